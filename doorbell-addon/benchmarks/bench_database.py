@@ -0,0 +1,128 @@
+"""Per-call latency of DatabaseManager methods: connect-per-call vs pooled.
+
+Builds a throwaway database with 100k doorbell events (plus a few persons and
+samples), then times the common read paths both the old way — a fresh
+``sqlite3.connect()`` for every call — and through the pooled connections.
+
+    python benchmarks/bench_database.py [--events 100000] [--iterations 2000]
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def _seed(db_path: str, events: int) -> None:
+    start = datetime.now() - timedelta(days=365)
+    step = timedelta(days=365) / events
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO doorbell_events (timestamp, image_path, ai_message, faces_detected) "
+            "VALUES (?, ?, ?, ?)",
+            (
+                ((start + step * i).isoformat(), f"/images/doorbell_{i}.jpg", "Someone", i % 3)
+                for i in range(events)
+            ),
+        )
+        for p in range(50):
+            cur = conn.execute(
+                "INSERT INTO known_persons (name, created_at) VALUES (?, ?)",
+                (f"Person {p}", start.isoformat()),
+            )
+            conn.executemany(
+                "INSERT INTO person_embeddings (person_id, embedding, created_at) VALUES (?, ?, ?)",
+                ((cur.lastrowid, b"\0" * 2048, start.isoformat()) for _ in range(5)),
+            )
+        conn.commit()
+
+
+def _legacy_calls(db_path: str) -> dict:
+    """Reproduce the pre-pool pattern: one connection per method call."""
+
+    def get_event_count():
+        with sqlite3.connect(db_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM doorbell_events").fetchone()[0]
+
+    def get_doorbell_events():
+        with sqlite3.connect(db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(
+                "SELECT * FROM doorbell_events ORDER BY timestamp DESC LIMIT 20"
+            ).fetchall()
+
+    def get_person():
+        with sqlite3.connect(db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(
+                "SELECT id, name, thumbnail_path, created_at FROM known_persons WHERE id = ?",
+                (7,),
+            ).fetchone()
+
+    def get_person_embeddings():
+        with sqlite3.connect(db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(
+                "SELECT id, person_id, thumbnail_path, created_at "
+                "FROM person_embeddings WHERE person_id = ? ORDER BY id ASC",
+                (7,),
+            ).fetchall()
+
+    return {
+        "get_event_count": get_event_count,
+        "get_doorbell_events(limit=20)": get_doorbell_events,
+        "get_person": get_person,
+        "get_person_embeddings": get_person_embeddings,
+    }
+
+
+def _pooled_calls(mgr) -> dict:
+    return {
+        "get_event_count": mgr.get_event_count,
+        "get_doorbell_events(limit=20)": lambda: mgr.get_doorbell_events(limit=20),
+        "get_person": lambda: mgr.get_person(7),
+        "get_person_embeddings": lambda: mgr.get_person_embeddings(7),
+    }
+
+
+def _time(fn, iterations: int) -> tuple:
+    fn()  # warm-up
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return statistics.median(samples), statistics.quantiles(samples, n=100)[98]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    storage = tempfile.mkdtemp(prefix="whorang-bench-")
+    os.environ["STORAGE_PATH"] = storage
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+    from src.database import DatabaseManager  # noqa: E402 — needs STORAGE_PATH set
+
+    mgr = DatabaseManager()
+    print(f"Seeding {args.events} events into {mgr.db_path} ...")
+    _seed(mgr.db_path, args.events)
+
+    legacy = _legacy_calls(mgr.db_path)
+    pooled = _pooled_calls(mgr)
+    print(f"\n{'method':32} {'per-call p50 / p99 (µs)':>28} {'pooled p50 / p99 (µs)':>26} {'speed-up':>9}")
+    for name in legacy:
+        l50, l99 = _time(legacy[name], args.iterations)
+        p50, p99 = _time(pooled[name], args.iterations)
+        print(f"{name:32} {l50:13.1f} / {l99:10.1f} {p50:13.1f} / {p99:10.1f} {l50 / p50:8.1f}x")
+    mgr.close()
+
+
+if __name__ == "__main__":
+    main()
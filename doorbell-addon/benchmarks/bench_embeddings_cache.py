@@ -0,0 +1,78 @@
+"""Enrollment latency: full embeddings-cache reload vs incremental delta.
+
+Before delta updates every sample add/delete, rename and crop assignment
+re-read all of person_embeddings and np.load-ed each blob. This times that
+full reload against the delta operations at several cache sizes.
+
+    python benchmarks/bench_embeddings_cache.py [--sizes 10 1000 50000]
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+import numpy as np
+
+_DIM = 512
+_SAMPLES_PER_PERSON = 5
+
+
+def _blob(vec) -> bytes:
+    buf = io.BytesIO()
+    np.save(buf, vec)
+    return buf.getvalue()
+
+
+def _time(fn, budget: float = 2.0) -> float:
+    fn()  # warm-up
+    samples = []
+    deadline = time.perf_counter() + budget
+    while len(samples) < 5 or (time.perf_counter() < deadline and len(samples) < 2000):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 50_000])
+    args = parser.parse_args()
+
+    os.environ.setdefault("STORAGE_PATH", tempfile.mkdtemp(prefix="whorang-bench-"))
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+    import src.face_recognition_service as frs_mod  # noqa: E402 — needs STORAGE_PATH set
+
+    rng = np.random.default_rng(0)
+    print(f"{'samples':>8} {'full reload (ms)':>17} {'add + remove (ms)':>18} {'rename (ms)':>12}")
+    for size in args.sizes:
+        vectors = rng.standard_normal((size, _DIM)).astype(np.float32)
+        # Rows as DatabaseManager.get_all_embeddings returns them (blobs, not arrays).
+        rows = [
+            {"id": i, "person_id": i // _SAMPLES_PER_PERSON,
+             "name": f"Person {i // _SAMPLES_PER_PERSON}", "embedding": _blob(vectors[i])}
+            for i in range(size)
+        ]
+        svc = frs_mod.FaceRecognitionService()
+        fake_db = type("FakeDB", (), {"get_all_embeddings": lambda self: rows})()
+        with patch.object(frs_mod, "db", fake_db), patch.object(frs_mod, "logger"):
+            full = _time(svc.refresh_embeddings_cache)
+
+        new_vec = rng.standard_normal(_DIM).astype(np.float32)
+
+        def add_then_remove():
+            svc.cache_add_sample(size, 0, "Person 0", new_vec)
+            svc.cache_remove_sample(size)
+
+        delta = _time(add_then_remove)
+        rename = _time(lambda: svc.cache_rename_person(0, "Renamed"))
+        print(f"{size:>8} {full:17.3f} {delta:18.4f} {rename:12.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Per-ring latency of FaceRecognitionService.identify_faces: per-sample loop vs matrix.
+
+Fills the embeddings cache with random 512-d samples (5 per person) at each
+size, then times matching a ring's faces the old way — a Python loop that
+re-normalises every stored sample for every face — and through the
+pre-normalised float32 matrix.
+
+    python benchmarks/bench_face_matching.py [--sizes 10 1000 50000] [--faces 2]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+_DIM = 512
+_SAMPLES_PER_PERSON = 5
+
+
+def _legacy_identify(cache: dict, embeddings: list, threshold: float) -> list:
+    """The pre-matrix loop over {emb_id: (person_id, name, emb)}."""
+    results = []
+    for emb in embeddings:
+        norm_emb = emb / (np.linalg.norm(emb) + 1e-10)
+        best_per_person = {}
+        for _emb_id, (person_id, person_name, known_emb) in cache.items():
+            norm_known = known_emb / (np.linalg.norm(known_emb) + 1e-10)
+            score = float(np.dot(norm_emb, norm_known))
+            if score >= threshold:
+                prev = best_per_person.get(person_id)
+                if prev is None or score > prev[1]:
+                    best_per_person[person_id] = (person_name, score)
+        if best_per_person:
+            best = max(best_per_person, key=lambda pid: best_per_person[pid][1])
+            results.append((best, best_per_person[best][0]))
+        else:
+            results.append((None, "Unknown"))
+    return results
+
+
+def _time(fn, budget: float = 2.0) -> tuple:
+    fn()  # warm-up
+    samples = []
+    deadline = time.perf_counter() + budget
+    while len(samples) < 5 or (time.perf_counter() < deadline and len(samples) < 2000):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples), max(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 50_000])
+    parser.add_argument("--faces", type=int, default=2, help="faces per ring")
+    args = parser.parse_args()
+
+    os.environ.setdefault("STORAGE_PATH", tempfile.mkdtemp(prefix="whorang-bench-"))
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+    from src.face_recognition_service import (  # noqa: E402 — needs STORAGE_PATH set
+        EmbeddingCache,
+        FaceRecognitionService,
+        FaceResult,
+    )
+    from src.config import settings  # noqa: E402
+
+    rng = np.random.default_rng(0)
+    print(f"{'samples':>8} {'loop p50 / max (ms)':>22} {'matrix p50 / max (ms)':>24} {'speed-up':>9}")
+    for size in args.sizes:
+        vectors = rng.standard_normal((size, _DIM)).astype(np.float32)
+        samples = [
+            (i, i // _SAMPLES_PER_PERSON, f"Person {i // _SAMPLES_PER_PERSON}", vectors[i])
+            for i in range(size)
+        ]
+        # Each ring's faces are noisy copies of stored samples, so both paths match.
+        picks = rng.integers(0, size, args.faces)
+        queries = [vectors[i] + 0.3 * rng.standard_normal(_DIM).astype(np.float32) for i in picks]
+        faces = [FaceResult(bbox=(0, 0, 1, 1), embedding=q, det_score=0.9) for q in queries]
+
+        legacy_cache = {s[0]: (s[1], s[2], s[3]) for s in samples}
+        svc = FaceRecognitionService()
+        svc._embeddings_cache = EmbeddingCache.build(samples)
+        threshold = settings.face_recognition_threshold
+
+        expected = [pid for pid, _ in _legacy_identify(legacy_cache, queries, threshold)]
+        assert [f.person_id for f in svc.identify_faces(faces)] == expected
+
+        l50, lmax = _time(lambda: _legacy_identify(legacy_cache, queries, threshold))
+        m50, mmax = _time(lambda: svc.identify_faces(faces))
+        print(f"{size:>8} {l50:11.3f} / {lmax:8.3f} {m50:13.3f} / {mmax:8.3f} {l50 / m50:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
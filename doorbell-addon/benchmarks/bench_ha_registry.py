@@ -0,0 +1,126 @@
+"""Settings-page discovery: a /states download per endpoint vs the shared registry.
+
+The settings page asks for cameras, weather entities and binary sensors at
+once. This serves a synthetic /states list of N entities from a local server
+and times those three lookups done the old way (three full downloads and
+linear scans) and through HARegistry (one download, indexed by domain), both
+cold and with a warm cache.
+
+    python benchmarks/bench_ha_registry.py [--entities 5000] [--rounds 20]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+_DOMAINS = ("sensor", "binary_sensor", "light", "switch", "camera", "weather", "automation")
+
+
+def _states(n: int) -> bytes:
+    return json.dumps([
+        {
+            "entity_id": f"{_DOMAINS[i % len(_DOMAINS)]}.entity_{i}",
+            "state": "on",
+            "attributes": {"friendly_name": f"Entity {i}", "icon": "mdi:eye", "extra": "x" * 200},
+            "last_changed": "2026-10-17T08:00:00+00:00",
+            "last_updated": "2026-10-17T08:00:00+00:00",
+            "context": {"id": "01J" + "0" * 23, "parent_id": None, "user_id": None},
+        }
+        for i in range(n)
+    ]).encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = 65536
+    disable_nagle_algorithm = True
+    body = b"[]"
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+async def _old_way(api) -> None:
+    async def scan(prefix):
+        response = await api._get("/states")
+        return [s for s in response.json() if s.get("entity_id", "").startswith(prefix)]
+    await asyncio.gather(scan("camera."), scan("weather."), scan("binary_sensor."))
+
+
+async def _registry_way(registry) -> None:
+    await asyncio.gather(
+        registry.states("camera"), registry.states("weather"), registry.states("binary_sensor")
+    )
+
+
+async def _measure(fn, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples)
+
+
+async def _main(entities: int, rounds: int) -> None:
+    os.environ.setdefault("STORAGE_PATH", tempfile.mkdtemp(prefix="whorang-bench-"))
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+    from src.ha_registry import HARegistry  # noqa: E402 — needs STORAGE_PATH set
+    from src.utils import HomeAssistantAPI  # noqa: E402
+
+    _Handler.body = _states(entities)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    api = HomeAssistantAPI()
+    api.base_url = f"http://127.0.0.1:{httpd.server_address[1]}/api"
+
+    with patch("src.ha_registry.HomeAssistantAPI", return_value=api):
+        await _old_way(api)  # warm-up
+        _Handler.requests = 0
+        old = await _measure(lambda: _old_way(api), rounds)
+        old_requests = _Handler.requests / rounds
+
+        registry = HARegistry(ttl=0)
+        _Handler.requests = 0
+        cold = await _measure(lambda: _registry_way(registry), rounds)
+        cold_requests = _Handler.requests / rounds
+
+        registry.ttl = 3600
+        warm = await _measure(lambda: _registry_way(registry), rounds)
+    httpd.shutdown()
+
+    size_mb = len(_Handler.body) / 1e6
+    print(f"{entities} entities ({size_mb:.1f} MB /states), median of {rounds} page loads")
+    print(f"{'fetch per endpoint':>20}: {old:8.2f} ms  ({old_requests:.0f} downloads)")
+    print(f"{'registry, cold':>20}: {cold:8.2f} ms  ({cold_requests:.0f} download)")
+    print(f"{'registry, cached':>20}: {warm:8.2f} ms  (0 downloads)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(_main(args.entities, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
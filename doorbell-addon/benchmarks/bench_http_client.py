@@ -0,0 +1,102 @@
+"""Ring HTTP overhead: a new httpx.AsyncClient per call vs the shared pool.
+
+A ring makes about a dozen supervisor calls (weather, llmvision, sensor
+updates, the ring event, notify services). This replays that many POSTs
+against a local keep-alive server, once with a throwaway client per call
+(the old _post/_get) and once through SharedHTTPClient. A real supervisor
+adds network RTT per extra handshake on top of what is measured here.
+
+    python benchmarks/bench_http_client.py [--calls 12] [--rounds 50]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # One segment per response, or delayed ACKs dominate on loopback
+    wbufsize = 65536
+    disable_nagle_algorithm = True
+    connections = 0
+
+    def setup(self):
+        type(self).connections += 1
+        super().setup()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+async def _ring_per_call(url: str, calls: int) -> None:
+    import httpx
+    for _ in range(calls):
+        async with httpx.AsyncClient() as client:
+            (await client.post(url, json={"state": 1}, timeout=10.0)).raise_for_status()
+
+
+async def _ring_shared(shared, url: str, calls: int) -> None:
+    for _ in range(calls):
+        (await shared.post(url, json={"state": 1}, timeout=10.0)).raise_for_status()
+
+
+async def _measure(fn, rounds: int) -> float:
+    await fn()  # warm-up
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples)
+
+
+async def _main(calls: int, rounds: int) -> None:
+    os.environ.setdefault("STORAGE_PATH", tempfile.mkdtemp(prefix="whorang-bench-"))
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+    from src.http_client import SharedHTTPClient  # noqa: E402 — needs STORAGE_PATH set
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{httpd.server_address[1]}/api/states/sensor.x"
+
+    _Handler.connections = 0
+    per_call = await _measure(lambda: _ring_per_call(url, calls), rounds)
+    per_call_conns = _Handler.connections
+
+    shared = SharedHTTPClient()
+    _Handler.connections = 0
+    pooled = await _measure(lambda: _ring_shared(shared, url, calls), rounds)
+    pooled_conns = _Handler.connections
+    await shared.close()
+    httpd.shutdown()
+
+    print(f"{calls} calls per ring, median of {rounds} rings")
+    print(f"{'client per call':>16}: {per_call:8.2f} ms/ring  ({per_call_conns} TCP connections)")
+    print(f"{'shared pool':>16}: {pooled:8.2f} ms/ring  ({pooled_conns} TCP connections)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=12)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(_main(args.calls, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
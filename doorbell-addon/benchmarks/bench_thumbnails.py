@@ -0,0 +1,76 @@
+"""Gallery card images: full snapshots vs cached thumbnails.
+
+Encodes a synthetic camera frame (noise over a gradient, so it compresses
+like a real scene) and compares what a card costs: bytes sent for the full
+JPEG vs the 320 px variant, and the time to make that variant with a full
+decode + resize vs Pillow's draft-mode decode used by src.thumbnails.
+
+    python benchmarks/bench_thumbnails.py [--width 1920] [--height 1080] [--rounds 20]
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+def _frame(width: int, height: int) -> bytes:
+    from PIL import Image
+    gradient = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    noise = Image.effect_noise((width, height), 40).convert("RGB")
+    buf = io.BytesIO()
+    Image.blend(gradient, noise, 0.5).save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+
+def _full_decode(data: bytes, width: int, fmt: str) -> bytes:
+    from PIL import Image, ImageOps
+    img = ImageOps.exif_transpose(Image.open(io.BytesIO(data))).convert("RGB")
+    img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, fmt, quality=80)
+    return buf.getvalue()
+
+
+def _measure(fn, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("STORAGE_PATH", tempfile.mkdtemp(prefix="whorang-bench-"))
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+    from src.thumbnails import WIDTHS, render  # noqa: E402 — needs STORAGE_PATH set
+
+    data = _frame(args.width, args.height)
+    card = WIDTHS[1]
+    full_ms = _measure(lambda: _full_decode(data, card, "JPEG"), args.rounds)
+    draft_ms = _measure(lambda: render(data, [card], "jpeg"), args.rounds)
+    all_ms = _measure(lambda: render(data, WIDTHS, "webp"), args.rounds)
+    jpeg = render(data, [card], "jpeg")[card]
+    webp = render(data, [card], "webp")[card]
+
+    print(f"{args.width}x{args.height} snapshot, {len(data) / 1e3:.0f} KB; median of {args.rounds}")
+    print(f"{'100 cards, full':>28}: {len(data) * 100 / 1e6:8.2f} MB")
+    print(f"{f'100 cards, {card} px JPEG':>28}: {len(jpeg) * 100 / 1e6:8.2f} MB")
+    print(f"{f'100 cards, {card} px WebP':>28}: {len(webp) * 100 / 1e6:8.2f} MB")
+    print(f"{f'{card} px, full decode':>28}: {full_ms:8.2f} ms")
+    print(f"{f'{card} px, draft decode':>28}: {draft_ms:8.2f} ms")
+    print(f"{'ring-time, all widths WebP':>28}: {all_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,25 @@ if bashio::config.exists 'camera_entity' && ! bashio::config.is_empty 'camera_en
     export CAMERA_ENTITY=$(bashio::config 'camera_entity')
 fi
 
+if bashio::config.exists 'camera_rtsp_persistent'; then
+    export CAMERA_RTSP_PERSISTENT=$(bashio::config 'camera_rtsp_persistent')
+fi
+if bashio::config.exists 'clip_enabled'; then
+    export CLIP_ENABLED=$(bashio::config 'clip_enabled')
+fi
+if bashio::config.exists 'clip_pre_roll_secs'; then
+    export CLIP_PRE_ROLL_SECS=$(bashio::config 'clip_pre_roll_secs')
+fi
+if bashio::config.exists 'clip_post_roll_secs'; then
+    export CLIP_POST_ROLL_SECS=$(bashio::config 'clip_post_roll_secs')
+fi
+if bashio::config.exists 'clip_buffer_mb'; then
+    export CLIP_BUFFER_MB=$(bashio::config 'clip_buffer_mb')
+fi
+if bashio::config.exists 'weather_max_age_secs'; then
+    export WEATHER_MAX_AGE_SECS=$(bashio::config 'weather_max_age_secs')
+fi
+
 # Handle optional ha_access_token
 if bashio::config.exists 'ha_access_token' && ! bashio::config.is_empty 'ha_access_token'; then
     export HA_ACCESS_TOKEN=$(bashio::config 'ha_access_token')
@@ -37,6 +56,9 @@ fi
 if bashio::config.exists 'face_recognition_model' && ! bashio::config.is_empty 'face_recognition_model'; then
     export FACE_RECOGNITION_MODEL=$(bashio::config 'face_recognition_model')
 fi
+if bashio::config.exists 'face_recognition_workers'; then
+    export FACE_RECOGNITION_WORKERS=$(bashio::config 'face_recognition_workers')
+fi
 export INSIGHTFACE_HOME="${STORAGE_PATH}/insightface_models"
 mkdir -p "${STORAGE_PATH}/persons"
 mkdir -p "${STORAGE_PATH}/insightface_models"
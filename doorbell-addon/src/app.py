@@ -5,34 +5,53 @@ import json
 import os
 import socket
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any, List, Optional
 
 import requests
 import structlog
 import uvicorn
-from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi import FastAPI, File, Form, HTTPException, Query, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from .clips import clip_path_for, clip_recorder
 from .config import settings
-from .database import db
+from .database import EventFilter, db, db_executor, remove_event_files
+from .event_bus import event_bus
 from .face_recognition_service import face_recognition_service
 from .ha_camera import ha_camera_manager
 from .ha_integration import ha_integration
-from .ring_pipeline import run_ring_pipeline
+from .ha_registry import ha_registry
+from .ha_websocket import ha_websocket
+from .http_client import http_client
+from .retention import retention_purger
+from .ring_queue import job_summary, ring_queue
+from .rtsp_grabber import rtsp_grabber
+from .thumbnails import WIDTHS, media_type, negotiate_format, thumbnail_cache
 from .utils import (
+    REVALIDATE_CACHE_CONTROL,
     HomeAssistantAPI,
+    cached_file_response,
     classify_notify_service,
     create_placeholder_image,
     ensure_directories,
+    file_range_response,
+    file_version,
     get_storage_usage,
+    is_not_modified,
     notification_manager,
     sanitize_filename,
 )
+from .weather_cache import weather_cache
 
 logger = structlog.get_logger()
 
@@ -85,6 +104,15 @@ class IngressAuthMiddleware(BaseHTTPMiddleware):
 
 
 _RING_DEBOUNCE_SECS = 10
+_RING_WAIT_SECS = 60  # longest a wait=true ring request is held open
+_SSE_HEARTBEAT_SECS = 15
+_MAX_FACE_WORKERS = 4
+# (setting, min, max) for the ring clip options
+_CLIP_LIMITS = (
+    ("clip_pre_roll_secs", 0, 30),
+    ("clip_post_roll_secs", 0, 30),
+    ("clip_buffer_mb", 4, 512),
+)
 _last_ring_time: float = 0.0
 
 app = FastAPI(
@@ -108,12 +136,19 @@ app.add_middleware(
 app.mount("/static", StaticFiles(directory="/app/web/static"), name="static")
 templates = Jinja2Templates(directory="/app/web/templates")
 templates.env.filters["fromjson"] = lambda s: json.loads(s) if s else []
+templates.env.filters["file_version"] = file_version
 
 
 async def _sensor_refresh_loop():
-    """Periodically re-push all HA sensor states so they survive HA restarts."""
+    """Periodically re-push all HA sensor states so they survive HA restarts.
+
+    Only while the WebSocket is down: when it is up, an HA restart drops the
+    connection and the reconnect re-pushes the sensors instead.
+    """
     while True:
         await asyncio.sleep(300)  # every 5 minutes
+        if ha_websocket.connected:
+            continue
         try:
             await ha_integration.update_sensors()
         except Exception as e:
@@ -125,8 +160,15 @@ async def startup_event():
     """Initialize the application on startup."""
     logger.info("Starting WhoRang doorbell addon", version=settings.app_version)
     ensure_directories()
+    await http_client.start()
     await ha_integration.initialize()
+    await ring_queue.start()
+    ha_websocket.add_on_connect(ha_integration.update_sensors)
+    ha_websocket.start()
+    weather_cache.start()
     asyncio.create_task(_sensor_refresh_loop())
+    asyncio.create_task(retention_purger.run_forever())
+    await asyncio.to_thread(ha_camera_manager.sync_rtsp_grabber)
     if settings.face_recognition_enabled:
         asyncio.create_task(face_recognition_service.initialize())
     logger.info("WhoRang addon ready - waiting for doorbell ring events")
@@ -136,7 +178,14 @@ async def startup_event():
 async def shutdown_event():
     """Clean up on shutdown."""
     logger.info("Shutting down WhoRang doorbell addon")
-    db.cleanup_old_events()
+    await ring_queue.stop()
+    await face_recognition_service.shutdown()
+    await weather_cache.stop()
+    await ha_websocket.stop()
+    await asyncio.to_thread(rtsp_grabber.stop)
+    await http_client.close()
+    await asyncio.to_thread(db_executor.shutdown)
+    db.close()
 
 
 # ── Web pages ────────────────────────────────────────────────────────────────
@@ -145,8 +194,10 @@ async def shutdown_event():
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request):
     """Main dashboard page."""
-    recent_events = db.get_doorbell_events(limit=10)
-    storage_info = get_storage_usage()
+    recent_events, storage_info = await asyncio.gather(
+        db_executor.read(db.get_doorbell_events, limit=10),
+        asyncio.to_thread(get_storage_usage),
+    )
 
     return templates.TemplateResponse(
         "dashboard.html",
@@ -159,16 +210,34 @@ async def dashboard(request: Request):
     )
 
 
+_GALLERY_DEFAULT_DAYS = 30
+
+
 @app.get("/gallery", response_class=HTMLResponse)
 async def gallery(request: Request):
-    """Image gallery page."""
-    events = db.get_doorbell_events(limit=100)
+    """Image gallery page — first page of the last 30 days, filtered in SQL."""
+    date_to = datetime.now().date()
+    date_from = date_to - timedelta(days=_GALLERY_DEFAULT_DAYS)
+    filters = EventFilter(
+        start=datetime.combine(date_from, datetime.min.time()),
+        end=datetime.combine(date_to + timedelta(days=1), datetime.min.time()),
+    )
+    events, next_cursor = await db_executor.read(
+        db.get_doorbell_events_page, limit=100, filters=filters
+    )
+    persons = (
+        await db_executor.read(db.get_persons) if settings.face_recognition_enabled else []
+    )
 
     return templates.TemplateResponse(
         "gallery.html",
         {
             "request": request,
             "events": events,
+            "next_cursor": next_cursor,
+            "date_from": date_from.isoformat(),
+            "date_to": date_to.isoformat(),
+            "persons": persons,
             "settings": settings,
         },
     )
@@ -177,7 +246,7 @@ async def gallery(request: Request):
 @app.get("/persons", response_class=HTMLResponse)
 async def persons_page(request: Request):
     """Known persons page."""
-    persons = db.get_persons()
+    persons = await db_executor.read(db.get_persons)
     return templates.TemplateResponse(
         "persons.html",
         {"request": request, "persons": persons, "settings": settings},
@@ -187,7 +256,7 @@ async def persons_page(request: Request):
 @app.get("/settings", response_class=HTMLResponse)
 async def settings_page(request: Request):
     """Settings page."""
-    storage_info = get_storage_usage()
+    storage_info = await asyncio.to_thread(get_storage_usage)
 
     return templates.TemplateResponse(
         "settings.html",
@@ -236,15 +305,39 @@ async def api_documentation():
         <span class="method get">GET</span><code>/api/stats</code>
         <div class="description">System statistics</div>
     </div>
+    <div class="endpoint">
+        <span class="method get">GET</span><code>/api/stats/heatmap?days=90</code>
+        <div class="description">Rings by weekday and hour of day (7 x 24, Monday first)</div>
+    </div>
+    <div class="endpoint">
+        <span class="method get">GET</span><code>/api/stats/timeseries?period=day&amp;from=2026-01-01&amp;to=2026-01-31</code>
+        <div class="description">Rings and known/unknown faces per hour or day; day points include weather</div>
+    </div>
 
     <h2>Events</h2>
     <div class="endpoint">
-        <span class="method get">GET</span><code>/api/events?limit=50&amp;offset=0</code>
-        <div class="description">Get doorbell events with pagination</div>
+        <span class="method get">GET</span><code>/api/events?limit=50&amp;before={next_cursor}</code>
+        <div class="description">Get doorbell events, newest first. Pass the previous response's next_cursor as before to page.
+            Filters: from, to (YYYY-MM-DD or ISO datetime), person_id, min_faces, unknown_only</div>
+    </div>
+    <div class="endpoint">
+        <span class="method get">GET</span><code>/api/events/search?q=delivery+driver&amp;limit=20&amp;offset=0</code>
+        <div class="description">Full-text search over AI descriptions and comments, best match first;
+            each event has a highlighted snippet. Pass next_offset as offset to page</div>
+    </div>
+    <div class="endpoint">
+        <span class="method get">GET</span><code>/api/events/stream</code>
+        <div class="description">Server-sent events: hello, ring, event, event_updated, events_deleted,
+            inbox, stats, resync</div>
     </div>
     <div class="endpoint">
         <span class="method post">POST</span><code>/api/doorbell/ring</code>
-        <div class="description">Trigger doorbell ring — captures image, records event. Form: ai_message (optional)</div>
+        <div class="description">Queue a doorbell ring — captures image, records event; returns job_id.
+            Form: ai_message, image_path, wait (all optional)</div>
+    </div>
+    <div class="endpoint">
+        <span class="method get">GET</span><code>/api/ring/jobs</code>
+        <div class="description">Ring queue depth, wait times, per-stage timings and recent jobs</div>
     </div>
     <div class="endpoint">
         <span class="method post">POST</span><code>/api/events/{event_id}/comment</code>
@@ -280,6 +373,14 @@ async def api_documentation():
         <span class="method get">GET</span><code>/api/images/{image_name}</code>
         <div class="description">Serve event image files</div>
     </div>
+    <div class="endpoint">
+        <span class="method get">GET</span><code>/api/images/{image_name}/thumb?w=320</code>
+        <div class="description">Downscaled event image (widths 128, 320, 640; WebP if accepted, else JPEG)</div>
+    </div>
+    <div class="endpoint">
+        <span class="method get">GET</span><code>/api/clips/{clip_name}</code>
+        <div class="description">Serve ring clips (supports Range requests)</div>
+    </div>
 </div>
 </body>
 </html>"""
@@ -309,45 +410,210 @@ async def options_handler(request: Request, full_path: str):
 async def get_statistics():
     """Get system statistics."""
     try:
-        total_events, storage_info = await asyncio.gather(
-            asyncio.to_thread(db.get_event_count),
+        totals, storage_info = await asyncio.gather(
+            db_executor.read(db.get_ring_totals),
             asyncio.to_thread(get_storage_usage),
         )
         return {
-            "total_events": total_events,
+            "total_events": totals["rings"],
+            "known_faces": totals["known_faces"],
+            "unknown_faces": totals["unknown_faces"],
             "storage_usage": storage_info,
+            "database": db_executor.get_status(),
+            "http_client": http_client.get_status(),
+            "ha_websocket": ha_websocket.get_status(),
+            "ha_registry": ha_registry.get_status(),
+            "weather_cache": weather_cache.get_status(),
+            "event_bus": event_bus.get_status(),
+            "thumbnails": thumbnail_cache.get_status(),
         }
     except Exception as e:
         logger.error("Error getting statistics", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
 
+_HEATMAP_WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+@app.get("/api/stats/heatmap")
+async def get_ring_heatmap(days: int = Query(90, ge=1, le=3650)):
+    """Rings over the last `days` days by weekday and hour of day (7 x 24)."""
+    end = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    start = end - timedelta(days=days)
+    rings = await db_executor.read(db.get_ring_heatmap, start, end)
+    return {"days": days, "weekdays": _HEATMAP_WEEKDAYS, "hours": list(range(24)), "rings": rings}
+
+
+@app.get("/api/stats/timeseries")
+async def get_ring_timeseries(
+    period: str = Query("day", pattern="^(hour|day)$"),
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+):
+    """Rings and known/unknown faces per hour or day, oldest first.
+
+    Defaults to the last 30 days (period=day) or 48 hours (period=hour);
+    ``from``/``to`` take a date or datetime. Day points include rings per
+    weather condition. Buckets without rings are omitted.
+    """
+    try:
+        start = _parse_date_bound(date_from)
+        end = _parse_date_bound(date_to, end=True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if end is None:
+        end = datetime.now() + (timedelta(hours=1) if period == "hour" else timedelta(days=1))
+    if start is None:
+        start = end - (timedelta(hours=48) if period == "hour" else timedelta(days=30))
+    series = await db_executor.read(db.get_ring_timeseries, period, start, end)
+    return {"period": period, "from": start.isoformat(), "to": end.isoformat(), "series": series}
+
+
 # ── Events ────────────────────────────────────────────────────────────────────
 
 
-@app.get("/api/events")
-async def get_events(limit: int = 50, offset: int = 0):
-    """Get doorbell events with pagination."""
+def _parse_date_bound(value: Optional[str], end: bool = False) -> Optional[datetime]:
+    """Parse a from/to query value (date or datetime, ISO 8601).
+
+    A date-only ``to`` covers that whole day, so it becomes the next midnight.
+    Raises ValueError on malformed input.
+    """
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def _clip_url(image_path: str) -> Optional[str]:
+    """Relative URL of the event's ring clip, or None if none was recorded."""
+    clip_path = clip_path_for(image_path)
+    if not os.path.isfile(clip_path):
+        return None
+    return f"api/clips/{os.path.basename(clip_path)}"
+
+
+def _event_json(e) -> dict:
+    return {
+        "id": e.id,
+        "timestamp": e.timestamp.isoformat(),
+        "image_path": e.image_path,
+        "ai_message": e.ai_message,
+        "weather_condition": e.weather_condition,
+        "weather_temperature": e.weather_temperature,
+        "weather_humidity": e.weather_humidity,
+        "weather_age_secs": e.weather_age_secs,
+        "faces_detected": e.faces_detected,
+        "face_data": json.loads(e.face_data) if e.face_data else [],
+        "clip_url": _clip_url(e.image_path),
+    }
+
+
+def _sse(message: dict) -> str:
+    return f"id: {message['id']}\nevent: {message['type']}\ndata: {json.dumps(message['data'])}\n\n"
+
+
+@app.get("/api/events/stream")
+async def stream_events(request: Request):
+    """Live updates for the web UI as server-sent events.
+
+    Starts with a hello carrying the current totals; a client reconnecting
+    after a drop (Last-Event-ID set) is told to resync, since messages sent
+    while it was away are not replayed.
+    """
+    reconnect = request.headers.get("last-event-id") is not None
+
+    async def _stream():
+        # Subscribed before reading the totals, so no change falls between them.
+        queue = event_bus.subscribe()
+        try:
+            total_events, inbox = await asyncio.gather(
+                db_executor.read(db.get_event_count),
+                db_executor.read(db.get_face_crop_count),
+            )
+            yield _sse({"id": 0, "type": "hello",
+                        "data": {"total_events": total_events, "inbox": inbox}})
+            if reconnect:
+                yield _sse({"id": 0, "type": "resync", "data": {}})
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), _SSE_HEARTBEAT_SECS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"  # keeps proxies from closing an idle stream
+                    continue
+                yield _sse(message)
+        finally:
+            event_bus.unsubscribe(queue)
+
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/events/search")
+async def search_events(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """Full-text search over AI descriptions and comments, best match first.
+
+    Each event carries ``snippet``: HTML-escaped text around the matches,
+    which are wrapped in <mark>. Page with ``offset=<next_offset>``.
+    """
     try:
-        events = db.get_doorbell_events(limit=limit, offset=offset)
+        results, next_offset = await db_executor.read(
+            db.search_events, q, limit=limit, offset=offset
+        )
+    except Exception as e:
+        logger.error("Error searching events", query=q, error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "events": [{**_event_json(e), "snippet": snippet} for e, snippet in results],
+        "next_offset": next_offset,
+    }
 
-        events_data = [
-            {
-                "id": e.id,
-                "timestamp": e.timestamp.isoformat(),
-                "image_path": e.image_path,
-                "ai_message": e.ai_message,
-                "weather_condition": e.weather_condition,
-                "weather_temperature": e.weather_temperature,
-                "weather_humidity": e.weather_humidity,
-                "faces_detected": e.faces_detected,
-                "face_data": json.loads(e.face_data) if e.face_data else [],
-            }
-            for e in events
-        ]
 
-        return {"events": events_data}
+@app.get("/api/events")
+async def get_events(
+    limit: int = 50,
+    offset: int = 0,
+    before: Optional[str] = None,
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    person_id: Optional[int] = None,
+    min_faces: Optional[int] = None,
+    unknown_only: bool = False,
+):
+    """Get doorbell events, newest first.
 
+    Page with ``before=<next_cursor>`` from the previous response (constant cost
+    at any depth); ``offset`` is kept for older clients. ``from``/``to``,
+    ``person_id``, ``min_faces`` and ``unknown_only`` filter in SQL.
+    """
+    try:
+        filters = EventFilter(
+            start=_parse_date_bound(date_from),
+            end=_parse_date_bound(date_to, end=True),
+            person_id=person_id,
+            min_faces=min_faces,
+            unknown_only=unknown_only,
+        )
+        events, next_cursor = await db_executor.read(
+            db.get_doorbell_events_page,
+            limit=limit,
+            offset=offset,
+            before=before,
+            filters=filters,
+        )
+
+        return {"events": [_event_json(e) for e in events], "next_cursor": next_cursor}
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error("Error getting events", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
@@ -357,8 +623,15 @@ async def get_events(limit: int = 50, offset: int = 0):
 async def doorbell_ring(
     ai_message: Optional[str] = Form(None),
     image_path: Optional[str] = Form(None),
+    wait: bool = Form(False),
 ):
-    """Handle a doorbell ring event — capture image, run pipeline, return result."""
+    """Handle a doorbell ring event — queue it and return the job id.
+
+    The ring is persisted before this returns, so it completes even if the
+    add-on restarts. With wait=true the request is held until the ring is
+    processed (at most _RING_WAIT_SECS) and returns the event as before; a
+    ring still unfinished after that answers 202 with the job id.
+    """
     global _last_ring_time
     now = time.monotonic()
     if now - _last_ring_time < _RING_DEBOUNCE_SECS:
@@ -368,31 +641,77 @@ async def doorbell_ring(
     _last_ring_time = now
     logger.info("Doorbell ring event received", ai_message=ai_message)
     try:
-        result = await run_ring_pipeline(image_path=image_path, ai_message=ai_message)
-        return {
-            "success": True,
-            "message": "Doorbell ring processed",
-            "timestamp": datetime.now().isoformat(),
-            "event_id": result["event_id"],
-            "ai_message": result["ai_message"],
-            "ai_title": result["ai_title"],
-        }
-    except HTTPException:
-        raise
+        job_id = await ring_queue.enqueue(image_path=image_path, ai_message=ai_message)
     except Exception as e:
-        logger.error("Error processing doorbell ring", error=str(e))
+        logger.error("Error queueing doorbell ring", error=str(e))
         raise HTTPException(status_code=500, detail=f"Doorbell processing failed: {str(e)}")
+    response = {
+        "success": True,
+        "message": "Doorbell ring queued",
+        "timestamp": datetime.now().isoformat(),
+        "job_id": job_id,
+    }
+    if not wait:
+        return response
+    try:
+        job = await ring_queue.wait(job_id, _RING_WAIT_SECS)
+    except asyncio.TimeoutError:
+        job = {"status": "running"}
+    return _ring_wait_response(response, job)
+
+
+def _ring_wait_response(response: dict, job: Optional[dict]) -> Any:
+    """The wait=true answer for a ring job as the wait left it."""
+    if job is None:
+        raise HTTPException(status_code=500, detail="Doorbell ring job not found")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=f"Doorbell processing failed: {job['error']}")
+    if job["status"] != "done":
+        # Still queued or running, e.g. resumed after a bookkeeping failure.
+        return JSONResponse(
+            {**response, "message": "Doorbell ring still processing"}, status_code=202
+        )
+    analysis = (job.get("checkpoint") or {}).get("analyze")
+    if not analysis:
+        raise HTTPException(
+            status_code=504, detail="Doorbell ring finished without an analysis result"
+        )
+    return {
+        **response,
+        "message": "Doorbell ring processed",
+        "event_id": job["event_id"],
+        "ai_message": analysis.get("ai_message"),
+        "ai_title": analysis.get("ai_title"),
+    }
+
+
+@app.get("/api/ring/jobs")
+async def get_ring_jobs(limit: int = Query(20, ge=1, le=200)):
+    """Ring queue depth, wait times, average per-stage timings and recent jobs."""
+    status, jobs = await asyncio.gather(
+        ring_queue.get_status(), db_executor.read(db.get_ring_jobs, limit)
+    )
+    return {**status, "jobs": [job_summary(j) for j in jobs]}
+
+
+@app.get("/api/ring/jobs/{job_id}")
+async def get_ring_job(job_id: int):
+    """State, completed stages and stage timings of one ring job."""
+    job = await db_executor.read(db.get_ring_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ring job not found")
+    return job_summary(job)
 
 
 @app.post("/api/events/{event_id}/comment")
 async def update_event_comment(event_id: int, comment: Optional[str] = Form(None)):
     """Add or update a comment on a doorbell event."""
     try:
-        event = db.get_doorbell_event(event_id)
+        event = await db_executor.read(db.get_doorbell_event, event_id)
         if not event:
             raise HTTPException(status_code=404, detail="Event not found")
 
-        db.update_event_comment(event_id, comment)
+        await db_executor.write(db.update_event_comment, event_id, comment)
         return {"message": "Comment updated", "event_id": event_id, "comment": comment}
 
     except HTTPException:
@@ -411,7 +730,8 @@ async def delete_events(event_ids: str = Form(...)):
         if not ids:
             raise HTTPException(status_code=400, detail="No event IDs provided")
 
-        deleted_count = db.delete_events(ids)
+        deleted_count, paths = await db_executor.write(db.delete_events, ids)
+        await asyncio.to_thread(remove_event_files, paths)
 
         return {
             "message": f"Successfully deleted {deleted_count} event(s)",
@@ -429,18 +749,22 @@ async def delete_events(event_ids: str = Form(...)):
 
 
 @app.get("/api/images/{image_name}")
-async def get_image(image_name: str):
-    """Serve image files."""
+async def get_image(image_name: str, request: Request):
+    """Serve image files.
+
+    Snapshot names are unique per ring and never rewritten, so they are
+    cacheable forever; a placeholder for a missing one is not.
+    """
     try:
         image_name = sanitize_filename(image_name)
         image_path = os.path.join(settings.images_path, image_name)
 
         if os.path.isfile(image_path):
-            return FileResponse(image_path)
+            return cached_file_response(request.headers, image_path, immutable=True)
 
         placeholder_path = create_placeholder_image(image_name)
         if placeholder_path:
-            return FileResponse(placeholder_path)
+            return cached_file_response(request.headers, placeholder_path, immutable=False)
 
         raise HTTPException(status_code=404, detail="Image not found")
 
@@ -451,6 +775,52 @@ async def get_image(image_name: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/images/{image_name}/thumb")
+async def get_image_thumbnail(
+    image_name: str, request: Request, w: int = Query(WIDTHS[1], ge=1, le=4096)
+):
+    """Serve a downscaled copy of an event image.
+
+    w is snapped up to the nearest cached width. WebP goes to clients that
+    accept it, JPEG to the rest.
+    """
+    image_name = sanitize_filename(image_name)
+    image_path = os.path.join(settings.images_path, image_name)
+    if not os.path.isfile(image_path):
+        placeholder_path = create_placeholder_image(image_name)
+        if placeholder_path:
+            return cached_file_response(request.headers, placeholder_path, immutable=False)
+        raise HTTPException(status_code=404, detail="Image not found")
+    fmt = negotiate_format(request.headers.get("accept"))
+    try:
+        thumb_path = await thumbnail_cache.get(image_path, w, fmt)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Image not found")
+    except Exception as e:
+        logger.error("Error creating thumbnail", image_name=image_name, error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+    return cached_file_response(
+        request.headers, thumb_path, immutable=True,
+        media_type=media_type(fmt), headers={"Vary": "Accept"},
+    )
+
+
+@app.get("/api/clips/{clip_name}")
+async def get_clip(clip_name: str, request: Request):
+    """Serve a ring clip; honours Range requests so players can seek."""
+    clip_name = sanitize_filename(clip_name)
+    clip_path = os.path.join(settings.images_path, clip_name)
+    if not clip_name.endswith(".mp4") or not os.path.isfile(clip_path):
+        raise HTTPException(status_code=404, detail="Clip not found")
+    return file_range_response(clip_path, request.headers.get("range"), "video/mp4")
+
+
+@app.get("/api/clips")
+async def get_clip_status():
+    """Clip recorder settings and counters, plus the grabber's frame history."""
+    return {**clip_recorder.get_status(), "buffer": rtsp_grabber.get_status()["history"]}
+
+
 # ── Settings ──────────────────────────────────────────────────────────────────
 
 
@@ -460,10 +830,16 @@ async def get_settings():
     return {
         "camera_url": settings.camera_url,
         "camera_entity": settings.camera_entity,
+        "camera_rtsp_persistent": settings.camera_rtsp_persistent,
+        "clip_enabled": settings.clip_enabled,
+        "clip_pre_roll_secs": settings.clip_pre_roll_secs,
+        "clip_post_roll_secs": settings.clip_post_roll_secs,
+        "clip_buffer_mb": settings.clip_buffer_mb,
         "storage_path": settings.storage_path,
         "retention_days": settings.retention_days,
         "notification_webhook": settings.notification_webhook,
         "weather_entity": settings.weather_entity,
+        "weather_max_age_secs": settings.weather_max_age_secs,
         "ha_access_token": settings.ha_access_token,
         "app_version": settings.app_version,
         "llmvision_enabled": settings.llmvision_enabled,
@@ -491,10 +867,25 @@ async def update_settings(request: Request):
             settings.camera_url = data["camera_url"]
         if "camera_entity" in data:
             settings.camera_entity = data["camera_entity"]
+        if "camera_rtsp_persistent" in data:
+            settings.camera_rtsp_persistent = bool(data["camera_rtsp_persistent"])
+        if "clip_enabled" in data:
+            settings.clip_enabled = bool(data["clip_enabled"])
+        for field, low, high in _CLIP_LIMITS:
+            if field in data:
+                value = int(data[field])
+                if not low <= value <= high:
+                    raise ValueError(f"{field} must be between {low} and {high}")
+                setattr(settings, field, value)
         if "ha_access_token" in data:
             settings.ha_access_token = data["ha_access_token"]
         if "weather_entity" in data:
             settings.weather_entity = data["weather_entity"]
+        if "weather_max_age_secs" in data:
+            max_age = int(data["weather_max_age_secs"])
+            if not 30 <= max_age <= 3600:
+                raise ValueError("weather_max_age_secs must be between 30 and 3600")
+            settings.weather_max_age_secs = max_age
         if "notification_webhook" in data:
             settings.notification_webhook = data["notification_webhook"]
         if "retention_days" in data:
@@ -527,6 +918,8 @@ async def update_settings(request: Request):
             settings.trigger_entity = data["trigger_entity"] or None
 
         settings.save_to_file()
+        await asyncio.to_thread(ha_camera_manager.sync_rtsp_grabber)
+        await ha_websocket.refresh_subscriptions()
 
         return {"success": True, "message": "Settings updated successfully"}
 
@@ -571,11 +964,17 @@ async def test_camera_connection(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/camera/grabber")
+async def get_rtsp_grabber_status():
+    """Health of the persistent RTSP grabber: connection, frame age, decode rate."""
+    return {"enabled": settings.camera_rtsp_persistent, **rtsp_grabber.get_status()}
+
+
 @app.get("/api/cameras")
 async def get_available_cameras():
     """Get available Home Assistant camera entities."""
     try:
-        cameras = await asyncio.to_thread(ha_camera_manager.get_available_cameras)
+        cameras = await ha_camera_manager.get_available_cameras()
         return {"cameras": cameras}
     except Exception as e:
         logger.error("Error getting camera entities", error=str(e))
@@ -589,9 +988,8 @@ async def get_available_cameras():
 async def get_available_weather_entities():
     """Get available Home Assistant weather entities."""
     try:
-        ha_api = HomeAssistantAPI()
-        response = await ha_api._get("/states")
-        if not response:
+        states = await ha_registry.states("weather")
+        if not states:
             return {"entities": []}
 
         weather_entities = [
@@ -602,8 +1000,7 @@ async def get_available_weather_entities():
                 ),
                 "state": state.get("state"),
             }
-            for state in response.json()
-            if state.get("entity_id", "").startswith("weather.")
+            for state in states
         ]
         return {"entities": weather_entities}
 
@@ -635,12 +1032,9 @@ async def get_llmvision_providers():
 async def get_llmvision_schema():
     """Return the raw llmvision service schema from HA — useful for diagnosing field name issues."""
     try:
-        ha_api = HomeAssistantAPI()
-        response = await ha_api._get("/services")
-        if not response:
+        llmvision_svcs = await ha_registry.services("llmvision")
+        if llmvision_svcs is None:
             return {"error": "Could not reach HA services API"}
-        domains = {d["domain"]: d["services"] for d in response.json()}
-        llmvision_svcs = domains.get("llmvision")
         if not llmvision_svcs:
             return {"error": "llmvision domain not found — is the integration installed?"}
         return {"services": llmvision_svcs}
@@ -652,12 +1046,9 @@ async def get_llmvision_schema():
 async def get_notify_services():
     """Fetch and classify notify.* services from HA. Returns empty list on failure."""
     try:
-        ha_api = HomeAssistantAPI()
-        response = await ha_api._get("/services")
-        if not response:
+        notify_svcs = await ha_registry.services("notify")
+        if not notify_svcs:
             return {"services": []}
-        domains = {d["domain"]: d["services"] for d in response.json()}
-        notify_svcs = domains.get("notify", {})
         result = [
             {
                 "name": f"notify.{name}",
@@ -676,17 +1067,15 @@ async def get_notify_services():
 async def get_binary_sensors():
     """Fetch binary_sensor.* entities from HA. Returns empty list on failure."""
     try:
-        ha_api = HomeAssistantAPI()
-        response = await ha_api._get("/states")
-        if not response:
+        states = await ha_registry.states("binary_sensor")
+        if not states:
             return {"entities": []}
         entities = [
             {
                 "entity_id": s["entity_id"],
                 "friendly_name": s.get("attributes", {}).get("friendly_name", s["entity_id"]),
             }
-            for s in response.json()
-            if s.get("entity_id", "").startswith("binary_sensor.")
+            for s in states
         ]
         return {"entities": entities}
     except Exception as e:
@@ -725,8 +1114,8 @@ async def test_notifications():
 async def cleanup_storage():
     """Manually trigger cleanup of old data based on retention policy."""
     try:
-        events_before = db.get_event_count()
-        cleaned_count = db.cleanup_old_events()
+        events_before = await db_executor.read(db.get_event_count)
+        cleaned_count = await retention_purger.run_once()
 
         return {
             "success": True,
@@ -744,7 +1133,7 @@ async def cleanup_storage():
 async def get_storage_info_api():
     """Get current storage usage information."""
     try:
-        storage_info = get_storage_usage()
+        storage_info = await asyncio.to_thread(get_storage_usage)
 
         return {
             "success": True,
@@ -753,6 +1142,7 @@ async def get_storage_info_api():
             "used_gb": storage_info.get("used_gb", 0),
             "free_gb": storage_info.get("free_gb", 0),
             "usage_percent": storage_info.get("usage_percent", 0),
+            "retention": retention_purger.get_status(),
         }
     except Exception as e:
         logger.error("Failed to get storage info", error=str(e))
@@ -767,80 +1157,75 @@ async def get_storage_info_api():
 @app.get("/api/face-recognition/status")
 async def get_face_recognition_status():
     """Get face recognition service status."""
-    persons = db.get_persons()
+    persons = await db_executor.read(db.get_persons)
     return {
         "enabled": settings.face_recognition_enabled,
         "model_loaded": face_recognition_service.is_ready(),
         "model_name": settings.face_recognition_model,
         "person_count": len(persons),
+        "cached_samples": face_recognition_service.cached_sample_count(),
         "threshold": settings.face_recognition_threshold,
+        "inference": face_recognition_service.inference_status(),
     }
 
 
-@app.get("/api/persons")
-async def get_persons():
-    """Get all known persons with their sample embeddings."""
-    persons = db.get_persons()
-    result = []
-    for p in persons:
-        embeddings = db.get_person_embeddings(p["id"])
-        thumb_url = (
-            f"api/persons/{p['id']}/thumbnail"
-            if p.get("thumbnail_path")
-            else None
-        )
-        samples = [
-            {
-                "id": e["id"],
-                "thumbnail_path": (
-                    f"api/persons/{p['id']}/samples/{e['id']}/thumbnail"
-                ),
-                "created_at": e["created_at"],
-            }
-            for e in embeddings
-        ]
-        result.append({
-            "id": p["id"],
-            "name": p["name"],
-            "thumbnail_path": thumb_url,
-            "sample_count": len(samples),
-            "samples": samples,
-        })
-    return {"persons": result}
+@app.post("/api/face-recognition/reload-embeddings")
+async def reload_face_embeddings():
+    """Rebuild the in-memory embeddings cache from the database."""
+    await face_recognition_service.refresh_embeddings_cache()
+    return {"cached_samples": face_recognition_service.cached_sample_count()}
 
 
-@app.get("/api/persons/{person_id}")
-async def get_person(person_id: int):
-    """Get a single person with their sample embeddings."""
-    persons = db.get_persons()
-    p = next((x for x in persons if x["id"] == person_id), None)
-    if not p:
-        raise HTTPException(status_code=404, detail="Person not found")
-    embeddings = db.get_person_embeddings(p["id"])
-    thumb_url = (
-        f"api/persons/{p['id']}/thumbnail"
-        if p.get("thumbnail_path")
-        else None
-    )
+def _person_thumbnail_url(person: dict) -> Optional[str]:
+    """Avatar URL, versioned so browsers may cache it until the avatar changes."""
+    if not person.get("thumbnail_path"):
+        return None
+    return f"api/persons/{person['id']}/thumbnail?v={file_version(person['thumbnail_path'])}"
+
+
+def _person_json(person: dict) -> dict:
+    """A person from get_person(s)_with_samples in the /api/persons shape."""
     samples = [
         {
             "id": e["id"],
-            "thumbnail_path": f"api/persons/{p['id']}/samples/{e['id']}/thumbnail",
+            "thumbnail_path": f"api/persons/{person['id']}/samples/{e['id']}/thumbnail",
             "created_at": e["created_at"],
         }
-        for e in embeddings
+        for e in person["samples"]
     ]
     return {
-        "persons": [{
-            "id": p["id"],
-            "name": p["name"],
-            "thumbnail_path": thumb_url,
-            "sample_count": len(samples),
-            "samples": samples,
-        }]
+        "id": person["id"],
+        "name": person["name"],
+        "thumbnail_path": _person_thumbnail_url(person),
+        "sample_count": len(samples),
+        "samples": samples,
     }
 
 
+@app.get("/api/persons")
+async def get_persons(request: Request):
+    """Get all known persons with their sample embeddings.
+
+    The listing carries an ETag that changes with any person or sample, so
+    a client revalidating an unchanged list gets a 304 without a query.
+    """
+    etag = db.persons_etag()
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL}
+    if is_not_modified(request.headers, etag):
+        return Response(status_code=304, headers=headers)
+    persons = await db_executor.read(db.get_persons_with_samples)
+    return JSONResponse({"persons": [_person_json(p) for p in persons]}, headers=headers)
+
+
+@app.get("/api/persons/{person_id}")
+async def get_person(person_id: int):
+    """Get a single person with their sample embeddings."""
+    person = await db_executor.read(db.get_person_with_samples, person_id)
+    if not person:
+        raise HTTPException(status_code=404, detail="Person not found")
+    return {"persons": [_person_json(person)]}
+
+
 @app.post("/api/persons", status_code=201)
 async def add_person(name: str = Form(...), image: UploadFile = File(...)):
     """Add a known person from an uploaded image."""
@@ -857,9 +1242,8 @@ async def add_person(name: str = Form(...), image: UploadFile = File(...)):
         tmp.write(await image.read())
         tmp_path = tmp.name
     try:
-        person = await asyncio.to_thread(
-            face_recognition_service.add_person, name, tmp_path
-        )
+        faces = await face_recognition_service.analyze(tmp_path)
+        person = await face_recognition_service.add_person(name, tmp_path, faces)
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
@@ -871,28 +1255,7 @@ async def add_person(name: str = Form(...), image: UploadFile = File(...)):
         except Exception:
             pass
     # Return full person shape
-    embeddings = db.get_person_embeddings(person["id"])
-    samples = [
-        {
-            "id": e["id"],
-            "thumbnail_path": (
-                f"api/persons/{person['id']}/samples/{e['id']}/thumbnail"
-            ),
-            "created_at": e["created_at"],
-        }
-        for e in embeddings
-    ]
-    return {
-        "id": person["id"],
-        "name": person["name"],
-        "thumbnail_path": (
-            f"api/persons/{person['id']}/thumbnail"
-            if person.get("thumbnail_path")
-            else None
-        ),
-        "sample_count": len(samples),
-        "samples": samples,
-    }
+    return _person_json(await db_executor.read(db.get_person_with_samples, person["id"]))
 
 
 @app.patch("/api/persons/{person_id}")
@@ -902,45 +1265,45 @@ async def rename_person(person_id: int, request: Request):
     name = data.get("name", "").strip()
     if not name:
         raise HTTPException(status_code=422, detail="Name must not be empty")
-    if not db.rename_person(person_id, name):
+    if not await db_executor.write(db.rename_person, person_id, name):
         raise HTTPException(status_code=404, detail="Person not found")
-    face_recognition_service.refresh_embeddings_cache()
+    face_recognition_service.cache_rename_person(person_id, name)
     return {"id": person_id, "name": name}
 
 
 @app.delete("/api/persons/{person_id}", status_code=204)
 async def delete_person(person_id: int):
     """Delete a known person and all their sample thumbnails."""
-    deleted = await asyncio.to_thread(
-        face_recognition_service.delete_person, person_id
-    )
-    if not deleted:
+    if not await face_recognition_service.delete_person(person_id):
         raise HTTPException(status_code=404, detail="Person not found")
 
 
 @app.get("/api/persons/{person_id}/thumbnail")
-async def get_person_thumbnail(person_id: int):
-    """Serve person avatar thumbnail -- reads path from DB."""
-    person = db.get_person(person_id)
-    if not person or not person.get("thumbnail_path"):
+async def get_person_thumbnail(person_id: int, request: Request, v: Optional[str] = None):
+    """Serve person avatar thumbnail.
+
+    The avatar changes with the person's samples, so only a URL carrying the
+    current version (v, as listed by /api/persons) is cacheable forever.
+    """
+    path = await db_executor.read(db.get_person_thumbnail_path, person_id)
+    if not path:
         raise HTTPException(status_code=404, detail="Thumbnail not found")
-    if not os.path.isfile(person["thumbnail_path"]):
+    if not os.path.isfile(path):
         raise HTTPException(status_code=404, detail="Thumbnail file missing")
-    return FileResponse(person["thumbnail_path"])
+    return cached_file_response(request.headers, path, immutable=v == file_version(path))
 
 
 @app.get("/api/persons/{person_id}/samples/{emb_id}/thumbnail")
-async def get_sample_thumbnail(person_id: int, emb_id: int):
-    """Serve a specific sample thumbnail."""
-    rows = db.get_person_embeddings(person_id)
-    emb = next((e for e in rows if e["id"] == emb_id), None)
-    if not emb or not emb.get("thumbnail_path"):
+async def get_sample_thumbnail(person_id: int, emb_id: int, request: Request):
+    """Serve a specific sample thumbnail (written once per sample)."""
+    path = await db_executor.read(db.get_sample_thumbnail_path, person_id, emb_id)
+    if not path:
         raise HTTPException(
             status_code=404, detail="Sample thumbnail not found"
         )
-    if not os.path.isfile(emb["thumbnail_path"]):
+    if not os.path.isfile(path):
         raise HTTPException(status_code=404, detail="Thumbnail file missing")
-    return FileResponse(emb["thumbnail_path"])
+    return cached_file_response(request.headers, path, immutable=True)
 
 
 @app.post("/api/persons/{person_id}/samples", status_code=201)
@@ -952,62 +1315,32 @@ async def add_person_sample(
         raise HTTPException(
             status_code=503, detail="Face recognition is not enabled"
         )
-    person = db.get_person(person_id)
+    person = await db_executor.read(db.get_person, person_id)
     if not person:
         raise HTTPException(status_code=404, detail="Person not found")
     import tempfile
-    import io as _io
-    import numpy as np
-    from PIL import Image, ImageOps
     suffix = os.path.splitext(image.filename or ".jpg")[1] or ".jpg"
     with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
         tmp.write(await image.read())
         tmp_path = tmp.name
     try:
-        faces = await asyncio.to_thread(
-            face_recognition_service.analyze_image, tmp_path
-        )
+        faces = await face_recognition_service.analyze(tmp_path)
         if not faces:
             raise HTTPException(
                 status_code=422, detail="No face detected in uploaded image"
             )
         best_face = max(faces, key=lambda f: f.det_score)
-        buf = _io.BytesIO()
-        np.save(buf, best_face.embedding)
-        emb_bytes = buf.getvalue()
-        # Crop thumbnail
-        os.makedirs(settings.persons_path, exist_ok=True)
-        img_pil = ImageOps.exif_transpose(
-            Image.open(tmp_path)
-        ).convert("RGB")
-        x, y, w, h = best_face.bbox
-        padding = int(max(w, h) * 0.2)
-        crop = img_pil.crop((
-            max(0, x - padding),
-            max(0, y - padding),
-            min(img_pil.width, x + w + padding),
-            min(img_pil.height, y + h + padding),
-        )).resize((200, 200))
-        tmp_thumb = os.path.join(
-            settings.persons_path, f"{person_id}_tmp.jpg"
-        )
-        crop.save(tmp_thumb, "JPEG")
-        emb_id = db.add_person_embedding(person_id, emb_bytes, None)
-        final_thumb = os.path.join(
-            settings.persons_path, f"{person_id}_{emb_id}.jpg"
-        )
-        os.rename(tmp_thumb, final_thumb)
-        db.update_person_embedding_thumbnail(emb_id, final_thumb)
         # Set avatar if currently NULL
-        if not person.get("thumbnail_path"):
-            db.update_person_thumbnail(person_id, final_thumb)
-        face_recognition_service.refresh_embeddings_cache()
+        emb_id, _ = await face_recognition_service.add_sample(
+            person_id, person["name"], tmp_path, best_face,
+            set_avatar=not person.get("thumbnail_path"),
+        )
     finally:
         try:
             os.remove(tmp_path)
         except Exception:
             pass
-    emb_rows = db.get_person_embeddings(person_id)
+    emb_rows = await db_executor.read(db.get_person_embeddings, person_id)
     emb_row = next((e for e in emb_rows if e["id"] == emb_id), None)
     return {
         "id": emb_id,
@@ -1022,24 +1355,24 @@ async def add_person_sample(
 @app.delete("/api/persons/{person_id}/samples/{emb_id}", status_code=204)
 async def delete_person_sample(person_id: int, emb_id: int):
     """Remove a face sample from a person."""
-    rows = db.get_person_embeddings(person_id)
+    rows = await db_executor.read(db.get_person_embeddings, person_id)
     emb = next((e for e in rows if e["id"] == emb_id), None)
     if not emb:
         raise HTTPException(status_code=404, detail="Sample not found")
     # Delete thumbnail file
     if emb.get("thumbnail_path"):
         try:
-            os.remove(emb["thumbnail_path"])
+            await asyncio.to_thread(os.remove, emb["thumbnail_path"])
         except Exception:
             pass
-    db.delete_person_embedding(emb_id)
+    await db_executor.write(db.delete_person_embedding, emb_id)
     # Update avatar if this was the avatar
-    person = db.get_person(person_id)
+    person = await db_executor.read(db.get_person, person_id)
     if person and person.get("thumbnail_path") == emb.get("thumbnail_path"):
-        remaining = db.get_person_embeddings(person_id)
+        remaining = await db_executor.read(db.get_person_embeddings, person_id)
         new_thumb = remaining[0]["thumbnail_path"] if remaining else None
-        db.update_person_thumbnail(person_id, new_thumb)
-    face_recognition_service.refresh_embeddings_cache()
+        await db_executor.write(db.update_person_thumbnail, person_id, new_thumb)
+    face_recognition_service.cache_remove_sample(emb_id)
 
 
 # ── Face Crops Inbox ──────────────────────────────────────────────────────────
@@ -1051,8 +1384,9 @@ async def get_face_crops(dismissed: bool = False, count_only: bool = False):
     if not settings.face_recognition_enabled:
         return {"count": 0} if count_only else {"crops": []}
     if count_only:
-        return {"count": db.get_face_crop_count(dismissed=dismissed)}
-    crops = db.get_face_crops(dismissed=dismissed)
+        count = await db_executor.read(db.get_face_crop_count, dismissed=dismissed)
+        return {"count": count}
+    crops = await db_executor.read(db.get_face_crops, dismissed=dismissed)
     result = []
     for c in crops:
         result.append({
@@ -1067,23 +1401,23 @@ async def get_face_crops(dismissed: bool = False, count_only: bool = False):
 
 
 @app.get("/api/face-crops/{crop_id}/image")
-async def get_face_crop_image(crop_id: int):
-    """Serve a face crop image."""
-    crop = db.get_face_crop(crop_id)
-    if not crop:
+async def get_face_crop_image(crop_id: int, request: Request):
+    """Serve a face crop image (written once per crop)."""
+    path = await db_executor.read(db.get_face_crop_path, crop_id)
+    if not path:
         raise HTTPException(status_code=404, detail="Crop not found")
-    if not os.path.isfile(crop["image_path"]):
+    if not os.path.isfile(path):
         raise HTTPException(status_code=404, detail="Crop file missing")
-    return FileResponse(crop["image_path"])
+    return cached_file_response(request.headers, path, immutable=True)
 
 
 @app.post("/api/face-crops/{crop_id}/dismiss", status_code=204)
 async def dismiss_face_crop(crop_id: int):
     """Dismiss a face crop without assigning."""
-    crop = db.get_face_crop(crop_id)
+    crop = await db_executor.read(db.get_face_crop, crop_id)
     if not crop:
         raise HTTPException(status_code=404, detail="Crop not found")
-    db.dismiss_face_crop(crop_id)
+    await db_executor.write(db.dismiss_face_crop, crop_id)
 
 
 @app.post("/api/face-crops/{crop_id}/assign")
@@ -1099,57 +1433,32 @@ async def assign_face_crop(crop_id: int, request: Request):
             status_code=422,
             detail="Provide exactly one of person_id or name",
         )
-    crop = db.get_face_crop(crop_id)
+    crop = await db_executor.read(db.get_face_crop, crop_id)
     if not crop:
         raise HTTPException(status_code=404, detail="Crop not found")
 
     created_person_id = None
     if has_name:
-        created_person_id = db.add_person(data["name"].strip())
+        created_person_id = await db_executor.write(db.add_person, data["name"].strip())
         person_id = created_person_id
     else:
         person_id = int(data["person_id"])
 
     try:
-        faces = await asyncio.to_thread(
-            face_recognition_service.analyze_image, crop["image_path"]
-        )
+        faces = await face_recognition_service.analyze(crop["image_path"])
         if not faces:
             if created_person_id:
-                db.delete_person(created_person_id)
+                await db_executor.write(db.delete_person, created_person_id)
             raise HTTPException(status_code=422, detail="No face detected in crop image")
 
         best_face = max(faces, key=lambda f: f.det_score)
-        import io as _io
-        import numpy as np
-        buf = _io.BytesIO()
-        np.save(buf, best_face.embedding)
-        emb_bytes = buf.getvalue()
-
-        os.makedirs(settings.persons_path, exist_ok=True)
-        from PIL import Image, ImageOps
-        img_pil = ImageOps.exif_transpose(
-            Image.open(crop["image_path"])
-        ).convert("RGB")
-        x, y, w, h = best_face.bbox
-        padding = int(max(w, h) * 0.2)
-        thumb = img_pil.crop((
-            max(0, x - padding), max(0, y - padding),
-            min(img_pil.width, x + w + padding), min(img_pil.height, y + h + padding),
-        )).resize((200, 200))
-        tmp_thumb = os.path.join(settings.persons_path, f"{person_id}_tmp.jpg")
-        thumb.save(tmp_thumb, "JPEG")
-        emb_id = db.add_person_embedding(person_id, emb_bytes, None)
-        final_thumb = os.path.join(settings.persons_path, f"{person_id}_{emb_id}.jpg")
-        os.rename(tmp_thumb, final_thumb)
-        db.update_person_embedding_thumbnail(emb_id, final_thumb)
-        person = db.get_person(person_id)
-        if person and not person.get("thumbnail_path"):
-            db.update_person_thumbnail(person_id, final_thumb)
-        db.dismiss_face_crop(crop_id)
-        face_recognition_service.refresh_embeddings_cache()
-
+        person = await db_executor.read(db.get_person, person_id)
         name = data.get("name") or (person["name"] if person else "Unknown")
+        emb_id, _ = await face_recognition_service.add_sample(
+            person_id, person["name"] if person else name, crop["image_path"], best_face,
+            set_avatar=person is not None and not person.get("thumbnail_path"),
+        )
+        await db_executor.write(db.dismiss_face_crop, crop_id)
         return {"person_id": person_id, "embedding_id": emb_id, "name": name}
 
     except HTTPException:
@@ -1157,7 +1466,7 @@ async def assign_face_crop(crop_id: int, request: Request):
     except Exception as e:
         if created_person_id:
             try:
-                db.delete_person(created_person_id)
+                await db_executor.write(db.delete_person, created_person_id)
             except Exception:
                 pass
         logger.error("Error assigning face crop", error=str(e))
@@ -1167,7 +1476,7 @@ async def assign_face_crop(crop_id: int, request: Request):
 @app.get("/api/events/{event_id}/faces")
 async def get_event_faces(event_id: int):
     """Get face data for a specific event."""
-    event = db.get_doorbell_event(event_id)
+    event = await db_executor.read(db.get_doorbell_event, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     faces = json.loads(event.face_data) if event.face_data else []
@@ -1185,6 +1494,8 @@ async def update_face_recognition_settings(request: Request):
         data = await request.json()
         was_disabled = not settings.face_recognition_enabled
 
+        previous = (settings.face_recognition_model, settings.face_recognition_workers)
+
         if "enabled" in data:
             settings.face_recognition_enabled = bool(data["enabled"])
         if "model" in data and data["model"] in ("buffalo_sc", "buffalo_s", "buffalo_l"):
@@ -1193,11 +1504,18 @@ async def update_face_recognition_settings(request: Request):
             threshold = float(data["threshold"])
             if 0.1 <= threshold <= 0.99:
                 settings.face_recognition_threshold = threshold
+        if "workers" in data:
+            workers = int(data["workers"])
+            if 0 <= workers <= _MAX_FACE_WORKERS:
+                settings.face_recognition_workers = workers
 
         settings.save_to_file()
 
-        # Kick off model loading if just enabled
-        if settings.face_recognition_enabled and (was_disabled or not face_recognition_service.is_ready()):
+        # Kick off model loading if just enabled, or reload it for a new model/pool size
+        reload = previous != (settings.face_recognition_model, settings.face_recognition_workers)
+        if settings.face_recognition_enabled and (
+            was_disabled or reload or not face_recognition_service.is_ready()
+        ):
             asyncio.create_task(face_recognition_service.initialize())
 
         return {"success": True, "message": "Face recognition settings updated"}
@@ -0,0 +1,120 @@
+"""Per-ring video clips cut from the RTSP grabber's frame history."""
+
+import asyncio
+import os
+import subprocess
+import time
+from typing import Any, Dict, Optional
+
+import structlog
+
+from .config import settings
+from .rtsp_grabber import rtsp_grabber
+
+logger = structlog.get_logger()
+
+_CLIP_EXT = ".mp4"
+_ENCODE_TIMEOUT = 60
+# Extra history beyond pre+post roll, so a ring handled a moment late still
+# finds its first pre-roll frames.
+_HISTORY_MARGIN_SECS = 2.0
+
+
+def clip_path_for(image_path: str) -> str:
+    """Clips sit next to their snapshot: doorbell_<ts>.jpg → doorbell_<ts>.mp4."""
+    return os.path.splitext(image_path)[0] + _CLIP_EXT
+
+
+def history_window_secs() -> float:
+    """Seconds of frames the grabber must keep for the configured clip length."""
+    return settings.clip_pre_roll_secs + settings.clip_post_roll_secs + _HISTORY_MARGIN_SECS
+
+
+def encode_clip(frames: list, fps: int, dest_path: str) -> None:
+    """Encode JPEG frames to an H.264 MP4 (faststart, so it streams by range).
+
+    Written to a temp name and renamed, so a reader never sees a partial file.
+    """
+    tmp_path = dest_path + ".part"
+    result = subprocess.run(
+        [
+            "ffmpeg", "-y", "-nostdin", "-loglevel", "error",
+            "-f", "image2pipe", "-framerate", str(fps), "-c:v", "mjpeg", "-i", "pipe:0",
+            "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+            "-movflags", "+faststart", "-f", "mp4", tmp_path,
+        ],
+        input=b"".join(frames),
+        capture_output=True,
+        timeout=_ENCODE_TIMEOUT,
+    )
+    if result.returncode != 0 or not os.path.exists(tmp_path):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise RuntimeError(result.stderr.decode(errors="ignore").strip() or "ffmpeg failed")
+    os.replace(tmp_path, dest_path)
+
+
+class ClipRecorder:
+    """Writes a pre-roll + post-roll clip for each ring.
+
+    Frames come from the grabber's in-memory history, so recording never opens
+    a second camera connection; the ring waits for none of it.
+    """
+
+    def __init__(self):
+        self.clips_written = 0
+        self.clips_failed = 0
+        self.last_error: Optional[str] = None
+        self.last_encode_ms: Optional[int] = None
+
+    def available(self) -> bool:
+        return settings.clip_enabled and rtsp_grabber.is_running()
+
+    async def record(self, image_path: str, ring_at: Optional[float] = None) -> Optional[str]:
+        """Wait out the post-roll, then encode the ring's frames next to image_path.
+
+        ring_at is the time.monotonic() of the ring (defaults to now). Returns
+        the clip path, or None when there were no frames or encoding failed.
+        """
+        if ring_at is None:
+            ring_at = time.monotonic()
+        pre, post = settings.clip_pre_roll_secs, settings.clip_post_roll_secs
+        await asyncio.sleep(max(0.0, ring_at + post - time.monotonic()))
+        frames = rtsp_grabber.frames_between(ring_at - pre, ring_at + post)
+        if not frames:
+            logger.warning("No buffered frames for ring clip", image_path=image_path)
+            return None
+        clip_path = clip_path_for(image_path)
+        started = time.monotonic()
+        try:
+            await asyncio.to_thread(encode_clip, frames, rtsp_grabber.fps, clip_path)
+        except Exception as e:
+            self.clips_failed += 1
+            self.last_error = str(e)
+            logger.warning("Failed to encode ring clip", image_path=image_path, error=str(e))
+            return None
+        self.clips_written += 1
+        self.last_error = None
+        self.last_encode_ms = round((time.monotonic() - started) * 1000)
+        logger.info(
+            "Ring clip saved",
+            clip=clip_path, frames=len(frames), encode_ms=self.last_encode_ms,
+        )
+        return clip_path
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.clip_enabled,
+            "available": self.available(),
+            "pre_roll_secs": settings.clip_pre_roll_secs,
+            "post_roll_secs": settings.clip_post_roll_secs,
+            "buffer_mb": settings.clip_buffer_mb,
+            "clips_written": self.clips_written,
+            "clips_failed": self.clips_failed,
+            "last_encode_ms": self.last_encode_ms,
+            "last_error": self.last_error,
+        }
+
+
+# Global recorder instance
+clip_recorder = ClipRecorder()
@@ -13,6 +13,14 @@ class Settings(BaseSettings):
     # Camera configuration
     camera_url: str = os.getenv("CAMERA_URL", "rtsp://192.168.1.100:554/stream")
     camera_entity: Optional[str] = os.getenv("CAMERA_ENTITY")
+    # Keep an RTSP camera_url open and buffer its newest frame between rings
+    camera_rtsp_persistent: bool = os.getenv("CAMERA_RTSP_PERSISTENT", "false").lower() == "true"
+
+    # Ring clips (RTSP camera_url only): frames buffered in memory around each ring
+    clip_enabled: bool = os.getenv("CLIP_ENABLED", "false").lower() == "true"
+    clip_pre_roll_secs: int = int(os.getenv("CLIP_PRE_ROLL_SECS", "5"))
+    clip_post_roll_secs: int = int(os.getenv("CLIP_POST_ROLL_SECS", "5"))
+    clip_buffer_mb: int = int(os.getenv("CLIP_BUFFER_MB", "32"))
 
     # Storage configuration
     storage_path: str = os.getenv("STORAGE_PATH", "/share/doorbell")
@@ -23,6 +31,8 @@ class Settings(BaseSettings):
 
     # Weather integration
     weather_entity: Optional[str] = os.getenv("WEATHER_ENTITY")
+    # Oldest cached weather reading a ring may use before fetching live
+    weather_max_age_secs: int = int(os.getenv("WEATHER_MAX_AGE_SECS", "600"))
 
     # AI description (llmvision)
     llmvision_enabled: bool = os.getenv("LLMVISION_ENABLED", "false").lower() == "true"
@@ -48,6 +58,8 @@ class Settings(BaseSettings):
     face_recognition_enabled: bool = os.getenv("FACE_RECOGNITION_ENABLED", "false").lower() == "true"
     face_recognition_model: str = os.getenv("FACE_RECOGNITION_MODEL", "buffalo_sc")
     face_recognition_threshold: float = float(os.getenv("FACE_RECOGNITION_THRESHOLD", "0.45"))
+    # InsightFace worker processes; 0 runs the model inside the web server process
+    face_recognition_workers: int = int(os.getenv("FACE_RECOGNITION_WORKERS", "1"))
 
     # Home Assistant integration
     hassio_token: Optional[str] = os.getenv("HASSIO_TOKEN")
@@ -83,6 +95,11 @@ class Settings(BaseSettings):
         """Get the insightface models directory path."""
         return os.path.join(self.storage_path, "insightface_models")
 
+    @property
+    def thumbnails_path(self) -> str:
+        """Get the event thumbnail cache directory path."""
+        return os.path.join(self.storage_path, "thumbnails")
+
     @property
     def face_crops_path(self) -> str:
         """Get the face crops directory path."""
@@ -92,14 +109,21 @@ class Settings(BaseSettings):
     _PERSISTED_FIELDS: ClassVar[tuple] = (
         "camera_url",
         "camera_entity",
+        "camera_rtsp_persistent",
+        "clip_enabled",
+        "clip_pre_roll_secs",
+        "clip_post_roll_secs",
+        "clip_buffer_mb",
         "ha_access_token",
         "weather_entity",
+        "weather_max_age_secs",
         "notification_webhook",
         "retention_days",
         "storage_path",
         "face_recognition_enabled",
         "face_recognition_model",
         "face_recognition_threshold",
+        "face_recognition_workers",
         # automation integration
         "llmvision_enabled",
         "llmvision_provider",
@@ -1,14 +1,28 @@
 """Database models and operations for the doorbell addon."""
 
+import asyncio
+import base64
+import contextvars
+import functools
+import html
+import json
 import os
+import re
 import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
-from datetime import datetime, timedelta
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
 
 import structlog
 
+from .clips import clip_path_for
 from .config import settings
+from .event_bus import event_bus
+from .thumbnails import thumbnail_cache
 
 logger = structlog.get_logger()
 
@@ -24,30 +38,144 @@ class DoorbellEvent:
     weather_condition: Optional[str] = None
     weather_temperature: Optional[float] = None
     weather_humidity: Optional[float] = None
+    weather_age_secs: Optional[float] = None  # age of the cached reading at ring time
     faces_detected: Optional[int] = None
-    face_data: Optional[str] = None  # JSON string
+    face_data: Optional[str] = None  # JSON string, rebuilt from event_faces
 
 
-# Columns returned by all SELECT queries on doorbell_events
+@dataclass
+class RingCommit:
+    """Rows written for one ring by DatabaseManager.commit_ring."""
+
+    event: DoorbellEvent
+    face_ids: List[int]  # event_faces ids, in face order
+    crop_ids: List[int]  # face_crops ids, in crop_paths order
+
+
+@dataclass
+class EventFilter:
+    """Optional filters for event queries; all set fields are AND-ed."""
+
+    start: Optional[datetime] = None  # inclusive
+    end: Optional[datetime] = None  # exclusive
+    person_id: Optional[int] = None
+    min_faces: Optional[int] = None
+    unknown_only: bool = False
+
+
+# Columns returned by all SELECT queries on doorbell_events_compat
 _EVENT_COLUMNS = (
     "id, timestamp, image_path, ai_message, "
-    "weather_condition, weather_temperature, weather_humidity, "
+    "weather_condition, weather_temperature, weather_humidity, weather_age_secs, "
     "faces_detected, face_data"
 )
 
 
+# Per-connection tuning applied once when a connection is opened.
+# journal_mode=WAL is persistent in the database file; the rest are per-connection.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-8000",  # KiB, i.e. ~8 MB page cache
+    "PRAGMA mmap_size=67108864",  # 64 MB
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+_PATH_CACHE_SIZE = 4096
+
+# PRAGMA user_version once event_faces has been backfilled from face_data.
+# Set in the backfill's own transaction, so an interrupted backfill is retried.
+_EVENT_FACES_BACKFILLED_VERSION = 1
+
+
+class _PathCache:
+    """Memo of id → file path for the image endpoints.
+
+    Entries are dropped by the methods that change or delete the row; the
+    whole memo is cleared if it outgrows its bound.
+    """
+
+    def __init__(self, max_entries: int = _PATH_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: Dict[tuple, Any] = {}
+
+    def get(self, key: tuple) -> Any:
+        return self._entries.get(key)
+
+    def put(self, key: tuple, value: Any) -> None:
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+        self._entries[key] = value
+
+    def invalidate(self, key: tuple) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
 class DatabaseManager:
     """Database manager for SQLite operations."""
 
     def __init__(self):
         self.db_path = settings.database_path
+        # One long-lived connection per thread (event loop + executor workers),
+        # opened lazily and reused by every method instead of connecting per call.
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._paths = _PathCache()
+        # Bumped on every change to persons or samples; with the per-process
+        # token it versions /api/persons (the ETag) without querying.
+        self._persons_version = 0
+        self._persons_token = os.urandom(4).hex()
+        # False if this SQLite lacks FTS5; search_events then scans with LIKE.
+        self.fts_enabled = True
         self._init_database()
 
+    def _get_connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening and configuring it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread=False only so close() can run from the shutdown
+            # thread; each connection is otherwise used solely by its owner.
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            for pragma in _CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Yield this thread's pooled connection, committing on success and
+        rolling back on error (same semantics as ``with sqlite3.connect(...)``).
+        """
+        conn = self._get_connection()
+        with conn:
+            yield conn
+
+    def close(self) -> None:
+        """Close every pooled connection (called on shutdown)."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception as e:
+                logger.warning("Error closing database connection", error=str(e))
+        self._local = threading.local()
+
     def _init_database(self):
         """Initialize the database with required tables."""
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             # ── Core events table ───────────────────────────────────────────
             conn.execute(
                 """
@@ -59,6 +187,7 @@ class DatabaseManager:
                     weather_condition TEXT,
                     weather_temperature REAL,
                     weather_humidity REAL,
+                    weather_age_secs REAL,
                     faces_detected INT DEFAULT 0,
                     face_data TEXT
                 )
@@ -69,6 +198,7 @@ class DatabaseManager:
                 ("weather_condition", "TEXT"),
                 ("weather_temperature", "REAL"),
                 ("weather_humidity", "REAL"),
+                ("weather_age_secs", "REAL"),
                 ("faces_detected", "INT DEFAULT 0"),
                 ("face_data", "TEXT"),
             ]:
@@ -79,9 +209,18 @@ class DatabaseManager:
                     conn.commit()
                 except sqlite3.OperationalError:
                     pass
+            # (timestamp, id) serves both ORDER BY timestamp DESC, id DESC and
+            # keyset seeks; it supersedes the old single-column index.
             conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_events_timestamp "
-                "ON doorbell_events (timestamp)"
+                "CREATE INDEX IF NOT EXISTS idx_events_timestamp_id "
+                "ON doorbell_events (timestamp, id)"
+            )
+            conn.execute("DROP INDEX IF EXISTS idx_events_timestamp")
+            # Partial index over events that have faces: person / unknown /
+            # min_faces filters walk only these rows, still in timestamp order.
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_events_with_faces "
+                "ON doorbell_events (timestamp, id) WHERE faces_detected > 0"
             )
 
             # ── Known persons (no embedding column) ────────────────────────
@@ -109,6 +248,11 @@ class DatabaseManager:
                 )
                 """
             )
+            # Samples are listed per person and deleted with their person.
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_person_embeddings_person "
+                "ON person_embeddings (person_id, id)"
+            )
 
             # ── Unrecognised face crops inbox ───────────────────────────────
             conn.execute(
@@ -127,6 +271,72 @@ class DatabaseManager:
                 "CREATE INDEX IF NOT EXISTS idx_face_crops_dismissed "
                 "ON face_crops (dismissed)"
             )
+            # Deleting an event cascades here; without it every delete scans.
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_face_crops_event "
+                "ON face_crops (event_id)"
+            )
+
+            # ── Faces detected per event (normalised face_data) ─────────────
+            # name is the label at ring time; timestamp is the event's, copied
+            # here so per-person history is one range scan on the person index.
+            backfill_event_faces = (
+                conn.execute("PRAGMA user_version").fetchone()[0]
+                < _EVENT_FACES_BACKFILLED_VERSION
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS event_faces (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    event_id INTEGER NOT NULL
+                        REFERENCES doorbell_events(id) ON DELETE CASCADE,
+                    face_idx INTEGER NOT NULL,
+                    person_id INTEGER
+                        REFERENCES known_persons(id) ON DELETE SET NULL,
+                    name TEXT NOT NULL,
+                    bbox_x INTEGER,
+                    bbox_y INTEGER,
+                    bbox_w INTEGER,
+                    bbox_h INTEGER,
+                    score REAL,
+                    det_score REAL,
+                    timestamp TIMESTAMP NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_event_faces_event "
+                "ON event_faces (event_id, face_idx)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_event_faces_person "
+                "ON event_faces (person_id, timestamp, event_id)"
+            )
+
+            # ── Durable ring job queue ──────────────────────────────────────
+            # checkpoint holds each completed stage's outputs (JSON) so an
+            # interrupted ring resumes where it stopped; stage_ms its timings.
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ring_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    params TEXT NOT NULL,
+                    checkpoint TEXT NOT NULL DEFAULT '{}',
+                    stage_ms TEXT NOT NULL DEFAULT '{}',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    event_id INTEGER,
+                    error TEXT,
+                    created_at TIMESTAMP NOT NULL,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_ring_jobs_status "
+                "ON ring_jobs (status, id)"
+            )
             conn.commit()
 
             # ── Migration: move embedding column out of known_persons ───────
@@ -139,6 +349,50 @@ class DatabaseManager:
             if "embedding" in existing_cols:
                 self._migrate_remove_embedding_column(conn)
 
+            # ── Migration: backfill event_faces from face_data JSON ─────────
+            if backfill_event_faces:
+                self._migrate_backfill_event_faces(conn)
+
+            # ── Ring statistics, maintained by triggers ─────────────────────
+            # Rings and known/unknown faces per hour, per day and in total,
+            # and rings per weather condition per day, so counts are one row
+            # read however long the history. After the migrations above, so
+            # the faces they backfill are counted once, by the backfill here.
+            self._init_ring_stats(conn)
+
+            # ── Full-text index over descriptions and comments ──────────────
+            self._init_events_fts(conn)
+
+            # ── Compatibility view: events with face_data from event_faces ──
+            # Faces carry the person's current name. Events that were never
+            # backfilled (unparseable JSON) fall back to the legacy column.
+            # Recreated on every start so the definition tracks the code, and
+            # after the migrations since rebuilding known_persons breaks it.
+            conn.execute("DROP VIEW IF EXISTS doorbell_events_compat")
+            conn.execute(
+                """
+                CREATE VIEW doorbell_events_compat AS
+                SELECT de.id, de.timestamp, de.image_path, de.ai_message,
+                       de.weather_condition, de.weather_temperature,
+                       de.weather_humidity, de.weather_age_secs, de.faces_detected,
+                       COALESCE((
+                           SELECT json_group_array(json_object(
+                               'name', COALESCE(kp.name, ef.name),
+                               'person_id', ef.person_id,
+                               'bbox', json_array(ef.bbox_x, ef.bbox_y,
+                                                  ef.bbox_w, ef.bbox_h),
+                               'score', ef.score,
+                               'det_score', ef.det_score))
+                           FROM event_faces ef
+                           LEFT JOIN known_persons kp ON kp.id = ef.person_id
+                           WHERE ef.event_id = de.id
+                           HAVING COUNT(*) > 0
+                       ), de.face_data) AS face_data
+                FROM doorbell_events de
+                """
+            )
+            conn.commit()
+
     def _migrate_remove_embedding_column(self, conn: sqlite3.Connection) -> None:
         """Move embeddings from known_persons into person_embeddings, then drop the column.
 
@@ -146,6 +400,11 @@ class DatabaseManager:
         database stays consistent even if the process crashes mid-migration.
         """
         logger.info("Migrating: moving embeddings from known_persons to person_embeddings")
+        # Table rebuild must run with foreign keys off: with them on, DROP TABLE
+        # known_persons would cascade-delete the embeddings copied just above.
+        # The pragma is a no-op inside a transaction, so commit any open one first.
+        conn.commit()
+        conn.execute("PRAGMA foreign_keys=OFF")
         conn.execute("BEGIN")
         try:
             conn.execute(
@@ -176,8 +435,133 @@ class DatabaseManager:
         except Exception:
             conn.execute("ROLLBACK")
             raise
+        finally:
+            conn.execute("PRAGMA foreign_keys=ON")
         logger.info("Migration complete: embedding column removed from known_persons")
 
+    def _init_ring_stats(self, conn: sqlite3.Connection) -> None:
+        """Create the statistics tables and triggers, backfilling new tables."""
+        backfill = not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ring_stats'"
+        ).fetchone()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ring_stats (
+                period TEXT NOT NULL,  -- 'hour', 'day' or 'all'
+                bucket TEXT NOT NULL,  -- local 'YYYY-MM-DDTHH', 'YYYY-MM-DD' or ''
+                rings INTEGER NOT NULL DEFAULT 0,
+                known_faces INTEGER NOT NULL DEFAULT 0,
+                unknown_faces INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (period, bucket)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ring_weather_stats (
+                day TEXT NOT NULL,
+                condition TEXT NOT NULL,
+                rings INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, condition)
+            ) WITHOUT ROWID
+            """
+        )
+        # Recreated on every start so the definitions track the code.
+        for name, sql in _ring_stats_triggers():
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.execute(sql)
+        if backfill:
+            for period in _STATS_BUCKETS:
+                conn.execute(
+                    f"""
+                    INSERT INTO ring_stats (period, bucket, rings, known_faces, unknown_faces)
+                    SELECT ?, bucket, SUM(rings), SUM(known), SUM(unknown) FROM (
+                        SELECT {_stats_bucket(period, "timestamp")} AS bucket,
+                               1 AS rings, 0 AS known, 0 AS unknown
+                        FROM doorbell_events
+                        UNION ALL
+                        SELECT {_stats_bucket(period, "timestamp")},
+                               0, name <> 'Unknown', name = 'Unknown'
+                        FROM event_faces
+                    ) GROUP BY bucket
+                    """,
+                    (period,),
+                )
+            conn.execute(
+                f"""
+                INSERT INTO ring_weather_stats (day, condition, rings)
+                SELECT {_stats_bucket("day", "timestamp")}, COALESCE(weather_condition, 'unknown'),
+                       COUNT(*)
+                FROM doorbell_events GROUP BY 1, 2
+                """
+            )
+        conn.commit()
+
+    def _init_events_fts(self, conn: sqlite3.Connection) -> None:
+        """Create the FTS5 index over ai_message and its triggers, building a new index.
+
+        External content: the index stores only tokens and reads the text back
+        from doorbell_events, so it adds little to the file.
+        """
+        build = not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'events_fts'"
+        ).fetchone()
+        try:
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5("
+                "ai_message, content='doorbell_events', content_rowid='id', "
+                "tokenize='porter unicode61')"
+            )
+        except sqlite3.OperationalError as e:
+            logger.warning("FTS5 unavailable, event search will scan", error=str(e))
+            self.fts_enabled = False
+            return
+        for name, sql in _events_fts_triggers():
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.execute(sql)
+        if build:
+            conn.execute("INSERT INTO events_fts (events_fts) VALUES ('rebuild')")
+        conn.commit()
+
+    def _migrate_backfill_event_faces(self, conn: sqlite3.Connection) -> None:
+        """Copy every event's face_data JSON into event_faces in one transaction.
+
+        Older JSON only names the person; the name is mapped back to an id
+        (lowest id on duplicates). Unparseable rows are skipped and keep being
+        served from the legacy column, which is left untouched. Events that
+        already have face rows are skipped, so a retried backfill adds none
+        twice. Commits with the user_version marker.
+        """
+        rows = conn.execute(
+            "SELECT id, timestamp, face_data FROM doorbell_events de "
+            "WHERE face_data IS NOT NULL AND face_data != '[]' "
+            "AND NOT EXISTS (SELECT 1 FROM event_faces ef WHERE ef.event_id = de.id)"
+        ).fetchall()
+        if not rows:
+            conn.execute(f"PRAGMA user_version = {_EVENT_FACES_BACKFILLED_VERSION}")
+            return
+        logger.info("Migrating: backfilling event_faces from face_data", events=len(rows))
+        person_ids: Dict[str, int] = {}
+        for row in conn.execute("SELECT id, name FROM known_persons ORDER BY id DESC"):
+            person_ids[row["name"]] = row["id"]
+        migrated = 0
+        with conn:
+            for row in rows:
+                try:
+                    faces = json.loads(row["face_data"])
+                except (TypeError, ValueError):
+                    continue
+                if not isinstance(faces, list):
+                    continue
+                for face in faces:
+                    if isinstance(face, dict) and face.get("person_id") is None:
+                        name = face.get("name")
+                        face["person_id"] = person_ids.get(name) if isinstance(name, str) else None
+                _insert_event_faces(conn, row["id"], row["timestamp"], faces)
+                migrated += 1
+            conn.execute(f"PRAGMA user_version = {_EVENT_FACES_BACKFILLED_VERSION}")
+        logger.info("Migration complete: event_faces backfilled", events=migrated)
+
     def add_doorbell_event(
         self,
         image_path: str,
@@ -186,52 +570,109 @@ class DatabaseManager:
         weather_temperature: Optional[float] = None,
         weather_humidity: Optional[float] = None,
         faces_detected: Optional[int] = None,
-        face_data: Optional[str] = None,
+        faces: Optional[List[Dict[str, Any]]] = None,
+        weather_age_secs: Optional[float] = None,
+        timestamp: Optional[datetime] = None,
+        ring_job_id: Optional[int] = None,
     ) -> DoorbellEvent:
-        """Add a new doorbell event."""
+        """Add a new doorbell event and its detected faces in one transaction.
+
+        Each face is a dict with name, person_id (None when unknown), bbox
+        ([x, y, w, h]), score and det_score. timestamp defaults to now; a
+        ring_job_id is linked to the event in the same transaction.
+        """
+        return self.commit_ring(
+            image_path, ai_message, weather_condition, weather_temperature,
+            weather_humidity, faces_detected, faces, weather_age_secs, timestamp,
+            ring_job_id,
+        ).event
+
+    def commit_ring(
+        self,
+        image_path: str,
+        ai_message: Optional[str] = None,
+        weather_condition: Optional[str] = None,
+        weather_temperature: Optional[float] = None,
+        weather_humidity: Optional[float] = None,
+        faces_detected: Optional[int] = None,
+        faces: Optional[List[Dict[str, Any]]] = None,
+        weather_age_secs: Optional[float] = None,
+        timestamp: Optional[datetime] = None,
+        ring_job_id: Optional[int] = None,
+        crop_paths: Optional[List[str]] = None,
+    ) -> RingCommit:
+        """Insert a ring's event, face rows and face crops in one transaction.
+
+        Arguments are those of add_doorbell_event plus the image files of the
+        unknown faces' crops, already written. One commit (one fsync) however
+        many faces the ring has, and an event is never saved without its crops.
+        """
         # Passed explicitly rather than relying on the schema's DEFAULT
         # CURRENT_TIMESTAMP — SQLite generates that in UTC, which every
         # reader (web UI, retention, HA sensors) treats as naive local time.
-        now = datetime.now()
-        with sqlite3.connect(self.db_path) as conn:
+        now = timestamp or datetime.now()
+        with self._connect() as conn:
             cursor = conn.execute(
                 """INSERT INTO doorbell_events
                    (timestamp, image_path, ai_message, weather_condition, weather_temperature,
-                    weather_humidity, faces_detected, face_data)
+                    weather_humidity, weather_age_secs, faces_detected)
                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
                 (now.isoformat(), image_path, ai_message, weather_condition, weather_temperature,
-                 weather_humidity, faces_detected, face_data),
+                 weather_humidity, weather_age_secs, faces_detected),
             )
             event_id = cursor.lastrowid
+            assert event_id is not None
+            face_ids = _insert_event_faces(conn, event_id, now.isoformat(), faces or [])
+            crop_ids = []
+            for crop_path in crop_paths or []:
+                crop_id = conn.execute(
+                    "INSERT INTO face_crops (event_id, image_path, created_at) VALUES (?, ?, ?)",
+                    (event_id, crop_path, datetime.now().isoformat()),
+                ).lastrowid
+                assert crop_id is not None
+                crop_ids.append(crop_id)
+            if ring_job_id is not None:
+                conn.execute(
+                    "UPDATE ring_jobs SET event_id = ? WHERE id = ?", (event_id, ring_job_id)
+                )
             conn.commit()
+            event_bus.publish("stats", {"total_events": 1})
+            if crop_ids:
+                _publish_inbox_count(conn)
 
-            return DoorbellEvent(
-                id=event_id,
-                timestamp=now,
-                image_path=image_path,
-                ai_message=ai_message,
-                weather_condition=weather_condition,
-                weather_temperature=weather_temperature,
-                weather_humidity=weather_humidity,
-                faces_detected=faces_detected,
-                face_data=face_data,
-            )
+        event = DoorbellEvent(
+            id=event_id,
+            timestamp=now,
+            image_path=image_path,
+            ai_message=ai_message,
+            weather_condition=weather_condition,
+            weather_temperature=weather_temperature,
+            weather_humidity=weather_humidity,
+            weather_age_secs=weather_age_secs,
+            faces_detected=faces_detected,
+            face_data=json.dumps(faces) if faces else None,
+        )
+        return RingCommit(event=event, face_ids=face_ids, crop_ids=crop_ids)
 
     def add_person(self, name: str) -> int:
         """Add a known person. Returns new person id."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute(
                 "INSERT INTO known_persons (name, created_at) VALUES (?, ?)",
                 (name, datetime.now().isoformat()),
             )
             conn.commit()
-            assert cursor.lastrowid is not None
-            return cursor.lastrowid
+        self._persons_version += 1
+        assert cursor.lastrowid is not None
+        return cursor.lastrowid
+
+    def persons_etag(self) -> str:
+        """Strong ETag of the persons listing; changes whenever it would."""
+        return f'"persons-{self._persons_token}-{self._persons_version}"'
 
     def get_persons(self) -> List[dict]:
         """Get all known persons."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             cursor = conn.execute(
                 "SELECT id, name, thumbnail_path, created_at FROM known_persons ORDER BY name"
             )
@@ -239,8 +680,7 @@ class DatabaseManager:
 
     def get_person(self, person_id: int) -> Optional[dict]:
         """Get a single person by ID."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             cursor = conn.execute(
                 "SELECT id, name, thumbnail_path, created_at FROM known_persons WHERE id = ?",
                 (person_id,),
@@ -248,32 +688,77 @@ class DatabaseManager:
             row = cursor.fetchone()
             return dict(row) if row else None
 
+    def get_persons_with_samples(self) -> List[dict]:
+        """All known persons by name, each with its samples (id order), in one query.
+
+        Each person dict has id, name, thumbnail_path, created_at and samples,
+        a list of {id, thumbnail_path, created_at}.
+        """
+        return self._persons_with_samples("", ())
+
+    def get_person_with_samples(self, person_id: int) -> Optional[dict]:
+        """One person with its samples, as in get_persons_with_samples, or None."""
+        persons = self._persons_with_samples("WHERE p.id = ?", (person_id,))
+        return persons[0] if persons else None
+
+    def _persons_with_samples(self, where: str, params: tuple) -> List[dict]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT p.id, p.name, p.thumbnail_path, p.created_at, e.id AS sample_id, "
+                "e.thumbnail_path AS sample_thumbnail_path, e.created_at AS sample_created_at "
+                "FROM known_persons p LEFT JOIN person_embeddings e ON e.person_id = p.id "
+                f"{where} ORDER BY p.name, p.id, e.id",
+                params,
+            ).fetchall()
+        persons: List[dict] = []
+        for row in rows:
+            if not persons or persons[-1]["id"] != row["id"]:
+                persons.append({
+                    "id": row["id"],
+                    "name": row["name"],
+                    "thumbnail_path": row["thumbnail_path"],
+                    "created_at": row["created_at"],
+                    "samples": [],
+                })
+            if row["sample_id"] is not None:
+                persons[-1]["samples"].append({
+                    "id": row["sample_id"],
+                    "thumbnail_path": row["sample_thumbnail_path"],
+                    "created_at": row["sample_created_at"],
+                })
+        return persons
+
     def update_person_thumbnail(self, person_id: int, path: Optional[str]) -> None:
         """Update thumbnail path for a person (pass None to clear avatar)."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.execute(
                 "UPDATE known_persons SET thumbnail_path = ? WHERE id = ?",
                 (path, person_id),
             )
             conn.commit()
+        self._paths.invalidate(("person", person_id))
+        self._persons_version += 1
 
     def delete_person(self, person_id: int) -> bool:
         """Delete a known person. Returns True if deleted."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             deleted = conn.execute(
                 "DELETE FROM known_persons WHERE id = ?", (person_id,)
             ).rowcount
             conn.commit()
-            return deleted > 0
+        self._paths.clear()  # the person's samples go with it
+        self._persons_version += 1
+        return deleted > 0
 
     def rename_person(self, person_id: int, name: str) -> bool:
         """Rename a known person. Returns True if found."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             updated = conn.execute(
                 "UPDATE known_persons SET name = ? WHERE id = ?",
                 (name, person_id),
             ).rowcount
             conn.commit()
+        self._persons_version += 1
         return updated > 0
 
     # ── Person embeddings ──────────────────────────────────────────────────────
@@ -282,38 +767,42 @@ class DatabaseManager:
         self, person_id: int, embedding_bytes: bytes, thumbnail_path: Optional[str]
     ) -> int:
         """Insert a face embedding for a person. Returns new embedding id."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute(
                 "INSERT INTO person_embeddings (person_id, embedding, thumbnail_path, created_at) "
                 "VALUES (?, ?, ?, ?)",
                 (person_id, embedding_bytes, thumbnail_path, datetime.now().isoformat()),
             )
             conn.commit()
-            assert cursor.lastrowid is not None
-            return cursor.lastrowid
+        self._persons_version += 1
+        assert cursor.lastrowid is not None
+        return cursor.lastrowid
 
     def update_person_embedding_thumbnail(self, emb_id: int, thumbnail_path: Optional[str]) -> None:
         """Set the thumbnail path for a person_embeddings row (pass None to clear)."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.execute(
                 "UPDATE person_embeddings SET thumbnail_path = ? WHERE id = ?",
                 (thumbnail_path, emb_id),
             )
             conn.commit()
+        self._paths.invalidate(("sample", emb_id))
+        self._persons_version += 1
 
     def delete_person_embedding(self, emb_id: int) -> bool:
         """Delete one embedding. Returns True if deleted."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             deleted = conn.execute(
                 "DELETE FROM person_embeddings WHERE id = ?", (emb_id,)
             ).rowcount
             conn.commit()
+        self._paths.invalidate(("sample", emb_id))
+        self._persons_version += 1
         return deleted > 0
 
     def get_person_embeddings(self, person_id: int) -> List[dict]:
         """Get all embeddings for a person, ordered by id ASC."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             cursor = conn.execute(
                 "SELECT id, person_id, thumbnail_path, created_at "
                 "FROM person_embeddings WHERE person_id = ? ORDER BY id ASC",
@@ -321,10 +810,56 @@ class DatabaseManager:
             )
             return [dict(row) for row in cursor.fetchall()]
 
+    # ── Image paths (memoised: the image endpoints look these up per request) ──
+
+    def get_person_thumbnail_path(self, person_id: int) -> Optional[str]:
+        """Avatar file of a person, or None."""
+        key = ("person", person_id)
+        path = self._paths.get(key)
+        if path is None:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT thumbnail_path FROM known_persons WHERE id = ?", (person_id,)
+                ).fetchone()
+            path = row[0] if row else None
+            if path:
+                self._paths.put(key, path)
+        return path
+
+    def get_sample_thumbnail_path(self, person_id: int, emb_id: int) -> Optional[str]:
+        """Thumbnail file of one of a person's samples, or None."""
+        key = ("sample", emb_id)
+        cached = self._paths.get(key)
+        if cached is None:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT person_id, thumbnail_path FROM person_embeddings WHERE id = ?",
+                    (emb_id,),
+                ).fetchone()
+            if not row or not row[1]:
+                return None
+            cached = (row[0], row[1])
+            self._paths.put(key, cached)
+        owner, path = cached
+        return path if owner == person_id else None
+
+    def get_face_crop_path(self, crop_id: int) -> Optional[str]:
+        """Image file of a face crop, or None."""
+        key = ("crop", crop_id)
+        path = self._paths.get(key)
+        if path is None:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT image_path FROM face_crops WHERE id = ?", (crop_id,)
+                ).fetchone()
+            path = row[0] if row else None
+            if path:
+                self._paths.put(key, path)
+        return path
+
     def get_all_embeddings(self) -> List[dict]:
         """Get all embeddings with their person name (for cache rebuild)."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             cursor = conn.execute(
                 "SELECT pe.id, pe.person_id, kp.name, pe.embedding "
                 "FROM person_embeddings pe "
@@ -336,28 +871,30 @@ class DatabaseManager:
 
     def add_face_crop(self, event_id: int, image_path: str) -> int:
         """Insert an unrecognised face crop. Returns new crop id."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute(
                 "INSERT INTO face_crops (event_id, image_path, created_at) VALUES (?, ?, ?)",
                 (event_id, image_path, datetime.now().isoformat()),
             )
             conn.commit()
+            _publish_inbox_count(conn)
             assert cursor.lastrowid is not None
             return cursor.lastrowid
 
     def dismiss_face_crop(self, crop_id: int) -> bool:
         """Mark a face crop as dismissed. Returns True if found and updated."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             updated = conn.execute(
                 "UPDATE face_crops SET dismissed = 1 WHERE id = ?", (crop_id,)
             ).rowcount
             conn.commit()
+            if updated:
+                _publish_inbox_count(conn)
         return updated > 0
 
     def get_face_crops(self, dismissed: bool = False) -> List[dict]:
         """Get face crops with event timestamp (JOIN doorbell_events)."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             cursor = conn.execute(
                 "SELECT fc.id, fc.event_id, fc.image_path, fc.dismissed, "
                 "fc.created_at, de.timestamp as event_timestamp "
@@ -371,8 +908,7 @@ class DatabaseManager:
 
     def get_face_crop(self, crop_id: int) -> Optional[dict]:
         """Get a single face crop by id."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             cursor = conn.execute(
                 "SELECT fc.id, fc.event_id, fc.image_path, fc.dismissed, "
                 "fc.created_at, de.timestamp as event_timestamp "
@@ -386,118 +922,546 @@ class DatabaseManager:
 
     def get_face_crop_count(self, dismissed: bool = False) -> int:
         """Return count of face crops matching dismissed flag."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             return conn.execute(
                 "SELECT COUNT(*) FROM face_crops WHERE dismissed = ?",
                 (1 if dismissed else 0,),
             ).fetchone()[0]
 
     def get_doorbell_events(
-        self, limit: int = 100, offset: int = 0
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        before: Optional[str] = None,
+        filters: Optional[EventFilter] = None,
     ) -> List[DoorbellEvent]:
-        """Get doorbell events with pagination."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                f"SELECT {_EVENT_COLUMNS} FROM doorbell_events"
-                " ORDER BY timestamp DESC LIMIT ? OFFSET ?",
-                (limit, offset),
-            )
-            return [_row_to_event(row) for row in cursor.fetchall()]
+        """Get doorbell events with pagination (newest first)."""
+        return self.get_doorbell_events_page(
+            limit=limit, offset=offset, before=before, filters=filters
+        )[0]
+
+    def get_doorbell_events_page(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        before: Optional[str] = None,
+        filters: Optional[EventFilter] = None,
+    ) -> Tuple[List[DoorbellEvent], Optional[str]]:
+        """Get one page of events plus the cursor for the next page.
+
+        ``before`` is a cursor from a previous page; the query seeks straight to
+        it on idx_events_timestamp_id, so deep pages cost the same as the first.
+        ``filters`` are evaluated in SQL (see _event_filter_clauses).
+        Returns ``(events, next_cursor)`` — next_cursor is None on the last page.
+        Raises ValueError for a malformed cursor.
+        """
+        clauses, params = _event_filter_clauses(filters)
+        if before:
+            clauses.append("(timestamp, id) < (?, ?)")
+            params.extend(decode_event_cursor(before))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {_EVENT_COLUMNS} FROM doorbell_events_compat de{where}"
+                " ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+                (*params, limit + 1, offset),
+            ).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_event_cursor(rows[-1]["timestamp"], rows[-1]["id"])
+        return [_row_to_event(row) for row in rows], next_cursor
 
     def get_doorbell_event(self, event_id: int) -> Optional[DoorbellEvent]:
         """Get a single doorbell event by ID."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             cursor = conn.execute(
-                f"SELECT {_EVENT_COLUMNS} FROM doorbell_events WHERE id = ?",
+                f"SELECT {_EVENT_COLUMNS} FROM doorbell_events_compat WHERE id = ?",
                 (event_id,),
             )
             row = cursor.fetchone()
             return _row_to_event(row) if row else None
 
     def get_event_count(self) -> int:
-        """Return total number of doorbell events (fast COUNT query)."""
-        with sqlite3.connect(self.db_path) as conn:
-            return conn.execute(
-                "SELECT COUNT(*) FROM doorbell_events"
-            ).fetchone()[0]
+        """Return total number of doorbell events (one ring_stats row)."""
+        return self.get_ring_totals()["rings"]
 
     def get_today_event_count(self) -> int:
-        """Return number of doorbell events recorded today (since midnight local time)."""
-        today_midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        with sqlite3.connect(self.db_path) as conn:
-            return conn.execute(
-                "SELECT COUNT(*) FROM doorbell_events WHERE timestamp >= ?",
-                (today_midnight.strftime('%Y-%m-%d %H:%M:%S'),),
-            ).fetchone()[0]
+        """Return number of doorbell events recorded today (local time)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT rings FROM ring_stats WHERE period = 'day' AND bucket = ?",
+                (datetime.now().strftime("%Y-%m-%d"),),
+            ).fetchone()
+        return row[0] if row else 0
+
+    def get_ring_totals(self) -> Dict[str, int]:
+        """All-time rings and known/unknown faces."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT rings, known_faces, unknown_faces FROM ring_stats "
+                "WHERE period = 'all' AND bucket = ''"
+            ).fetchone()
+        if row is None:
+            return {"rings": 0, "known_faces": 0, "unknown_faces": 0}
+        return dict(row)
+
+    def get_ring_heatmap(self, start: datetime, end: datetime) -> List[List[int]]:
+        """Rings in [start, end) by weekday (Monday first) and hour of day: 7 x 24."""
+        heatmap = [[0] * 24 for _ in range(7)]
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT (CAST(strftime('%w', bucket || ':00') AS INTEGER) + 6) % 7, "
+                "CAST(substr(bucket, 12, 2) AS INTEGER), SUM(rings) "
+                "FROM ring_stats WHERE period = 'hour' AND bucket >= ? AND bucket < ? "
+                "GROUP BY 1, 2",
+                (start.strftime("%Y-%m-%dT%H"), end.strftime("%Y-%m-%dT%H")),
+            ).fetchall()
+        for weekday, hour, rings in rows:
+            if weekday is not None and hour is not None:
+                heatmap[weekday][hour] = rings
+        return heatmap
+
+    def get_ring_timeseries(self, period: str, start: datetime, end: datetime) -> List[dict]:
+        """Per-hour or per-day ring and face counts in [start, end), oldest first.
+
+        Buckets without rings are omitted. Day buckets also carry rings per
+        weather condition.
+        """
+        fmt = {"hour": "%Y-%m-%dT%H", "day": "%Y-%m-%d"}[period]
+        bounds = (start.strftime(fmt), end.strftime(fmt))
+        with self._connect() as conn:
+            series = [
+                dict(row) for row in conn.execute(
+                    "SELECT bucket, rings, known_faces, unknown_faces FROM ring_stats "
+                    "WHERE period = ? AND bucket >= ? AND bucket < ? AND rings > 0 "
+                    "ORDER BY bucket",
+                    (period, *bounds),
+                )
+            ]
+            if period == "day":
+                weather: Dict[str, Dict[str, int]] = {}
+                for day, condition, rings in conn.execute(
+                    "SELECT day, condition, rings FROM ring_weather_stats "
+                    "WHERE day >= ? AND day < ? AND rings > 0",
+                    bounds,
+                ):
+                    weather.setdefault(day, {})[condition] = rings
+                for point in series:
+                    point["weather"] = weather.get(point["bucket"], {})
+        return series
+
+    def search_events(
+        self, query: str, limit: int = 20, offset: int = 0
+    ) -> Tuple[List[Tuple[DoorbellEvent, str]], Optional[int]]:
+        """Events whose description or comment matches query, best match first.
+
+        Every word must match (stemmed, so "rainy" finds "rain"); the last one
+        also matches as a prefix. Returns ``([(event, snippet), ...],
+        next_offset)``; snippets are HTML-escaped with matches in <mark>, and
+        next_offset is None on the last page.
+        """
+        words = _search_words(query)
+        if not words:
+            return [], None
+        if self.fts_enabled:
+            # Ranked on the index alone, then only the page is joined to the
+            # view, so face_data is built for `limit` rows rather than every match.
+            sql = (
+                f"SELECT {_qualified_event_columns('e')}, m.snippet FROM ("
+                "  SELECT rowid, bm25(events_fts) AS score, snippet(events_fts, 0, "
+                f"  char(1), char(2), '…', {_SNIPPET_TOKENS}) AS snippet"
+                "  FROM events_fts WHERE events_fts MATCH ?"
+                "  ORDER BY score, rowid DESC LIMIT ? OFFSET ?"
+                ") m JOIN doorbell_events_compat e ON e.id = m.rowid"
+                " ORDER BY m.score, m.rowid DESC"
+            )
+            params: List[Any] = [_fts_query(words)]
+        else:
+            sql = (
+                f"SELECT {_EVENT_COLUMNS}, ai_message AS snippet FROM doorbell_events_compat"
+                f" WHERE {' AND '.join(['ai_message LIKE ?'] * len(words))}"
+                " ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?"
+            )
+            params = [f"%{word}%" for word in words]
+        with self._connect() as conn:
+            rows = conn.execute(sql, (*params, limit + 1, offset)).fetchall()
+        next_offset = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_offset = offset + limit
+        return [(_row_to_event(row), _highlight(row["snippet"])) for row in rows], next_offset
 
     def get_last_event(self) -> Optional[DoorbellEvent]:
         """Return the most recent doorbell event."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             cursor = conn.execute(
-                f"SELECT {_EVENT_COLUMNS} FROM doorbell_events"
-                " ORDER BY timestamp DESC LIMIT 1"
+                f"SELECT {_EVENT_COLUMNS} FROM doorbell_events_compat"
+                " ORDER BY timestamp DESC, id DESC LIMIT 1"
             )
             row = cursor.fetchone()
             return _row_to_event(row) if row else None
 
     def update_event_comment(self, event_id: int, comment: Optional[str]) -> None:
         """Update the comment/ai_message for an event."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.execute(
                 "UPDATE doorbell_events SET ai_message = ? WHERE id = ?",
                 (comment, event_id),
             )
             conn.commit()
+        event_bus.publish("event_updated", {"id": event_id, "ai_message": comment})
 
-    def cleanup_old_events(self) -> int:
-        """Clean up old events based on retention policy. Returns deleted count."""
-        cutoff_date = datetime.now() - timedelta(days=settings.retention_days)
+    def purge_events_before(self, cutoff: datetime, limit: int) -> Tuple[int, List[str]]:
+        """Delete up to `limit` of the oldest events older than cutoff.
 
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                "SELECT image_path FROM doorbell_events WHERE timestamp < ?",
-                (cutoff_date.isoformat(),),
-            )
-            image_paths = [row[0] for row in cursor.fetchall()]
-
-            deleted_count = conn.execute(
-                "DELETE FROM doorbell_events WHERE timestamp < ?",
-                (cutoff_date.isoformat(),),
-            ).rowcount
+        One short transaction per call, walking idx_events_timestamp_id. Face
+        crops and face rows go with the event. Returns (events deleted, file
+        paths); the caller removes the files with remove_event_files().
+        """
+        with self._connect() as conn:
+            event_ids = [
+                row[0] for row in conn.execute(
+                    "SELECT id FROM doorbell_events WHERE timestamp < ? "
+                    "ORDER BY timestamp, id LIMIT ?",
+                    (cutoff.isoformat(), limit),
+                ).fetchall()
+            ]
+            if not event_ids:
+                return 0, []
+            deleted_count, file_paths = _delete_event_rows(conn, event_ids)
             conn.commit()
+            _publish_events_deleted(conn, event_ids, deleted_count)
+
+        self._paths.clear()  # their face crops are gone
+        return deleted_count, file_paths
 
-        _delete_image_files(image_paths)
-        return deleted_count
+    def delete_events(self, event_ids: List[int]) -> Tuple[int, List[str]]:
+        """Delete multiple events by their IDs.
 
-    def delete_events(self, event_ids: List[int]) -> int:
-        """Delete multiple events by their IDs and associated image files."""
+        Returns (events deleted, file paths); the caller removes the images,
+        thumbnails and crop files with remove_event_files().
+        """
         if not event_ids:
-            return 0
+            return 0, []
+
+        with self._connect() as conn:
+            deleted_count, file_paths = _delete_event_rows(conn, event_ids)
+            conn.commit()
+            _publish_events_deleted(conn, event_ids, deleted_count)
 
-        placeholders = ",".join("?" * len(event_ids))
-        with sqlite3.connect(self.db_path) as conn:
+        self._paths.clear()  # their face crops are gone
+        return deleted_count, file_paths
+
+    # ── Ring job queue ────────────────────────────────────────────────────────
+
+    def enqueue_ring_job(self, params: Dict[str, Any]) -> int:
+        """Persist a ring for the workers. Returns the job id."""
+        with self._connect() as conn:
             cursor = conn.execute(
-                f"SELECT image_path FROM doorbell_events WHERE id IN ({placeholders})",
-                event_ids,
+                "INSERT INTO ring_jobs (params, created_at) VALUES (?, ?)",
+                (json.dumps(params), datetime.now().isoformat()),
             )
-            image_paths = [row[0] for row in cursor.fetchall()]
+            conn.commit()
+            assert cursor.lastrowid is not None
+            return cursor.lastrowid
+
+    def claim_ring_job(self) -> Optional[Dict[str, Any]]:
+        """Mark the oldest queued job running and return it (None if idle)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "UPDATE ring_jobs SET status = 'running', started_at = ?, "
+                "attempts = attempts + 1 "
+                "WHERE id = (SELECT id FROM ring_jobs WHERE status = 'queued' "
+                "ORDER BY id LIMIT 1) RETURNING *",
+                (datetime.now().isoformat(),),
+            ).fetchone()
+            conn.commit()
+        return _row_to_ring_job(row) if row else None
+
+    def checkpoint_ring_job(
+        self, job_id: int, checkpoint: Dict[str, Any], stage_ms: Dict[str, int]
+    ) -> None:
+        """Record the outputs and timings of the stages completed so far."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE ring_jobs SET checkpoint = ?, stage_ms = ? WHERE id = ?",
+                (json.dumps(checkpoint), json.dumps(stage_ms), job_id),
+            )
+            conn.commit()
+
+    def finish_ring_job(self, job_id: int, status: str, error: Optional[str] = None) -> None:
+        """Close a job as 'done' or 'failed'."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE ring_jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, error, datetime.now().isoformat(), job_id),
+            )
+            conn.commit()
 
-            deleted_count = conn.execute(
-                f"DELETE FROM doorbell_events WHERE id IN ({placeholders})",
-                event_ids,
+    def requeue_interrupted_ring_jobs(self, max_attempts: int) -> Tuple[int, int]:
+        """Requeue jobs left running by a restart; give up on ones tried max_attempts times.
+
+        Returns (requeued, failed).
+        """
+        with self._connect() as conn:
+            failed = conn.execute(
+                "UPDATE ring_jobs SET status = 'failed', finished_at = ?, "
+                "error = 'interrupted too many times' "
+                "WHERE status = 'running' AND attempts >= ?",
+                (datetime.now().isoformat(), max_attempts),
+            ).rowcount
+            requeued = conn.execute(
+                "UPDATE ring_jobs SET status = 'queued' WHERE status = 'running'"
             ).rowcount
             conn.commit()
+        return requeued, failed
+
+    def get_ring_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM ring_jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_ring_job(row) if row else None
 
-        _delete_image_files(image_paths)
-        return deleted_count
+    def get_ring_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent jobs first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM ring_jobs ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [_row_to_ring_job(row) for row in rows]
+
+    def get_ring_queue_counts(self) -> Dict[str, Any]:
+        """Jobs per status and the oldest queued job's created_at."""
+        with self._connect() as conn:
+            counts = {
+                row[0]: row[1] for row in conn.execute(
+                    "SELECT status, COUNT(*) FROM ring_jobs GROUP BY status"
+                )
+            }
+            oldest = conn.execute(
+                "SELECT MIN(created_at) FROM ring_jobs WHERE status = 'queued'"
+            ).fetchone()[0]
+        return {"counts": counts, "oldest_queued_at": oldest}
+
+    def prune_ring_jobs(self, before: datetime) -> int:
+        """Delete finished jobs older than before. Returns rows deleted."""
+        with self._connect() as conn:
+            deleted = conn.execute(
+                "DELETE FROM ring_jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (before.isoformat(),),
+            ).rowcount
+            conn.commit()
+        return deleted
 
 
 # ── Module-level helpers ──────────────────────────────────────────────────────
 
 
+def _timestamp_bound(value: datetime) -> str:
+    """Format a datetime for comparison against the stored timestamp text.
+
+    A bare date sorts before every timestamp on that day whether it was stored
+    with a 'T' (isoformat) or ' ' (legacy CURRENT_TIMESTAMP) separator, so
+    midnight bounds are emitted date-only.
+    """
+    if value.time() == datetime.min.time():
+        return value.date().isoformat()
+    return value.isoformat()
+
+
+def _event_filter_clauses(filters: Optional[EventFilter]) -> Tuple[List[str], list]:
+    """Translate an EventFilter into WHERE clauses + params for doorbell_events.
+
+    Any face-based filter also adds the literal ``faces_detected > 0`` term so
+    SQLite can choose the idx_events_with_faces partial index.
+    """
+    clauses: List[str] = []
+    params: list = []
+    if filters is None:
+        return clauses, params
+    if filters.start is not None:
+        clauses.append("timestamp >= ?")
+        params.append(_timestamp_bound(filters.start))
+    if filters.end is not None:
+        clauses.append("timestamp < ?")
+        params.append(_timestamp_bound(filters.end))
+    if filters.min_faces or filters.person_id is not None or filters.unknown_only:
+        clauses.append("faces_detected > 0")
+    if filters.min_faces and filters.min_faces > 1:
+        clauses.append("faces_detected >= ?")
+        params.append(filters.min_faces)
+    if filters.person_id is not None:
+        clauses.append("de.id IN (SELECT event_id FROM event_faces WHERE person_id = ?)")
+        params.append(filters.person_id)
+    if filters.unknown_only:
+        # Unary + stops the planner driving this from idx_event_faces_person
+        # (every unknown face ever seen); probe idx_event_faces_event per event.
+        clauses.append(
+            "EXISTS (SELECT 1 FROM event_faces ef WHERE ef.event_id = de.id "
+            "AND +ef.person_id IS NULL AND ef.name = 'Unknown')"
+        )
+    return clauses, params
+
+
+def encode_event_cursor(timestamp: str, event_id: int) -> str:
+    """Opaque keyset cursor for the event at (timestamp, id).
+
+    Encodes the raw stored timestamp string rather than a parsed datetime so the
+    seek compares exactly like ORDER BY does, whatever format the row was written in.
+    """
+    raw = f"{timestamp}|{event_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_event_cursor(cursor: str) -> Tuple[str, int]:
+    """Inverse of encode_event_cursor. Raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, event_id = raw.rsplit("|", 1)
+        return timestamp, int(event_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def _insert_event_faces(
+    conn: sqlite3.Connection, event_id: int, timestamp: str, faces: List[Dict[str, Any]]
+) -> List[int]:
+    """Insert event_faces rows for one event; the caller owns the transaction.
+
+    Returns the new row ids in face order.
+    """
+    ids = []
+    for idx, face in enumerate(faces):
+        if not isinstance(face, dict):
+            continue
+        bbox = list(face.get("bbox") or [])[:4]
+        bbox += [None] * (4 - len(bbox))
+        row_id = conn.execute(
+            "INSERT INTO event_faces (event_id, face_idx, person_id, name, "
+            "bbox_x, bbox_y, bbox_w, bbox_h, score, det_score, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (event_id, idx, face.get("person_id"), face.get("name") or "Unknown",
+             *bbox, face.get("score"), face.get("det_score"), timestamp),
+        ).lastrowid
+        assert row_id is not None
+        ids.append(row_id)
+    return ids
+
+
+# ring_stats periods and the SQL deriving each one's bucket from a timestamp.
+_STATS_BUCKETS = {
+    "hour": "strftime('%Y-%m-%dT%H', {ts})",
+    "day": "strftime('%Y-%m-%d', {ts})",
+    "all": "''",
+}
+
+
+def _stats_bucket(period: str, ts: str) -> str:
+    return f"COALESCE({_STATS_BUCKETS[period].format(ts=ts)}, '')"
+
+
+def _ring_stats_triggers() -> List[Tuple[str, str]]:
+    """(name, CREATE TRIGGER) pairs keeping ring_stats and ring_weather_stats
+    in step with doorbell_events and event_faces, including cascaded deletes.
+    """
+    triggers = []
+    for action, row, sign in (("INSERT", "NEW", 1), ("DELETE", "OLD", -1)):
+        ring_buckets = ", ".join(
+            f"('{period}', {_stats_bucket(period, row + '.timestamp')}, {sign})"
+            for period in _STATS_BUCKETS
+        )
+        face_buckets = ", ".join(
+            f"('{period}', {_stats_bucket(period, row + '.timestamp')}, "
+            f"{sign} * ({row}.name <> 'Unknown'), {sign} * ({row}.name = 'Unknown'))"
+            for period in _STATS_BUCKETS
+        )
+        triggers.append((
+            f"trg_ring_stats_event_{action.lower()}",
+            f"""
+            CREATE TRIGGER trg_ring_stats_event_{action.lower()}
+            AFTER {action} ON doorbell_events
+            BEGIN
+                INSERT INTO ring_stats (period, bucket, rings) VALUES {ring_buckets}
+                ON CONFLICT (period, bucket) DO UPDATE SET rings = rings + excluded.rings;
+                INSERT INTO ring_weather_stats (day, condition, rings) VALUES (
+                    {_stats_bucket("day", row + ".timestamp")},
+                    COALESCE({row}.weather_condition, 'unknown'), {sign}
+                )
+                ON CONFLICT (day, condition) DO UPDATE SET rings = rings + excluded.rings;
+            END
+            """,
+        ))
+        triggers.append((
+            f"trg_ring_stats_face_{action.lower()}",
+            f"""
+            CREATE TRIGGER trg_ring_stats_face_{action.lower()}
+            AFTER {action} ON event_faces
+            BEGIN
+                INSERT INTO ring_stats (period, bucket, known_faces, unknown_faces)
+                VALUES {face_buckets}
+                ON CONFLICT (period, bucket) DO UPDATE SET
+                    known_faces = known_faces + excluded.known_faces,
+                    unknown_faces = unknown_faces + excluded.unknown_faces;
+            END
+            """,
+        ))
+    return triggers
+
+
+def _events_fts_triggers() -> List[Tuple[str, str]]:
+    """(name, CREATE TRIGGER) pairs keeping events_fts in step with
+    doorbell_events: new rings, edited comments and deletes (cascaded or not).
+    """
+    delete = (
+        "INSERT INTO events_fts (events_fts, rowid, ai_message) "
+        "VALUES ('delete', OLD.id, OLD.ai_message);"
+    )
+    insert = "INSERT INTO events_fts (rowid, ai_message) VALUES (NEW.id, NEW.ai_message);"
+    return [
+        (name, f"CREATE TRIGGER {name} AFTER {action} ON doorbell_events BEGIN {body} END")
+        for name, action, body in (
+            ("trg_events_fts_insert", "INSERT", insert),
+            ("trg_events_fts_delete", "DELETE", delete),
+            ("trg_events_fts_update", "UPDATE OF ai_message", delete + " " + insert),
+        )
+    ]
+
+
+# Words too common to narrow a search; dropped unless the query is nothing else.
+_SEARCH_STOPWORDS = frozenset(
+    "a an and are at by for from in into is of on or the to was with".split()
+)
+_SNIPPET_TOKENS = 12
+
+
+def _search_words(query: str) -> List[str]:
+    words = re.findall(r"\w+", query.lower())
+    return [w for w in words if w not in _SEARCH_STOPWORDS] or words
+
+
+def _fts_query(words: List[str]) -> str:
+    """An FTS5 MATCH expression: all words, each quoted so none is read as
+    an operator, the last also as a prefix.
+    """
+    return " ".join(f'"{w}"' for w in words) + "*"
+
+
+def _qualified_event_columns(alias: str) -> str:
+    return ", ".join(f"{alias}.{col.strip()}" for col in _EVENT_COLUMNS.split(","))
+
+
+def _highlight(snippet: Optional[str]) -> str:
+    """Escape an FTS snippet and turn its match markers into <mark> tags."""
+    return html.escape(snippet or "").replace("\x01", "<mark>").replace("\x02", "</mark>")
+
+
+def _row_to_ring_job(row: sqlite3.Row) -> Dict[str, Any]:
+    job = dict(row)
+    for key in ("params", "checkpoint", "stage_ms"):
+        job[key] = json.loads(job[key])
+    return job
+
+
 def _row_to_event(row: sqlite3.Row) -> DoorbellEvent:
     return DoorbellEvent(
         id=row["id"],
@@ -507,20 +1471,160 @@ def _row_to_event(row: sqlite3.Row) -> DoorbellEvent:
         weather_condition=row["weather_condition"],
         weather_temperature=row["weather_temperature"],
         weather_humidity=row["weather_humidity"],
+        weather_age_secs=row["weather_age_secs"],
         faces_detected=row["faces_detected"],
         face_data=row["face_data"],
     )
 
 
-def _delete_image_files(image_paths: List[str]) -> None:
+def _delete_event_rows(conn: sqlite3.Connection, event_ids: List[int]) -> Tuple[int, List[str]]:
+    """Delete events (crops and faces cascade) and return the files they owned.
+
+    Files are the snapshot, its ring clip (if one was recorded) and face crops.
+    The caller owns the transaction and removes the files once it has committed.
+    """
+    placeholders = ",".join("?" * len(event_ids))
+    file_paths = []
+    for image_path, is_event in conn.execute(
+        f"SELECT image_path, 1 FROM doorbell_events WHERE id IN ({placeholders}) "
+        f"UNION ALL SELECT image_path, 0 FROM face_crops WHERE event_id IN ({placeholders})",
+        event_ids + event_ids,
+    ).fetchall():
+        file_paths.append(image_path)
+        if is_event:
+            file_paths.append(clip_path_for(image_path))
+    deleted_count = conn.execute(
+        f"DELETE FROM doorbell_events WHERE id IN ({placeholders})",
+        event_ids,
+    ).rowcount
+    return deleted_count, file_paths
+
+
+def _publish_inbox_count(conn: sqlite3.Connection) -> None:
+    """Push the face inbox count to live clients (skips the query if there are none)."""
+    if event_bus.active:
+        count = conn.execute("SELECT COUNT(*) FROM face_crops WHERE dismissed = 0").fetchone()[0]
+        event_bus.publish("inbox", {"count": count})
+
+
+def _publish_events_deleted(conn: sqlite3.Connection, event_ids: List[int], count: int) -> None:
+    if not count:
+        return
+    event_bus.publish("events_deleted", {"ids": [int(i) for i in event_ids]})
+    event_bus.publish("stats", {"total_events": -count})
+    _publish_inbox_count(conn)
+
+
+def remove_event_files(file_paths: List[str]) -> int:
+    """Evict the thumbnails of deleted events and remove their files.
+
+    Blocking; run it with asyncio.to_thread once the delete has committed, so
+    the unlinks never hold up the database writer. Returns the files removed.
+    """
+    thumbnail_cache.evict(file_paths)
+    return _delete_image_files(file_paths)
+
+
+def _delete_image_files(image_paths: List[str]) -> int:
+    """Remove files, tolerating ones already gone. Returns how many were removed."""
+    removed = 0
     for image_path in image_paths:
         try:
             os.remove(image_path)
+            removed += 1
         except FileNotFoundError:
             pass
         except Exception as e:
             logger.error("Error deleting image", path=image_path, error=str(e))
+    return removed
+
+
+_READER_THREADS = 4
+
+T = TypeVar("T")
+
+
+class DatabaseExecutor:
+    """Runs DatabaseManager calls off the event loop.
+
+    Writes go to one dedicated thread and are applied in submission order,
+    so a long retention delete queues behind (and ahead of) other writes
+    instead of contending for SQLite's write lock; reads go to a small pool
+    and proceed concurrently under WAL. Every thread keeps its own pooled
+    connection (see DatabaseManager._get_connection).
+
+        events = await db_executor.read(db.get_doorbell_events, limit=10)
+        await db_executor.write(db.update_event_comment, event_id, comment)
+    """
+
+    def __init__(self, readers: int = _READER_THREADS):
+        self.readers = readers
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._reader_pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.writes = 0
+        self.pending_writes = 0
+        self.max_write_wait_ms = 0.0
+
+    def _pools(self) -> Tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+        with self._lock:
+            writer, readers = self._writer, self._reader_pool
+            if writer is None or readers is None:
+                writer = ThreadPoolExecutor(1, thread_name_prefix="db-writer")
+                readers = ThreadPoolExecutor(
+                    self.readers, thread_name_prefix="db-reader"
+                )
+                self._writer, self._reader_pool = writer, readers
+            return writer, readers
+
+    async def _run(
+        self, pool: ThreadPoolExecutor, fn: Callable[..., T], *args, **kwargs
+    ) -> T:
+        # Same context propagation as asyncio.to_thread.
+        call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(pool, call)
+
+    async def read(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run a read-only call on the reader pool."""
+        self.reads += 1
+        return await self._run(self._pools()[1], fn, *args, **kwargs)
+
+    async def write(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run a call that writes on the single writer thread, in order."""
+        self.writes += 1
+        self.pending_writes += 1
+        queued_at = time.monotonic()
+
+        def timed():
+            wait_ms = (time.monotonic() - queued_at) * 1000
+            self.max_write_wait_ms = max(self.max_write_wait_ms, wait_ms)
+            return fn(*args, **kwargs)
+
+        try:
+            return await self._run(self._pools()[0], timed)
+        finally:
+            self.pending_writes -= 1
+
+    def shutdown(self) -> None:
+        """Finish queued calls and stop the threads (recreated on next use)."""
+        with self._lock:
+            pools = (self._writer, self._reader_pool)
+            self._writer = self._reader_pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=True)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "reader_threads": self.readers,
+            "reads": self.reads,
+            "writes": self.writes,
+            "pending_writes": self.pending_writes,
+            "max_write_wait_ms": round(self.max_write_wait_ms, 1),
+        }
 
 
 # Global database instance
 db = DatabaseManager()
+db_executor = DatabaseExecutor()
@@ -0,0 +1,90 @@
+"""In-process publish/subscribe for the live UI stream (/api/events/stream).
+
+The ring pipeline and the database publish small messages (a ring started,
+an event was saved or changed, the face inbox count, stats deltas); every
+open browser tab holds one subscription and applies them incrementally
+instead of reloading the page or polling on a timer.
+"""
+
+import asyncio
+import itertools
+from typing import Any, Dict, Optional, Set
+
+import structlog
+
+logger = structlog.get_logger()
+
+_QUEUE_SIZE = 100  # messages buffered per client before it is told to resync
+
+
+class EventBus:
+    """Fans each published message out to a bounded queue per subscriber.
+
+    publish() never blocks and may be called from any thread (the database
+    runs in executor threads). A client that falls a full queue behind is
+    not allowed to hold messages back for everyone else: its backlog is
+    dropped and replaced by a single "resync" message, on which the UI
+    refetches what it shows.
+    """
+
+    def __init__(self, queue_size: int = _QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ids = itertools.count(1)
+        self.published = 0
+        self.resyncs = 0
+
+    @property
+    def active(self) -> bool:
+        """True while any client is subscribed (lets publishers skip extra work)."""
+        return bool(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def publish(self, kind: str, data: Dict[str, Any]) -> None:
+        """Send a message to every subscriber; a no-op when nobody listens."""
+        if not self._subscribers or self._loop is None:
+            return
+        message = {"id": next(self._ids), "type": kind, "data": data}
+        self.published += 1
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._deliver(message)
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._deliver, message)
+        except RuntimeError:
+            pass  # the loop has shut down; nobody is listening any more
+
+    def _deliver(self, message: Dict[str, Any]) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"id": message["id"], "type": "resync", "data": {}})
+                self.resyncs += 1
+                logger.debug("Live stream client fell behind, sent resync")
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "resyncs": self.resyncs,
+        }
+
+
+# Global bus
+event_bus = EventBus()
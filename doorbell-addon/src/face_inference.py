@@ -0,0 +1,313 @@
+"""Out-of-process InsightFace inference fed by a priority queue.
+
+Kept free of database/config imports: worker processes import this module on
+spawn and should load nothing but the model.
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Lower value runs first; a queued ring jumps every waiting enrollment/backfill job.
+PRIORITY_RING = 0
+PRIORITY_ENROLL = 1
+PRIORITY_BACKFILL = 2
+_PRIORITY_NAMES = {
+    PRIORITY_RING: "ring",
+    PRIORITY_ENROLL: "enroll",
+    PRIORITY_BACKFILL: "backfill",
+}
+
+# Background (non-ring) jobs waiting for a worker; further submitters wait.
+_MAX_QUEUED_BACKGROUND = 32
+
+# (bbox (x, y, w, h), embedding, det_score) — plain tuples so results pickle
+# without the worker importing face_recognition_service.
+RawFace = Tuple[Tuple[int, int, int, int], Any, float]
+
+
+def load_model(model_name: str, models_path: str) -> Any:
+    """Load and prepare an InsightFace FaceAnalysis model (CPU)."""
+    os.environ["INSIGHTFACE_HOME"] = models_path
+    from insightface.app import FaceAnalysis  # type: ignore
+    model = FaceAnalysis(
+        name=model_name,
+        allowed_modules=["detection", "recognition"],
+    )
+    model.prepare(ctx_id=-1, det_size=(640, 640))
+    return model
+
+
+def detect_faces(model: Any, image: Any) -> List[RawFace]:
+    """Run detection + recognition on an image file or a decoded RGB array.
+
+    Pass the (h, w, 3) uint8 array from Snapshot.pixels() when the caller has
+    already decoded the frame, so the JPEG is not decoded a second time.
+    """
+    import numpy as np
+    if isinstance(image, (str, os.PathLike)):
+        from PIL import Image, ImageOps
+        image = np.asarray(ImageOps.exif_transpose(Image.open(image)).convert("RGB"))
+    faces = model.get(image)
+    results = []
+    for face in faces:
+        x1, y1, x2, y2 = face.bbox.astype(int)
+        bbox = (int(x1), int(y1), int(x2 - x1), int(y2 - y1))
+        results.append((bbox, face.embedding, float(face.det_score)))
+    return results
+
+
+# ── Worker process side ──────────────────────────────────────────────────────
+
+_worker_model: Any = None
+
+
+def _init_worker(model_name: str, models_path: str) -> None:
+    global _worker_model
+    _worker_model = load_model(model_name, models_path)
+
+
+def _worker_ready() -> int:
+    """Answered only once the initializer has loaded the model; the pid tells
+    the workers apart."""
+    return os.getpid()
+
+
+def _worker_detect(image: Any) -> List[RawFace]:
+    return detect_faces(_worker_model, image)
+
+
+# ── Event loop side ──────────────────────────────────────────────────────────
+
+
+def _settle(
+    future: asyncio.Future, result: Any = None, error: Optional[BaseException] = None
+) -> None:
+    """Resolve a caller's future unless the caller already gave up."""
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class InferencePool:
+    """Process pool running InsightFace, one model copy per worker.
+
+    Jobs wait in a priority queue and one dispatcher per worker pulls the most
+    urgent, so concurrency never exceeds the worker count and a ring waits at
+    most for the job already running, never behind queued enrollment work.
+    If a worker dies (e.g. OOM-killed) the executor is broken for good, so it
+    is replaced with a fresh one; the jobs it was running fail.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._background_slots: Optional[asyncio.Semaphore] = None
+        self._dispatchers: List[asyncio.Task] = []
+        self._seq = itertools.count()
+        self.workers = 0
+        self.model_name: Optional[str] = None
+        self._model_args: Tuple[str, str] = ("", "")  # initargs: model name and path
+        self._restart_lock = asyncio.Lock()
+        self._broken = False  # the last restart failed; the next job retries it
+        self._restarts = 0
+        self._last_error: Optional[str] = None
+        self._queued: Dict[int, int] = {p: 0 for p in _PRIORITY_NAMES}
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._busy_secs = 0.0
+
+    def is_running(self) -> bool:
+        return self._executor is not None
+
+    async def start(self, workers: int, model_name: str, models_path: str) -> None:
+        """(Re)start the pool; returns once every worker has loaded the model,
+        so a broken model install fails here rather than on the first ring.
+        """
+        await self.stop()
+        self.workers = workers
+        self.model_name = model_name
+        self._model_args = (model_name, models_path)
+        try:
+            executor = await self._spawn()
+        except Exception:
+            self.workers = 0
+            raise
+        self._executor = executor
+        queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        slots = asyncio.Semaphore(_MAX_QUEUED_BACKGROUND)
+        self._queue, self._background_slots = queue, slots
+        self._queued = {p: 0 for p in _PRIORITY_NAMES}
+        self._broken = False
+        self._dispatchers = [
+            asyncio.create_task(self._dispatch(queue, slots)) for _ in range(workers)
+        ]
+        logger.info("Face inference pool started", workers=workers, model=model_name)
+
+    async def _spawn(self) -> ProcessPoolExecutor:
+        """A new executor with all its workers started and their models loaded.
+
+        The executor starts a process per job submitted while none is idle, so
+        one warm-up job per worker starts them all. A fast worker can take two
+        warm-ups, though, so rounds repeat until every worker has answered.
+        """
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=self._model_args,
+        )
+        loop = asyncio.get_running_loop()
+        ready: Set[int] = set()
+        try:
+            while True:
+                ready.update(await asyncio.gather(*(
+                    loop.run_in_executor(executor, _worker_ready)
+                    for _ in range(self.workers - len(ready))
+                )))
+                if len(ready) >= self.workers:
+                    return executor
+                await asyncio.sleep(0.1)
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    async def _replace_broken(self, broken: ProcessPoolExecutor) -> None:
+        """Swap a broken executor for a new one (once, however many jobs saw it).
+
+        If that fails the broken executor stays, so the next job fails fast
+        with BrokenProcessPool and tries again.
+        """
+        async with self._restart_lock:
+            if self._executor is not broken:
+                return
+            logger.warning("Face inference worker died, restarting the pool",
+                           workers=self.workers)
+            try:
+                executor = await self._spawn()
+            except Exception as e:
+                self._broken = True
+                self._last_error = str(e)
+                logger.error("Face inference pool restart failed", error=str(e))
+                return
+            self._executor = executor
+            self._broken = False
+            self._restarts += 1
+        await asyncio.to_thread(broken.shutdown, wait=False, cancel_futures=True)
+
+    async def stop(self) -> None:
+        """Stop dispatching and shut the worker processes down."""
+        for task in self._dispatchers:
+            task.cancel()
+        self._dispatchers = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                *_, future = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("Face inference pool stopped"))
+            self._queue = None
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+        self._background_slots = None
+        self._broken = False
+        self.workers = 0
+
+    async def analyze(self, image: Any, priority: int = PRIORITY_ENROLL) -> List[RawFace]:
+        """Queue an image (file path or decoded RGB array) and wait for its faces.
+
+        An array is pickled to the worker, which is much cheaper than the
+        worker decoding the JPEG again.
+        """
+        queue, slots = self._queue, self._background_slots
+        if queue is None or slots is None:
+            raise RuntimeError("Face inference pool is not running")
+        if priority != PRIORITY_RING:
+            await slots.acquire()
+        future = asyncio.get_running_loop().create_future()
+        self._queued[priority] += 1
+        queue.put_nowait((priority, next(self._seq), image, future))
+        return await future
+
+    async def _dispatch(self, queue: asyncio.PriorityQueue, slots: asyncio.Semaphore) -> None:
+        while True:
+            priority, _seq, image, future = await queue.get()
+            self._queued[priority] -= 1
+            if priority != PRIORITY_RING:
+                slots.release()
+            if future.done():  # caller gave up (cancelled)
+                continue
+            executor = self._executor
+            if executor is None:  # stopping
+                future.set_exception(RuntimeError("Face inference pool stopped"))
+                continue
+            await self._run_job(executor, image, future)
+
+    async def _run_job(
+        self, executor: ProcessPoolExecutor, image: Any, future: asyncio.Future
+    ) -> None:
+        """Run one detection on executor and settle the caller's future."""
+        self._in_flight += 1
+        started = time.monotonic()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                executor, _worker_detect, image
+            )
+        except asyncio.CancelledError:
+            _settle(future, error=RuntimeError("Face inference pool stopped"))
+            raise
+        except BrokenProcessPool as e:
+            self._failed += 1
+            self._last_error = str(e)
+            _settle(future, error=e)
+            await self._replace_broken(executor)
+        except Exception as e:
+            self._failed += 1
+            _settle(future, error=e)
+        else:
+            self._completed += 1
+            _settle(future, result=result)
+        finally:
+            self._in_flight -= 1
+            self._busy_secs += time.monotonic() - started
+
+    def get_status(self) -> Dict[str, Any]:
+        """Worker count, queue depth (per priority), job counters and restarts.
+
+        mode is "broken" while a dead worker's pool could not be replaced.
+        """
+        jobs = self._completed + self._failed
+        if not self.is_running():
+            mode = "in_process"
+        else:
+            mode = "broken" if self._broken else "process_pool"
+        return {
+            "mode": mode,
+            "workers": self.workers,
+            "restarts": self._restarts,
+            "last_error": self._last_error,
+            "in_flight": self._in_flight,
+            "queue_depth": sum(self._queued.values()),
+            "queued": {_PRIORITY_NAMES[p]: n for p, n in self._queued.items()},
+            "max_queued_background": _MAX_QUEUED_BACKGROUND,
+            "completed": self._completed,
+            "failed": self._failed,
+            "avg_inference_ms": round(self._busy_secs / jobs * 1000, 1) if jobs else None,
+        }
+
+
+# Global pool instance (started by FaceRecognitionService.initialize)
+inference_pool = InferencePool()
@@ -1,17 +1,32 @@
 """Optional face recognition service using InsightFace."""
 
 import os
+import threading
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import structlog
 
 from .config import settings
-from .database import db
+from .database import db, db_executor
+from .face_inference import (
+    PRIORITY_ENROLL,
+    detect_faces,
+    inference_pool,
+    load_model,
+)
+from .snapshot import crop_padded
 
 logger = structlog.get_logger()
 
 
+def _describe(image: Any) -> str:
+    """Log-friendly label for a path or decoded frame."""
+    if isinstance(image, (str, os.PathLike)):
+        return str(image)
+    return f"<frame {getattr(image, 'shape', '?')}>"
+
+
 @dataclass
 class FaceResult:
     """Raw face detection result."""
@@ -32,88 +47,269 @@ class IdentifiedFace:
     person_id: Optional[int] = None  # None for Unknown
 
 
+class EmbeddingCache:
+    """Known-person samples as one pre-normalised float32 matrix, patched in place.
+
+    Rows are unordered with spare capacity at the end, so adding a sample is an
+    amortised O(1) append and removing one moves the last row into its slot.
+    A person's score is their best sample's, so the best person for a face is
+    simply the owner of its best-scoring row. Names live in a per-person dict,
+    making a rename O(1). All access goes through one lock: edits come from
+    the event loop and worker threads, and rings score in a worker thread.
+    """
+
+    _MIN_CAPACITY = 64
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._matrix: Any = None  # np.ndarray (capacity, dim) float32, unit rows
+        self._embedding_ids: Any = None  # np.ndarray (capacity,) int64
+        self._person_ids: Any = None  # np.ndarray (capacity,) int64
+        self._size = 0
+        self._rows: Dict[int, int] = {}  # embedding_id -> row
+        self._person_samples: Dict[int, Set[int]] = {}  # person_id -> embedding ids
+        self._names: Dict[int, str] = {}  # person_id -> name
+
+    @classmethod
+    def build(cls, samples: List[Tuple[int, int, str, Any]]) -> "EmbeddingCache":
+        """Build from (embedding_id, person_id, name, embedding) tuples."""
+        cache = cls()
+        for sample in samples:
+            cache.add_sample(*sample)
+        return cache
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def dim(self) -> Optional[int]:
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    @property
+    def matrix(self) -> Any:
+        return self._matrix[: self._size] if self._matrix is not None else None
+
+    @property
+    def embedding_ids(self) -> Any:
+        return self._embedding_ids[: self._size] if self._matrix is not None else None
+
+    @property
+    def person_ids(self) -> Any:
+        return self._person_ids[: self._size] if self._matrix is not None else None
+
+    def name_of(self, person_id: int) -> Optional[str]:
+        return self._names.get(person_id)
+
+    def add_sample(self, embedding_id: int, person_id: int, name: str, embedding: Any) -> bool:
+        """Add (or replace) one sample. False if its dimension does not match."""
+        import numpy as np
+        vec = np.asarray(embedding, dtype=np.float32).ravel()
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.empty((self._MIN_CAPACITY, vec.size), dtype=np.float32)
+                self._embedding_ids = np.empty(self._MIN_CAPACITY, dtype=np.int64)
+                self._person_ids = np.empty(self._MIN_CAPACITY, dtype=np.int64)
+            elif vec.size != self._matrix.shape[1]:
+                logger.warning(
+                    "Skipping embedding with unexpected dimension",
+                    embedding_id=embedding_id,
+                    expected=self._matrix.shape[1],
+                )
+                return False
+            if embedding_id in self._rows:
+                self._remove_row(embedding_id)
+            if self._size == len(self._matrix):
+                self._grow()
+            row = self._size
+            self._matrix[row] = vec / (np.linalg.norm(vec) + 1e-10)
+            self._embedding_ids[row] = embedding_id
+            self._person_ids[row] = person_id
+            self._size += 1
+            self._rows[embedding_id] = row
+            self._person_samples.setdefault(person_id, set()).add(embedding_id)
+            self._names[person_id] = name
+            return True
+
+    def remove_sample(self, embedding_id: int) -> bool:
+        """Remove one sample. False if it was not cached."""
+        with self._lock:
+            if embedding_id not in self._rows:
+                return False
+            self._remove_row(embedding_id)
+            return True
+
+    def remove_person(self, person_id: int) -> int:
+        """Remove every sample of a person. Returns how many were removed."""
+        with self._lock:
+            embedding_ids = self._person_samples.get(person_id, set()).copy()
+            for embedding_id in embedding_ids:
+                self._remove_row(embedding_id)
+            self._names.pop(person_id, None)
+            return len(embedding_ids)
+
+    def rename_person(self, person_id: int, name: str) -> bool:
+        """Change the name reported for a person. False if they have no samples."""
+        with self._lock:
+            if person_id not in self._names:
+                return False
+            self._names[person_id] = name
+            return True
+
+    def best_matches(self, embeddings: List[Any]) -> List[Optional[Tuple[int, str, float]]]:
+        """Best (person_id, name, score) for each embedding; None if unscorable."""
+        import numpy as np
+        results: List[Optional[Tuple[int, str, float]]] = [None] * len(embeddings)
+        with self._lock:
+            if not self._size:
+                return results
+            dim = self._matrix.shape[1]
+            valid = [i for i, e in enumerate(embeddings) if np.asarray(e).size == dim]
+            if not valid:
+                return results
+            queries = np.stack([
+                np.asarray(embeddings[i], dtype=np.float32).ravel() for i in valid
+            ])
+            queries /= np.linalg.norm(queries, axis=1, keepdims=True) + 1e-10
+            # (samples x faces); row-major matrix on the left keeps it a streaming pass
+            scores = self._matrix[: self._size] @ queries.T
+            best_rows = scores.argmax(axis=0)
+            for col, (i, row) in enumerate(zip(valid, best_rows)):
+                person_id = int(self._person_ids[row])
+                results[i] = (person_id, self._names[person_id], float(scores[row, col]))
+        return results
+
+    def _grow(self) -> None:
+        import numpy as np
+        capacity = max(self._MIN_CAPACITY, 2 * len(self._matrix))
+        matrix = np.empty((capacity, self._matrix.shape[1]), dtype=np.float32)
+        matrix[: self._size] = self._matrix[: self._size]
+        self._matrix = matrix
+        self._embedding_ids = np.resize(self._embedding_ids, capacity)
+        self._person_ids = np.resize(self._person_ids, capacity)
+
+    def _remove_row(self, embedding_id: int) -> None:
+        """Swap the last row into the removed slot. Caller holds the lock."""
+        row = self._rows.pop(embedding_id)
+        person_id = int(self._person_ids[row])
+        last = self._size - 1
+        if row != last:
+            moved_id = int(self._embedding_ids[last])
+            self._matrix[row] = self._matrix[last]
+            self._embedding_ids[row] = moved_id
+            self._person_ids[row] = self._person_ids[last]
+            self._rows[moved_id] = row
+        self._size = last
+        samples = self._person_samples[person_id]
+        samples.discard(embedding_id)
+        if not samples:
+            del self._person_samples[person_id]
+            self._names.pop(person_id, None)
+
+
 class FaceRecognitionService:
     """Singleton service for face detection and recognition."""
 
     def __init__(self):
         self._model = None
         self._ready = False
-        self._embeddings_cache: Dict[int, Any] = {}  # {embedding_id: (person_id, name, emb)}
+        self._embeddings_cache = EmbeddingCache()
+        # Guards swapping in a rebuilt cache. While a rebuild's DB read is in
+        # flight, deltas are also logged and replayed onto the new cache, so
+        # an edit made meanwhile is not lost. Replay is idempotent.
+        self._cache_lock = threading.Lock()
+        self._rebuilds = 0
+        self._deltas: List[Tuple[str, tuple]] = []
 
     def is_ready(self) -> bool:
         return self._ready
 
+    def cached_sample_count(self) -> int:
+        return len(self._embeddings_cache)
+
+    def inference_status(self) -> dict:
+        return inference_pool.get_status()
+
     async def initialize(self) -> None:
-        """Load the InsightFace model in a thread pool (non-blocking startup)."""
+        """Load the InsightFace model without blocking startup.
+
+        With face_recognition_workers > 0 the model lives only in the worker
+        processes of the inference pool; with 0 it is loaded in-process.
+        """
         import asyncio
+        self._ready = False
         try:
-            await asyncio.to_thread(self._load_model)
-            self._refresh_embeddings_cache_sync()
+            if settings.face_recognition_workers > 0:
+                await inference_pool.start(
+                    settings.face_recognition_workers,
+                    settings.face_recognition_model,
+                    settings.insightface_models_path,
+                )
+                self._model = None
+            else:
+                await inference_pool.stop()
+                await asyncio.to_thread(self._load_model)
+            await self.refresh_embeddings_cache()
             self._ready = True
-            logger.info("Face recognition model loaded", model=settings.face_recognition_model)
+            logger.info(
+                "Face recognition model loaded",
+                model=settings.face_recognition_model,
+                workers=settings.face_recognition_workers,
+            )
         except Exception as e:
             logger.error("Failed to load face recognition model", error=str(e))
 
+    async def shutdown(self) -> None:
+        """Stop the inference worker processes."""
+        await inference_pool.stop()
+
     def _load_model(self) -> None:
         """Load InsightFace model (runs in thread pool)."""
-        os.environ["INSIGHTFACE_HOME"] = settings.insightface_models_path
-        from insightface.app import FaceAnalysis  # type: ignore
-        model = FaceAnalysis(
-            name=settings.face_recognition_model,
-            allowed_modules=["detection", "recognition"],
+        self._model = load_model(
+            settings.face_recognition_model, settings.insightface_models_path
         )
-        model.prepare(ctx_id=-1, det_size=(640, 640))
-        self._model = model
 
-    def analyze_image(self, image_path: str) -> List[FaceResult]:
-        """Detect faces in an image file. Synchronous — call via asyncio.to_thread."""
+    async def analyze(self, image: Any, priority: int = PRIORITY_ENROLL) -> List[FaceResult]:
+        """Detect faces in an image file or decoded RGB array on the inference pool.
+
+        Rings pass PRIORITY_RING to jump queued enrollment work. Falls back to
+        the in-process model (in a thread) when the pool is not running.
+        """
+        import asyncio
+        if not self._ready:
+            return []
+        if not inference_pool.is_running():
+            return await asyncio.to_thread(self.analyze_image, image)
+        try:
+            raw = await inference_pool.analyze(image, priority)
+        except Exception as e:
+            logger.error("Face analysis failed", image=_describe(image), error=str(e))
+            return []
+        return [FaceResult(bbox=b, embedding=e, det_score=d) for b, e, d in raw]
+
+    def analyze_image(self, image: Any) -> List[FaceResult]:
+        """Detect faces with the in-process model. Synchronous — call via asyncio.to_thread."""
         if not self._ready or self._model is None:
             return []
         try:
-            import numpy as np
-            from PIL import Image, ImageOps
-            img = ImageOps.exif_transpose(Image.open(image_path)).convert("RGB")
-            img_array = np.array(img)
-            faces = self._model.get(img_array)
-            results = []
-            for face in faces:
-                x1, y1, x2, y2 = face.bbox.astype(int)
-                bbox = (int(x1), int(y1), int(x2 - x1), int(y2 - y1))
-                results.append(FaceResult(
-                    bbox=bbox,
-                    embedding=face.embedding,
-                    det_score=float(face.det_score),
-                ))
-            return results
+            return [
+                FaceResult(bbox=b, embedding=e, det_score=d)
+                for b, e, d in detect_faces(self._model, image)
+            ]
         except Exception as e:
-            logger.error("Face analysis failed", image_path=image_path, error=str(e))
+            logger.error("Face analysis failed", image=_describe(image), error=str(e))
             return []
 
     def identify_faces(self, faces: List[FaceResult]) -> List[IdentifiedFace]:
         """Match detected faces against known persons using cosine similarity.
         Multiple embeddings per person: pick the best-scoring person.
+        Scores against the whole gallery — call via asyncio.to_thread.
         """
-        import numpy as np
+        matches = self._embeddings_cache.best_matches([f.embedding for f in faces])
         identified = []
-        for face in faces:
-            emb = face.embedding
-            norm_emb = emb / (np.linalg.norm(emb) + 1e-10)
-            # best_per_person: {person_id: (name, best_score)}
-            best_per_person: Dict[int, Any] = {}
-            for _emb_id, (person_id, person_name, known_emb) in self._embeddings_cache.items():
-                norm_known = known_emb / (np.linalg.norm(known_emb) + 1e-10)
-                score = float(np.dot(norm_emb, norm_known))
-                if score >= settings.face_recognition_threshold:
-                    prev = best_per_person.get(person_id)
-                    if prev is None or score > prev[1]:
-                        best_per_person[person_id] = (person_name, score)
-            if best_per_person:
-                best_person_id = max(
-                    best_per_person, key=lambda pid: best_per_person[pid][1]
-                )
-                best_name, best_score = best_per_person[best_person_id]
-            else:
-                best_person_id, best_name, best_score = None, "Unknown", 0.0
+        for face, match in zip(faces, matches):
+            best_person_id, best_name, best_score = None, "Unknown", 0.0
+            if match and match[2] >= settings.face_recognition_threshold:
+                best_person_id, best_name, best_score = match
             identified.append(IdentifiedFace(
                 bbox=face.bbox,
                 name=best_name,
@@ -124,115 +320,193 @@ class FaceRecognitionService:
         return identified
 
     def save_face_crop(
-        self, image_path: str, bbox: tuple, event_id: int, face_idx: int
+        self, image: Any, bbox: tuple, prefix: str, face_idx: int
     ) -> str:
-        """Crop an unrecognised face and save to face_crops directory.
-        bbox is (x, y, w, h) — same format returned by analyze_image().
+        """Crop an unrecognised face and save it as face_crops/<prefix>_<face_idx>.jpg.
+        image is a file path or an already-decoded upright RGB PIL image
+        (Snapshot.image()); bbox is (x, y, w, h) as returned by analyze_image().
+        The ring pipeline passes the snapshot's file stem as prefix, so crops
+        can be written before their event row exists.
         """
-        from PIL import Image, ImageOps
-        img = ImageOps.exif_transpose(Image.open(image_path)).convert("RGB")
-        x, y, w, h = bbox
-        padding = int(max(w, h) * 0.6)
-        x1 = max(0, x - padding)
-        y1 = max(0, y - padding)
-        x2 = min(img.width, x + w + padding)
-        y2 = min(img.height, y + h + padding)
-        crop = img.crop((x1, y1, x2, y2)).resize((200, 200))
+        if isinstance(image, (str, os.PathLike)):
+            from PIL import Image, ImageOps
+            image = ImageOps.exif_transpose(Image.open(image)).convert("RGB")
+        crop = crop_padded(image, bbox, 0.6, (200, 200))
         os.makedirs(settings.face_crops_path, exist_ok=True)
-        path = os.path.join(settings.face_crops_path, f"{event_id}_{face_idx}.jpg")
+        path = os.path.join(settings.face_crops_path, f"{prefix}_{face_idx}.jpg")
         crop.save(path, "JPEG")
         return path
 
-    def add_person(self, name: str, image_path: str) -> dict:
-        """Detect face in image, store embedding + thumbnail. Returns person dict."""
-        import io
-        import numpy as np
-        from PIL import Image, ImageOps
+    async def add_person(
+        self, name: str, image_path: str, faces: Optional[List[FaceResult]] = None
+    ) -> dict:
+        """Detect face in image, store embedding + thumbnail. Returns person dict.
 
-        os.makedirs(settings.persons_path, exist_ok=True)
+        Pass faces already detected via analyze() to skip in-process detection.
+        """
+        import asyncio
 
-        faces = self.analyze_image(image_path)
+        if faces is None:
+            faces = await asyncio.to_thread(self.analyze_image, image_path)
         if not faces:
             raise ValueError("No face detected in the uploaded image")
 
         best_face = max(faces, key=lambda f: f.det_score)
 
-        # Serialize embedding
-        buf = io.BytesIO()
-        np.save(buf, best_face.embedding)
-        embedding_bytes = buf.getvalue()
-
         # Create person record (no embedding in known_persons)
-        person_id = db.add_person(name)
+        person_id = await db_executor.write(db.add_person, name)
+        _, thumb_path = await self.add_sample(
+            person_id, name, image_path, best_face, set_avatar=True
+        )
+        return {"id": person_id, "name": name, "thumbnail_path": thumb_path}
+
+    async def add_sample(
+        self, person_id: int, name: str, image_path: str, face: FaceResult,
+        set_avatar: bool = False,
+    ) -> Tuple[int, Optional[str]]:
+        """Store a detected face as a new sample of person_id.
+
+        Only the SQL goes to the database writer; the thumbnail is cropped in
+        a worker thread so it never holds up other writes. Returns the
+        embedding id and the thumbnail path (None if it could not be saved).
+        """
+        import asyncio
+        import io
+        import numpy as np
+
+        buf = io.BytesIO()
+        np.save(buf, face.embedding)
 
         # Store embedding in DB first — if this fails, let the exception propagate
-        emb_id = db.add_person_embedding(person_id, embedding_bytes, None)
+        emb_id = await db_executor.write(
+            db.add_person_embedding, person_id, buf.getvalue(), None
+        )
 
         # Crop and save thumbnail (file I/O failures are non-fatal)
         thumb_path = None
         try:
-            img = ImageOps.exif_transpose(Image.open(image_path)).convert("RGB")
-            x, y, w, h = best_face.bbox
-            padding = int(max(w, h) * 0.2)
-            x1 = max(0, x - padding)
-            y1 = max(0, y - padding)
-            x2 = min(img.width, x + w + padding)
-            y2 = min(img.height, y + h + padding)
-            thumb = img.crop((x1, y1, x2, y2)).resize((200, 200))
-            tmp_thumb = os.path.join(settings.persons_path, f"{person_id}_tmp.jpg")
-            thumb.save(tmp_thumb, "JPEG")
-            thumb_path = os.path.join(settings.persons_path, f"{person_id}_{emb_id}.jpg")
-            os.rename(tmp_thumb, thumb_path)
-            db.update_person_embedding_thumbnail(emb_id, thumb_path)
-            db.update_person_thumbnail(person_id, thumb_path)
+            thumb_path = await asyncio.to_thread(
+                _save_sample_thumbnail, image_path, face.bbox, person_id, emb_id
+            )
+            await db_executor.write(db.update_person_embedding_thumbnail, emb_id, thumb_path)
+            if set_avatar:
+                await db_executor.write(db.update_person_thumbnail, person_id, thumb_path)
         except Exception as e:
             logger.warning("Failed to save person thumbnail", error=str(e))
 
-        # Update cache
-        self._refresh_embeddings_cache_sync()
-
-        return {"id": person_id, "name": name, "thumbnail_path": thumb_path}
+        self.cache_add_sample(emb_id, person_id, name, face.embedding)
+        return emb_id, thumb_path
 
-    def delete_person(self, person_id: int) -> bool:
+    async def delete_person(self, person_id: int) -> bool:
         """Remove person from DB and cache, deleting all thumbnail files."""
+        import asyncio
         # Collect all thumbnail paths before deletion
-        embeddings = db.get_person_embeddings(person_id)
+        embeddings = await db_executor.read(db.get_person_embeddings, person_id)
         thumb_paths = [e["thumbnail_path"] for e in embeddings if e["thumbnail_path"]]
-        deleted = db.delete_person(person_id)
+        deleted = await db_executor.write(db.delete_person, person_id)
         if deleted:
-            self._embeddings_cache = {
-                k: v for k, v in self._embeddings_cache.items()
-                if v[0] != person_id
-            }
-            for thumb in thumb_paths:
-                try:
-                    if os.path.exists(thumb):
-                        os.remove(thumb)
-                except Exception:
-                    pass
+            self.cache_remove_person(person_id)
+            await asyncio.to_thread(_remove_files, thumb_paths)
         return deleted
 
-    def refresh_embeddings_cache(self) -> None:
-        """Reload all embeddings from DB into memory."""
-        self._refresh_embeddings_cache_sync()
+    async def refresh_embeddings_cache(self) -> None:
+        """Reload all embeddings from DB into memory.
 
-    def _refresh_embeddings_cache_sync(self) -> None:
-        import io
-        import numpy as np
-        cache: Dict[int, Any] = {}
-        for row in db.get_all_embeddings():
-            try:
-                buf = io.BytesIO(row["embedding"])
-                emb = np.load(buf, allow_pickle=False)
-                cache[row["id"]] = (row["person_id"], row["name"], emb)
-            except Exception as e:
-                logger.warning(
-                    "Failed to load embedding",
-                    embedding_id=row["id"],
-                    error=str(e),
-                )
-        self._embeddings_cache = cache
-        logger.info("Embeddings cache refreshed", count=len(cache))
+        Full rebuild for startup and on-demand resyncs; routine edits use the
+        cache_* delta methods below instead. The read goes to the database
+        reader pool and the decode to a worker thread.
+        """
+        import asyncio
+        with self._cache_lock:
+            self._rebuilds += 1
+        cache = None
+        try:
+            rows = await db_executor.read(db.get_all_embeddings)
+            cache = await asyncio.to_thread(_build_cache, rows)
+        finally:
+            self._finish_rebuild(cache)
+        logger.info("Embeddings cache refreshed", count=len(self._embeddings_cache))
+
+    def _finish_rebuild(self, cache: Optional[EmbeddingCache]) -> None:
+        """Swap in a rebuilt cache (None if the rebuild failed) after replaying
+        the deltas logged during its read.
+        """
+        with self._cache_lock:
+            self._rebuilds -= 1
+            if cache is not None:
+                for method, args in self._deltas:
+                    getattr(cache, method)(*args)
+                self._embeddings_cache = cache
+            if not self._rebuilds:
+                self._deltas.clear()
+
+    def _apply_delta(self, method: str, *args: Any) -> None:
+        with self._cache_lock:
+            getattr(self._embeddings_cache, method)(*args)
+            if self._rebuilds:
+                self._deltas.append((method, args))
+
+    def cache_add_sample(
+        self, embedding_id: int, person_id: int, name: str, embedding: Any
+    ) -> None:
+        """Add one newly stored sample to the in-memory cache."""
+        self._apply_delta("add_sample", embedding_id, person_id, name, embedding)
+
+    def cache_remove_sample(self, embedding_id: int) -> None:
+        """Drop one deleted sample from the in-memory cache."""
+        self._apply_delta("remove_sample", embedding_id)
+
+    def cache_remove_person(self, person_id: int) -> None:
+        """Drop every sample of a deleted person from the in-memory cache."""
+        self._apply_delta("remove_person", person_id)
+
+    def cache_rename_person(self, person_id: int, name: str) -> None:
+        """Update the name the cache reports for a person."""
+        self._apply_delta("rename_person", person_id, name)
+
+
+def _save_sample_thumbnail(
+    image_path: str, bbox: tuple, person_id: int, emb_id: int
+) -> str:
+    """Crop a 200x200 sample thumbnail into persons_path and return its path."""
+    from PIL import Image, ImageOps
+
+    os.makedirs(settings.persons_path, exist_ok=True)
+    img = ImageOps.exif_transpose(Image.open(image_path)).convert("RGB")
+    thumb = crop_padded(img, bbox, 0.2, (200, 200))
+    tmp_thumb = os.path.join(settings.persons_path, f"{person_id}_{emb_id}.tmp")
+    thumb.save(tmp_thumb, "JPEG")
+    thumb_path = os.path.join(settings.persons_path, f"{person_id}_{emb_id}.jpg")
+    os.rename(tmp_thumb, thumb_path)
+    return thumb_path
+
+
+def _remove_files(paths: List[str]) -> None:
+    for path in paths:
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except Exception:
+            pass
+
+
+def _build_cache(rows: List[Dict[str, Any]]) -> EmbeddingCache:
+    """Decode get_all_embeddings() rows into a cache, skipping unreadable ones."""
+    import io
+    import numpy as np
+    samples = []
+    for row in rows:
+        try:
+            buf = io.BytesIO(row["embedding"])
+            emb = np.load(buf, allow_pickle=False)
+            samples.append((row["id"], row["person_id"], row["name"], emb))
+        except Exception as e:
+            logger.warning(
+                "Failed to load embedding",
+                embedding_id=row["id"],
+                error=str(e),
+            )
+    return EmbeddingCache.build(samples)
 
 
 # Module-level singleton
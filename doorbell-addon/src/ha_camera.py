@@ -1,19 +1,119 @@
 """Home Assistant camera entity integration."""
 
+import asyncio
 import os
-import subprocess
 import time
 from typing import Dict, Optional
 
 import requests
 import structlog
 
+from .clips import history_window_secs
 from .config import settings
+from .ha_registry import ha_registry
+from .http_client import http_client
+from .rtsp_grabber import rtsp_grabber
 
 logger = structlog.get_logger()
 
 _HTTP_TIMEOUT = 10
 _FFMPEG_TIMEOUT = 15
+_MAX_SNAPSHOT_BYTES = 20 * 1024 * 1024  # larger bodies are not a snapshot
+_CHUNK_BYTES = 64 * 1024
+
+
+class SnapshotTooLarge(Exception):
+    """The camera returned more than _MAX_SNAPSHOT_BYTES."""
+
+
+def _write_atomic(destination_path: str, data: bytes) -> None:
+    tmp_path = destination_path + ".part"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, destination_path)
+
+
+async def _stream_to_file(
+    url: str, destination_path: str, headers: Optional[Dict[str, str]] = None
+) -> int:
+    """GET url into destination_path via a temp file; returns the HTTP status.
+
+    The body is written chunk by chunk as it arrives (never held whole in
+    memory) and renamed into place only when complete, so readers never see
+    a partial image. Bodies over _MAX_SNAPSHOT_BYTES raise SnapshotTooLarge.
+    Chunk writes are small page-cache writes, done inline on the loop.
+    """
+    tmp_path = destination_path + ".part"
+    async with http_client.stream(
+        "GET", url, headers=headers, timeout=_HTTP_TIMEOUT
+    ) as response:
+        if response.status_code != 200:
+            return response.status_code
+        declared = int(response.headers.get("content-length") or 0)
+        if declared > _MAX_SNAPSHOT_BYTES:
+            raise SnapshotTooLarge(f"snapshot is {declared} bytes")
+        written = 0
+        try:
+            with open(tmp_path, "wb") as f:
+                async for chunk in response.aiter_bytes(_CHUNK_BYTES):
+                    written += len(chunk)
+                    if written > _MAX_SNAPSHOT_BYTES:
+                        raise SnapshotTooLarge(f"snapshot exceeds {_MAX_SNAPSHOT_BYTES} bytes")
+                    f.write(chunk)
+            os.replace(tmp_path, destination_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return 200
+
+
+async def _capture_rtsp_frame(camera_url: str, destination_path: str) -> bool:
+    """One-shot ffmpeg grab of a single RTSP frame, as an async subprocess."""
+    tmp_path = destination_path + ".part.jpg"
+    proc = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-y", "-i", camera_url, "-frames:v", "1", "-q:v", "2", tmp_path,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        _, stderr = await asyncio.wait_for(proc.communicate(), timeout=_FFMPEG_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.error("ffmpeg capture timed out", timeout=_FFMPEG_TIMEOUT)
+        return False
+    finally:
+        # Timed out, or the ring was cancelled (shutdown, pipeline timeout):
+        # never leave ffmpeg running behind us.
+        if proc.returncode is None:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+        if proc.returncode != 0 and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    if proc.returncode == 0 and os.path.exists(tmp_path):
+        os.replace(tmp_path, destination_path)
+        logger.info("Image captured from RTSP stream")
+        return True
+    logger.error("ffmpeg capture failed", stderr=stderr.decode(errors="ignore"))
+    return False
+
+
+async def _capture_rtsp(camera_url: str, destination_path: str) -> bool:
+    """The grabber's buffered frame if it has one, else a one-shot ffmpeg grab."""
+    frame = rtsp_grabber.latest_frame() if rtsp_grabber.is_running() else None
+    if frame is not None:
+        _write_atomic(destination_path, frame)
+        logger.info(
+            "Image captured from RTSP grabber",
+            frame_age_ms=rtsp_grabber.get_status()["frame_age_ms"],
+        )
+        return True
+    if rtsp_grabber.is_running():
+        logger.warning("RTSP grabber has no fresh frame, capturing directly")
+    return await _capture_rtsp_frame(camera_url, destination_path)
 
 
 class HACameraManager:
@@ -33,7 +133,7 @@ class HACameraManager:
             return None
         return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
 
-    def get_available_cameras(self) -> list:
+    async def get_available_cameras(self) -> list:
         """Get list of available camera entities from Home Assistant."""
         headers = self._get_headers()
         if not headers:
@@ -41,11 +141,6 @@ class HACameraManager:
             return []
 
         try:
-            response = requests.get(
-                f"{self.base_url}/states", headers=headers, timeout=_HTTP_TIMEOUT
-            )
-            response.raise_for_status()
-
             return [
                 {
                     "entity_id": state["entity_id"],
@@ -54,8 +149,7 @@ class HACameraManager:
                     ),
                     "state": state["state"],
                 }
-                for state in response.json()
-                if state["entity_id"].startswith("camera.")
+                for state in await ha_registry.states("camera") or []
             ]
 
         except Exception as e:
@@ -90,59 +184,30 @@ class HACameraManager:
             logger.error(f"Failed to get stream URL for {entity_id}: {e}")
             return None
 
-    def capture_image(self, destination_path: str) -> bool:
-        """Capture a single frame from the configured camera source."""
+    async def capture_image(self, destination_path: str) -> bool:
+        """Capture a single frame from the configured camera source.
+
+        Runs on the event loop: HTTP sources stream through the shared pooled
+        client and RTSP uses the grabber's buffered frame or an async ffmpeg
+        subprocess, so capture never waits for a free executor thread.
+        """
         try:
             os.makedirs(os.path.dirname(destination_path), exist_ok=True)
 
             if settings.camera_entity:
-                headers = self._get_headers()
-                if not headers:
-                    logger.error("No token available for camera entity capture")
-                    return False
-
-                t0 = time.monotonic()
-                response = requests.get(
-                    f"{self.base_url}/camera_proxy/{settings.camera_entity}",
-                    headers=headers,
-                    timeout=_HTTP_TIMEOUT,
-                    stream=True,
-                )
-                if response.status_code == 200:
-                    with open(destination_path, "wb") as f:
-                        f.write(response.content)
-                    proxy_ms = round((time.monotonic() - t0) * 1000)
-                    logger.info(
-                        "Image captured from HA camera entity",
-                        entity=settings.camera_entity,
-                        proxy_ms=proxy_ms,
-                    )
-                    return True
-                logger.error("Failed to capture from HA camera entity", status=response.status_code)
-                return False
+                return await self._capture_entity(destination_path)
 
             camera_url = settings.camera_url
             if camera_url.startswith(("http://", "https://")):
-                response = requests.get(camera_url, timeout=_HTTP_TIMEOUT, stream=True)
-                if response.status_code == 200:
-                    with open(destination_path, "wb") as f:
-                        f.write(response.content)
+                status = await _stream_to_file(camera_url, destination_path)
+                if status == 200:
                     logger.info("Image captured from HTTP camera URL")
                     return True
-                logger.error("Failed to capture from HTTP URL", status=response.status_code)
+                logger.error("Failed to capture from HTTP URL", status=status)
                 return False
 
             if camera_url.startswith("rtsp://"):
-                result = subprocess.run(
-                    ["ffmpeg", "-y", "-i", camera_url, "-frames:v", "1", "-q:v", "2", destination_path],
-                    capture_output=True,
-                    timeout=_FFMPEG_TIMEOUT,
-                )
-                if result.returncode == 0 and os.path.exists(destination_path):
-                    logger.info("Image captured from RTSP stream")
-                    return True
-                logger.error("ffmpeg capture failed", stderr=result.stderr.decode(errors="ignore"))
-                return False
+                return await _capture_rtsp(camera_url, destination_path)
 
             logger.error("No camera source configured")
             return False
@@ -151,6 +216,54 @@ class HACameraManager:
             logger.error(f"Failed to capture image: {e}")
             return False
 
+    async def _capture_entity(self, destination_path: str) -> bool:
+        """Fetch the frame through HA's camera proxy for camera_entity."""
+        headers = self._get_headers()
+        if not headers:
+            logger.error("No token available for camera entity capture")
+            return False
+
+        t0 = time.monotonic()
+        status = await _stream_to_file(
+            f"{self.base_url}/camera_proxy/{settings.camera_entity}",
+            destination_path,
+            headers,
+        )
+        if status == 200:
+            proxy_ms = round((time.monotonic() - t0) * 1000)
+            logger.info(
+                "Image captured from HA camera entity",
+                entity=settings.camera_entity,
+                proxy_ms=proxy_ms,
+            )
+            return True
+        logger.error("Failed to capture from HA camera entity", status=status)
+        return False
+
+    def sync_rtsp_grabber(self) -> None:
+        """Start, restart or stop the persistent RTSP grabber to match settings.
+
+        It runs when camera_rtsp_persistent or clip_enabled is on and the camera
+        source is an RTSP camera_url (a camera_entity takes precedence in
+        capture_image). Clips additionally size the grabber's frame history.
+        """
+        url = settings.camera_url or ""
+        wanted = (
+            (settings.camera_rtsp_persistent or settings.clip_enabled)
+            and not settings.camera_entity
+            and url.startswith("rtsp://")
+        )
+        if settings.clip_enabled:
+            rtsp_grabber.configure_history(
+                history_window_secs(), settings.clip_buffer_mb * 1024 * 1024
+            )
+        else:
+            rtsp_grabber.configure_history(0, 0)
+        if not wanted:
+            rtsp_grabber.stop()
+        elif not rtsp_grabber.is_running() or rtsp_grabber.url != url:
+            rtsp_grabber.start(url)
+
     def test_camera_connection(self, entity_id: str) -> dict:
         """Test connection to a camera entity."""
         try:
@@ -80,11 +80,11 @@ class HomeAssistantIntegration:
     async def update_sensors(self):
         """Update all sensor states."""
         try:
-            from .database import db
+            from .database import db, db_executor
 
-            last_event = db.get_last_event()
-            total_events = db.get_event_count()
-            today_count = db.get_today_event_count()
+            last_event = await db_executor.read(db.get_last_event)
+            total_events = await db_executor.read(db.get_event_count)
+            today_count = await db_executor.read(db.get_today_event_count)
             # sensor.doorbell_last_event has device_class "timestamp", which HA's
             # REST API requires as a UTC-offset ISO 8601 string (see e.g. sun.sun's
             # next_rising in HA's own API docs). last_event.timestamp is naive but
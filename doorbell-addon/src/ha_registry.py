@@ -0,0 +1,130 @@
+"""TTL-cached, domain-indexed copies of Home Assistant's /states and /services.
+
+The settings page asks for cameras, weather entities and binary sensors at
+once, and each used to download and scan the full /states list (several MB on
+a large install). Here each list is fetched at most once per TTL, parsed off
+the event loop, and grouped by domain; concurrent callers share one in-flight
+fetch.
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+from .utils import HomeAssistantAPI
+
+logger = structlog.get_logger()
+
+_TTL_SECS = 60.0
+
+
+def _index_states(states: list) -> Dict[str, List[dict]]:
+    by_domain: Dict[str, List[dict]] = {}
+    for state in states:
+        entity_id = state.get("entity_id", "")
+        by_domain.setdefault(entity_id.split(".", 1)[0], []).append(state)
+    return by_domain
+
+
+def _index_services(domains: list) -> Dict[str, dict]:
+    return {d["domain"]: d["services"] for d in domains}
+
+
+# kind -> (API path, builder of the domain index from the JSON list it returns)
+_SOURCES: Dict[str, Tuple[str, Callable[[list], Dict[str, Any]]]] = {
+    "states": ("/states", _index_states),
+    "services": ("/services", _index_services),
+}
+
+
+def _build_index(
+    path: str, build_index: Callable[[list], Dict[str, Any]], payload: Any
+) -> Dict[str, Any]:
+    if not isinstance(payload, list):
+        raise ValueError(f"GET {path} returned {type(payload).__name__}, expected a list")
+    return build_index(payload)
+
+
+class HARegistry:
+    """Shared cache of HA states and services, keyed by domain.
+
+    A failed refresh keeps serving the previous copy (if any) rather than
+    emptying every picker until HA answers again.
+    """
+
+    def __init__(self, ttl: float = _TTL_SECS):
+        self.ttl = ttl
+        self._cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats = {
+            kind: {"hits": 0, "joined": 0, "fetches": 0, "errors": 0} for kind in _SOURCES
+        }
+
+    async def states(self, domain: str) -> Optional[List[dict]]:
+        """States of every entity in domain, or None if HA could not be reached."""
+        index = await self._index("states")
+        return None if index is None else index.get(domain, [])
+
+    async def services(self, domain: str) -> Optional[dict]:
+        """Services of domain ({} if none), or None if HA could not be reached."""
+        index = await self._index("services")
+        return None if index is None else index.get(domain, {})
+
+    def invalidate(self, kind: Optional[str] = None) -> None:
+        """Drop cached data so the next call refetches (all kinds if None)."""
+        for k in [kind] if kind else list(self._cache):
+            self._cache.pop(k, None)
+
+    async def _index(self, kind: str) -> Optional[Dict[str, Any]]:
+        cached = self._cache.get(kind)
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            self._stats[kind]["hits"] += 1
+            return cached[1]
+        task = self._inflight.get(kind)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = self._inflight[kind] = asyncio.create_task(self._refresh(kind))
+        else:
+            self._stats[kind]["joined"] += 1
+        # Shielded: a caller that goes away must not cancel everyone's fetch.
+        return await asyncio.shield(task)
+
+    async def _refresh(self, kind: str) -> Optional[Dict[str, Any]]:
+        path, build_index = _SOURCES[kind]
+        stats = self._stats[kind]
+        stats["fetches"] += 1
+        try:
+            response = await HomeAssistantAPI()._get(path)
+            if response is None:
+                raise RuntimeError(f"GET {path} failed")
+            index = await asyncio.to_thread(
+                lambda: _build_index(path, build_index, response.json())
+            )
+        except Exception as e:
+            stats["errors"] += 1
+            stale = self._cache.get(kind)
+            logger.warning(
+                "HA registry refresh failed", kind=kind, error=str(e), serving_stale=stale is not None
+            )
+            return stale[1] if stale else None
+        finally:
+            self._inflight.pop(kind, None)
+        self._cache[kind] = (time.monotonic(), index)
+        return index
+
+    def get_status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        status: Dict[str, Any] = {"ttl_secs": self.ttl}
+        for kind, stats in self._stats.items():
+            cached = self._cache.get(kind)
+            status[kind] = {
+                **stats,
+                "age_secs": round(now - cached[0], 1) if cached else None,
+                "domains": len(cached[1]) if cached else 0,
+            }
+        return status
+
+
+# Global registry
+ha_registry = HARegistry()
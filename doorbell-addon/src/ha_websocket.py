@@ -0,0 +1,317 @@
+"""Persistent Home Assistant WebSocket API connection.
+
+Carries fire_event commands and keeps a push-updated copy of the states the
+add-on reads (weather and doorbell trigger entities), so a ring needs no REST
+round trip for either. HA's WebSocket API has no command to write an
+arbitrary entity state, so sensor writes stay on REST (over the shared
+keep-alive client); instead sensors are re-pushed whenever the connection is
+(re)established, which is when HA may have restarted and dropped them.
+"""
+
+import asyncio
+import itertools
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import structlog
+
+from .config import settings
+
+logger = structlog.get_logger()
+
+_WS_URL = "ws://supervisor/core/websocket"
+_COMMAND_TIMEOUT_SECS = 10.0
+_OPEN_TIMEOUT_SECS = 10.0
+_BACKOFF_INITIAL_SECS = 1.0
+_BACKOFF_MAX_SECS = 60.0
+_MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+
+class HomeAssistantWebSocketError(Exception):
+    """A command failed, timed out or was sent while disconnected."""
+
+
+class HomeAssistantWebSocket:
+    """Authenticated, auto-reconnecting HA WebSocket client.
+
+    Commands are multiplexed over one socket by message id. On every
+    (re)connect the entity subscription is renewed — its initial snapshot
+    resynchronises anything missed while disconnected — and the on_connect
+    callbacks run.
+    """
+
+    def __init__(self, url: str = _WS_URL):
+        self.url = url
+        self._ws: Any = None
+        self._task: Optional[asyncio.Task] = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._entities_sub: Optional[int] = None
+        self._subscribed: List[str] = []
+        self._on_connect: List[Callable[[], Awaitable[None]]] = []
+        self._state_listeners: List[Callable[[str, Optional[dict], Optional[dict]], None]] = []
+        self.connected = False
+        self.ha_version: Optional[str] = None
+        self.connects = 0
+        self.messages_in = 0
+        self.messages_out = 0
+        self.unsolicited_results = 0  # results with no id or for no pending command
+        self.last_error: Optional[str] = None
+
+    # ── Lifecycle ────────────────────────────────────────────────────────────
+
+    def add_on_connect(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """Run callback after every successful (re)connect."""
+        self._on_connect.append(callback)
+
+    def add_state_listener(
+        self, callback: Callable[[str, Optional[dict], Optional[dict]], None]
+    ) -> None:
+        """callback(entity_id, new_state, old_state) on every pushed change."""
+        self._state_listeners.append(callback)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.connected = False
+
+    def _token(self) -> Optional[str]:
+        return settings.supervisor_token or settings.hassio_token or settings.ha_access_token
+
+    async def _run(self) -> None:
+        import websockets
+
+        backoff = _BACKOFF_INITIAL_SECS
+        while True:
+            try:
+                async with websockets.connect(
+                    self.url,
+                    max_size=_MAX_MESSAGE_BYTES,
+                    open_timeout=_OPEN_TIMEOUT_SECS,
+                ) as ws:
+                    await self._authenticate(ws)
+                    self._ws = ws
+                    self.connected = True
+                    self.connects += 1
+                    self.last_error = None
+                    backoff = _BACKOFF_INITIAL_SECS
+                    logger.info("Home Assistant WebSocket connected", ha_version=self.ha_version)
+                    reader = asyncio.create_task(self._read_loop(ws))
+                    try:
+                        await self._after_connect()
+                        await reader
+                    finally:
+                        reader.cancel()
+                    self.last_error = "connection closed"
+            except asyncio.CancelledError:
+                self._disconnected()
+                raise
+            except Exception as e:
+                self.last_error = str(e) or type(e).__name__
+            self._disconnected()
+            logger.warning(
+                "Home Assistant WebSocket disconnected", retry_in=backoff, error=self.last_error
+            )
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, _BACKOFF_MAX_SECS)
+
+    async def _authenticate(self, ws: Any) -> None:
+        hello = json.loads(await ws.recv())
+        if hello.get("type") != "auth_required":
+            raise HomeAssistantWebSocketError(f"unexpected greeting: {hello.get('type')}")
+        token = self._token()
+        if not token:
+            raise HomeAssistantWebSocketError("no Home Assistant token configured")
+        await ws.send(json.dumps({"type": "auth", "access_token": token}))
+        reply = json.loads(await ws.recv())
+        if reply.get("type") != "auth_ok":
+            raise HomeAssistantWebSocketError(reply.get("message") or "authentication failed")
+        self.ha_version = reply.get("ha_version")
+
+    async def _after_connect(self) -> None:
+        await self.refresh_subscriptions()
+        for callback in self._on_connect:
+            try:
+                await callback()
+            except Exception as e:
+                logger.warning("WebSocket on-connect callback failed", error=str(e))
+
+    def _disconnected(self) -> None:
+        self.connected = False
+        self._ws = None
+        self._entities_sub = None
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(HomeAssistantWebSocketError("connection lost"))
+        self._pending.clear()
+
+    # ── Messages ─────────────────────────────────────────────────────────────
+
+    async def _read_loop(self, ws: Any) -> None:
+        async for raw in ws:
+            payload = json.loads(raw)
+            # HA may coalesce several messages into one JSON array frame.
+            for message in payload if isinstance(payload, list) else [payload]:
+                self.messages_in += 1
+                self._dispatch(message)
+
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        kind = message.get("type")
+        msg_id = message.get("id")
+        if kind == "result":
+            future = self._pending.pop(msg_id, None) if isinstance(msg_id, int) else None
+            if future is None:
+                self.unsolicited_results += 1
+                logger.debug("Unsolicited result from Home Assistant", id=msg_id)
+            elif not future.done():
+                if message.get("success"):
+                    future.set_result(message.get("result"))
+                else:
+                    error = message.get("error") or {}
+                    future.set_exception(
+                        HomeAssistantWebSocketError(error.get("message") or "command failed")
+                    )
+        elif kind == "event" and msg_id == self._entities_sub:
+            self._apply_entities_event(message.get("event") or {})
+
+    async def call(self, message: Dict[str, Any], timeout: float = _COMMAND_TIMEOUT_SECS) -> Any:
+        """Send a command and wait for its result."""
+        ws = self._ws
+        if ws is None or not self.connected:
+            raise HomeAssistantWebSocketError("not connected")
+        msg_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[msg_id] = future
+        try:
+            await ws.send(json.dumps({**message, "id": msg_id}))
+            self.messages_out += 1
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise HomeAssistantWebSocketError(f"{message.get('type')} timed out")
+        finally:
+            self._pending.pop(msg_id, None)
+
+    async def fire_event(self, event_type: str, event_data: Dict[str, Any]) -> None:
+        await self.call({"type": "fire_event", "event_type": event_type, "event_data": event_data})
+
+    # ── Entity states ────────────────────────────────────────────────────────
+
+    def watched_entities(self) -> List[str]:
+        """Entities whose state is kept in sync (weather + doorbell trigger)."""
+        return [e for e in (settings.weather_entity, settings.trigger_entity) if e]
+
+    async def refresh_subscriptions(self) -> None:
+        """(Re)subscribe to the watched entities; call after changing them."""
+        if not self.connected:
+            return
+        entities = self.watched_entities()
+        if self._entities_sub is not None:
+            if entities == self._subscribed:
+                return
+            old, self._entities_sub = self._entities_sub, None
+            try:
+                await self.call({"type": "unsubscribe_events", "subscription": old})
+            except HomeAssistantWebSocketError as e:
+                logger.debug("Unsubscribe failed", error=str(e))
+        self._states = {e: s for e, s in self._states.items() if e in entities}
+        self._subscribed = entities
+        if not entities:
+            return
+        # Reserve the id before sending: the initial snapshot event can arrive
+        # before the result message.
+        sub_id = next(self._ids)
+        self._entities_sub = sub_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[sub_id] = future
+        try:
+            await self._ws.send(json.dumps(
+                {"id": sub_id, "type": "subscribe_entities", "entity_ids": entities}
+            ))
+            self.messages_out += 1
+            await asyncio.wait_for(future, _COMMAND_TIMEOUT_SECS)
+        except Exception as e:
+            self._entities_sub = None
+            self._pending.pop(sub_id, None)
+            logger.warning("Entity subscription failed", entities=entities, error=str(e))
+
+    def _apply_entities_event(self, event: Dict[str, Any]) -> None:
+        """Apply a subscribe_entities event: a(dded), c(hanged), r(emoved)."""
+        now = time.monotonic()
+        for entity_id, compressed in (event.get("a") or {}).items():
+            old = self._states.get(entity_id)
+            new = {
+                "entity_id": entity_id,
+                "state": compressed.get("s"),
+                "attributes": dict(compressed.get("a") or {}),
+                "last_changed": compressed.get("lc"),
+                "received_at": now,
+            }
+            self._states[entity_id] = new
+            self._notify(entity_id, new, old)
+        for entity_id, diff in (event.get("c") or {}).items():
+            old = self._states.get(entity_id)
+            if old is None:
+                continue
+            new = {**old, "attributes": dict(old["attributes"]), "received_at": now}
+            plus = diff.get("+") or {}
+            if "s" in plus:
+                new["state"] = plus["s"]
+            if "lc" in plus:
+                new["last_changed"] = plus["lc"]
+            new["attributes"].update(plus.get("a") or {})
+            for key in (diff.get("-") or {}).get("a") or []:
+                new["attributes"].pop(key, None)
+            self._states[entity_id] = new
+            self._notify(entity_id, new, old)
+        for entity_id in event.get("r") or []:
+            old = self._states.pop(entity_id, None)
+            self._notify(entity_id, None, old)
+
+    def _notify(self, entity_id: str, new: Optional[dict], old: Optional[dict]) -> None:
+        for listener in self._state_listeners:
+            try:
+                listener(entity_id, new, old)
+            except Exception as e:
+                logger.warning("State listener failed", entity_id=entity_id, error=str(e))
+
+    def get_state(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        """Pushed state of a watched entity, or None if not (yet) known.
+
+        Only trustworthy while connected; callers fall back to REST otherwise.
+        """
+        if not self.connected:
+            return None
+        return self._states.get(entity_id)
+
+    def get_status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "connected": self.connected,
+            "ha_version": self.ha_version,
+            "connects": self.connects,
+            "last_error": self.last_error,
+            "subscribed_entities": self._subscribed if self._entities_sub is not None else [],
+            "pending_commands": len(self._pending),
+            "messages_in": self.messages_in,
+            "messages_out": self.messages_out,
+            "unsolicited_results": self.unsolicited_results,
+            "states": {
+                e: {"state": s["state"], "age_secs": round(now - s["received_at"], 1)}
+                for e, s in self._states.items()
+            },
+        }
+
+
+# Global connection (started with the app)
+ha_websocket = HomeAssistantWebSocket()
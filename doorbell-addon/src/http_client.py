@@ -0,0 +1,167 @@
+"""Shared pooled async HTTP client for Home Assistant and webhook calls."""
+
+import asyncio
+import importlib.util
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import structlog
+
+logger = structlog.get_logger()
+
+_MAX_CONNECTIONS = 20
+_MAX_KEEPALIVE = 10
+_KEEPALIVE_EXPIRY_SECS = 30.0
+_PER_HOST_LIMIT = 8  # concurrent requests per host; others wait their turn
+_DEFAULT_TIMEOUT = 10.0
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package (httpx[http2]); TLS hosts only."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class SharedHTTPClient:
+    """One keep-alive httpx.AsyncClient for the whole add-on.
+
+    A ring talks to the supervisor a dozen times (weather, llmvision, sensor
+    updates, the ring event, notify services); sharing the pool means one TCP
+    handshake instead of one per call. Requests to a single host are capped
+    so a burst of notifications cannot take every pooled connection.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = _MAX_CONNECTIONS,
+        max_keepalive: int = _MAX_KEEPALIVE,
+        per_host_limit: int = _PER_HOST_LIMIT,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=_KEEPALIVE_EXPIRY_SECS,
+        )
+        self.per_host_limit = per_host_limit
+        self.http2 = _http2_available()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+        self.clients_created = 0
+
+    async def start(self) -> None:
+        """Create the client now rather than on the first request."""
+        self._ensure_client()
+
+    async def close(self) -> None:
+        """Close pooled connections (called at shutdown)."""
+        client, self._client = self._client, None
+        self._loop = None
+        self._host_slots = {}
+        if client is not None:
+            await client.aclose()
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        # Connections belong to the loop that opened them; a new loop (tests,
+        # restart) gets a fresh client rather than dead sockets.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                limits=self.limits, http2=self.http2, timeout=_DEFAULT_TIMEOUT
+            )
+            self._loop = loop
+            self._host_slots = {}
+            self.clients_created += 1
+        return self._client
+
+    @asynccontextmanager
+    async def _tracked(self, url: str) -> AsyncIterator[None]:
+        """Hold a per-host slot and record the request in that host's stats."""
+        host = urlsplit(url).netloc
+        slots = self._host_slots.get(host)
+        if slots is None:
+            slots = self._host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+        stats = self._hosts.setdefault(
+            host, {"requests": 0, "errors": 0, "in_flight": 0, "total_ms": 0.0}
+        )
+        async with slots:
+            stats["in_flight"] += 1
+            started = time.monotonic()
+            try:
+                yield
+            except Exception:
+                stats["errors"] += 1
+                raise
+            finally:
+                stats["in_flight"] -= 1
+                stats["requests"] += 1
+                stats["total_ms"] += (time.monotonic() - started) * 1000
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request on the shared pool; raises like httpx does."""
+        client = self._ensure_client()
+        async with self._tracked(url):
+            return await client.request(method, url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Like httpx's client.stream(): the body is read chunk by chunk.
+
+        The host slot is held until the block exits, so stats include the
+        time spent reading the body.
+        """
+        client = self._ensure_client()
+        async with self._tracked(url):
+            async with client.stream(method, url, **kwargs) as response:
+                yield response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def _pool_connections(self) -> Optional[Dict[str, int]]:
+        """Open/idle connection counts from the transport pool, or None.
+
+        The pool is private to httpx/httpcore and changes between versions, so
+        each attribute is probed and anything unexpected leaves the counts out.
+        """
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is None:
+            return None
+        try:
+            idle = sum(1 for c in connections if c.is_idle())
+            total = len(connections)
+        except Exception:
+            return None
+        return {"open": total, "idle": idle, "active": total - idle}
+
+    def get_status(self) -> Dict[str, Any]:
+        """Pool limits, live connection counts and per-host request stats."""
+        return {
+            "started": self._client is not None,
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "per_host_limit": self.per_host_limit,
+            "connections": self._pool_connections(),
+            "in_flight": sum(s["in_flight"] for s in self._hosts.values()),
+            "hosts": {
+                host: {
+                    "requests": s["requests"],
+                    "errors": s["errors"],
+                    "in_flight": s["in_flight"],
+                    "avg_ms": round(s["total_ms"] / s["requests"], 1) if s["requests"] else None,
+                }
+                for host, s in self._hosts.items()
+            },
+        }
+
+
+# Global client (started/closed with the app)
+http_client = SharedHTTPClient()
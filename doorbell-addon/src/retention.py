@@ -0,0 +1,120 @@
+"""Background retention purge for the doorbell addon."""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import structlog
+
+from .config import settings
+from .database import db, db_executor, remove_event_files
+
+logger = structlog.get_logger()
+
+_PURGE_INTERVAL_SECS = 3600
+_PURGE_BATCH_SIZE = 500
+_PURGE_BATCH_PAUSE_SECS = 0.05  # yield the DB to ring writes between batches
+
+
+class RetentionPurger:
+    """Deletes events older than the retention window in small batches.
+
+    Each batch is its own short transaction run off the event loop, so a large
+    backlog never holds the write lock or blocks requests for long. Progress
+    and throughput are kept for /api/storage/info.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = _PURGE_BATCH_SIZE,
+        batch_pause: float = _PURGE_BATCH_PAUSE_SECS,
+    ):
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self._lock = asyncio.Lock()
+        self.running = False
+        self.runs = 0
+        self.events_deleted_total = 0
+        self.files_deleted_total = 0
+        self.current_run: Dict[str, Any] = {}
+        self.last_run: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+
+    async def run_once(self) -> int:
+        """Purge everything currently expired. Returns the number of events deleted.
+
+        Concurrent calls (schedule and manual cleanup) are serialised.
+        """
+        async with self._lock:
+            cutoff = datetime.now() - timedelta(days=settings.retention_days)
+            started = time.monotonic()
+            self.running = True
+            self.current_run = {
+                "started_at": datetime.now().isoformat(),
+                "cutoff": cutoff.isoformat(),
+                "batches": 0,
+                "events_deleted": 0,
+                "files_deleted": 0,
+            }
+            try:
+                while True:
+                    events, paths = await db_executor.write(
+                        db.purge_events_before, cutoff, self.batch_size
+                    )
+                    # Unlink outside the writer so queued writes don't wait on it.
+                    files = await asyncio.to_thread(remove_event_files, paths)
+                    self.current_run["batches"] += 1
+                    self.current_run["events_deleted"] += events
+                    self.current_run["files_deleted"] += files
+                    self.events_deleted_total += events
+                    self.files_deleted_total += files
+                    if events < self.batch_size:
+                        break
+                    await asyncio.sleep(self.batch_pause)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                raise
+            finally:
+                elapsed = time.monotonic() - started
+                run = dict(self.current_run)
+                run["duration_secs"] = round(elapsed, 3)
+                run["events_per_sec"] = (
+                    round(run["events_deleted"] / elapsed, 1) if elapsed > 0 else 0.0
+                )
+                self.last_run = run
+                self.current_run = {}
+                self.running = False
+                self.runs += 1
+
+            if run["events_deleted"]:
+                logger.info("Retention purge complete", **run)
+            return run["events_deleted"]
+
+    async def run_forever(self, interval: float = _PURGE_INTERVAL_SECS) -> None:
+        """Purge on startup and then every `interval` seconds."""
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.warning("Retention purge failed", error=str(e))
+            await asyncio.sleep(interval)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Progress of the running purge (if any) and totals since startup."""
+        return {
+            "running": self.running,
+            "retention_days": settings.retention_days,
+            "batch_size": self.batch_size,
+            "runs": self.runs,
+            "events_deleted_total": self.events_deleted_total,
+            "files_deleted_total": self.files_deleted_total,
+            "current_run": dict(self.current_run) if self.running else None,
+            "last_run": self.last_run,
+            "last_error": self.last_error,
+        }
+
+
+# Global purger instance
+retention_purger = RetentionPurger()
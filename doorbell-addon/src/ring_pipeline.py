@@ -1,26 +1,39 @@
 """Ring event pipeline — owns the complete doorbell ring flow."""
 
 import asyncio
-import json
 import os
-import shutil
 import time
 from datetime import datetime
-from typing import Optional
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 
 import structlog
 
+from .clips import clip_recorder
 from .config import settings
-from .database import db
+from .database import db, db_executor
+from .event_bus import event_bus
+from .face_inference import PRIORITY_RING
 from .face_recognition_service import face_recognition_service
 from .ha_camera import ha_camera_manager
 from .ha_integration import ha_integration
+from .ha_websocket import ha_websocket
+from .snapshot import Snapshot
+from .thumbnails import thumbnail_cache
 from .utils import HomeAssistantAPI
 from .utils import notification_manager
 from .utils import public_image_url_filename
+from .weather_cache import weather_cache
 
 logger = structlog.get_logger()
 
+# Stages in order; each one's outputs are checkpointed before the next starts.
+RING_STAGES = ("capture", "analyze", "save", "publish")
+
+StageCallback = Callable[[str, dict, int], Awaitable[None]]
+
+# A trigger change older than this is not the press that caused this ring.
+_TRIGGER_LAG_WINDOW_SECS = 60
+
 # Strong references to in-flight fire-and-forget tasks, so they are not garbage
 # collected mid-flight (see asyncio.create_task docs). Cleared on completion.
 _background_tasks: set = set()
@@ -38,6 +51,20 @@ def _spawn_background(coro):
     return task
 
 
+def _trigger_lag_ms() -> Optional[int]:
+    """Milliseconds since the doorbell trigger entity turned on, if that was recent.
+
+    Uses the state pushed over the HA WebSocket, so it costs no request.
+    """
+    if not settings.trigger_entity:
+        return None
+    state = ha_websocket.get_state(settings.trigger_entity)
+    if not state or state.get("state") != "on" or not state.get("last_changed"):
+        return None
+    lag = time.time() - float(state["last_changed"])
+    return round(lag * 1000) if 0 <= lag < _TRIGGER_LAG_WINDOW_SECS else None
+
+
 async def _dispatch_notifications(coros: list):
     """Await all notification coroutines, isolating individual failures."""
     await asyncio.gather(*coros, return_exceptions=True)
@@ -46,13 +73,25 @@ async def _dispatch_notifications(coros: list):
 async def run_ring_pipeline(
     image_path: Optional[str] = None,
     ai_message: Optional[str] = None,
+    checkpoint: Optional[Dict[str, dict]] = None,
+    on_stage: Optional[StageCallback] = None,
+    ring_job_id: Optional[int] = None,
 ) -> dict:
     """Run the complete doorbell ring pipeline.
 
+    The ring runs as stages (see RING_STAGES). After each one on_stage is
+    awaited with the stage name, its outputs and its duration, so a durable
+    caller can checkpoint them; passing those outputs back in checkpoint
+    resumes the ring after the last completed stage.
+
     Args:
         image_path: Path to a pre-captured snapshot. If provided and the file
                     exists, it is used instead of capturing from the camera.
         ai_message: Caller-provided description. If set, the LLM call is skipped.
+        checkpoint: Outputs of stages already completed, keyed by stage name.
+        on_stage: Awaited as on_stage(stage, outputs, ms) after each stage.
+        ring_job_id: Queue job to link to the event in the event's own
+                     transaction, so a resumed job never inserts it twice.
 
     Returns:
         {"event_id": int, "ai_message": str, "ai_title": str}
@@ -60,155 +99,302 @@ async def run_ring_pipeline(
     Raises:
         RuntimeError: Only if image capture fails (non-degradable).
     """
-    # ── Step 1: Capture image ──────────────────────────────────────────────
+    done = dict(checkpoint or {})
+    resumed = bool(done)
     t_pipeline_start = time.monotonic()
-    timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-    image_filename = f"doorbell_{timestamp_str}.jpg"
-    dest_path = os.path.join(settings.images_path, image_filename)
+    trigger_lag_ms = None if resumed else _trigger_lag_ms()
+
+    async def _completed(stage: str, outputs: dict, started: float) -> int:
+        ms = round((time.monotonic() - started) * 1000)
+        done[stage] = outputs
+        if on_stage is not None:
+            await on_stage(stage, outputs, ms)
+        return ms
+
+    # ── Step 1: Capture image + public copy ────────────────────────────────
+    # The snapshot is read from disk once; every copy is written from those
+    # bytes and detection + face crops share one decoded frame.
+    capture_ms = None
+    if "capture" in done:
+        snapshot = await asyncio.to_thread(Snapshot.load, done["capture"]["image_path"])
+        logger.info("Resuming ring", image_path=done["capture"]["image_path"], stages=list(done))
+    else:
+        t_capture_start = time.monotonic()
+        snapshot, capture = await _capture(image_path, t_pipeline_start)
+        capture_ms = await _completed("capture", capture, t_capture_start)
+        event_bus.publish("ring", {
+            "job_id": ring_job_id,
+            "timestamp": capture["rang_at"],
+            "image": os.path.basename(capture["image_path"]),
+        })
+    capture = done["capture"]
+
+    # ── Step 2: Parallel analysis ──────────────────────────────────────────
+    if "analyze" not in done:
+        t_analyze_start = time.monotonic()
+        outputs = await _analyze(snapshot, ai_message, capture["public_filename"])
+        await _completed("analyze", outputs, t_analyze_start)
+    analysis = done["analyze"]
+
+    # ── Step 3: Save event, faces and face crops ───────────────────────────
+    if "save" not in done:
+        t_save_start = time.monotonic()
+        outputs, announcement = await _save(snapshot, capture, analysis, ring_job_id)
+        await _completed("save", outputs, t_save_start)
+        # The enrichment of the ring announced after capture.
+        event_bus.publish("event", announcement)
+
+    # ── Steps 4 and 5: Fire HA event + update sensors, then notifications ──
+    t_publish_start = time.monotonic()
+    await _publish(capture, analysis, done["save"])
+    await _completed("publish", {}, t_publish_start)
+
+    logger.info(
+        "Ring pipeline complete",
+        capture_ms=capture_ms,
+        trigger_lag_ms=trigger_lag_ms,
+        weather_age_secs=analysis["weather_age_secs"],
+        pipeline_ms=round((time.monotonic() - t_pipeline_start) * 1000),
+        faces_detected=len(analysis["faces"] or []),
+        resumed=resumed,
+    )
+
+    return {
+        "event_id": done["save"]["event_id"],
+        "ai_message": analysis["ai_message"],
+        "ai_title": analysis["ai_title"],
+    }
+
 
+async def _capture(image_path: Optional[str], t_pipeline_start: float) -> Tuple[Snapshot, dict]:
+    """Capture stage: the snapshot, its public copy and the stage outputs."""
     t_capture_start = time.monotonic()
+    rang_at = datetime.now()
+    image_filename = f"doorbell_{rang_at.strftime('%Y%m%d_%H%M%S_%f')}.jpg"
+    dest_path = os.path.join(settings.images_path, image_filename)
     if image_path and os.path.isfile(image_path):
-        os.makedirs(settings.images_path, exist_ok=True)
-        shutil.copy2(image_path, dest_path)
+        snapshot = await asyncio.to_thread(Snapshot.load, image_path)
+        await asyncio.to_thread(snapshot.write_copy, dest_path)
+        snapshot.path = dest_path
         logger.info("Using pre-captured snapshot", source=image_path, dest=dest_path)
     else:
-        captured = await asyncio.to_thread(ha_camera_manager.capture_image, dest_path)
-        if not captured:
+        if not await ha_camera_manager.capture_image(dest_path):
             raise RuntimeError("Failed to capture image from camera")
-    capture_ms = round((time.monotonic() - t_capture_start) * 1000)
-    logger.info("Capture step complete", capture_ms=capture_ms)
+        snapshot = await asyncio.to_thread(Snapshot.load, dest_path)
+    logger.info(
+        "Capture step complete", capture_ms=round((time.monotonic() - t_capture_start) * 1000)
+    )
 
-    image_path = dest_path
+    # The clip needs the post-roll to elapse first, so it is written in the
+    # background from the grabber's frame history; the ring never waits on it.
+    if clip_recorder.available():
+        _spawn_background(clip_recorder.record(dest_path, ring_at=t_pipeline_start))
+    # Thumbnails for the live dashboard row and the gallery card, encoded
+    # from the bytes already in memory while the ring is analysed.
+    _spawn_background(thumbnail_cache.pregenerate(dest_path, snapshot.data))
 
-    # ── Step 2: Write public copy (must complete before LLM call) ──────────
-    public_filename: Optional[str] = None
-    if settings.public_image_path:
-        try:
-            os.makedirs(settings.public_image_path, exist_ok=True)
-            public_filename = image_filename
-            shutil.copy2(image_path, os.path.join(settings.public_image_path, public_filename))
-        except Exception as e:
-            logger.warning("Failed to write public image copy", error=str(e))
-            public_filename = None
-
-    # ── Step 3: Parallel analysis ──────────────────────────────────────────
-    async def _llm_call() -> tuple:
-        if ai_message is not None:
-            logger.debug("LLM skipped — ai_message provided by caller")
-            return ai_message, "Doorbell"
-        if not settings.llmvision_enabled:
-            logger.debug("LLM skipped — llmvision_enabled=false")
-            return settings.default_message, "Doorbell"
-        if not settings.llmvision_provider:
-            logger.debug("LLM skipped — no provider configured")
-            return settings.default_message, "Doorbell"
-        if not settings.public_image_path:
-            logger.debug("LLM skipped — no public_image_path configured")
-            return settings.default_message, "Doorbell"
-        if not public_filename:
-            logger.debug("LLM skipped — public image write failed")
-            return settings.default_message, "Doorbell"
-        ha_api = HomeAssistantAPI()
-        try:
-            return await ha_api.call_llmvision(
-                image_file=os.path.join(settings.public_image_path, public_filename),
-                provider=settings.llmvision_provider,
-                prompt=settings.llmvision_prompt,
-                max_tokens=settings.llmvision_max_tokens,
-            )
-        except Exception as e:
-            logger.warning("LLM call failed, using default message", error=str(e))
-            return settings.default_message, "Doorbell"
+    return snapshot, {
+        "image_path": dest_path,
+        # Must complete before the LLM call.
+        "public_filename": await _write_public_copy(snapshot, image_filename),
+        "rang_at": rang_at.isoformat(),
+    }
 
-    async def _face_analysis() -> Optional[list]:
-        if not (settings.face_recognition_enabled and face_recognition_service.is_ready()):
-            return None
-        try:
-            return await asyncio.to_thread(face_recognition_service.analyze_image, image_path)
-        except Exception as e:
-            logger.error("Face analysis error", error=str(e))
-            return None
-
-    async def _weather_fetch() -> Optional[dict]:
-        if not settings.weather_entity:
-            return None
-        try:
-            ha_api = HomeAssistantAPI()
-            return await ha_api.get_weather_data(settings.weather_entity)
-        except Exception as e:
-            logger.error("Weather fetch error", error=str(e))
-            return None
-
-    results = await asyncio.gather(
-        _llm_call(), _face_analysis(), _weather_fetch(),
+
+async def _write_public_copy(snapshot: Snapshot, filename: str) -> Optional[str]:
+    """Copy the snapshot to public_image_path; its filename, or None if not written."""
+    if not settings.public_image_path:
+        return None
+    try:
+        await asyncio.to_thread(
+            snapshot.write_copy, os.path.join(settings.public_image_path, filename)
+        )
+    except Exception as e:
+        logger.warning("Failed to write public image copy", error=str(e))
+        return None
+    return filename
+
+
+async def _analyze(
+    snapshot: Snapshot, ai_message: Optional[str], public_filename: Optional[str]
+) -> dict:
+    """Analyze stage: description, faces and weather, fetched concurrently."""
+    llm_result, face_raw, weather_result = await asyncio.gather(
+        _llm_call(ai_message, public_filename), _face_analysis(snapshot), _weather_fetch(),
         return_exceptions=True,
     )
-    llm_result, face_raw, weather = results
-
     if isinstance(llm_result, Exception) or not isinstance(llm_result, tuple):
-        resolved_message, resolved_title = settings.default_message, "Doorbell"
-    else:
-        resolved_message, resolved_title = llm_result
-
+        llm_result = (settings.default_message, "Doorbell")
     if isinstance(face_raw, Exception):
         face_raw = None
-    if isinstance(weather, Exception):
-        weather = None
-
-    # Process face results
-    identified, faces_detected, face_data_json = [], 0, None
-    if face_raw:
-        identified = face_recognition_service.identify_faces(face_raw)
-        faces_detected = len(identified)
-        face_data_json = json.dumps([
-            {
-                "name": f.name,
-                "bbox": list(f.bbox),
-                "score": round(f.score, 3),
-                "det_score": round(f.det_score, 3),
-            }
-            for f in identified
-        ])
-
-    # ── Step 4: Save event ─────────────────────────────────────────────────
-    event = db.add_doorbell_event(
+    if isinstance(weather_result, Exception):
+        weather_result = (None, None)
+    weather, weather_age_secs = weather_result
+    return {
+        "ai_message": llm_result[0],
+        "ai_title": llm_result[1],
+        "faces": await _identify(face_raw),
+        "weather": weather,
+        "weather_age_secs": weather_age_secs,
+    }
+
+
+async def _llm_call(ai_message: Optional[str], public_filename: Optional[str]) -> tuple:
+    if ai_message is not None:
+        logger.debug("LLM skipped — ai_message provided by caller")
+        return ai_message, "Doorbell"
+    if not settings.llmvision_enabled:
+        logger.debug("LLM skipped — llmvision_enabled=false")
+        return settings.default_message, "Doorbell"
+    if not settings.llmvision_provider:
+        logger.debug("LLM skipped — no provider configured")
+        return settings.default_message, "Doorbell"
+    if not settings.public_image_path:
+        logger.debug("LLM skipped — no public_image_path configured")
+        return settings.default_message, "Doorbell"
+    if not public_filename:
+        logger.debug("LLM skipped — public image write failed")
+        return settings.default_message, "Doorbell"
+    ha_api = HomeAssistantAPI()
+    try:
+        return await ha_api.call_llmvision(
+            image_file=os.path.join(settings.public_image_path, public_filename),
+            provider=settings.llmvision_provider,
+            prompt=settings.llmvision_prompt,
+            max_tokens=settings.llmvision_max_tokens,
+        )
+    except Exception as e:
+        logger.warning("LLM call failed, using default message", error=str(e))
+        return settings.default_message, "Doorbell"
+
+
+async def _face_analysis(snapshot: Snapshot) -> Optional[list]:
+    if not (settings.face_recognition_enabled and face_recognition_service.is_ready()):
+        return None
+    try:
+        frame = await asyncio.to_thread(snapshot.pixels)
+        return await face_recognition_service.analyze(frame, priority=PRIORITY_RING)
+    except Exception as e:
+        logger.error("Face analysis error", error=str(e))
+        return None
+
+
+async def _weather_fetch() -> tuple:
+    # Normally an instant cache read; live only when the cache is stale.
+    try:
+        return await weather_cache.current()
+    except Exception as e:
+        logger.error("Weather fetch error", error=str(e))
+        return None, None
+
+
+async def _identify(face_raw: Optional[list]) -> Optional[List[dict]]:
+    """Detected faces matched against known persons, as stored with the event."""
+    if not face_raw:
+        return None
+    # Scoring against the whole gallery is one matrix product; keep it off the loop.
+    identified = await asyncio.to_thread(face_recognition_service.identify_faces, face_raw)
+    return [
+        {
+            "name": f.name,
+            "person_id": f.person_id,
+            "bbox": list(f.bbox),
+            "score": round(f.score, 3),
+            "det_score": round(f.det_score, 3),
+        }
+        for f in identified
+    ]
+
+
+async def _save(
+    snapshot: Snapshot, capture: dict, analysis: dict, ring_job_id: Optional[int]
+) -> Tuple[dict, dict]:
+    """Save stage: the stage outputs and the "event" announcement.
+
+    Crop files are named after the snapshot, so they are written before the
+    event exists and committed with it in one transaction: a ring is saved
+    whole or not at all, and a resumed ring simply rewrites them.
+    """
+    image_path = capture["image_path"]
+    faces = analysis["faces"] or []
+    weather = analysis["weather"] or {}
+    crop_prefix = os.path.splitext(os.path.basename(image_path))[0]
+    unknown = [(idx, face) for idx, face in enumerate(faces) if face["name"] == "Unknown"]
+    crop_paths = (
+        await asyncio.to_thread(_save_crops, snapshot, unknown, crop_prefix) if unknown else []
+    )
+    ring = await db_executor.write(
+        db.commit_ring,
         image_path=image_path,
-        ai_message=resolved_message,
-        weather_condition=weather.get("condition") if weather else None,
-        weather_temperature=weather.get("temperature") if weather else None,
-        weather_humidity=weather.get("humidity") if weather else None,
-        faces_detected=faces_detected,
-        face_data=face_data_json,
+        ai_message=analysis["ai_message"],
+        weather_condition=weather.get("condition"),
+        weather_temperature=weather.get("temperature"),
+        weather_humidity=weather.get("humidity"),
+        weather_age_secs=analysis["weather_age_secs"],
+        faces_detected=len(faces),
+        faces=analysis["faces"],
+        timestamp=datetime.fromisoformat(capture["rang_at"]),
+        ring_job_id=ring_job_id,
+        crop_paths=crop_paths,
     )
+    event = ring.event
+    outputs = {
+        "event_id": event.id,
+        "timestamp": event.timestamp.isoformat(),
+        "crop_ids": ring.crop_ids,
+    }
+    return outputs, {
+        "id": event.id,
+        "job_id": ring_job_id,
+        "timestamp": event.timestamp.isoformat(),
+        "image": os.path.basename(image_path),
+        "ai_message": analysis["ai_message"],
+        "ai_title": analysis["ai_title"],
+        "faces_detected": len(faces),
+        "faces": [f["name"] for f in faces],
+        "weather_condition": weather.get("condition"),
+        "weather_temperature": weather.get("temperature"),
+    }
+
+
+def _save_crops(snapshot: Snapshot, unknown: List[Tuple[int, dict]], crop_prefix: str) -> List[str]:
+    # In the worker thread: a resumed ring decodes the snapshot here.
+    paths = []
+    for idx, face in unknown:
+        try:
+            paths.append(face_recognition_service.save_face_crop(
+                snapshot.image(), tuple(face["bbox"]), crop_prefix, idx,
+            ))
+        except Exception as crop_err:
+            logger.warning("Failed to save face crop", error=str(crop_err))
+    return paths
 
-    # ── Step 5: Save face crops ────────────────────────────────────────────
-    for idx, iface in enumerate(identified):
-        if iface.name == "Unknown":
-            try:
-                crop_path = await asyncio.to_thread(
-                    face_recognition_service.save_face_crop,
-                    image_path, iface.bbox, event.id, idx,
-                )
-                db.add_face_crop(event.id, crop_path)
-            except Exception as crop_err:
-                logger.warning("Failed to save face crop", error=str(crop_err))
 
-    # ── Step 6: Fire HA event + update sensors (time-sensitive) ────────────
+async def _publish(capture: dict, analysis: dict, saved: dict) -> None:
+    """Publish stage: the HA event and sensors, then notifications."""
     # Downstream HA automations key off the doorbell_ring event and these
     # sensors, so they must fire promptly — never gated behind notifications.
     try:
         await ha_integration.handle_doorbell_ring({
-            "event_id": event.id,
-            "timestamp": event.timestamp.isoformat(),
-            "image_path": image_path,
-            "ai_message": resolved_message,
+            "event_id": saved["event_id"],
+            "timestamp": saved["timestamp"],
+            "image_path": capture["image_path"],
+            "ai_message": analysis["ai_message"],
         })
     except Exception as e:
         logger.error("HA integration error", error=str(e))
 
-    # ── Step 7: Dispatch notifications (fire-and-forget) ───────────────────
     # A slow or failing notify service must not delay the event above or this
     # pipeline's return, so notifications run in the background.
+    notify_coros = _notifications(capture, analysis, saved)
+    if notify_coros:
+        _spawn_background(_dispatch_notifications(notify_coros))
+
+
+def _notifications(capture: dict, analysis: dict, saved: dict) -> list:
+    """Coroutines sending the ring to each configured notify service and webhook."""
+    message, title = analysis["ai_message"], analysis["ai_title"]
+    public_filename = capture["public_filename"]
     notify_coros = []
     if settings.ha_notify_services:
         ha_api = HomeAssistantAPI()
@@ -220,35 +406,21 @@ async def run_ring_pipeline(
             notify_coros.append(
                 ha_api.send_ha_notification(
                     service_name=svc,
-                    message=resolved_message,
-                    title=resolved_title,
+                    message=message,
+                    title=title,
                     image_filename=notify_image_filename,
                 )
             )
     if settings.notification_webhook:
         notify_coros.append(
             notification_manager._send_webhook_notification({
-                "title": resolved_title,
-                "message": resolved_message,
+                "title": title,
+                "message": message,
                 "event": "doorbell_ring",
-                "event_id": event.id,
-                "image_path": image_path,
-                "ai_message": resolved_message,
-                "timestamp": event.timestamp.isoformat(),
+                "event_id": saved["event_id"],
+                "image_path": capture["image_path"],
+                "ai_message": message,
+                "timestamp": saved["timestamp"],
             })
         )
-    if notify_coros:
-        _spawn_background(_dispatch_notifications(notify_coros))
-
-    logger.info(
-        "Ring pipeline complete",
-        capture_ms=capture_ms,
-        pipeline_ms=round((time.monotonic() - t_pipeline_start) * 1000),
-        faces_detected=faces_detected,
-    )
-
-    return {
-        "event_id": event.id,
-        "ai_message": resolved_message,
-        "ai_title": resolved_title,
-    }
+    return notify_coros
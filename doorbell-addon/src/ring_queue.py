@@ -0,0 +1,219 @@
+"""Durable ring job queue: rings survive restarts and never hold the request open."""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import structlog
+
+from .database import db, db_executor
+from .ring_pipeline import RING_STAGES, run_ring_pipeline
+
+logger = structlog.get_logger()
+
+_WORKERS = 1  # rings are rare and ordered; HA sensors expect them in sequence
+_MAX_ATTEMPTS = 3  # a job interrupted this often is failed, not retried forever
+_IDLE_POLL_SECS = 5.0  # safety net in case a wake-up is missed
+_KEEP_FINISHED_DAYS = 7
+_RECENT_JOBS = 50  # jobs averaged for the wait/stage timings
+
+
+class RingQueue:
+    """Runs rings from the ring_jobs table.
+
+    The ring endpoint only inserts a job; workers claim jobs oldest first and
+    run the pipeline, checkpointing each stage's outputs. Jobs still marked
+    running at startup were interrupted and are resumed after their last
+    completed stage.
+    """
+
+    def __init__(self, workers: int = _WORKERS):
+        self.workers = workers
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._waiters: Dict[int, List[asyncio.Future]] = {}
+        self.jobs_done = 0
+        self.jobs_failed = 0
+        self.jobs_resumed = 0
+
+    async def start(self) -> None:
+        """Resume interrupted jobs and start the workers."""
+        requeued, failed = await db_executor.write(
+            db.requeue_interrupted_ring_jobs, _MAX_ATTEMPTS
+        )
+        pruned = await db_executor.write(
+            db.prune_ring_jobs, datetime.now() - timedelta(days=_KEEP_FINISHED_DAYS)
+        )
+        if requeued or failed:
+            logger.warning("Resuming interrupted rings", requeued=requeued, failed=failed)
+        if pruned:
+            logger.info("Pruned finished ring jobs", deleted=pruned)
+        wakeup = self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(n, wakeup)) for n in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Stop the workers. A ring cut off here resumes on the next start."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def enqueue(
+        self, image_path: Optional[str] = None, ai_message: Optional[str] = None
+    ) -> int:
+        """Persist a ring and wake a worker. Returns the job id."""
+        job_id = await db_executor.write(
+            db.enqueue_ring_job, {"image_path": image_path, "ai_message": ai_message}
+        )
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    async def wait(self, job_id: int, timeout: float) -> Dict[str, Any]:
+        """Wait for a job to finish and return its row.
+
+        Raises asyncio.TimeoutError if it is still pending after timeout.
+        """
+        # Registered before the read, so a job finishing during it still wakes us.
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(job_id, []).append(future)
+        try:
+            job = await db_executor.read(db.get_ring_job, job_id)
+            if job is None or job["status"] in ("done", "failed"):
+                return job
+            await asyncio.wait_for(future, timeout)
+        finally:
+            waiters = self._waiters.get(job_id, [])
+            if future in waiters:
+                waiters.remove(future)
+            if not waiters:
+                self._waiters.pop(job_id, None)
+        return await db_executor.read(db.get_ring_job, job_id)
+
+    async def _worker(self, n: int, wakeup: asyncio.Event) -> None:
+        while True:
+            # Cleared before claiming, so an enqueue during the claim still wakes us.
+            wakeup.clear()
+            try:
+                job = await db_executor.write(db.claim_ring_job)
+            except Exception as e:
+                logger.error("Could not claim ring job", worker=n, error=str(e))
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), _IDLE_POLL_SECS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(job)
+            except Exception as e:
+                # Failed outside the pipeline (checkpoint or finish write, event
+                # lookup): the job stays running and resumes on the next start,
+                # but this worker must live on for the rings behind it.
+                logger.error(
+                    "Ring job bookkeeping failed", worker=n, job_id=job["id"], error=str(e)
+                )
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        checkpoint: Dict[str, Any] = job["checkpoint"]
+        stage_ms: Dict[str, int] = job["stage_ms"]
+        if checkpoint:
+            self.jobs_resumed += 1
+
+        async def _on_stage(stage: str, outputs: dict, ms: int) -> None:
+            checkpoint[stage] = outputs
+            stage_ms[stage] = ms
+            await db_executor.write(db.checkpoint_ring_job, job_id, checkpoint, stage_ms)
+
+        # The event row records the job it came from; if the ring was cut off
+        # after inserting it, don't insert it again.
+        if job["event_id"] is not None and "save" not in checkpoint:
+            event = await db_executor.read(db.get_doorbell_event, job["event_id"])
+            if event is not None:
+                checkpoint["save"] = {
+                    "event_id": event.id, "timestamp": event.timestamp.isoformat()
+                }
+
+        try:
+            try:
+                await run_ring_pipeline(
+                    image_path=job["params"].get("image_path"),
+                    ai_message=job["params"].get("ai_message"),
+                    checkpoint=checkpoint,
+                    on_stage=_on_stage,
+                    ring_job_id=job_id,
+                )
+                status, error = "done", None
+                self.jobs_done += 1
+            except asyncio.CancelledError:
+                raise  # shutting down: left running, resumed on next start
+            except Exception as e:
+                status, error = "failed", str(e)
+                self.jobs_failed += 1
+                logger.error("Ring job failed", job_id=job_id, error=error)
+            await db_executor.write(db.finish_ring_job, job_id, status, error)
+        finally:
+            # Waiters get the job row however it ended, rather than timing out.
+            for future in self._waiters.pop(job_id, []):
+                if not future.done():
+                    future.set_result(None)
+
+    async def get_status(self) -> Dict[str, Any]:
+        """Queue depth, waits and per-stage timings of recent jobs."""
+        queue, recent = await asyncio.gather(
+            db_executor.read(db.get_ring_queue_counts),
+            db_executor.read(db.get_ring_jobs, _RECENT_JOBS),
+        )
+        now = datetime.now()
+        oldest = queue["oldest_queued_at"]
+        waits = [
+            (datetime.fromisoformat(j["started_at"]) - datetime.fromisoformat(j["created_at"]))
+            .total_seconds() * 1000
+            for j in recent if j["started_at"]
+        ]
+        stage_avg = {}
+        for stage in RING_STAGES:
+            samples = [j["stage_ms"][stage] for j in recent if stage in j["stage_ms"]]
+            if samples:
+                stage_avg[stage] = round(sum(samples) / len(samples))
+        counts = queue["counts"]
+        return {
+            "workers": len([t for t in self._tasks if not t.done()]),
+            "depth": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "done": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+            "oldest_wait_ms": (
+                round((now - datetime.fromisoformat(oldest)).total_seconds() * 1000)
+                if oldest else None
+            ),
+            "avg_wait_ms": round(sum(waits) / len(waits)) if waits else None,
+            "avg_stage_ms": stage_avg,
+            "jobs_done": self.jobs_done,
+            "jobs_failed": self.jobs_failed,
+            "jobs_resumed": self.jobs_resumed,
+        }
+
+
+def job_summary(job: Dict[str, Any]) -> Dict[str, Any]:
+    """A job as returned by the API (no checkpoint payloads)."""
+    return {
+        "id": job["id"],
+        "status": job["status"],
+        "event_id": job["event_id"],
+        "attempts": job["attempts"],
+        "stages_done": [s for s in RING_STAGES if s in job["checkpoint"]],
+        "stage_ms": job["stage_ms"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+
+
+# Global queue (workers started with the app)
+ring_queue = RingQueue()
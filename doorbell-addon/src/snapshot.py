@@ -0,0 +1,73 @@
+"""In-memory ring snapshot: raw JPEG bytes plus one shared decoded frame."""
+
+import os
+import threading
+from typing import Any, Optional, Tuple
+
+
+class Snapshot:
+    """One ring's image, read from disk once and decoded at most once.
+
+    Copies are written from the raw bytes; detection and every face crop use
+    the same EXIF-upright RGB frame instead of re-opening the JPEG.
+    """
+
+    def __init__(self, path: str, data: bytes):
+        self.path = path
+        self.data = data
+        self._lock = threading.Lock()
+        self._image: Any = None  # PIL.Image, decoded on first use
+        self._pixels: Any = None  # np.ndarray view of _image
+
+    @classmethod
+    def load(cls, path: str) -> "Snapshot":
+        with open(path, "rb") as f:
+            return cls(path, f.read())
+
+    def write_copy(self, dest_path: str) -> None:
+        """Write the original JPEG bytes to another path."""
+        os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+        with open(dest_path, "wb") as f:
+            f.write(self.data)
+
+    def image(self) -> Any:
+        """The decoded, EXIF-upright RGB frame (PIL.Image). Decodes on first call."""
+        with self._lock:
+            if self._image is None:
+                import io
+                from PIL import Image, ImageOps
+                img = ImageOps.exif_transpose(Image.open(io.BytesIO(self.data)))
+                self._image = img.convert("RGB")
+            return self._image
+
+    def pixels(self) -> Any:
+        """The decoded frame as an (h, w, 3) uint8 array, shared by all callers."""
+        image = self.image()
+        with self._lock:
+            if self._pixels is None:
+                import numpy as np
+                self._pixels = np.asarray(image)
+            return self._pixels
+
+    @property
+    def decoded(self) -> bool:
+        return self._image is not None
+
+    def crop(self, bbox: Tuple[int, int, int, int], padding_ratio: float,
+             size: Optional[Tuple[int, int]] = None) -> Any:
+        """Crop (x, y, w, h) plus padding_ratio * max(w, h) on each side."""
+        return crop_padded(self.image(), bbox, padding_ratio, size)
+
+
+def crop_padded(image: Any, bbox: Tuple[int, int, int, int], padding_ratio: float,
+                size: Optional[Tuple[int, int]] = None) -> Any:
+    """Crop a PIL image around bbox with padding, clamped to the image, optionally resized."""
+    x, y, w, h = bbox
+    padding = int(max(w, h) * padding_ratio)
+    crop = image.crop((
+        max(0, x - padding),
+        max(0, y - padding),
+        min(image.width, x + w + padding),
+        min(image.height, y + h + padding),
+    ))
+    return crop.resize(size) if size else crop
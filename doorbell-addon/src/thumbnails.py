@@ -0,0 +1,223 @@
+"""Downscaled event snapshots for the dashboard and gallery, cached on disk.
+
+A gallery of 100 cards used to download 100 full-resolution camera JPEGs.
+Cards now load a variant a few hundred pixels wide, decoded with Pillow's
+JPEG draft mode (the decoder scales by 1/2, 1/4 or 1/8 while reading, so the
+full frame is never materialised) and cached under thumbnails/<snapshot>/.
+"""
+
+import asyncio
+import io
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+
+from .config import settings
+
+logger = structlog.get_logger()
+
+# Widths a request is snapped to, so the cache holds a few variants per image.
+WIDTHS = (128, 320, 640)
+_FORMATS = {"webp": ("WEBP", "image/webp"), "jpeg": ("JPEG", "image/jpeg")}
+_QUALITY = {"WEBP": 75, "JPEG": 80}
+_ORIENTATION_TAG = 0x0112
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)  # EXIF rotations that swap width and height
+
+
+def snap_width(width: int) -> int:
+    """The smallest cached width that is at least width (the largest if none is)."""
+    for w in WIDTHS:
+        if w >= width:
+            return w
+    return WIDTHS[-1]
+
+
+def thumbnail_dir_for(image_path: str) -> str:
+    """Variants of a snapshot live together, so eviction is one directory."""
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    return os.path.join(settings.thumbnails_path, stem)
+
+
+def webp_supported() -> bool:
+    from PIL import features
+    return bool(features.check("webp"))
+
+
+def preferred_format() -> str:
+    return "webp" if webp_supported() else "jpeg"
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """WebP for clients that accept it (every current browser), else JPEG."""
+    if accept and "image/webp" in accept and webp_supported():
+        return "webp"
+    return "jpeg"
+
+
+def media_type(fmt: str) -> str:
+    return _FORMATS[fmt][1]
+
+
+def render(source: Any, widths: Iterable[int], fmt: str) -> Dict[int, bytes]:
+    """Encode the snapshot (path or JPEG bytes) at each width; never upscales.
+
+    The JPEG is draft-decoded once at the scale the largest width needs and
+    each smaller variant is resized from that frame.
+    """
+    from PIL import Image, ImageOps
+
+    widths = sorted(set(widths), reverse=True)
+    img = Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+    transposed = img.getexif().get(_ORIENTATION_TAG) in _TRANSPOSED_ORIENTATIONS
+    upright_w, upright_h = img.size[::-1] if transposed else img.size
+    target_w = min(widths[0], upright_w)
+    target_h = max(1, round(upright_h * target_w / upright_w))
+    img.draft("RGB", (target_h, target_w) if transposed else (target_w, target_h))
+    frame = ImageOps.exif_transpose(img).convert("RGB")
+
+    pil_format = _FORMATS[fmt][0]
+    variants = {}
+    for width in widths:
+        w = min(width, frame.width)
+        h = max(1, round(frame.height * w / frame.width))
+        resized = frame if (w, h) == frame.size else frame.resize((w, h), Image.Resampling.LANCZOS)
+        buf = io.BytesIO()
+        resized.save(buf, pil_format, quality=_QUALITY[pil_format])
+        variants[width] = buf.getvalue()
+    return variants
+
+
+class ThumbnailCache:
+    """Thumbnail variants on disk, keyed by source mtime, width and format.
+
+    A variant is <width>_<mtime_ns>.<ext>, so a replaced snapshot gets fresh
+    variants and stale ones are removed when the new one is written.
+    Concurrent requests for the same missing variant, and a ring's
+    pre-generation of it, share one encode.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Tuple[str, int, str], asyncio.Task] = {}
+        self.hits = 0
+        self.generated = 0
+        self.pregenerated = 0
+        self.evicted = 0
+
+    def _variant_path(self, image_path: str, width: int, fmt: str) -> str:
+        mtime_ns = os.stat(image_path).st_mtime_ns
+        return os.path.join(thumbnail_dir_for(image_path), f"{width}_{mtime_ns}.{fmt}")
+
+    def _write(self, image_path: str, variants: Dict[int, bytes], fmt: str) -> None:
+        directory = thumbnail_dir_for(image_path)
+        os.makedirs(directory, exist_ok=True)
+        for width, data in variants.items():
+            path = self._variant_path(image_path, width, fmt)
+            # Unique per writer, so a half-written file is never renamed into place.
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{width}_", suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except FileNotFoundError:
+                    pass
+                raise
+            # Variants of an older version of the snapshot.
+            for name in os.listdir(directory):
+                if name.startswith(f"{width}_") and name.endswith(f".{fmt}") and \
+                        name != os.path.basename(path):
+                    try:
+                        os.remove(os.path.join(directory, name))
+                    except FileNotFoundError:
+                        pass
+
+    async def get(self, image_path: str, width: int, fmt: str) -> str:
+        """Path of the variant, encoding it first if it is not cached.
+
+        Raises FileNotFoundError if the snapshot does not exist.
+        """
+        width = snap_width(width)
+        path = self._variant_path(image_path, width, fmt)
+        if os.path.isfile(path):
+            self.hits += 1
+            return path
+        task = self._running((image_path, width, fmt))
+        started = task is None
+        if task is None:
+            task = self._start(image_path, image_path, [width], fmt)
+        # Shielded: a client that goes away must not cancel a shared encode.
+        await asyncio.shield(task)
+        if started:
+            self.generated += 1
+        return path
+
+    def _running(self, key: Tuple[str, int, str]) -> Optional[asyncio.Task]:
+        task = self._inflight.get(key)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            return None
+        return task
+
+    def _start(self, image_path: str, source: Any, widths: List[int], fmt: str) -> asyncio.Task:
+        """Encode widths in a thread, registered as the in-flight task of each."""
+        keys = [(image_path, width, fmt) for width in widths]
+
+        async def _encode() -> None:
+            try:
+                await asyncio.to_thread(
+                    lambda: self._write(image_path, render(source, widths, fmt), fmt)
+                )
+            finally:
+                for key in keys:
+                    if self._inflight.get(key) is task:
+                        del self._inflight[key]
+
+        task = asyncio.create_task(_encode())
+        for key in keys:
+            self._inflight[key] = task
+        return task
+
+    async def pregenerate(self, image_path: str, data: Optional[bytes] = None) -> None:
+        """Write the widths the UI shows, from the ring's in-memory JPEG if given.
+
+        Widths a request is already encoding are left to it; requests arriving
+        meanwhile wait for this encode instead of starting their own.
+        """
+        fmt = preferred_format()
+        widths = [w for w in WIDTHS if self._running((image_path, w, fmt)) is None]
+        if not widths:
+            return
+        try:
+            await asyncio.shield(self._start(image_path, data or image_path, widths, fmt))
+            self.pregenerated += 1
+        except Exception as e:
+            logger.warning("Thumbnail pre-generation failed", image_path=image_path, error=str(e))
+
+    def evict(self, image_paths: Iterable[str]) -> int:
+        """Remove the variants of deleted snapshots. Returns directories removed."""
+        removed = 0
+        for image_path in image_paths:
+            directory = thumbnail_dir_for(image_path)
+            if os.path.isdir(directory):
+                shutil.rmtree(directory, ignore_errors=True)
+                removed += 1
+        self.evicted += removed
+        return removed
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "widths": list(WIDTHS),
+            "format": preferred_format(),
+            "hits": self.hits,
+            "generated": self.generated,
+            "pregenerated": self.pregenerated,
+            "evicted": self.evicted,
+        }
+
+
+# Global cache
+thumbnail_cache = ThumbnailCache()
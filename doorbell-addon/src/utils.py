@@ -3,12 +3,16 @@
 import os
 import re
 from datetime import datetime
-from typing import Any, Dict, Optional
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
 
 import httpx
 import structlog
+from starlette.responses import FileResponse, Response, StreamingResponse
 
 from .config import settings
+from .ha_websocket import HomeAssistantWebSocketError, ha_websocket
+from .http_client import http_client
 
 logger = structlog.get_logger()
 
@@ -48,6 +52,16 @@ def classify_notify_service(name: str) -> str:
     return "full"
 
 
+def parse_weather_state(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Condition, temperature and humidity from a weather entity's state."""
+    attributes = data.get("attributes", {})
+    return {
+        "condition": data.get("state"),
+        "temperature": float(attributes["temperature"]) if "temperature" in attributes else None,
+        "humidity": float(attributes["humidity"]) if "humidity" in attributes else None,
+    }
+
+
 class HomeAssistantAPI:
     """Home Assistant API client for integration."""
 
@@ -61,12 +75,11 @@ class HomeAssistantAPI:
     async def _post(self, path: str, json: Optional[Dict] = None) -> Optional[httpx.Response]:
         """POST to the HA API, returning the response or None on error."""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}{path}", headers=self.headers, json=json or {}, timeout=10.0
-                )
-                response.raise_for_status()
-                return response
+            response = await http_client.post(
+                f"{self.base_url}{path}", headers=self.headers, json=json or {}, timeout=10.0
+            )
+            response.raise_for_status()
+            return response
         except httpx.HTTPStatusError as e:
             body = e.response.text[:500] if e.response is not None else ""
             logger.error("HA API POST failed", path=path, error=str(e), response_body=body)
@@ -78,12 +91,11 @@ class HomeAssistantAPI:
     async def _get(self, path: str) -> Optional[httpx.Response]:
         """GET from the HA API, returning the response or None on error."""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}{path}", headers=self.headers, timeout=10.0
-                )
-                response.raise_for_status()
-                return response
+            response = await http_client.get(
+                f"{self.base_url}{path}", headers=self.headers, timeout=10.0
+            )
+            response.raise_for_status()
+            return response
         except Exception as e:
             logger.error("HA API GET failed", path=path, error=str(e))
             return None
@@ -110,7 +122,14 @@ class HomeAssistantAPI:
             logger.info("Sensor updated", entity_id=entity_id, state=state)
 
     async def fire_event(self, event_type: str, event_data: Dict):
-        """Fire an event in Home Assistant."""
+        """Fire an event in Home Assistant (WebSocket when connected, else REST)."""
+        if ha_websocket.connected:
+            try:
+                await ha_websocket.fire_event(event_type, event_data)
+                logger.info("Event fired", event_type=event_type, via="websocket")
+                return
+            except HomeAssistantWebSocketError as e:
+                logger.warning("WebSocket fire_event failed, using REST", error=str(e))
         response = await self._post(f"/events/{event_type}", event_data)
         if response:
             logger.info("Event fired", event_type=event_type)
@@ -120,17 +139,14 @@ class HomeAssistantAPI:
         if not entity_id:
             return None
 
-        response = await self._get(f"/states/{entity_id}")
-        if not response:
-            return None
-
-        data = response.json()
-        attributes = data.get("attributes", {})
-        return {
-            "condition": data.get("state"),
-            "temperature": float(attributes["temperature"]) if "temperature" in attributes else None,
-            "humidity": float(attributes["humidity"]) if "humidity" in attributes else None,
-        }
+        # Pushed over the WebSocket subscription — no round trip on a ring.
+        data = ha_websocket.get_state(entity_id)
+        if data is None:
+            response = await self._get(f"/states/{entity_id}")
+            if not response:
+                return None
+            data = response.json()
+        return parse_weather_state(data)
 
     async def call_llmvision(
         self,
@@ -255,10 +271,9 @@ class NotificationManager:
             else:
                 payload = data
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(webhook_url, json=payload, timeout=10.0)
-                response.raise_for_status()
-                logger.info("Webhook notification sent successfully")
+            response = await http_client.post(webhook_url, json=payload, timeout=10.0)
+            response.raise_for_status()
+            logger.info("Webhook notification sent successfully")
 
         except Exception as e:
             logger.error("Failed to send webhook notification", error=str(e), webhook_url=webhook_url)
@@ -272,6 +287,7 @@ def ensure_directories():
         os.path.dirname(settings.database_path),
         settings.persons_path,
         settings.face_crops_path,
+        settings.thumbnails_path,
     ]:
         os.makedirs(directory, exist_ok=True)
         logger.info("Directory ensured", path=directory)
@@ -310,6 +326,128 @@ def sanitize_filename(filename: str) -> str:
     return filename
 
 
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_RANGE_CHUNK = 64 * 1024
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Resolve a single-range ``Range`` header to inclusive (start, end).
+
+    Returns None when the header is absent, malformed or multi-range (the
+    caller then serves the whole file). Raises ValueError if unsatisfiable.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":  # suffix range: last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("unsatisfiable range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+def _iter_file_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(_RANGE_CHUNK, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def file_range_response(path: str, range_header: Optional[str], media_type: str) -> Response:
+    """Serve a file honouring a single ``Range: bytes=`` request (206/416).
+
+    Lets <video> seek and resume without downloading the whole file.
+    """
+    size = os.path.getsize(path)
+    try:
+        byte_range = parse_byte_range(range_header, size)
+    except ValueError:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    if byte_range is None:
+        return FileResponse(path, media_type=media_type, headers={"Accept-Ranges": "bytes"})
+    start, end = byte_range
+    return StreamingResponse(
+        _iter_file_range(path, start, end),
+        status_code=206,
+        media_type=media_type,
+        headers={
+            "Accept-Ranges": "bytes",
+            "Content-Range": f"bytes {start}-{end}/{size}",
+            "Content-Length": str(end - start + 1),
+        },
+    )
+
+
+# An image whose URL changes whenever its content does can be kept forever;
+# any other URL is revalidated on each use (a 304 when unchanged).
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def file_version(path: str) -> str:
+    """URL version token for a file whose name changes with its content."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def file_etag(stat_result: os.stat_result) -> str:
+    """Strong ETag from the file's identity; files are replaced, never edited."""
+    return f'"{stat_result.st_ino:x}-{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def is_not_modified(
+    request_headers: Mapping[str, str], etag: str, mtime: Optional[float] = None
+) -> bool:
+    """Whether the client's copy is current (If-None-Match, else If-Modified-Since)."""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since and mtime is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since
+    return False
+
+
+def cached_file_response(
+    request_headers: Mapping[str, str],
+    path: str,
+    immutable: bool,
+    media_type: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Serve a file with a strong ETag and Cache-Control, or a bodiless 304.
+
+    Raises FileNotFoundError if the file does not exist.
+    """
+    stat_result = os.stat(path)
+    etag = file_etag(stat_result)
+    headers = {
+        **(headers or {}),
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+    }
+    if is_not_modified(request_headers, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat_result)
+
+
 # Placeholder image resources — loaded once
 _PLACEHOLDER_SIZE = 60
 _placeholder_font = None
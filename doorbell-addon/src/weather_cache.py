@@ -0,0 +1,133 @@
+"""Last-known weather for the ring pipeline, kept warm in the background."""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import structlog
+
+from .config import settings
+from .ha_websocket import ha_websocket
+from .utils import HomeAssistantAPI, parse_weather_state
+
+logger = structlog.get_logger()
+
+# How long a ring waits for a live fetch when the cache is stale; the fetch
+# keeps going afterwards and warms the cache for the next ring.
+_RING_FETCH_TIMEOUT_SECS = 2.0
+_MIN_POLL_SECS = 15.0
+
+
+class WeatherCache:
+    """Latest reading of the weather entity and how old it is.
+
+    While the HA WebSocket is connected its pushed state is current by
+    definition and is used directly. Otherwise a poller refreshes the reading
+    every half weather_max_age_secs, so a ring reads it without a request and
+    only fetches live when the cached value is older than the maximum age.
+    """
+
+    def __init__(self):
+        self._entity: Optional[str] = None
+        self._data: Optional[Dict[str, Any]] = None
+        self._at = 0.0  # time.monotonic() when _data was last known current
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._poller: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.live_fetches = 0
+        self.last_error: Optional[str] = None
+
+    def _cached(self, entity_id: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """(reading, age_secs) for entity_id, preferring the WebSocket's state."""
+        state = ha_websocket.get_state(entity_id)
+        if state is not None:
+            self._store(entity_id, parse_weather_state(state))
+        if self._data is None or self._entity != entity_id:
+            return None
+        return self._data, time.monotonic() - self._at
+
+    def _store(self, entity_id: str, data: Dict[str, Any]) -> None:
+        self._entity, self._data, self._at = entity_id, data, time.monotonic()
+
+    async def refresh(self) -> Optional[Dict[str, Any]]:
+        """Fetch the weather entity now; concurrent callers share one request."""
+        task = self._refresh_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = self._refresh_task = asyncio.create_task(self._fetch())
+        return await asyncio.shield(task)
+
+    async def _fetch(self) -> Optional[Dict[str, Any]]:
+        entity_id = settings.weather_entity
+        if not entity_id:
+            return None
+        self.live_fetches += 1
+        try:
+            data = await HomeAssistantAPI().get_weather_data(entity_id)
+            error = None if data is not None else "weather entity unavailable"
+        except Exception as e:
+            data, error = None, str(e)
+        self.last_error = error
+        if data is not None:
+            self._store(entity_id, data)
+        return data
+
+    async def current(self) -> Tuple[Optional[Dict[str, Any]], Optional[float]]:
+        """(reading, age_secs) for the ring: cached if fresh enough, else live.
+
+        Returns (None, None) when there is no weather entity or no reading
+        within the age limit could be obtained in time.
+        """
+        entity_id = settings.weather_entity
+        if not entity_id:
+            return None, None
+        cached = self._cached(entity_id)
+        if cached is not None and cached[1] <= settings.weather_max_age_secs:
+            self.hits += 1
+            return cached[0], round(cached[1], 1)
+        try:
+            data = await asyncio.wait_for(self.refresh(), _RING_FETCH_TIMEOUT_SECS)
+        except asyncio.TimeoutError:
+            logger.warning("Live weather fetch too slow, ring continues without it")
+            return None, None
+        return (data, 0.0) if data is not None else (None, None)
+
+    # ── Background poller ────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        poller, self._poller = self._poller, None
+        if poller is not None:
+            poller.cancel()
+            try:
+                await poller
+            except asyncio.CancelledError:
+                pass
+
+    async def _poll(self) -> None:
+        while True:
+            # Pushed WebSocket state needs no polling; _cached() reads it.
+            entity_id = settings.weather_entity
+            if entity_id and ha_websocket.get_state(entity_id) is None:
+                await self.refresh()
+            await asyncio.sleep(max(_MIN_POLL_SECS, settings.weather_max_age_secs / 2))
+
+    def get_status(self) -> Dict[str, Any]:
+        age = time.monotonic() - self._at if self._data is not None else None
+        pushed = bool(self._entity) and ha_websocket.get_state(self._entity) is not None
+        return {
+            "entity": self._entity,
+            "reading": self._data,
+            "age_secs": round(age, 1) if age is not None else None,
+            "max_age_secs": settings.weather_max_age_secs,
+            "source": "websocket" if pushed else "poll",
+            "hits": self.hits,
+            "live_fetches": self.live_fetches,
+            "last_error": self.last_error,
+        }
+
+
+# Global cache (poller started with the app)
+weather_cache = WeatherCache()
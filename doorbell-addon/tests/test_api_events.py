@@ -0,0 +1,90 @@
+"""Tests for GET /api/events — cursor pagination and server-side filters."""
+import os
+import sys
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+_real_staticfiles_init = None
+
+
+def _patched_staticfiles_init(self, **kwargs):
+    kwargs["check_dir"] = False
+    _real_staticfiles_init(self, **kwargs)
+
+
+def _patch_app_imports():
+    global _real_staticfiles_init
+    from starlette.staticfiles import StaticFiles
+    if _real_staticfiles_init is None:
+        _real_staticfiles_init = StaticFiles.__init__
+        StaticFiles.__init__ = _patched_staticfiles_init
+
+
+_patch_app_imports()
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    import src.app as app_mod
+    mock_db = MagicMock()
+    mock_db.get_doorbell_events_page.return_value = ([], None)
+    mock_ha_integration = MagicMock()
+    mock_ha_integration.initialize = AsyncMock()
+    with patch.object(app_mod, 'db', mock_db), \
+         patch.object(app_mod, 'ha_integration', mock_ha_integration), \
+         patch.object(app_mod, 'ensure_directories', MagicMock()):
+        with TestClient(app_mod.app, raise_server_exceptions=True) as c:
+            c._mock_db = mock_db
+            yield c
+
+
+def test_events_response_includes_next_cursor(client):
+    event = MagicMock(
+        id=1, timestamp=datetime(2026, 1, 1, 10, 0), image_path="/img/a.jpg",
+        ai_message=None, weather_condition=None, weather_temperature=None,
+        weather_humidity=None, faces_detected=0, face_data=None,
+    )
+    client._mock_db.get_doorbell_events_page.return_value = ([event], "abc")
+    resp = client.get("/api/events?limit=1")
+    assert resp.status_code == 200
+    assert resp.json()["next_cursor"] == "abc"
+    assert resp.json()["events"][0]["id"] == 1
+
+
+def test_events_forwards_cursor(client):
+    client.get("/api/events?before=abc")
+    assert client._mock_db.get_doorbell_events_page.call_args.kwargs["before"] == "abc"
+
+
+def test_events_invalid_cursor_returns_400(client):
+    client._mock_db.get_doorbell_events_page.side_effect = ValueError("Invalid cursor")
+    resp = client.get("/api/events?before=garbage")
+    assert resp.status_code == 400
+
+
+def test_events_filters_are_parsed(client):
+    client.get(
+        "/api/events?from=2026-01-01&to=2026-01-31&person_id=3&min_faces=1&unknown_only=true"
+    )
+    f = client._mock_db.get_doorbell_events_page.call_args.kwargs["filters"]
+    assert f.start == datetime(2026, 1, 1)
+    assert f.end == datetime(2026, 2, 1)  # date-only "to" covers the whole day
+    assert f.person_id == 3
+    assert f.min_faces == 1
+    assert f.unknown_only is True
+
+
+def test_events_datetime_to_is_exact(client):
+    client.get("/api/events?to=2026-01-31T12:30:00")
+    f = client._mock_db.get_doorbell_events_page.call_args.kwargs["filters"]
+    assert f.end == datetime(2026, 1, 31, 12, 30)
+
+
+def test_events_malformed_date_returns_400(client):
+    resp = client.get("/api/events?from=yesterday")
+    assert resp.status_code == 400
@@ -34,6 +34,7 @@ def client(tmp_path):
     mock_frs = MagicMock()
     mock_frs.is_ready.return_value = True
     mock_frs.initialize = AsyncMock()
+    mock_frs.shutdown = AsyncMock()
     mock_settings = MagicMock()
     mock_settings.face_recognition_enabled = True
     mock_settings.persons_path = str(tmp_path / "persons")
@@ -105,7 +106,6 @@ def test_assign_face_crop_to_existing_person(client, tmp_path):
     """POST /api/face-crops/{id}/assign with person_id."""
     import numpy as np
     from src.face_recognition_service import FaceResult
-    from unittest.mock import patch as _patch
     crop_file = tmp_path / "face_crops" / "5_0.jpg"
     crop_file.parent.mkdir(parents=True, exist_ok=True)
     crop_file.write_bytes(b"fake-image")
@@ -116,24 +116,18 @@ def test_assign_face_crop_to_existing_person(client, tmp_path):
     client._mock_db.get_person.return_value = {
         "id": 2, "name": "Alice", "thumbnail_path": None
     }
-    client._mock_db.add_person_embedding.return_value = 10
     face_result = FaceResult(bbox=(0, 0, 50, 50), embedding=np.array([0.1, 0.2, 0.3]), det_score=0.99)
-    client._mock_frs.analyze_image.return_value = [face_result]
-
-    # Mock PIL Image.open and ImageOps to avoid needing a real image file
-    mock_img = MagicMock()
-    mock_img.width = 100
-    mock_img.height = 100
-    mock_img.crop.return_value = mock_img
-    mock_img.resize.return_value = mock_img
-    mock_img.convert.return_value = mock_img
-
-    with _patch("PIL.ImageOps.exif_transpose", return_value=mock_img), \
-         _patch("PIL.Image.open", return_value=mock_img), \
-         _patch("src.app.os.rename"):
-        resp = client.post("/api/face-crops/1/assign", json={"person_id": 2})
+    client._mock_frs.analyze = AsyncMock(return_value=[face_result])
+    client._mock_frs.add_sample = AsyncMock(return_value=(10, "/data/persons/2_10.jpg"))
+
+    resp = client.post("/api/face-crops/1/assign", json={"person_id": 2})
     assert resp.status_code == 200
-    assert resp.json()["person_id"] == 2
+    assert resp.json() == {"person_id": 2, "embedding_id": 10, "name": "Alice"}
+    client._mock_frs.add_sample.assert_awaited_once_with(
+        2, "Alice", str(crop_file), face_result, set_avatar=True
+    )
+    client._mock_db.dismiss_face_crop.assert_called_once_with(1)
+    client._mock_frs.refresh_embeddings_cache.assert_not_called()
 
 
 def test_assign_face_crop_both_fields_returns_422(client):
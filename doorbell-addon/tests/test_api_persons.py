@@ -60,6 +60,7 @@ def client(tmp_path):
     mock_settings.storage_path = str(tmp_path)
     # Make async methods return coroutines
     mock_frs.initialize = AsyncMock()
+    mock_frs.shutdown = AsyncMock()
     mock_ha_integration = MagicMock()
     mock_ha_integration.initialize = AsyncMock()
     mock_ha_integration.handle_doorbell_ring = AsyncMock()
@@ -77,11 +78,10 @@ def client(tmp_path):
 
 def test_get_persons_returns_persons_with_samples(client):
     """GET /api/persons must return persons array with samples."""
-    client._mock_db.get_persons.return_value = [
-        {"id": 1, "name": "Alice", "thumbnail_path": "/data/persons/1_1.jpg", "created_at": "2026-01-01"}
-    ]
-    client._mock_db.get_person_embeddings.return_value = [
-        {"id": 1, "person_id": 1, "thumbnail_path": "/data/persons/1_1.jpg", "created_at": "2026-01-01"}
+    client._mock_db.persons_etag.return_value = '"persons-ab-1"'
+    client._mock_db.get_persons_with_samples.return_value = [
+        {"id": 1, "name": "Alice", "thumbnail_path": "/data/persons/1_1.jpg", "created_at": "2026-01-01",
+         "samples": [{"id": 1, "thumbnail_path": "/data/persons/1_1.jpg", "created_at": "2026-01-01"}]}
     ]
     resp = client.get("/api/persons")
     assert resp.status_code == 200
@@ -92,6 +92,31 @@ def test_get_persons_returns_persons_with_samples(client):
     assert "sample_count" in p
     assert "samples" in p
     assert p["samples"][0]["thumbnail_path"] == "api/persons/1/samples/1/thumbnail"
+    assert p["thumbnail_path"] == "api/persons/1/thumbnail?v=1_1"
+    assert resp.headers["etag"] == '"persons-ab-1"'
+    client._mock_db.get_person_embeddings.assert_not_called()
+
+
+def test_get_persons_unchanged_list_is_304_without_query(client):
+    client._mock_db.persons_etag.return_value = '"persons-ab-7"'
+    resp = client.get("/api/persons", headers={"If-None-Match": '"persons-ab-7"'})
+    assert resp.status_code == 304
+    assert resp.content == b""
+    client._mock_db.get_persons_with_samples.assert_not_called()
+
+
+def test_get_person_reads_one_person(client):
+    client._mock_db.get_person_with_samples.return_value = {
+        "id": 3, "name": "Bob", "thumbnail_path": None, "created_at": "2026-01-01", "samples": [],
+    }
+    resp = client.get("/api/persons/3")
+    assert resp.status_code == 200
+    assert resp.json()["persons"][0]["sample_count"] == 0
+    client._mock_db.get_person_with_samples.assert_called_once_with(3)
+    client._mock_db.get_persons.assert_not_called()
+
+    client._mock_db.get_person_with_samples.return_value = None
+    assert client.get("/api/persons/4").status_code == 404
 
 
 def test_patch_person_renames(client):
@@ -100,6 +125,8 @@ def test_patch_person_renames(client):
     resp = client.patch("/api/persons/1", json={"name": "Alicia"})
     assert resp.status_code == 200
     assert resp.json()["name"] == "Alicia"
+    client._mock_frs.cache_rename_person.assert_called_once_with(1, "Alicia")
+    client._mock_frs.refresh_embeddings_cache.assert_not_called()
 
 
 def test_patch_person_empty_name_returns_422(client):
@@ -117,13 +144,13 @@ def test_patch_person_not_found_returns_404(client):
 
 def test_delete_person_returns_204(client):
     """DELETE /api/persons/{id} must return 204."""
-    client._mock_frs.delete_person.return_value = True
+    client._mock_frs.delete_person = AsyncMock(return_value=True)
     resp = client.delete("/api/persons/1")
     assert resp.status_code == 204
 
 
 def test_delete_person_not_found_returns_404(client):
-    client._mock_frs.delete_person.return_value = False
+    client._mock_frs.delete_person = AsyncMock(return_value=False)
     resp = client.delete("/api/persons/99")
     assert resp.status_code == 404
 
@@ -133,15 +160,28 @@ def test_get_person_thumbnail_from_db(client, tmp_path):
     thumb = tmp_path / "persons" / "1_1.jpg"
     thumb.parent.mkdir(parents=True, exist_ok=True)
     thumb.write_bytes(b"JFIF")
-    client._mock_db.get_person.return_value = {
-        "id": 1, "name": "Alice", "thumbnail_path": str(thumb)
-    }
+    client._mock_db.get_person_thumbnail_path.return_value = str(thumb)
     resp = client.get("/api/persons/1/thumbnail")
     assert resp.status_code == 200
+    client._mock_db.get_person_thumbnail_path.assert_called_with(1)
 
 
 def test_get_person_thumbnail_null_returns_404(client):
     """GET /api/persons/{id}/thumbnail returns 404 when no thumbnail set."""
-    client._mock_db.get_person.return_value = {"id": 1, "name": "Alice", "thumbnail_path": None}
+    client._mock_db.get_person_thumbnail_path.return_value = None
     resp = client.get("/api/persons/1/thumbnail")
     assert resp.status_code == 404
+
+
+def test_person_thumbnail_immutable_only_at_current_version(client, tmp_path):
+    thumb = tmp_path / "persons" / "1_7.jpg"
+    thumb.parent.mkdir(parents=True, exist_ok=True)
+    thumb.write_bytes(b"JFIF")
+    client._mock_db.get_person_thumbnail_path.return_value = str(thumb)
+    current = client.get("/api/persons/1/thumbnail?v=1_7")
+    assert "immutable" in current.headers["cache-control"]
+    stale = client.get("/api/persons/1/thumbnail?v=1_3")
+    assert stale.headers["cache-control"] == "no-cache"
+    # An unversioned or stale URL revalidates cheaply.
+    again = client.get("/api/persons/1/thumbnail", headers={"If-None-Match": stale.headers["etag"]})
+    assert again.status_code == 304 and again.content == b""
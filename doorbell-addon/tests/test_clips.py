@@ -0,0 +1,160 @@
+"""Tests for ring clips: frame history, ClipRecorder and the range endpoint."""
+import os
+import sys
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import src.clips as clips_mod
+from src.clips import ClipRecorder, clip_path_for
+from src.rtsp_grabber import RTSPGrabber
+from src.utils import parse_byte_range
+
+
+def test_clip_path_sits_next_to_snapshot():
+    assert clip_path_for("/share/doorbell/images/doorbell_1.jpg") == \
+        "/share/doorbell/images/doorbell_1.mp4"
+
+
+def test_history_bounded_by_age_and_bytes():
+    g = RTSPGrabber()
+    g.configure_history(seconds=10, max_bytes=250)
+    now = time.monotonic()
+    g._store([b"a" * 100], now - 20)  # too old once newer frames arrive
+    g._store([b"b" * 100], now - 2)
+    g._store([b"c" * 100, b"d" * 100], now)
+    history = g.get_status()["history"]
+    assert history["frames"] == 2  # byte cap drops "b" after age drops "a"
+    assert history["bytes"] == 200
+    assert g.frames_between(now - 5, now) == [b"c" * 100, b"d" * 100]
+
+
+def test_history_off_by_default():
+    g = RTSPGrabber()
+    g._store([b"frame"], time.monotonic())
+    assert g.get_status()["history"]["frames"] == 0
+
+
+@pytest.mark.parametrize("header,size,expected", [
+    (None, 100, None),
+    ("bytes=0-9", 100, (0, 9)),
+    ("bytes=90-", 100, (90, 99)),
+    ("bytes=-10", 100, (90, 99)),
+    ("bytes=50-500", 100, (50, 99)),
+    ("bytes=0-1,5-6", 100, None),
+    ("items=0-1", 100, None),
+])
+def test_parse_byte_range(header, size, expected):
+    assert parse_byte_range(header, size) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=5-2", "bytes=-0"])
+def test_parse_byte_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_byte_range(header, 100)
+
+
+@pytest.mark.asyncio
+async def test_recorder_encodes_pre_and_post_roll(tmp_path):
+    g = RTSPGrabber()
+    g.configure_history(seconds=30, max_bytes=10_000)
+    ring_at = time.monotonic()
+    g._store([b"too-early"], ring_at - 8)
+    g._store([b"pre"], ring_at - 1)
+    g._store([b"post"], ring_at + 0.5)
+    encoded = {}
+
+    def fake_encode(frames, fps, dest):
+        encoded.update(frames=frames, fps=fps, dest=dest)
+
+    recorder = ClipRecorder()
+    with patch.object(clips_mod, "rtsp_grabber", g), \
+         patch.object(clips_mod, "encode_clip", side_effect=fake_encode), \
+         patch.object(clips_mod.settings, "clip_pre_roll_secs", 5), \
+         patch.object(clips_mod.settings, "clip_post_roll_secs", 1), \
+         patch.object(clips_mod.asyncio, "sleep", AsyncMock()) as mock_sleep:
+        path = await recorder.record(str(tmp_path / "doorbell_x.jpg"), ring_at=ring_at)
+    assert path == str(tmp_path / "doorbell_x.mp4")
+    assert encoded["frames"] == [b"pre", b"post"]
+    assert encoded["dest"] == path
+    assert 0 < mock_sleep.call_args[0][0] <= 1
+    assert recorder.get_status()["clips_written"] == 1
+
+
+@pytest.mark.asyncio
+async def test_recorder_counts_failures_and_empty_history(tmp_path):
+    g = RTSPGrabber()
+    g.configure_history(seconds=30, max_bytes=10_000)
+    recorder = ClipRecorder()
+    with patch.object(clips_mod, "rtsp_grabber", g), \
+         patch.object(clips_mod.asyncio, "sleep", AsyncMock()):
+        assert await recorder.record(str(tmp_path / "a.jpg")) is None
+        g._store([b"frame"], time.monotonic())
+        with patch.object(clips_mod, "encode_clip", side_effect=RuntimeError("no libx264")):
+            assert await recorder.record(str(tmp_path / "a.jpg")) is None
+    status = recorder.get_status()
+    assert status["clips_failed"] == 1
+    assert status["last_error"] == "no libx264"
+
+
+def test_delete_event_rows_includes_clip(tmp_path):
+    import sqlite3
+    from src.database import _delete_event_rows
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE doorbell_events (id INTEGER PRIMARY KEY, image_path TEXT)")
+    conn.execute("CREATE TABLE face_crops (id INTEGER PRIMARY KEY, event_id INT, image_path TEXT)")
+    conn.execute("INSERT INTO doorbell_events VALUES (1, '/img/doorbell_1.jpg')")
+    conn.execute("INSERT INTO face_crops VALUES (1, 1, '/crops/1_0.jpg')")
+    count, files = _delete_event_rows(conn, [1])
+    assert count == 1
+    assert sorted(files) == ["/crops/1_0.jpg", "/img/doorbell_1.jpg", "/img/doorbell_1.mp4"]
+
+
+# ── Endpoint ──────────────────────────────────────────────────────────────────
+
+from tests.test_api_events import _patch_app_imports  # noqa: E402
+
+_patch_app_imports()
+
+
+@pytest.fixture
+def client(tmp_path):
+    from fastapi.testclient import TestClient
+    import src.app as app_mod
+    (tmp_path / "images").mkdir()
+    mock_ha_integration = MagicMock()
+    mock_ha_integration.initialize = AsyncMock()
+    with patch.object(app_mod.settings, 'storage_path', str(tmp_path)), \
+         patch.object(app_mod, 'ha_integration', mock_ha_integration), \
+         patch.object(app_mod, 'ensure_directories', MagicMock()):
+        with TestClient(app_mod.app, raise_server_exceptions=True) as c:
+            yield c
+
+
+def test_clip_endpoint_serves_ranges(client, tmp_path):
+    data = bytes(range(256)) * 4
+    (tmp_path / "images" / "doorbell_1.mp4").write_bytes(data)
+
+    full = client.get("/api/clips/doorbell_1.mp4")
+    assert full.status_code == 200
+    assert full.headers["accept-ranges"] == "bytes"
+    assert full.content == data
+
+    part = client.get("/api/clips/doorbell_1.mp4", headers={"Range": "bytes=10-19"})
+    assert part.status_code == 206
+    assert part.headers["content-range"] == f"bytes 10-19/{len(data)}"
+    assert part.headers["content-type"] == "video/mp4"
+    assert part.content == data[10:20]
+
+    bad = client.get("/api/clips/doorbell_1.mp4", headers={"Range": "bytes=5000-"})
+    assert bad.status_code == 416
+    assert bad.headers["content-range"] == f"bytes */{len(data)}"
+
+
+def test_clip_endpoint_rejects_missing_and_non_clips(client, tmp_path):
+    (tmp_path / "images" / "doorbell_1.jpg").write_bytes(b"jpeg")
+    assert client.get("/api/clips/doorbell_1.jpg").status_code == 404
+    assert client.get("/api/clips/missing.mp4").status_code == 404
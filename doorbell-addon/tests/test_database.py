@@ -246,6 +246,14 @@ def test_add_doorbell_event_stores_explicit_local_timestamp(tmp_path):
     assert datetime.fromisoformat(row[0]) == sentinel
 
 
+
+def test_weather_age_is_stored_with_the_event(tmp_path):
+    mgr = make_db(tmp_path)
+    event = mgr.add_doorbell_event(
+        image_path="/img/test.jpg", weather_condition="sunny", weather_age_secs=42.5
+    )
+    assert mgr.get_doorbell_event(event.id).weather_age_secs == 42.5
+
 def test_add_person_stores_explicit_local_created_at(tmp_path):
     import src.database as db_mod
     from datetime import datetime
@@ -347,3 +355,533 @@ def test_dismiss_face_crop(tmp_path):
     crops = mgr.get_face_crops(dismissed=True)
     assert len(crops) == 1
     assert crops[0]["dismissed"] == 1
+
+
+# ── Pooled connections ─────────────────────────────────────────────────────
+
+def test_connection_reused_within_thread(tmp_path):
+    mgr = make_db(tmp_path)
+    with mgr._connect() as first:
+        pass
+    mgr.get_event_count()
+    with mgr._connect() as second:
+        pass
+    assert first is second
+
+
+def test_connection_pragmas_applied(tmp_path):
+    mgr = make_db(tmp_path)
+    with mgr._connect() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_connection_per_thread(tmp_path):
+    import threading
+    mgr = make_db(tmp_path)
+    seen = []
+    t = threading.Thread(target=lambda: seen.append(mgr._get_connection()))
+    t.start()
+    t.join()
+    assert seen[0] is not mgr._get_connection()
+
+
+def test_connect_rolls_back_on_error(tmp_path):
+    mgr = make_db(tmp_path)
+    with pytest.raises(RuntimeError):
+        with mgr._connect() as conn:
+            conn.execute(
+                "INSERT INTO known_persons (name, created_at) VALUES ('Alice', '2026-01-01')"
+            )
+            raise RuntimeError("boom")
+    assert mgr.get_persons() == []
+
+
+def test_close_reopens_on_next_use(tmp_path):
+    mgr = make_db(tmp_path)
+    mgr.add_person("Alice")
+    mgr.close()
+    assert [p["name"] for p in mgr.get_persons()] == ["Alice"]
+
+
+def test_delete_person_cascades_to_embeddings(tmp_path):
+    """foreign_keys=ON makes ON DELETE CASCADE effective."""
+    mgr = make_db(tmp_path)
+    pid = mgr.add_person("Alice")
+    mgr.add_person_embedding(pid, _make_embedding_bytes(), None)
+    mgr.delete_person(pid)
+    with sqlite3.connect(mgr.db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM person_embeddings").fetchone()[0] == 0
+
+
+# ── Keyset pagination ──────────────────────────────────────────────────────
+
+def _insert_events(mgr, timestamps):
+    with sqlite3.connect(mgr.db_path) as conn:
+        for ts in timestamps:
+            conn.execute(
+                "INSERT INTO doorbell_events (timestamp, image_path) VALUES (?, ?)",
+                (ts, "/img/x.jpg"),
+            )
+
+
+def test_event_cursor_round_trip():
+    from src.database import decode_event_cursor, encode_event_cursor
+    cursor = encode_event_cursor("2026-01-01T10:00:00.123456", 42)
+    assert decode_event_cursor(cursor) == ("2026-01-01T10:00:00.123456", 42)
+
+
+def test_decode_event_cursor_rejects_garbage():
+    from src.database import decode_event_cursor
+    with pytest.raises(ValueError):
+        decode_event_cursor("not-a-cursor")
+
+
+def test_keyset_pages_cover_all_events_without_overlap(tmp_path):
+    mgr = make_db(tmp_path)
+    # Duplicate timestamps exercise the id tie-breaker.
+    _insert_events(mgr, [f"2026-01-{d:02d}T10:00:00" for d in range(1, 11)] * 2)
+    seen, cursor = [], None
+    while True:
+        events, cursor = mgr.get_doorbell_events_page(limit=3, before=cursor)
+        seen.extend(e.id for e in events)
+        if cursor is None:
+            break
+    assert len(seen) == 20
+    assert len(set(seen)) == 20
+    expected = mgr.get_doorbell_events(limit=100)
+    assert seen == [e.id for e in expected]
+
+
+def test_keyset_last_page_has_no_cursor(tmp_path):
+    mgr = make_db(tmp_path)
+    _insert_events(mgr, ["2026-01-01T10:00:00", "2026-01-02T10:00:00"])
+    events, cursor = mgr.get_doorbell_events_page(limit=2)
+    assert len(events) == 2
+    assert cursor is None
+
+
+def test_keyset_query_uses_composite_index(tmp_path):
+    mgr = make_db(tmp_path)
+    with sqlite3.connect(mgr.db_path) as conn:
+        plan = " ".join(r[3] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM doorbell_events "
+            "WHERE (timestamp, id) < (?, ?) ORDER BY timestamp DESC, id DESC LIMIT 20",
+            ("2026-01-01", 1),
+        ).fetchall())
+    assert "idx_events_timestamp_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+# ── Server-side event filters ──────────────────────────────────────────────
+
+def _add_event(mgr, ts, faces=None):
+    from src.database import _insert_event_faces
+    with sqlite3.connect(mgr.db_path) as conn:
+        event_id = conn.execute(
+            "INSERT INTO doorbell_events (timestamp, image_path, faces_detected) "
+            "VALUES (?, ?, ?)",
+            (ts, "/img/x.jpg", len(faces or [])),
+        ).lastrowid
+        _insert_event_faces(conn, event_id, ts, faces or [])
+        return event_id
+
+
+def test_filter_date_range(tmp_path):
+    from datetime import datetime
+    from src.database import EventFilter
+    mgr = make_db(tmp_path)
+    _add_event(mgr, "2026-01-01T23:59:00")
+    inside = _add_event(mgr, "2026-01-02T08:00:00")
+    legacy = _add_event(mgr, "2026-01-02 09:00:00")  # CURRENT_TIMESTAMP format
+    _add_event(mgr, "2026-01-03T00:00:00")
+    events = mgr.get_doorbell_events(filters=EventFilter(
+        start=datetime(2026, 1, 2), end=datetime(2026, 1, 3),
+    ))
+    assert sorted(e.id for e in events) == sorted([inside, legacy])
+
+
+def test_filter_person_id(tmp_path):
+    from src.database import EventFilter
+    mgr = make_db(tmp_path)
+    alice = mgr.add_person("Alice")
+    bob = mgr.add_person("Bob")
+    first = _add_event(mgr, "2026-01-01T10:00:00", [{"name": "Alice", "person_id": alice}])
+    group = _add_event(mgr, "2026-01-02T10:00:00", [
+        {"name": "Bob", "person_id": bob}, {"name": "Alice", "person_id": alice},
+    ])
+    _add_event(mgr, "2026-01-03T10:00:00", [{"name": "Bob", "person_id": bob}])
+    _add_event(mgr, "2026-01-04T10:00:00")
+    events = mgr.get_doorbell_events(filters=EventFilter(person_id=alice))
+    assert [e.id for e in events] == [group, first]
+
+
+def test_filter_unknown_only_and_min_faces(tmp_path):
+    from src.database import EventFilter
+    mgr = make_db(tmp_path)
+    unknown = _add_event(mgr, "2026-01-01T10:00:00", [{"name": "Unknown"}])
+    pair = _add_event(mgr, "2026-01-02T10:00:00", [{"name": "Alice"}, {"name": "Unknown"}])
+    _add_event(mgr, "2026-01-03T10:00:00", [{"name": "Alice"}])
+    _add_event(mgr, "2026-01-04T10:00:00")
+    events = mgr.get_doorbell_events(filters=EventFilter(unknown_only=True))
+    assert sorted(e.id for e in events) == sorted([unknown, pair])
+    events = mgr.get_doorbell_events(filters=EventFilter(min_faces=2))
+    assert [e.id for e in events] == [pair]
+
+
+def test_filter_tolerates_malformed_face_data(tmp_path):
+    from src.database import EventFilter
+    mgr = make_db(tmp_path)
+    with sqlite3.connect(mgr.db_path) as conn:
+        conn.execute(
+            "INSERT INTO doorbell_events (timestamp, image_path, faces_detected, face_data) "
+            "VALUES ('2026-01-01T10:00:00', '/img/x.jpg', 1, 'not json')"
+        )
+    assert mgr.get_doorbell_events(filters=EventFilter(unknown_only=True)) == []
+
+
+def test_face_filters_use_partial_index(tmp_path):
+    from src.database import EventFilter, _event_filter_clauses
+    mgr = make_db(tmp_path)
+    clauses, params = _event_filter_clauses(EventFilter(unknown_only=True))
+    with sqlite3.connect(mgr.db_path) as conn:
+        plan = " ".join(r[3] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM doorbell_events de WHERE "
+            + " AND ".join(clauses) + " ORDER BY timestamp DESC, id DESC LIMIT 20",
+            params,
+        ).fetchall())
+    assert "idx_events_with_faces" in plan
+    assert "idx_event_faces_event" in plan
+
+
+def test_filters_combine_with_cursor(tmp_path):
+    from src.database import EventFilter
+    mgr = make_db(tmp_path)
+    ids = [_add_event(mgr, f"2026-01-{d:02d}T10:00:00", [{"name": "Unknown"}]) for d in range(1, 6)]
+    _add_event(mgr, "2026-01-06T10:00:00")
+    f = EventFilter(unknown_only=True)
+    first, cursor = mgr.get_doorbell_events_page(limit=3, filters=f)
+    second, cursor = mgr.get_doorbell_events_page(limit=3, before=cursor, filters=f)
+    assert [e.id for e in first + second] == ids[::-1]
+    assert cursor is None
+
+
+# ── Normalised event_faces ─────────────────────────────────────────────────
+
+def test_add_doorbell_event_writes_event_faces(tmp_path):
+    import json
+    mgr = make_db(tmp_path)
+    alice = mgr.add_person("Alice")
+    faces = [
+        {"name": "Alice", "person_id": alice, "bbox": [1, 2, 3, 4], "score": 0.9, "det_score": 0.8},
+        {"name": "Unknown", "person_id": None, "bbox": [5, 6, 7, 8], "score": 0.1, "det_score": 0.7},
+    ]
+    event = mgr.add_doorbell_event(image_path="/img/test.jpg", faces_detected=2, faces=faces)
+    assert json.loads(event.face_data) == faces
+    stored = mgr.get_doorbell_event(event.id)
+    assert json.loads(stored.face_data) == faces
+    with sqlite3.connect(mgr.db_path) as conn:
+        ts = conn.execute("SELECT DISTINCT timestamp FROM event_faces").fetchall()
+    assert ts == [(event.timestamp.isoformat(),)]
+
+
+def test_event_without_faces_has_null_face_data(tmp_path):
+    mgr = make_db(tmp_path)
+    event = mgr.add_doorbell_event(image_path="/img/test.jpg", faces_detected=0, faces=[])
+    assert event.face_data is None
+    assert mgr.get_doorbell_event(event.id).face_data is None
+
+
+def test_face_data_reflects_person_rename(tmp_path):
+    import json
+    mgr = make_db(tmp_path)
+    alice = mgr.add_person("Alice")
+    event_id = _add_event(mgr, "2026-01-01T10:00:00", [{"name": "Alice", "person_id": alice}])
+    with sqlite3.connect(mgr.db_path) as conn:
+        conn.execute("UPDATE known_persons SET name = 'Alicia' WHERE id = ?", (alice,))
+    faces = json.loads(mgr.get_doorbell_event(event_id).face_data)
+    assert faces[0]["name"] == "Alicia"
+
+
+def test_event_faces_cascade_and_set_null(tmp_path):
+    import json
+    from src.database import EventFilter
+    mgr = make_db(tmp_path)
+    alice = mgr.add_person("Alice")
+    kept = _add_event(mgr, "2026-01-01T10:00:00", [{"name": "Alice", "person_id": alice}])
+    gone = _add_event(mgr, "2026-01-02T10:00:00", [{"name": "Alice", "person_id": alice}])
+    mgr.delete_events([gone])
+    mgr.delete_person(alice)
+    with sqlite3.connect(mgr.db_path) as conn:
+        rows = conn.execute("SELECT event_id, person_id, name FROM event_faces").fetchall()
+    assert rows == [(kept, None, "Alice")]
+    # The ring-time label survives, but the face no longer counts as unknown.
+    assert json.loads(mgr.get_doorbell_event(kept).face_data)[0]["name"] == "Alice"
+    assert mgr.get_doorbell_events(filters=EventFilter(unknown_only=True)) == []
+
+
+def test_backfill_event_faces_from_legacy_face_data(tmp_path):
+    import json
+    from src.database import EventFilter
+    mgr = make_db(tmp_path)
+    alice = mgr.add_person("Alice")
+    mgr.add_person("Alice")  # duplicate name: lowest id wins
+    legacy = [{"name": "Alice", "bbox": [1, 2, 3, 4], "score": 0.9, "det_score": 0.8},
+              {"name": "Unknown", "bbox": [5, 6, 7, 8], "score": 0.2, "det_score": 0.6}]
+    with sqlite3.connect(mgr.db_path) as conn:
+        conn.execute("DROP TABLE event_faces")
+        conn.execute("PRAGMA user_version = 0")
+        conn.executemany(
+            "INSERT INTO doorbell_events (timestamp, image_path, faces_detected, face_data) "
+            "VALUES (?, '/img/x.jpg', ?, ?)",
+            [("2026-01-01T10:00:00", 2, json.dumps(legacy)),
+             ("2026-01-02T10:00:00", 1, "not json")],
+        )
+    mgr.close()
+
+    mgr = make_db(tmp_path)
+    with sqlite3.connect(mgr.db_path) as conn:
+        rows = conn.execute(
+            "SELECT face_idx, person_id, name, bbox_x, timestamp FROM event_faces ORDER BY id"
+        ).fetchall()
+    assert rows == [
+        (0, alice, "Alice", 1, "2026-01-01T10:00:00"),
+        (1, None, "Unknown", 5, "2026-01-01T10:00:00"),
+    ]
+    events = mgr.get_doorbell_events()
+    assert events[0].face_data == "not json"  # unparseable rows fall back to the column
+    assert [f["person_id"] for f in json.loads(events[1].face_data)] == [alice, None]
+    assert [e.id for e in mgr.get_doorbell_events(filters=EventFilter(person_id=alice))] == [events[1].id]
+
+
+def test_interrupted_backfill_is_retried_without_duplicates(tmp_path):
+    import json
+    from src.database import EventFilter
+    mgr = make_db(tmp_path)
+    alice = mgr.add_person("Alice")
+    # A ring recorded after the table existed already has its face rows.
+    faces = [{"name": "Alice", "person_id": alice}]
+    current = _add_event(mgr, "2026-01-03T10:00:00", faces)
+    with sqlite3.connect(mgr.db_path) as conn:
+        conn.execute("UPDATE doorbell_events SET face_data = ? WHERE id = ?",
+                     (json.dumps(faces), current))
+        # As after a backfill that died: table created, marker never written.
+        conn.execute("PRAGMA user_version = 0")
+        legacy = conn.execute(
+            "INSERT INTO doorbell_events (timestamp, image_path, faces_detected, face_data) "
+            "VALUES ('2026-01-01T10:00:00', '/img/x.jpg', 1, ?)",
+            (json.dumps([{"name": "Alice"}]),),
+        ).lastrowid
+    mgr.close()
+
+    mgr = make_db(tmp_path)
+    found = mgr.get_doorbell_events(filters=EventFilter(person_id=alice))
+    assert [e.id for e in found] == [current, legacy]
+    with sqlite3.connect(mgr.db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM event_faces").fetchone()[0] == 2
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 1
+
+
+def test_person_filter_uses_person_index(tmp_path):
+    from src.database import EventFilter, _event_filter_clauses
+    mgr = make_db(tmp_path)
+    clauses, params = _event_filter_clauses(EventFilter(person_id=1))
+    with sqlite3.connect(mgr.db_path) as conn:
+        plan = " ".join(r[3] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM doorbell_events_compat de WHERE "
+            + " AND ".join(clauses) + " ORDER BY timestamp DESC, id DESC LIMIT 20",
+            params,
+        ).fetchall())
+    assert "idx_event_faces_person" in plan
+
+
+# ── Retention purge ────────────────────────────────────────────────────────
+
+def _add_event_with_files(mgr, tmp_path, ts, idx):
+    image = tmp_path / f"doorbell_{idx}.jpg"
+    crop = tmp_path / f"{idx}_0.jpg"
+    image.write_bytes(b"jpg")
+    crop.write_bytes(b"jpg")
+    with sqlite3.connect(mgr.db_path) as conn:
+        event_id = conn.execute(
+            "INSERT INTO doorbell_events (timestamp, image_path) VALUES (?, ?)",
+            (ts, str(image)),
+        ).lastrowid
+    mgr.add_face_crop(event_id, str(crop))
+    return event_id, image, crop
+
+
+def test_purge_events_before_deletes_oldest_batch_with_crops_and_files(tmp_path):
+    from datetime import datetime
+    from src.database import remove_event_files
+    mgr = make_db(tmp_path)
+    old = [_add_event_with_files(mgr, tmp_path, f"2026-01-0{d}T10:00:00", d) for d in (3, 1, 2)]
+    fresh = _add_event_with_files(mgr, tmp_path, "2026-02-01T10:00:00", 9)
+
+    events, paths = mgr.purge_events_before(datetime(2026, 1, 15), limit=2)
+    assert events == 2
+    assert old[1][1].exists()  # left for the caller, off the writer thread
+    assert remove_event_files(paths) == 4
+    remaining = [e.id for e in mgr.get_doorbell_events()]
+    assert remaining == [fresh[0], old[0][0]]  # Jan 1 and Jan 2 went first
+    assert not old[1][1].exists() and not old[1][2].exists()
+    assert old[0][1].exists() and old[0][2].exists()
+    assert len(mgr.get_face_crops()) == 2
+
+    events, paths = mgr.purge_events_before(datetime(2026, 1, 15), limit=2)
+    assert (events, remove_event_files(paths)) == (1, 2)
+    assert mgr.purge_events_before(datetime(2026, 1, 15), limit=2) == (0, [])
+    assert fresh[1].exists()
+
+
+def test_delete_events_removes_crop_files(tmp_path):
+    from src.database import remove_event_files
+    mgr = make_db(tmp_path)
+    event_id, image, crop = _add_event_with_files(mgr, tmp_path, "2026-01-01T10:00:00", 1)
+    deleted, paths = mgr.delete_events([event_id])
+    assert deleted == 1 and image.exists()
+    assert remove_event_files(paths) == 2
+    assert not image.exists() and not crop.exists()
+
+
+def test_persons_with_samples_in_one_query(tmp_path):
+    mgr = make_db(tmp_path)
+    bob, alice, carol = mgr.add_person("Bob"), mgr.add_person("Alice"), mgr.add_person("Carol")
+    a1 = mgr.add_person_embedding(alice, b"a1", "/p/a1.jpg")
+    b1 = mgr.add_person_embedding(bob, b"b1", "/p/b1.jpg")
+    a2 = mgr.add_person_embedding(alice, b"a2", "/p/a2.jpg")
+
+    persons = mgr.get_persons_with_samples()
+    assert [p["name"] for p in persons] == ["Alice", "Bob", "Carol"]
+    assert [s["id"] for s in persons[0]["samples"]] == [a1, a2]
+    assert persons[0]["samples"][1]["thumbnail_path"] == "/p/a2.jpg"
+    assert [s["id"] for s in persons[1]["samples"]] == [b1]
+    assert persons[2]["samples"] == []
+
+    assert mgr.get_person_with_samples(carol)["samples"] == []
+    assert [s["id"] for s in mgr.get_person_with_samples(alice)["samples"]] == [a1, a2]
+    assert mgr.get_person_with_samples(999) is None
+
+
+def test_persons_etag_changes_with_persons_and_samples(tmp_path):
+    mgr = make_db(tmp_path)
+    seen = {mgr.persons_etag()}
+    pid = mgr.add_person("Alice")
+    emb = mgr.add_person_embedding(pid, b"x", None)
+    for change in (
+        lambda: None,
+        lambda: mgr.update_person_embedding_thumbnail(emb, "/p/1.jpg"),
+        lambda: mgr.update_person_thumbnail(pid, "/p/1.jpg"),
+        lambda: mgr.rename_person(pid, "Alicia"),
+        lambda: mgr.delete_person_embedding(emb),
+        lambda: mgr.delete_person(pid),
+    ):
+        change()
+        seen.add(mgr.persons_etag())
+    assert len(seen) == 7
+    # Unrelated writes leave it alone.
+    etag = mgr.persons_etag()
+    mgr.add_doorbell_event("/img/a.jpg")
+    assert mgr.persons_etag() == etag
+    # A restarted process does not reuse the old tags.
+    assert make_db(tmp_path).persons_etag() not in seen
+
+
+def test_commit_ring_writes_event_faces_and_crops_together(tmp_path):
+    mgr = make_db(tmp_path)
+    faces = [
+        {"name": "Unknown", "person_id": None, "bbox": [1, 2, 3, 4], "score": 0.1, "det_score": 0.9},
+        {"name": "Unknown", "person_id": None, "bbox": [5, 6, 7, 8], "score": 0.2, "det_score": 0.8},
+    ]
+    ring = mgr.commit_ring(
+        "/img/doorbell_1.jpg", faces_detected=2, faces=faces,
+        crop_paths=["/face_crops/doorbell_1_0.jpg", "/face_crops/doorbell_1_1.jpg"],
+    )
+    assert ring.event.id is not None and len(ring.face_ids) == 2
+    crops = mgr.get_face_crops()
+    assert sorted(c["id"] for c in crops) == sorted(ring.crop_ids)
+    assert {c["event_id"] for c in crops} == {ring.event.id}
+    assert mgr.get_face_crop_path(ring.crop_ids[1]) == "/face_crops/doorbell_1_1.jpg"
+
+
+def test_commit_ring_is_all_or_nothing(tmp_path):
+    mgr = make_db(tmp_path)
+    with pytest.raises(sqlite3.IntegrityError):
+        # A NULL crop path violates NOT NULL after the event and faces are inserted.
+        mgr.commit_ring(
+            "/img/doorbell_1.jpg", faces_detected=1,
+            faces=[{"name": "Unknown", "bbox": [1, 2, 3, 4]}], crop_paths=[None],
+        )
+    assert mgr.get_event_count() == 0
+    assert mgr.get_face_crop_count() == 0
+    with mgr._connect() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM event_faces").fetchone()[0] == 0
+
+
+# ── DatabaseExecutor ──────────────────────────────────────────────────────────
+
+
+@pytest.mark.asyncio
+async def test_executor_serialises_writes_on_one_thread():
+    import asyncio
+    import threading
+    import time
+    from src.database import DatabaseExecutor
+
+    executor = DatabaseExecutor(readers=2)
+    order, threads = [], set()
+
+    def write(i):
+        threads.add(threading.current_thread().name)
+        time.sleep(0.01 if i == 0 else 0)
+        order.append(i)
+        return i
+
+    try:
+        results = await asyncio.gather(*(executor.write(write, i) for i in range(5)))
+    finally:
+        executor.shutdown()
+    assert results == [0, 1, 2, 3, 4]
+    assert order == [0, 1, 2, 3, 4]  # the slow first write is not overtaken
+    assert len(threads) == 1 and threads.pop().startswith("db-writer")
+    assert executor.get_status()["writes"] == 5
+    assert executor.get_status()["pending_writes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_executor_reads_do_not_wait_for_writes_or_block_loop():
+    import asyncio
+    import threading
+    from src.database import DatabaseExecutor
+
+    executor = DatabaseExecutor(readers=2)
+    release = threading.Event()
+    try:
+        slow_write = asyncio.ensure_future(executor.write(release.wait, 5))
+        # The loop keeps running and reads are answered while the write holds.
+        assert await executor.read(lambda x, y=0: x + y, 1, y=2) == 3
+        await asyncio.sleep(0)
+        assert not slow_write.done()
+        release.set()
+        assert await slow_write is True
+    finally:
+        executor.shutdown()
+    # Threads are recreated on next use after a shutdown.
+    assert await executor.read(threading.current_thread) is not None
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_executor_runs_manager_calls_and_propagates_errors(tmp_path):
+    from src.database import DatabaseExecutor
+
+    mgr = make_db(tmp_path)
+    executor = DatabaseExecutor()
+    try:
+        event = await executor.write(mgr.add_doorbell_event, str(tmp_path / "a.jpg"))
+        assert (await executor.read(mgr.get_doorbell_event, event.id)).id == event.id
+        with pytest.raises(sqlite3.IntegrityError):
+            await executor.write(mgr.add_person_embedding, 999, b"x", None)
+    finally:
+        executor.shutdown()
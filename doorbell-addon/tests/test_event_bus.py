@@ -0,0 +1,186 @@
+"""Tests for the live event bus and the /api/events/stream endpoint."""
+import asyncio
+import json
+import os
+import sys
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.event_bus import EventBus  # noqa: E402
+from tests.test_database import make_db  # noqa: E402
+
+_real_staticfiles_init = None
+
+
+def _patched_staticfiles_init(self, **kwargs):
+    kwargs["check_dir"] = False
+    _real_staticfiles_init(self, **kwargs)
+
+
+def _patch_app_imports():
+    global _real_staticfiles_init
+    from starlette.staticfiles import StaticFiles
+    if _real_staticfiles_init is None:
+        _real_staticfiles_init = StaticFiles.__init__
+        StaticFiles.__init__ = _patched_staticfiles_init
+
+
+_patch_app_imports()
+
+
+@pytest.mark.asyncio
+async def test_publish_fans_out_to_every_subscriber():
+    bus = EventBus()
+    a, b = bus.subscribe(), bus.subscribe()
+    bus.publish("inbox", {"count": 3})
+    for queue in (a, b):
+        message = queue.get_nowait()
+        assert message["type"] == "inbox" and message["data"] == {"count": 3}
+    bus.unsubscribe(a)
+    bus.publish("inbox", {"count": 4})
+    assert a.empty() and b.get_nowait()["data"] == {"count": 4}
+
+
+def test_publish_without_subscribers_is_a_noop():
+    bus = EventBus()
+    bus.publish("stats", {"total_events": 1})
+    assert bus.published == 0 and not bus.active
+
+
+@pytest.mark.asyncio
+async def test_slow_client_backlog_replaced_by_resync():
+    bus = EventBus(queue_size=3)
+    slow = bus.subscribe()
+    for n in range(5):
+        bus.publish("stats", {"total_events": n})
+    # The backlog was dropped for one resync; later messages queue behind it.
+    messages = [slow.get_nowait() for _ in range(slow.qsize())]
+    assert [m["type"] for m in messages] == ["resync", "stats"]
+    assert bus.get_status()["resyncs"] == 1
+
+
+@pytest.mark.asyncio
+async def test_publish_from_another_thread_is_delivered_on_the_loop():
+    bus = EventBus()
+    queue = bus.subscribe()
+    thread = threading.Thread(target=bus.publish, args=("inbox", {"count": 1}))
+    thread.start()
+    thread.join()
+    message = await asyncio.wait_for(queue.get(), 1)
+    assert message["data"] == {"count": 1}
+
+
+# ── Database publishers ───────────────────────────────────────────────────────
+
+
+@pytest.fixture
+def live_db(tmp_path):
+    import src.database as db_mod
+    bus = MagicMock()
+    bus.active = True
+    with patch.object(db_mod, 'event_bus', bus):
+        yield make_db(tmp_path), bus
+
+
+def _published(bus):
+    return [c.args for c in bus.publish.call_args_list]
+
+
+def test_db_publishes_stats_delta_and_inbox_count(live_db):
+    db, bus = live_db
+    event = db.add_doorbell_event(image_path="/tmp/a.jpg")
+    db.add_face_crop(event.id, "/tmp/crop_a.jpg")
+    crop_id = db.add_face_crop(event.id, "/tmp/crop_b.jpg")
+    db.dismiss_face_crop(crop_id)
+    assert _published(bus) == [
+        ("stats", {"total_events": 1}),
+        ("inbox", {"count": 1}),
+        ("inbox", {"count": 2}),
+        ("inbox", {"count": 1}),
+    ]
+
+
+def test_db_publishes_comment_and_deletions(live_db):
+    db, bus = live_db
+    first = db.add_doorbell_event(image_path="/tmp/a.jpg")
+    second = db.add_doorbell_event(image_path="/tmp/b.jpg")
+    bus.publish.reset_mock()
+    db.update_event_comment(first.id, "Postman")
+    db.delete_events([first.id, second.id])
+    assert _published(bus) == [
+        ("event_updated", {"id": first.id, "ai_message": "Postman"}),
+        ("events_deleted", {"ids": [first.id, second.id]}),
+        ("stats", {"total_events": -2}),
+        ("inbox", {"count": 0}),
+    ]
+
+
+def test_db_skips_inbox_count_without_listeners(live_db):
+    db, bus = live_db
+    bus.active = False
+    event = db.add_doorbell_event(image_path="/tmp/a.jpg")
+    db.add_face_crop(event.id, "/tmp/crop.jpg")
+    assert ("inbox", {"count": 1}) not in _published(bus)
+
+
+# ── Stream endpoint ───────────────────────────────────────────────────────────
+
+
+def _parse(chunk):
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+    return fields["event"], json.loads(fields["data"])
+
+
+@pytest.mark.asyncio
+async def test_stream_sends_hello_then_published_messages():
+    import src.app as app_mod
+    bus = EventBus()
+    mock_db = MagicMock()
+    mock_db.get_event_count.return_value = 7
+    mock_db.get_face_crop_count.return_value = 2
+    request = MagicMock()
+    request.headers = {}
+    with patch.object(app_mod, 'event_bus', bus), patch.object(app_mod, 'db', mock_db):
+        response = await app_mod.stream_events(request)
+        assert response.media_type == "text/event-stream"
+        stream = response.body_iterator
+        assert _parse(await stream.__anext__()) == ("hello", {"total_events": 7, "inbox": 2})
+        bus.publish("stats", {"total_events": 1})
+        assert _parse(await stream.__anext__()) == ("stats", {"total_events": 1})
+        await stream.aclose()
+    assert not bus.active
+
+
+@pytest.mark.asyncio
+async def test_reconnecting_stream_is_told_to_resync():
+    import src.app as app_mod
+    request = MagicMock()
+    request.headers = {"last-event-id": "12"}
+    mock_db = MagicMock()
+    mock_db.get_event_count.return_value = 0
+    mock_db.get_face_crop_count.return_value = 0
+    with patch.object(app_mod, 'event_bus', EventBus()), patch.object(app_mod, 'db', mock_db):
+        stream = (await app_mod.stream_events(request)).body_iterator
+        assert _parse(await stream.__anext__())[0] == "hello"
+        assert _parse(await stream.__anext__())[0] == "resync"
+        await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_idle_stream_sends_keepalive():
+    import src.app as app_mod
+    request = MagicMock()
+    request.headers = {}
+    mock_db = MagicMock()
+    mock_db.get_event_count.return_value = 0
+    mock_db.get_face_crop_count.return_value = 0
+    with patch.object(app_mod, 'event_bus', EventBus()), patch.object(app_mod, 'db', mock_db), \
+         patch.object(app_mod, '_SSE_HEARTBEAT_SECS', 0.01):
+        stream = (await app_mod.stream_events(request)).body_iterator
+        await stream.__anext__()
+        assert (await stream.__anext__()).startswith(":")
+        await stream.aclose()
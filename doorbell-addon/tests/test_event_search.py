@@ -0,0 +1,149 @@
+"""Tests for full-text search over event descriptions and comments."""
+import os
+import sys
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database import DoorbellEvent
+from tests.test_database import make_db
+
+
+def _ring(mgr, message, ts="2026-10-12T08:15:00"):
+    return mgr.add_doorbell_event(
+        f"/img/doorbell_{ts}.jpg", ai_message=message, timestamp=datetime.fromisoformat(ts)
+    ).id
+
+
+def _ids(mgr, query, **kwargs):
+    return [event.id for event, _ in mgr.search_events(query, **kwargs)[0]]
+
+
+def test_matches_stemmed_words_and_skips_stopwords(tmp_path):
+    mgr = make_db(tmp_path)
+    rain = _ring(mgr, "A delivery driver standing in the rain with a parcel")
+    rainy = _ring(mgr, "Deliveries left on the step on a rainy day")
+    _ring(mgr, "A cat walks past")
+    _ring(mgr, None)
+
+    assert set(_ids(mgr, "delivery driver in the rain")) == {rain}
+    # The last word is also a prefix, so "rain" finds "rainy".
+    assert set(_ids(mgr, "deliveries rain")) == {rain, rainy}
+    assert _ids(mgr, "postman") == []
+    assert mgr.search_events("  ?! ")[0] == []
+
+
+def test_ranks_better_matches_first(tmp_path):
+    mgr = make_db(tmp_path)
+    weak = _ring(mgr, "Someone at the door; a long description of the street, trees and a car")
+    strong = _ring(mgr, "Courier at the door with a parcel, courier van outside")
+    assert _ids(mgr, "courier door") == [strong]
+    assert _ids(mgr, "door")[-1] == weak
+
+
+def test_index_follows_comments_and_deletes(tmp_path):
+    mgr = make_db(tmp_path)
+    event_id = _ring(mgr, "Person at the door")
+    mgr.update_event_comment(event_id, "Grandma visiting")
+    assert _ids(mgr, "grandma") == [event_id]
+    assert _ids(mgr, "person") == []
+
+    mgr.update_event_comment(event_id, None)
+    assert _ids(mgr, "grandma") == []
+
+    other = _ring(mgr, "Grandma again")
+    mgr.delete_events([other])
+    assert _ids(mgr, "grandma") == []
+
+
+def test_snippet_is_escaped_and_marked(tmp_path):
+    mgr = make_db(tmp_path)
+    _ring(mgr, "<b>Parcel</b> & letter delivered")
+    [(event, snippet)] = mgr.search_events("parcel")[0]
+    assert isinstance(event, DoorbellEvent)
+    assert snippet == "&lt;b&gt;<mark>Parcel</mark>&lt;/b&gt; &amp; letter delivered"
+
+
+def test_quotes_and_operators_are_plain_words(tmp_path):
+    mgr = make_db(tmp_path)
+    event_id = _ring(mgr, "Neighbour said: NOT now, OR later")
+    assert _ids(mgr, 'NOT "now" OR') == [event_id]
+    assert _ids(mgr, "said: (now*") == [event_id]
+
+
+def test_pages_by_offset(tmp_path):
+    mgr = make_db(tmp_path)
+    ids = [_ring(mgr, "Parcel at the door", f"2026-10-1{day}T08:00:00") for day in range(5)]
+    first, next_offset = mgr.search_events("parcel", limit=3)
+    assert next_offset == 3
+    rest, last = mgr.search_events("parcel", limit=3, offset=next_offset)
+    assert last is None
+    # Equal scores fall back to newest first, with no row on two pages.
+    assert [e.id for e, _ in first + rest] == ids[::-1]
+
+
+def test_existing_events_are_indexed(tmp_path):
+    mgr = make_db(tmp_path)
+    event_id = _ring(mgr, "Window cleaner on a ladder")
+    with mgr._connect() as conn:
+        # As on a database from before the index existed.
+        for action in ("insert", "delete", "update"):
+            conn.execute(f"DROP TRIGGER trg_events_fts_{action}")
+        conn.execute("DROP TABLE events_fts")
+    mgr.close()
+
+    reopened = make_db(tmp_path)
+    assert _ids(reopened, "ladder") == [event_id]
+
+
+def test_scan_fallback_without_fts(tmp_path):
+    mgr = make_db(tmp_path)
+    event_id = _ring(mgr, "A <parcel> by the gate")
+    _ring(mgr, "A parcel")
+    mgr.fts_enabled = False
+    results, _ = mgr.search_events("gate parcel")
+    assert [(e.id, snippet) for e, snippet in results] == [(event_id, "A &lt;parcel&gt; by the gate")]
+
+
+# ── Endpoint ──────────────────────────────────────────────────────────────────
+
+from tests.test_api_events import _patch_app_imports  # noqa: E402
+
+_patch_app_imports()
+
+
+@pytest.fixture
+def client(tmp_path):
+    from fastapi.testclient import TestClient
+    import src.app as app_mod
+    mock_ha_integration = MagicMock()
+    mock_ha_integration.initialize = AsyncMock()
+    with patch.object(app_mod, 'db') as mock_db, \
+         patch.object(app_mod, 'ha_integration', mock_ha_integration), \
+         patch.object(app_mod, 'ensure_directories', MagicMock()):
+        with TestClient(app_mod.app, raise_server_exceptions=True) as c:
+            c._mock_db = mock_db
+            yield c
+
+
+def test_search_endpoint(client):
+    event = DoorbellEvent(id=7, timestamp=datetime(2026, 10, 12, 8, 15),
+                          image_path="/img/doorbell_7.jpg", ai_message="Courier")
+    client._mock_db.search_events.return_value = ([(event, "<mark>Courier</mark>")], 20)
+    resp = client.get("/api/events/search?q=courier&offset=0")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["next_offset"] == 20
+    assert data["events"][0]["id"] == 7
+    assert data["events"][0]["snippet"] == "<mark>Courier</mark>"
+    assert data["events"][0]["face_data"] == []
+    client._mock_db.search_events.assert_called_with("courier", limit=20, offset=0)
+
+
+def test_search_endpoint_validation(client):
+    assert client.get("/api/events/search").status_code == 422
+    assert client.get("/api/events/search?q=").status_code == 422
+    assert client.get("/api/events/search?q=a&limit=500").status_code == 422
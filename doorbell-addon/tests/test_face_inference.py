@@ -0,0 +1,206 @@
+"""Tests for face_inference.py — priority queue and worker-pool bookkeeping."""
+import asyncio
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch
+
+import pytest
+
+import src.face_inference as inference_mod
+from src.face_inference import (
+    PRIORITY_BACKFILL,
+    PRIORITY_ENROLL,
+    PRIORITY_RING,
+    InferencePool,
+)
+
+
+def _thread_executor(max_workers, mp_context=None, initializer=None, initargs=()):
+    """Stand-in for ProcessPoolExecutor: same contract, no model, no spawn."""
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    executors.append(executor)
+    return executor
+
+
+executors = []
+
+
+@pytest.fixture
+def gated_detect():
+    """_worker_detect replacement that records call order and blocks on 'gate'."""
+    gate = threading.Event()
+    calls = []
+
+    def detect(image_path):
+        calls.append(image_path)
+        if image_path == "gate.jpg":
+            gate.wait(5)
+        if image_path == "bad.jpg":
+            raise ValueError("cannot identify image file")
+        if image_path == "oom.jpg":
+            raise BrokenProcessPool("A process in the process pool was terminated abruptly")
+        return [((0, 0, 10, 10), [0.1, 0.2], 0.9)]
+
+    # Threads share a pid, so each warm-up answers with a fresh worker id.
+    worker_ids = itertools.count()
+    executors.clear()
+    with patch.object(inference_mod, "ProcessPoolExecutor", _thread_executor), \
+         patch.object(inference_mod, "_worker_ready", lambda: next(worker_ids)), \
+         patch.object(inference_mod, "_worker_detect", detect):
+        yield gate, calls
+
+
+async def _wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.005)
+
+
+@pytest.mark.asyncio
+async def test_ring_jumps_queued_background_work(gated_detect):
+    gate, calls = gated_detect
+    pool = InferencePool()
+    await pool.start(1, "buffalo_sc", "/tmp/models")
+    try:
+        first = asyncio.create_task(pool.analyze("gate.jpg", PRIORITY_ENROLL))
+        await _wait_for(lambda: calls == ["gate.jpg"])
+        backfill = asyncio.create_task(pool.analyze("backfill.jpg", PRIORITY_BACKFILL))
+        enroll = asyncio.create_task(pool.analyze("enroll.jpg", PRIORITY_ENROLL))
+        await asyncio.sleep(0)
+        ring = asyncio.create_task(pool.analyze("ring.jpg", PRIORITY_RING))
+        await _wait_for(lambda: pool.get_status()["queue_depth"] == 3)
+
+        status = pool.get_status()
+        assert status["workers"] == 1
+        assert status["in_flight"] == 1
+        assert status["queued"] == {"ring": 1, "enroll": 1, "backfill": 1}
+
+        gate.set()
+        results = await asyncio.gather(first, backfill, enroll, ring)
+        assert calls == ["gate.jpg", "ring.jpg", "enroll.jpg", "backfill.jpg"]
+        assert results[3] == [((0, 0, 10, 10), [0.1, 0.2], 0.9)]
+        assert pool.get_status()["completed"] == 4
+    finally:
+        gate.set()
+        await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_bounded_by_worker_count(gated_detect):
+    gate, calls = gated_detect
+    pool = InferencePool()
+    await pool.start(2, "buffalo_sc", "/tmp/models")
+    try:
+        jobs = [asyncio.create_task(pool.analyze("gate.jpg")) for _ in range(5)]
+        await _wait_for(lambda: pool.get_status()["in_flight"] == 2)
+        await asyncio.sleep(0.05)
+        assert pool.get_status()["in_flight"] == 2
+        assert pool.get_status()["queue_depth"] == 3
+        gate.set()
+        await asyncio.gather(*jobs)
+    finally:
+        gate.set()
+        await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_job_raises_to_caller_and_is_counted(gated_detect):
+    pool = InferencePool()
+    await pool.start(1, "buffalo_sc", "/tmp/models")
+    try:
+        with pytest.raises(ValueError):
+            await pool.analyze("bad.jpg")
+        assert await pool.analyze("ok.jpg")
+        status = pool.get_status()
+        assert (status["failed"], status["completed"]) == (1, 1)
+    finally:
+        await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_start_warms_every_worker(gated_detect):
+    ready = []
+    pool = InferencePool()
+    with patch.object(inference_mod, "_worker_ready",
+                      lambda: ready.append(threading.get_ident()) or len(ready)):
+        await pool.start(3, "buffalo_sc", "/tmp/models")
+    try:
+        assert len(ready) == 3
+    finally:
+        await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_dead_worker_replaces_the_pool(gated_detect):
+    pool = InferencePool()
+    await pool.start(2, "buffalo_sc", "/tmp/models")
+    try:
+        with pytest.raises(BrokenProcessPool):
+            await pool.analyze("oom.jpg")
+        # The caller hears of the dead worker before the restart completes.
+        await _wait_for(lambda: pool.get_status()["restarts"] == 1)
+        assert await pool.analyze("ok.jpg")
+        status = pool.get_status()
+        assert (status["mode"], status["restarts"]) == ("process_pool", 1)
+        assert "terminated abruptly" in status["last_error"]
+        assert len(executors) == 2 and executors[0]._shutdown
+    finally:
+        await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_restart_is_reported_and_retried(gated_detect):
+    pool = InferencePool()
+    await pool.start(1, "buffalo_sc", "/tmp/models")
+    try:
+        with patch.object(inference_mod, "_worker_ready", side_effect=RuntimeError("no memory")):
+            with pytest.raises(BrokenProcessPool):
+                await pool.analyze("oom.jpg")
+            await _wait_for(lambda: pool.get_status()["mode"] == "broken")
+            assert pool.get_status()["last_error"] == "no memory"
+        # The next job that hits the broken pool tries the restart again.
+        with pytest.raises(BrokenProcessPool):
+            await pool.analyze("oom.jpg")
+        assert await pool.analyze("ok.jpg")
+        assert pool.get_status()["mode"] == "process_pool"
+    finally:
+        await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_fails_queued_jobs_and_reports_in_process(gated_detect):
+    gate, _calls = gated_detect
+    pool = InferencePool()
+    await pool.start(1, "buffalo_sc", "/tmp/models")
+    running = asyncio.create_task(pool.analyze("gate.jpg"))
+    await _wait_for(lambda: pool.get_status()["in_flight"] == 1)
+    queued = asyncio.create_task(pool.analyze("later.jpg"))
+    await asyncio.sleep(0.01)
+    gate.set()
+    await pool.stop()
+    with pytest.raises(RuntimeError):
+        await queued
+    await asyncio.gather(running, return_exceptions=True)
+    assert pool.get_status()["mode"] == "in_process"
+    assert pool.get_status()["workers"] == 0
+    with pytest.raises(RuntimeError):
+        await pool.analyze("x.jpg")
+
+
+@pytest.mark.asyncio
+async def test_service_analyze_uses_pool_and_builds_face_results():
+    from unittest.mock import AsyncMock, MagicMock
+    import src.face_recognition_service as frs_mod
+    svc = frs_mod.FaceRecognitionService()
+    svc._ready = True
+    pool = MagicMock()
+    pool.is_running.return_value = True
+    pool.analyze = AsyncMock(return_value=[((1, 2, 3, 4), [0.5], 0.8)])
+    with patch.object(frs_mod, "inference_pool", pool):
+        faces = await svc.analyze("ring.jpg", priority=PRIORITY_RING)
+    pool.analyze.assert_awaited_once_with("ring.jpg", PRIORITY_RING)
+    assert faces[0].bbox == (1, 2, 3, 4)
+    assert faces[0].det_score == 0.8
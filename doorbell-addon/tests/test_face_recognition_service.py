@@ -23,42 +23,86 @@ def test_identified_face_has_person_id_field():
     assert face.person_id is None  # default
 
 
-def test_refresh_cache_builds_new_format(tmp_path):
-    """_refresh_embeddings_cache_sync must build {emb_id: (pid, name, emb)} cache."""
+@pytest.mark.asyncio
+async def test_refresh_cache_builds_normalised_matrix(tmp_path):
+    """refresh_embeddings_cache must build one float32 matrix of unit rows."""
     import numpy as np
     from src.face_recognition_service import FaceRecognitionService
 
-    emb_bytes = make_embedding_bytes([0.1, 0.2, 0.3])
     mock_db = MagicMock()
     mock_db.get_all_embeddings.return_value = [
-        {"id": 5, "person_id": 1, "name": "Alice", "embedding": emb_bytes}
+        {"id": 5, "person_id": 1, "name": "Alice", "embedding": make_embedding_bytes([3.0, 0.0, 4.0])},
+        {"id": 6, "person_id": 2, "name": "Bob", "embedding": make_embedding_bytes([0.0, 2.0, 0.0])},
+        {"id": 8, "person_id": 3, "name": "Carol", "embedding": b"corrupt"},
     ]
 
-    svc = FaceRecognitionService.__new__(FaceRecognitionService)
-    svc._embeddings_cache = {}
-    svc._ready = False
-    svc._model = None
+    svc = FaceRecognitionService()
 
     with patch('src.face_recognition_service.db', mock_db):
-        svc._refresh_embeddings_cache_sync()
+        await svc.refresh_embeddings_cache()
+
+    cache = svc._embeddings_cache
+    assert cache.matrix.dtype == np.float32
+    assert cache.matrix.flags["C_CONTIGUOUS"]
+    assert cache.embedding_ids.tolist() == [5, 6]
+    assert cache.person_ids.tolist() == [1, 2]
+    assert cache.name_of(2) == "Bob"
+    np.testing.assert_allclose(cache.matrix[0], [0.6, 0.0, 0.8], rtol=1e-6)
+
 
-    assert 5 in svc._embeddings_cache
-    person_id, person_name, emb = svc._embeddings_cache[5]
-    assert person_id == 1
-    assert person_name == "Alice"
-    assert isinstance(emb, np.ndarray)
+@pytest.mark.asyncio
+async def test_refresh_keeps_deltas_made_during_its_read():
+    """A sample added or removed while the rebuild reads the DB survives the swap."""
+    import numpy as np
+    from src.face_recognition_service import FaceRecognitionService
+
+    svc = FaceRecognitionService()
+    svc.cache_add_sample(6, 2, "Bob", np.array([0.0, 1.0, 0.0], dtype="float32"))
+
+    def read_then_edit():
+        # Rows as read before the edits below were committed.
+        rows = [{"id": 6, "person_id": 2, "name": "Bob",
+                 "embedding": make_embedding_bytes([0.0, 1.0, 0.0])}]
+        svc.cache_add_sample(9, 4, "Dana", np.array([1.0, 0.0, 0.0], dtype="float32"))
+        svc.cache_remove_person(2)
+        return rows
+
+    mock_db = MagicMock()
+    mock_db.get_all_embeddings.side_effect = read_then_edit
+    with patch('src.face_recognition_service.db', mock_db):
+        await svc.refresh_embeddings_cache()
+
+    assert svc._embeddings_cache.embedding_ids.tolist() == [9]
+    assert svc._embeddings_cache.name_of(4) == "Dana"
+    assert svc._deltas == []
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_current_cache():
+    import numpy as np
+    from src.face_recognition_service import FaceRecognitionService
+
+    svc = FaceRecognitionService()
+    svc.cache_add_sample(6, 2, "Bob", np.array([0.0, 1.0, 0.0], dtype="float32"))
+    mock_db = MagicMock()
+    mock_db.get_all_embeddings.side_effect = RuntimeError("locked")
+    with patch('src.face_recognition_service.db', mock_db), pytest.raises(RuntimeError):
+        await svc.refresh_embeddings_cache()
+    assert svc.cached_sample_count() == 1
+    svc.cache_remove_sample(6)
+    assert svc._deltas == []
 
 
 def make_service_with_cache(embeddings):
     """Build a FaceRecognitionService with a pre-populated cache."""
     import numpy as np
-    from src.face_recognition_service import FaceRecognitionService
-    svc = FaceRecognitionService.__new__(FaceRecognitionService)
-    svc._model = None
+    from src.face_recognition_service import EmbeddingCache, FaceRecognitionService
+    svc = FaceRecognitionService()
     svc._ready = True
-    svc._embeddings_cache = {}
-    for emb_id, person_id, name, vec in embeddings:
-        svc._embeddings_cache[emb_id] = (person_id, name, np.array(vec, dtype="float32"))
+    svc._embeddings_cache = EmbeddingCache.build([
+        (emb_id, person_id, name, np.array(vec, dtype="float32"))
+        for emb_id, person_id, name, vec in embeddings
+    ])
     return svc
 
 
@@ -126,6 +170,166 @@ def test_identify_faces_picks_best_person_not_best_embedding():
     assert results[0].name == "Alice"
 
 
+def test_identify_faces_scores_every_face_in_one_pass():
+    """Several faces in one ring each get their own best person."""
+    import numpy as np
+    from src.face_recognition_service import FaceResult
+    svc = make_service_with_cache([
+        (1, 10, "Alice", [1.0, 0.0, 0.0]),
+        (2, 20, "Bob",   [0.0, 1.0, 0.0]),
+        (3, 10, "Alice", [0.0, 0.0, 1.0]),  # second Alice sample, not adjacent by id
+    ])
+    mock_settings = MagicMock()
+    mock_settings.face_recognition_threshold = 0.45
+    faces = [
+        FaceResult(bbox=(0, 0, 5, 5), embedding=np.array([0.0, 2.0, 0.1]), det_score=0.91),
+        FaceResult(bbox=(9, 9, 5, 5), embedding=np.array([0.1, 0.0, 3.0]), det_score=0.92),
+        FaceResult(bbox=(5, 5, 5, 5), embedding=np.array([1.0, 1.0, 1.0]), det_score=0.93),
+        FaceResult(bbox=(1, 1, 5, 5), embedding=np.array([1.0, 0.0]), det_score=0.94),
+    ]
+    with patch('src.face_recognition_service.settings', mock_settings):
+        results = svc.identify_faces(faces)
+    assert [(r.name, r.person_id) for r in results] == [
+        ("Bob", 20), ("Alice", 10), ("Alice", 10), ("Unknown", None),
+    ]
+    assert results[0].score == pytest.approx(0.999, abs=1e-3)
+    assert results[2].score == pytest.approx(0.577, abs=1e-3)
+
+
+def test_identify_faces_empty_cache_returns_unknown():
+    import numpy as np
+    from src.face_recognition_service import FaceResult
+    svc = make_service_with_cache([])
+    face = FaceResult(bbox=(0, 0, 5, 5), embedding=np.array([1.0, 0.0, 0.0]), det_score=0.9)
+    results = svc.identify_faces([face])
+    assert results[0].name == "Unknown"
+    assert svc.identify_faces([]) == []
+
+
+def test_embedding_cache_skips_mismatched_dimensions():
+    import numpy as np
+    from src.face_recognition_service import EmbeddingCache
+    cache = EmbeddingCache.build([
+        (1, 10, "Alice", np.ones(4, dtype="float32")),
+        (2, 20, "Bob", np.ones(3, dtype="float32")),
+    ])
+    assert len(cache) == 1
+    assert cache.matrix.shape == (1, 4)
+    assert cache.best_matches([np.ones(3)]) == [None]
+
+
+def test_embedding_cache_delta_operations():
+    """add/remove/rename patch the matrix without a rebuild."""
+    import numpy as np
+    from src.face_recognition_service import EmbeddingCache
+    cache = EmbeddingCache()
+    for emb_id in range(1, 101):  # crosses the initial capacity
+        cache.add_sample(emb_id, emb_id % 3, f"P{emb_id % 3}", np.eye(128)[emb_id])
+    assert len(cache) == 100
+
+    assert cache.remove_sample(5) is True
+    assert cache.remove_sample(5) is False
+    assert 5 not in cache.embedding_ids.tolist()
+    # the row moved into the hole is still found by its own embedding
+    assert cache.best_matches([np.eye(128)[100]])[0][:2] == (1, "P1")
+
+    assert cache.remove_person(0) == 33
+    assert set(cache.person_ids.tolist()) == {1, 2}
+
+    assert cache.rename_person(1, "Alicia") is True
+    assert cache.rename_person(0, "Gone") is False
+    assert cache.best_matches([np.eye(128)[1]])[0][:2] == (1, "Alicia")
+
+    # re-adding an id replaces its row instead of duplicating it
+    cache.add_sample(1, 2, "P2", np.eye(128)[1])
+    assert cache.embedding_ids.tolist().count(1) == 1
+    assert cache.best_matches([np.eye(128)[1]])[0][:2] == (2, "P2")
+    assert len(cache) == 100 - 1 - 33
+
+
+def test_embedding_cache_matches_full_rebuild():
+    """A cache patched by deltas scores exactly like one built from scratch."""
+    import numpy as np
+    from src.face_recognition_service import EmbeddingCache
+    rng = np.random.default_rng(1)
+    vecs = rng.standard_normal((60, 16)).astype("float32")
+    cache = EmbeddingCache.build([(i, i % 7, f"P{i % 7}", vecs[i]) for i in range(40)])
+    for i in range(40, 60):
+        cache.add_sample(i, i % 7, f"P{i % 7}", vecs[i])
+    for i in range(0, 60, 4):
+        cache.remove_sample(i)
+    cache.remove_person(3)
+    rebuilt = EmbeddingCache.build([
+        (i, i % 7, f"P{i % 7}", vecs[i]) for i in range(60) if i % 4 and i % 7 != 3
+    ])
+    queries = list(rng.standard_normal((10, 16)))
+    patched, fresh = cache.best_matches(queries), rebuilt.best_matches(queries)
+    assert [m[0] for m in patched] == [m[0] for m in fresh]
+    np.testing.assert_allclose([m[2] for m in patched], [m[2] for m in fresh], rtol=1e-5)
+
+
+@pytest.mark.asyncio
+async def test_delete_person_drops_rows_from_matrix():
+    svc = make_service_with_cache([
+        (1, 10, "Alice", [1.0, 0.0, 0.0]),
+        (2, 20, "Bob",   [0.0, 1.0, 0.0]),
+        (3, 10, "Alice", [0.0, 0.0, 1.0]),
+    ])
+    mock_db = MagicMock()
+    mock_db.get_person_embeddings.return_value = []
+    mock_db.delete_person.return_value = True
+    with patch('src.face_recognition_service.db', mock_db):
+        assert await svc.delete_person(10) is True
+    assert svc._embeddings_cache.embedding_ids.tolist() == [2]
+    mock_db.get_all_embeddings.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_add_person_keeps_image_work_off_the_db_writer(tmp_path):
+    """Only the SQL runs on the writer thread; the thumbnail crop does not."""
+    import threading
+    import numpy as np
+    from PIL import Image
+    import src.face_recognition_service as frs_mod
+    from src.face_recognition_service import FaceRecognitionService, FaceResult
+
+    img_path = str(tmp_path / "upload.jpg")
+    Image.new("RGB", (100, 100)).save(img_path)
+    threads = {}
+
+    def on_thread(key, result):
+        def call(*args):
+            threads[key] = threading.current_thread().name
+            return result
+        return call
+
+    def crop(*args):
+        threads["crop"] = threading.current_thread().name
+        return Image.new("RGB", (200, 200))
+
+    mock_db = MagicMock()
+    mock_db.add_person.side_effect = on_thread("add_person", 4)
+    mock_db.add_person_embedding.side_effect = on_thread("add_embedding", 12)
+    mock_settings = MagicMock()
+    mock_settings.persons_path = str(tmp_path / "persons")
+    face = FaceResult(bbox=(10, 10, 40, 40), embedding=np.ones(3, dtype="float32"), det_score=0.9)
+    svc = FaceRecognitionService()
+    with patch.object(frs_mod, 'db', mock_db), \
+         patch.object(frs_mod, 'settings', mock_settings), \
+         patch.object(frs_mod, 'crop_padded', crop):
+        person = await svc.add_person("Alice", img_path, [face])
+
+    thumb = os.path.join(mock_settings.persons_path, "4_12.jpg")
+    assert person == {"id": 4, "name": "Alice", "thumbnail_path": thumb}
+    assert os.path.isfile(thumb)
+    assert threads["add_person"].startswith("db-writer")
+    assert threads["add_embedding"].startswith("db-writer")
+    assert not threads["crop"].startswith("db-")
+    assert threads["crop"] != threading.current_thread().name
+    mock_db.update_person_thumbnail.assert_called_once_with(4, thumb)
+    assert svc._embeddings_cache.embedding_ids.tolist() == [12]
+
+
 def test_save_face_crop_creates_file(tmp_path):
     """save_face_crop must write a JPEG to face_crops_path."""
     from PIL import Image
@@ -141,16 +345,16 @@ def test_save_face_crop_creates_file(tmp_path):
     mock_settings.face_crops_path = str(tmp_path / "crops")
 
     with patch('src.face_recognition_service.settings', mock_settings):
-        path = svc.save_face_crop(img_path, (10, 10, 80, 80), event_id=42, face_idx=0)
+        path = svc.save_face_crop(img_path, (10, 10, 80, 80), prefix="doorbell_1", face_idx=0)
 
     assert os.path.isfile(path)
-    assert "42_0.jpg" in path
+    assert "doorbell_1_0.jpg" in path
     saved = Image.open(path)
     assert saved.size == (200, 200)
 
 
-def test_save_face_crop_uses_event_idx_naming(tmp_path):
-    """File name must be {event_id}_{face_idx}.jpg."""
+def test_save_face_crop_uses_prefix_idx_naming(tmp_path):
+    """File name must be {prefix}_{face_idx}.jpg."""
     from PIL import Image
     from src.face_recognition_service import FaceRecognitionService
     img = Image.new("RGB", (300, 300))
@@ -160,5 +364,7 @@ def test_save_face_crop_uses_event_idx_naming(tmp_path):
     mock_settings = MagicMock()
     mock_settings.face_crops_path = str(tmp_path / "crops")
     with patch('src.face_recognition_service.settings', mock_settings):
-        path = svc.save_face_crop(img_path, (0, 0, 100, 100), event_id=7, face_idx=2)
-    assert path.endswith("7_2.jpg")
+        path = svc.save_face_crop(
+            img_path, (0, 0, 100, 100), prefix="doorbell_20260101_080000_000001", face_idx=2
+        )
+    assert path.endswith("doorbell_20260101_080000_000001_2.jpg")
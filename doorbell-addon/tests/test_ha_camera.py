@@ -0,0 +1,177 @@
+"""Tests for HACameraManager.capture_image (async HTTP / RTSP capture)."""
+import os
+import stat
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import src.ha_camera as cam_mod
+from src.http_client import SharedHTTPClient
+
+_JPEG = b"\xff\xd8" + b"x" * 5000 + b"\xff\xd9"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = 65536
+    auth_headers = []
+
+    def do_GET(self):
+        type(self).auth_headers.append(self.headers.get("Authorization"))
+        if self.path.endswith("/missing"):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path.endswith("/chunked-big"):  # no Content-Length: cap hit mid-stream
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for _ in range(40):
+                chunk = b"y" * 4096
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        body = _JPEG * 4 if self.path.endswith("/declared-big") else _JPEG
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    _Handler.auth_headers = []
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def shared_client():
+    client = SharedHTTPClient()
+    with patch.object(cam_mod, "http_client", client):
+        yield client
+
+
+def _settings(url=None, entity=None):
+    return [
+        patch.object(cam_mod.settings, "camera_url", url),
+        patch.object(cam_mod.settings, "camera_entity", entity),
+    ]
+
+
+async def _capture(dest, url=None, entity=None):
+    patches = _settings(url, entity)
+    for p in patches: p.start()
+    try:
+        return await cam_mod.ha_camera_manager.capture_image(dest)
+    finally:
+        for p in patches: p.stop()
+
+
+@pytest.mark.asyncio
+async def test_http_url_streams_to_destination(server, shared_client, tmp_path):
+    dest = str(tmp_path / "images" / "ring.jpg")
+    assert await _capture(dest, url=f"{server}/snap.jpg") is True
+    assert open(dest, "rb").read() == _JPEG
+    assert not os.path.exists(dest + ".part")
+    host = server.split("//")[1]
+    assert shared_client.get_status()["hosts"][host]["requests"] == 1
+    await shared_client.close()
+
+
+@pytest.mark.asyncio
+async def test_camera_entity_uses_proxy_with_token(server, shared_client, tmp_path):
+    dest = str(tmp_path / "ring.jpg")
+    manager = cam_mod.ha_camera_manager
+    with patch.object(manager, "base_url", f"{server}/api"), \
+         patch.object(manager, "supervisor_token", "tok"):
+        assert await _capture(dest, entity="camera.door") is True
+    assert open(dest, "rb").read() == _JPEG
+    assert _Handler.auth_headers == ["Bearer tok"]
+    await shared_client.close()
+
+
+@pytest.mark.asyncio
+async def test_http_error_leaves_no_file(server, shared_client, tmp_path):
+    dest = str(tmp_path / "ring.jpg")
+    assert await _capture(dest, url=f"{server}/missing") is False
+    assert os.listdir(tmp_path) == []
+    await shared_client.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/declared-big", "/chunked-big"])
+async def test_size_cap_rejects_and_cleans_up(server, shared_client, tmp_path, path):
+    dest = tmp_path / "ring.jpg"
+    dest.write_bytes(b"previous")
+    with patch.object(cam_mod, "_MAX_SNAPSHOT_BYTES", 10_000):
+        assert await _capture(str(dest), url=f"{server}{path}") is False
+    assert dest.read_bytes() == b"previous"  # never replaced by a partial body
+    assert sorted(os.listdir(tmp_path)) == ["ring.jpg"]
+    await shared_client.close()
+
+
+@pytest.mark.asyncio
+async def test_rtsp_one_shot_runs_ffmpeg_async(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake = bin_dir / "ffmpeg"
+    fake.write_text('#!/bin/sh\nfor last; do :; done\nprintf frame > "$last"\n')
+    fake.chmod(fake.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    dest = str(tmp_path / "ring.jpg")
+    with patch.object(cam_mod.rtsp_grabber, "is_running", return_value=False):
+        assert await _capture(dest, url="rtsp://cam/stream") is True
+    assert open(dest, "rb").read() == b"frame"
+    assert not any(n.startswith("ring.jpg.part") for n in os.listdir(tmp_path))
+
+
+@pytest.mark.asyncio
+async def test_rtsp_one_shot_failure(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake = bin_dir / "ffmpeg"
+    fake.write_text("#!/bin/sh\necho 'Connection refused' >&2\nexit 1\n")
+    fake.chmod(fake.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    with patch.object(cam_mod.rtsp_grabber, "is_running", return_value=False):
+        assert await _capture(str(tmp_path / "ring.jpg"), url="rtsp://cam/stream") is False
+    assert sorted(os.listdir(tmp_path)) == ["bin"]
+
+
+@pytest.mark.asyncio
+async def test_rtsp_one_shot_cancelled_kills_ffmpeg(tmp_path, monkeypatch):
+    import asyncio
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    pid_file = tmp_path / "ffmpeg.pid"
+    fake = bin_dir / "ffmpeg"
+    fake.write_text(f'#!/bin/sh\necho $$ > "{pid_file}"\nexec sleep 30\n')
+    fake.chmod(fake.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    with patch.object(cam_mod.rtsp_grabber, "is_running", return_value=False):
+        task = asyncio.create_task(_capture(str(tmp_path / "ring.jpg"), url="rtsp://cam/stream"))
+        for _ in range(200):
+            if pid_file.exists() and pid_file.read_text().strip():
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    pid = int(pid_file.read_text())
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
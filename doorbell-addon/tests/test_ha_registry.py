@@ -0,0 +1,118 @@
+"""Tests for the cached HA states/services registry (src/ha_registry.py)."""
+import asyncio
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import src.ha_registry as registry_mod
+from src.ha_registry import HARegistry
+
+_STATES = [
+    {"entity_id": "camera.porch", "state": "idle", "attributes": {}},
+    {"entity_id": "camera.garden", "state": "idle", "attributes": {}},
+    {"entity_id": "weather.home", "state": "sunny", "attributes": {}},
+]
+
+
+def _api(payload=_STATES, delay=0.0):
+    async def _get(path):
+        await asyncio.sleep(delay)
+        if payload is None:
+            return None
+        response = MagicMock()
+        response.json.return_value = payload
+        return response
+
+    api = MagicMock()
+    api._get = AsyncMock(side_effect=_get)
+    return api
+
+
+@pytest.mark.asyncio
+async def test_states_are_indexed_by_domain():
+    registry = HARegistry()
+    with patch.object(registry_mod, "HomeAssistantAPI", return_value=_api()):
+        cameras = await registry.states("camera")
+        assert [s["entity_id"] for s in cameras] == ["camera.porch", "camera.garden"]
+        assert await registry.states("light") == []
+    assert registry.get_status()["states"]["domains"] == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_fetch():
+    registry = HARegistry()
+    api = _api(delay=0.05)
+    with patch.object(registry_mod, "HomeAssistantAPI", return_value=api):
+        results = await asyncio.gather(
+            registry.states("camera"), registry.states("weather"), registry.states("camera"),
+        )
+    assert len(results[0]) == 2 and len(results[1]) == 1
+    api._get.assert_awaited_once_with("/states")
+    stats = registry.get_status()["states"]
+    assert stats["fetches"] == 1 and stats["joined"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_until_ttl_expires():
+    registry = HARegistry(ttl=60)
+    api = _api()
+    with patch.object(registry_mod, "HomeAssistantAPI", return_value=api):
+        await registry.states("camera")
+        await registry.states("weather")
+        assert api._get.await_count == 1
+        registry.ttl = 0
+        await registry.states("camera")
+        assert api._get.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_serves_stale_copy():
+    registry = HARegistry(ttl=0)
+    with patch.object(registry_mod, "HomeAssistantAPI", return_value=_api()):
+        await registry.states("camera")
+    with patch.object(registry_mod, "HomeAssistantAPI", return_value=_api(payload=None)):
+        assert len(await registry.states("camera")) == 2
+    assert registry.get_status()["states"]["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unreachable_without_cache_returns_none():
+    registry = HARegistry()
+    with patch.object(registry_mod, "HomeAssistantAPI", return_value=_api(payload=None)):
+        assert await registry.states("camera") is None
+        assert await registry.services("notify") is None
+
+
+@pytest.mark.asyncio
+async def test_unexpected_payload_is_a_failed_refresh():
+    registry = HARegistry()
+    with patch.object(registry_mod, "HomeAssistantAPI", return_value=_api({"message": "err"})):
+        assert await registry.states("camera") is None
+    assert registry.get_status()["states"]["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_services_by_domain():
+    registry = HARegistry()
+    payload = [{"domain": "notify", "services": {"mobile_app_phone": {}}}]
+    with patch.object(registry_mod, "HomeAssistantAPI", return_value=_api(payload)):
+        assert await registry.services("notify") == {"mobile_app_phone": {}}
+        assert await registry.services("llmvision") == {}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_fetch():
+    registry = HARegistry()
+    api = _api(delay=0.05)
+    with patch.object(registry_mod, "HomeAssistantAPI", return_value=api):
+        first = asyncio.create_task(registry.states("camera"))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(registry.states("camera"))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert len(await second) == 2
+    api._get.assert_awaited_once()
@@ -0,0 +1,250 @@
+"""Tests for the Home Assistant WebSocket client (src/ha_websocket.py)."""
+import asyncio
+import json
+import os
+import sys
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import src.ha_websocket as ws_mod
+from src.ha_websocket import HomeAssistantWebSocket, HomeAssistantWebSocketError
+
+
+class FakeHA:
+    """Minimal HA WebSocket API: auth, fire_event, subscribe_entities."""
+
+    def __init__(self, token="tok"):
+        self.token = token
+        self.fired = []
+        self.subscriptions = []
+        self.connections = 0
+        self.sockets = []
+        self.server = None
+
+    async def handler(self, ws):
+        self.connections += 1
+        self.sockets.append(ws)
+        await ws.send(json.dumps({"type": "auth_required", "ha_version": "2026.10.0"}))
+        auth = json.loads(await ws.recv())
+        if auth.get("access_token") != self.token:
+            await ws.send(json.dumps({"type": "auth_invalid", "message": "Invalid access token"}))
+            return
+        await ws.send(json.dumps({"type": "auth_ok", "ha_version": "2026.10.0"}))
+        async for raw in ws:
+            msg = json.loads(raw)
+            if msg["type"] == "fire_event":
+                self.fired.append((msg["event_type"], msg["event_data"]))
+                await ws.send(json.dumps({"id": msg["id"], "type": "result", "success": True,
+                                          "result": {"context": {}}}))
+            elif msg["type"] == "subscribe_entities":
+                self.subscriptions.append(msg["entity_ids"])
+                # Initial snapshot arrives before the result, as in HA.
+                await ws.send(json.dumps({"id": msg["id"], "type": "event", "event": {"a": {
+                    e: {"s": "sunny" if e.startswith("weather.") else "off",
+                        "a": {"temperature": 21.5, "humidity": 40}, "lc": time.time() - 100}
+                    for e in msg["entity_ids"]
+                }}}))
+                await ws.send(json.dumps({"id": msg["id"], "type": "result", "success": True, "result": None}))
+            elif msg["type"] == "unsubscribe_events":
+                await ws.send(json.dumps({"id": msg["id"], "type": "result", "success": True, "result": None}))
+            else:
+                await ws.send(json.dumps({"id": msg["id"], "type": "result", "success": False,
+                                          "error": {"code": "unknown_command", "message": "Unknown command."}}))
+
+    async def push(self, sub_id, event):
+        await self.sockets[-1].send(json.dumps({"id": sub_id, "type": "event", "event": event}))
+
+    async def start(self):
+        import websockets
+        self.server = await websockets.serve(self.handler, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"ws://127.0.0.1:{port}"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def _wait_for(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def ha_settings():
+    with patch.object(ws_mod.settings, "supervisor_token", "tok"), \
+         patch.object(ws_mod.settings, "weather_entity", "weather.home"), \
+         patch.object(ws_mod.settings, "trigger_entity", "binary_sensor.doorbell"):
+        yield ws_mod.settings
+
+
+@pytest.mark.asyncio
+async def test_connect_subscribe_and_fire_event(ha_settings):
+    ha = FakeHA()
+    client = HomeAssistantWebSocket(await ha.start())
+    on_connect = AsyncMock()
+    client.add_on_connect(on_connect)
+    client.start()
+    try:
+        assert await _wait_for(lambda: client.get_state("weather.home") is not None)
+        assert ha.subscriptions == [["weather.home", "binary_sensor.doorbell"]]
+        assert client.get_state("weather.home")["attributes"]["temperature"] == 21.5
+        on_connect.assert_awaited_once()
+        await client.fire_event("doorbell_ring", {"event_id": 7})
+        assert ha.fired == [("doorbell_ring", {"event_id": 7})]
+        status = client.get_status()
+        assert status["connected"] and status["ha_version"] == "2026.10.0"
+        with pytest.raises(HomeAssistantWebSocketError, match="Unknown command"):
+            await client.call({"type": "bogus"})
+    finally:
+        await client.stop()
+        await ha.stop()
+    assert client.get_state("weather.home") is None  # stale once disconnected
+
+
+@pytest.mark.asyncio
+async def test_state_changes_are_applied_and_listened(ha_settings):
+    ha = FakeHA()
+    client = HomeAssistantWebSocket(await ha.start())
+    changes = []
+    client.add_state_listener(lambda e, new, old: changes.append((e, old and old["state"], new and new["state"])))
+    client.start()
+    try:
+        assert await _wait_for(lambda: client.get_state("binary_sensor.doorbell") is not None)
+        sub = client._entities_sub
+        await ha.push(sub, {"c": {"binary_sensor.doorbell": {"+": {"s": "on", "lc": 123.0}}}})
+        await ha.push(sub, {"c": {"weather.home": {"+": {"a": {"temperature": 18}}, "-": {"a": ["humidity"]}}}})
+        assert await _wait_for(lambda: client.get_state("weather.home")["attributes"].get("temperature") == 18)
+        assert client.get_state("binary_sensor.doorbell")["state"] == "on"
+        assert client.get_state("binary_sensor.doorbell")["last_changed"] == 123.0
+        assert "humidity" not in client.get_state("weather.home")["attributes"]
+        assert ("binary_sensor.doorbell", "off", "on") in changes
+        await ha.push(sub, {"r": ["weather.home"]})
+        assert await _wait_for(lambda: client.get_state("weather.home") is None)
+    finally:
+        await client.stop()
+        await ha.stop()
+
+
+@pytest.mark.asyncio
+async def test_reconnects_and_resubscribes(ha_settings):
+    ha = FakeHA()
+    client = HomeAssistantWebSocket(await ha.start())
+    on_connect = AsyncMock()
+    client.add_on_connect(on_connect)
+    with patch.object(ws_mod, "_BACKOFF_INITIAL_SECS", 0.05):
+        client.start()
+        try:
+            assert await _wait_for(lambda: client.connected and client._entities_sub is not None)
+            await ha.sockets[-1].close()  # e.g. HA restarting
+            assert await _wait_for(lambda: client.connects == 2 and client._entities_sub is not None)
+            assert len(ha.subscriptions) == 2
+            assert on_connect.await_count == 2  # sensors re-pushed after reconnect
+            await client.fire_event("after_reconnect", {})
+            assert ha.fired[-1][0] == "after_reconnect"
+        finally:
+            await client.stop()
+            await ha.stop()
+
+
+@pytest.mark.asyncio
+async def test_auth_invalid_is_reported_and_retried(ha_settings):
+    ha = FakeHA(token="other")
+    client = HomeAssistantWebSocket(await ha.start())
+    with patch.object(ws_mod, "_BACKOFF_INITIAL_SECS", 0.05):
+        client.start()
+        try:
+            assert await _wait_for(lambda: ha.connections >= 2)
+            assert client.connected is False
+            assert client.last_error == "Invalid access token"
+        finally:
+            await client.stop()
+            await ha.stop()
+
+
+@pytest.mark.asyncio
+async def test_refresh_subscriptions_switches_entities(ha_settings):
+    ha = FakeHA()
+    client = HomeAssistantWebSocket(await ha.start())
+    client.start()
+    try:
+        assert await _wait_for(lambda: client._entities_sub is not None)
+        with patch.object(ws_mod.settings, "weather_entity", "weather.other"):
+            await client.refresh_subscriptions()
+            assert ha.subscriptions[-1] == ["weather.other", "binary_sensor.doorbell"]
+            assert await _wait_for(lambda: client.get_state("weather.other") is not None)
+            assert client.get_state("weather.home") is None
+    finally:
+        await client.stop()
+        await ha.stop()
+
+
+@pytest.mark.asyncio
+async def test_call_when_disconnected_raises():
+    client = HomeAssistantWebSocket("ws://127.0.0.1:1")
+    with pytest.raises(HomeAssistantWebSocketError, match="not connected"):
+        await client.fire_event("x", {})
+
+
+@pytest.mark.asyncio
+async def test_results_without_a_pending_command_are_unsolicited():
+    client = HomeAssistantWebSocket("ws://127.0.0.1:1")
+    future = asyncio.get_running_loop().create_future()
+    client._pending[7] = future
+    client._dispatch({"type": "result", "success": True, "result": "x"})
+    client._dispatch({"type": "result", "id": "7", "success": True})
+    client._dispatch({"type": "result", "id": 8, "success": True})
+    assert client.get_status()["unsolicited_results"] == 3
+    assert not future.done()
+    client._dispatch({"type": "result", "id": 7, "success": True, "result": "ok"})
+    assert future.result() == "ok"
+    assert client.get_status()["pending_commands"] == 0
+
+
+# ── Callers ──────────────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_fire_event_prefers_websocket_and_falls_back_to_rest():
+    import src.utils as utils_mod
+    api = utils_mod.HomeAssistantAPI()
+    fake_ws = MagicMock(connected=True)
+    fake_ws.fire_event = AsyncMock()
+    with patch.object(utils_mod, "ha_websocket", fake_ws), \
+         patch.object(api, "_post", AsyncMock()) as mock_post:
+        await api.fire_event("doorbell_ring", {"event_id": 1})
+        mock_post.assert_not_awaited()
+        fake_ws.fire_event.side_effect = HomeAssistantWebSocketError("connection lost")
+        await api.fire_event("doorbell_ring", {"event_id": 2})
+        mock_post.assert_awaited_once_with("/events/doorbell_ring", {"event_id": 2})
+
+
+@pytest.mark.asyncio
+async def test_weather_uses_pushed_state_without_request():
+    import src.utils as utils_mod
+    api = utils_mod.HomeAssistantAPI()
+    fake_ws = MagicMock()
+    fake_ws.get_state.return_value = {"state": "rainy", "attributes": {"temperature": 9, "humidity": 90}}
+    with patch.object(utils_mod, "ha_websocket", fake_ws), \
+         patch.object(api, "_get", AsyncMock()) as mock_get:
+        weather = await api.get_weather_data("weather.home")
+    mock_get.assert_not_awaited()
+    assert weather == {"condition": "rainy", "temperature": 9.0, "humidity": 90.0}
+
+
+def test_trigger_lag_from_pushed_state():
+    import src.ring_pipeline as pipeline_mod
+    fake_ws = MagicMock()
+    fake_ws.get_state.return_value = {"state": "on", "last_changed": time.time() - 1.5}
+    with patch.object(pipeline_mod, "ha_websocket", fake_ws), \
+         patch.object(pipeline_mod.settings, "trigger_entity", "binary_sensor.doorbell"):
+        assert 1400 <= pipeline_mod._trigger_lag_ms() <= 2500
+        fake_ws.get_state.return_value = {"state": "on", "last_changed": time.time() - 600}
+        assert pipeline_mod._trigger_lag_ms() is None
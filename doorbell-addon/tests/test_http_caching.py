@@ -0,0 +1,173 @@
+"""Tests for image caching headers, conditional GETs and the DB path memo."""
+import os
+import sys
+from email.utils import formatdate
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils import (
+    IMMUTABLE_CACHE_CONTROL,
+    cached_file_response,
+    file_etag,
+    file_version,
+    is_not_modified,
+)
+from tests.test_database import make_db
+
+
+def test_file_version_is_basename_stem():
+    assert file_version("/data/persons/3_1712345678.jpg") == "3_1712345678"
+
+
+def test_etag_changes_when_file_is_replaced(tmp_path):
+    path = tmp_path / "a.jpg"
+    path.write_bytes(b"one")
+    before = file_etag(os.stat(path))
+    tmp = tmp_path / "a.jpg.part"
+    tmp.write_bytes(b"two!")
+    os.replace(tmp, path)
+    assert file_etag(os.stat(path)) != before
+    assert before.startswith('"') and before.endswith('"')
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({}, False),
+    ({"if-none-match": '"abc"'}, True),
+    ({"if-none-match": 'W/"abc"'}, True),
+    ({"if-none-match": '"x", "abc"'}, True),
+    ({"if-none-match": "*"}, True),
+    ({"if-none-match": '"other"'}, False),
+    # If-None-Match wins over a matching If-Modified-Since.
+    ({"if-none-match": '"other"', "if-modified-since": formatdate(2000, usegmt=True)}, False),
+    ({"if-modified-since": formatdate(2000, usegmt=True)}, True),
+    ({"if-modified-since": formatdate(500, usegmt=True)}, False),
+    ({"if-modified-since": "not a date"}, False),
+])
+def test_is_not_modified(headers, expected):
+    assert is_not_modified(headers, '"abc"', 1000.5) is expected
+
+
+def test_cached_file_response_304_has_no_body(tmp_path):
+    path = tmp_path / "a.jpg"
+    path.write_bytes(b"jpeg")
+    full = cached_file_response({}, str(path), immutable=True)
+    assert full.status_code == 200
+    assert full.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    etag = full.headers["etag"]
+
+    again = cached_file_response({"if-none-match": etag}, str(path), immutable=False)
+    assert again.status_code == 304
+    assert again.body == b""
+    assert again.headers["etag"] == etag
+    assert again.headers["cache-control"] == "no-cache"
+
+
+def test_cached_file_response_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        cached_file_response({}, str(tmp_path / "missing.jpg"), immutable=True)
+
+
+# ── Path memo ─────────────────────────────────────────────────────────────────
+
+def _count_queries(db):
+    """Wrap the connection factory to count statements run on it."""
+    calls = []
+    real_connect = db._connect
+
+    def counting_connect():
+        cm = real_connect()
+        calls.append(1)
+        return cm
+
+    db._connect = counting_connect
+    return calls
+
+
+def test_person_thumbnail_path_memoised_and_invalidated(tmp_path):
+    db = make_db(tmp_path)
+    pid = db.add_person("Alice")
+    assert db.get_person_thumbnail_path(pid) is None
+    db.update_person_thumbnail(pid, "/p/1_1.jpg")
+    calls = _count_queries(db)
+    assert db.get_person_thumbnail_path(pid) == "/p/1_1.jpg"
+    assert db.get_person_thumbnail_path(pid) == "/p/1_1.jpg"
+    assert len(calls) == 1
+
+    db.update_person_thumbnail(pid, "/p/1_2.jpg")
+    assert db.get_person_thumbnail_path(pid) == "/p/1_2.jpg"
+    db.delete_person(pid)
+    assert db.get_person_thumbnail_path(pid) is None
+
+
+def test_sample_thumbnail_path_checks_owner(tmp_path):
+    db = make_db(tmp_path)
+    alice, bob = db.add_person("Alice"), db.add_person("Bob")
+    emb = db.add_person_embedding(alice, b"\x00" * 8, "/s/1.jpg")
+    assert db.get_sample_thumbnail_path(alice, emb) == "/s/1.jpg"
+    # Served from the memo, but still only under its own person.
+    assert db.get_sample_thumbnail_path(bob, emb) is None
+    db.delete_person_embedding(emb)
+    assert db.get_sample_thumbnail_path(alice, emb) is None
+
+
+def test_face_crop_path_dropped_with_its_event(tmp_path):
+    db = make_db(tmp_path)
+    event_id = db.add_doorbell_event(str(tmp_path / "doorbell_1.jpg")).id
+    crop_id = db.add_face_crop(event_id, str(tmp_path / "crop.jpg"))
+    assert db.get_face_crop_path(crop_id) == str(tmp_path / "crop.jpg")
+    db.delete_events([event_id])
+    assert db.get_face_crop_path(crop_id) is None
+
+
+# ── Endpoints ─────────────────────────────────────────────────────────────────
+
+from tests.test_api_events import _patch_app_imports  # noqa: E402
+
+_patch_app_imports()
+
+
+@pytest.fixture
+def client(tmp_path):
+    from fastapi.testclient import TestClient
+    import src.app as app_mod
+    (tmp_path / "images").mkdir()
+    mock_ha_integration = MagicMock()
+    mock_ha_integration.initialize = AsyncMock()
+    with patch.object(app_mod.settings, 'storage_path', str(tmp_path)), \
+         patch.object(app_mod, 'ha_integration', mock_ha_integration), \
+         patch.object(app_mod, 'ensure_directories', MagicMock()):
+        with TestClient(app_mod.app, raise_server_exceptions=True) as c:
+            yield c
+
+
+def test_snapshot_is_immutable_and_revalidates(client, tmp_path):
+    (tmp_path / "images" / "doorbell_1.jpg").write_bytes(b"jpeg")
+    first = client.get("/api/images/doorbell_1.jpg")
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+    second = client.get("/api/images/doorbell_1.jpg",
+                        headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 304
+    assert second.content == b""
+
+    since = client.get("/api/images/doorbell_1.jpg",
+                       headers={"If-Modified-Since": first.headers["last-modified"]})
+    assert since.status_code == 304
+
+
+def test_face_crop_served_from_path_lookup(client, tmp_path):
+    import src.app as app_mod
+    crop = tmp_path / "crop.jpg"
+    crop.write_bytes(b"jpeg")
+    with patch.object(app_mod, 'db') as mock_db:
+        mock_db.get_face_crop_path.return_value = str(crop)
+        resp = client.get("/api/face-crops/5/image")
+        assert resp.status_code == 200
+        assert resp.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        mock_db.get_face_crop_path.assert_called_with(5)
+        mock_db.get_face_crop_path.return_value = None
+        assert client.get("/api/face-crops/6/image").status_code == 404
@@ -0,0 +1,160 @@
+"""Tests for the shared pooled HTTP client (src/http_client.py)."""
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.http_client import SharedHTTPClient
+
+
+class _Server:
+    """Local keep-alive HTTP/1.1 server counting TCP connections and concurrency."""
+
+    def __init__(self, delay=0.0):
+        outer = self
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                with outer.lock:
+                    outer.connections += 1
+                super().setup()
+
+            def _reply(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                with outer.lock:
+                    outer.in_flight += 1
+                    outer.max_in_flight = max(outer.max_in_flight, outer.in_flight)
+                time.sleep(delay)
+                with outer.lock:
+                    outer.in_flight -= 1
+                body = b'{"ok": true}'
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = _reply
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    s = _Server()
+    yield s
+    s.close()
+
+
+@pytest.mark.asyncio
+async def test_requests_reuse_one_connection(server):
+    client = SharedHTTPClient()
+    try:
+        for _ in range(10):
+            resp = await client.post(f"{server.url}/api/states/sensor.x", json={"state": 1})
+            assert resp.status_code == 200
+        await client.get(f"{server.url}/api/states")
+    finally:
+        await client.close()
+    assert server.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_per_host_limit_caps_concurrency():
+    server = _Server(delay=0.05)
+    client = SharedHTTPClient(per_host_limit=2)
+    try:
+        await asyncio.gather(*[client.get(f"{server.url}/x") for _ in range(8)])
+    finally:
+        await client.close()
+        server.close()
+    assert server.max_in_flight <= 2
+
+
+@pytest.mark.asyncio
+async def test_status_reports_pool_and_host_stats(server):
+    client = SharedHTTPClient(max_connections=5)
+    try:
+        await client.get(f"{server.url}/a")
+        with pytest.raises(Exception):
+            await client.get("http://127.0.0.1:1/unreachable", timeout=1.0)
+        status = client.get_status()
+    finally:
+        await client.close()
+    host = server.url.split("//")[1]
+    assert status["started"] is True
+    assert status["max_connections"] == 5
+    assert status["connections"]["open"] >= 1
+    assert status["hosts"][host]["requests"] == 1
+    assert status["hosts"][host]["errors"] == 0
+    assert status["hosts"]["127.0.0.1:1"]["errors"] == 1
+    assert status["in_flight"] == 0
+    assert client.get_status()["started"] is False
+    assert client.get_status()["connections"] is None
+
+
+@pytest.mark.asyncio
+async def test_status_survives_unknown_transport_internals():
+    client = SharedHTTPClient()
+    try:
+        await client.start()
+        with patch.object(client._client, "_transport", object()):
+            status = client.get_status()
+    finally:
+        await client.close()
+    assert status["started"] is True
+    assert status["connections"] is None
+
+
+def test_new_event_loop_gets_fresh_client(server):
+    client = SharedHTTPClient()
+
+    async def call():
+        await client.get(f"{server.url}/a")
+
+    asyncio.run(call())
+    asyncio.run(call())  # first loop is closed; its connections are unusable
+    assert client.clients_created == 2
+
+
+@pytest.mark.asyncio
+async def test_ha_api_and_webhook_use_shared_client():
+    import src.utils as utils_mod
+    shared = MagicMock()
+    ok = MagicMock(status_code=200)
+    shared.post = AsyncMock(return_value=ok)
+    shared.get = AsyncMock(return_value=ok)
+    with patch.object(utils_mod, "http_client", shared), \
+         patch.object(utils_mod.settings, "notification_webhook", "http://hook/x"):
+        api = utils_mod.HomeAssistantAPI()
+        assert await api._post("/events/doorbell_ring", {"a": 1}) is ok
+        assert await api._get("/states") is ok
+        await utils_mod.NotificationManager()._send_webhook_notification({"title": "t"})
+    urls = [c.args[0] for c in shared.post.call_args_list]
+    assert urls == ["http://supervisor/core/api/events/doorbell_ring", "http://hook/x"]
+    shared.get.assert_awaited_once()
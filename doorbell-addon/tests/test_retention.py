@@ -0,0 +1,84 @@
+"""Tests for retention.py — batched background purge and its metrics."""
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import src.retention as retention_mod
+from src.retention import RetentionPurger
+
+
+@pytest.fixture
+def mock_db():
+    mock = MagicMock()
+    with patch.object(retention_mod, "db", mock), \
+         patch.object(retention_mod, "remove_event_files", len):
+        yield mock
+
+
+@pytest.mark.asyncio
+async def test_run_once_purges_in_batches_until_short_batch(mock_db):
+    mock_db.purge_events_before.side_effect = [(3, ["f"] * 6), (3, ["f"] * 5), (1, ["f"] * 2)]
+    purger = RetentionPurger(batch_size=3, batch_pause=0)
+
+    assert await purger.run_once() == 7
+
+    assert mock_db.purge_events_before.call_count == 3
+    cutoffs = {c.args[0] for c in mock_db.purge_events_before.call_args_list}
+    assert len(cutoffs) == 1  # one cutoff for the whole run
+    assert all(c.args[1] == 3 for c in mock_db.purge_events_before.call_args_list)
+    status = purger.get_status()
+    assert status["running"] is False
+    assert status["events_deleted_total"] == 7
+    assert status["files_deleted_total"] == 13
+    assert status["last_run"]["batches"] == 3
+    assert status["last_run"]["events_per_sec"] > 0
+
+
+@pytest.mark.asyncio
+async def test_run_once_reports_progress_while_running(mock_db):
+    purger = RetentionPurger(batch_size=2, batch_pause=0)
+    seen = []
+
+    def purge(cutoff, limit):
+        seen.append(purger.get_status()["current_run"]["events_deleted"])
+        return (2, ["a", "b"]) if len(seen) < 3 else (0, [])
+
+    mock_db.purge_events_before.side_effect = purge
+    await purger.run_once()
+    assert seen == [0, 2, 4]
+    assert purger.get_status()["current_run"] is None
+
+
+@pytest.mark.asyncio
+async def test_run_once_records_error(mock_db):
+    mock_db.purge_events_before.side_effect = RuntimeError("disk I/O error")
+    purger = RetentionPurger(batch_size=2, batch_pause=0)
+    with pytest.raises(RuntimeError):
+        await purger.run_once()
+    status = purger.get_status()
+    assert status["last_error"] == "disk I/O error"
+    assert status["running"] is False
+
+
+@pytest.mark.asyncio
+async def test_concurrent_runs_are_serialised(mock_db):
+    import threading
+    import time
+    purger = RetentionPurger(batch_size=10, batch_pause=0)
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def purge(cutoff, limit):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return (0, [])
+
+    mock_db.purge_events_before.side_effect = purge
+    await asyncio.gather(purger.run_once(), purger.run_once())
+    assert purger.runs == 2
+    assert peak[0] == 1
@@ -1,4 +1,5 @@
-"""Tests for ring endpoint — thin handler delegates to run_ring_pipeline."""
+"""Tests for ring endpoint — thin handler that queues the ring."""
+import asyncio
 import os
 import sys
 import pytest
@@ -36,42 +37,112 @@ def client():
             yield c
 
 
-def test_ring_returns_success_response(client):
-    """Ring handler returns all required fields."""
-    mock_result = {"event_id": 7, "ai_message": "Hi!", "ai_title": "Doorbell"}
-    with patch('src.app.run_ring_pipeline', new=AsyncMock(return_value=mock_result)):
+@pytest.fixture(autouse=True)
+def no_debounce():
+    import src.app as app_mod
+    app_mod._last_ring_time = 0.0
+
+
+def _mock_queue(job_id=7, job=None):
+    queue = MagicMock()
+    queue.enqueue = AsyncMock(return_value=job_id)
+    queue.wait = AsyncMock(return_value=job)
+    return queue
+
+
+def test_ring_returns_queued_job(client):
+    """Ring handler returns immediately with the job id."""
+    queue = _mock_queue()
+    with patch('src.app.ring_queue', queue):
         resp = client.post("/api/doorbell/ring", data={})
     assert resp.status_code == 200
     body = resp.json()
     assert body["success"] is True
-    assert body["event_id"] == 7
-    assert body["ai_message"] == "Hi!"
-    assert body["ai_title"] == "Doorbell"
+    assert body["job_id"] == 7
+    assert body["message"] == "Doorbell ring queued"
     assert "timestamp" in body
-    assert body["message"] == "Doorbell ring processed"
+    queue.wait.assert_not_awaited()
 
 
-def test_ring_passes_image_path_to_pipeline(client):
-    """image_path form field is forwarded to run_ring_pipeline."""
-    mock_result = {"event_id": 1, "ai_message": "Test", "ai_title": "Doorbell"}
-    mock_pipeline = AsyncMock(return_value=mock_result)
-    with patch('src.app.run_ring_pipeline', new=mock_pipeline):
+def test_ring_passes_image_path_to_queue(client):
+    """image_path form field is stored with the job."""
+    queue = _mock_queue()
+    with patch('src.app.ring_queue', queue):
         client.post("/api/doorbell/ring", data={"image_path": "/some/path.jpg"})
-    mock_pipeline.assert_called_once()
-    assert mock_pipeline.call_args.kwargs["image_path"] == "/some/path.jpg"
+    queue.enqueue.assert_awaited_once()
+    assert queue.enqueue.call_args.kwargs["image_path"] == "/some/path.jpg"
 
 
-def test_ring_passes_ai_message_to_pipeline(client):
-    """ai_message form field is forwarded to run_ring_pipeline."""
-    mock_result = {"event_id": 1, "ai_message": "Custom", "ai_title": "Doorbell"}
-    mock_pipeline = AsyncMock(return_value=mock_result)
-    with patch('src.app.run_ring_pipeline', new=mock_pipeline):
+def test_ring_passes_ai_message_to_queue(client):
+    """ai_message form field is stored with the job."""
+    queue = _mock_queue()
+    with patch('src.app.ring_queue', queue):
         client.post("/api/doorbell/ring", data={"ai_message": "Custom"})
-    assert mock_pipeline.call_args.kwargs["ai_message"] == "Custom"
+    assert queue.enqueue.call_args.kwargs["ai_message"] == "Custom"
 
 
-def test_ring_pipeline_error_returns_500(client):
-    """RuntimeError from pipeline becomes HTTP 500."""
-    with patch('src.app.run_ring_pipeline', new=AsyncMock(side_effect=RuntimeError("Camera fail"))):
+def test_ring_queue_error_returns_500(client):
+    queue = _mock_queue()
+    queue.enqueue.side_effect = RuntimeError("disk full")
+    with patch('src.app.ring_queue', queue):
         resp = client.post("/api/doorbell/ring", data={})
     assert resp.status_code == 500
+
+
+def test_ring_wait_returns_processed_event(client):
+    """wait=true holds the request until the job is done and returns the event."""
+    job = {
+        "status": "done", "event_id": 42, "error": None,
+        "checkpoint": {"analyze": {"ai_message": "Hi!", "ai_title": "Doorbell"}},
+    }
+    queue = _mock_queue(job=job)
+    with patch('src.app.ring_queue', queue):
+        resp = client.post("/api/doorbell/ring", data={"wait": "true"})
+    body = resp.json()
+    assert body["message"] == "Doorbell ring processed"
+    assert (body["job_id"], body["event_id"]) == (7, 42)
+    assert (body["ai_message"], body["ai_title"]) == ("Hi!", "Doorbell")
+
+
+def test_ring_wait_failed_job_returns_500(client):
+    """A failed ring (e.g. capture failure) becomes HTTP 500 when waiting."""
+    job = {"status": "failed", "event_id": None, "error": "Camera fail", "checkpoint": {}}
+    with patch('src.app.ring_queue', _mock_queue(job=job)):
+        resp = client.post("/api/doorbell/ring", data={"wait": "true"})
+    assert resp.status_code == 500
+    assert "Camera fail" in resp.json()["detail"]
+
+
+def test_ring_wait_unfinished_job_returns_202(client):
+    """A job still running after the wait (or left running) is reported, not a 500."""
+    job = {"status": "running", "event_id": None, "error": None, "checkpoint": {}}
+    with patch('src.app.ring_queue', _mock_queue(job=job)):
+        resp = client.post("/api/doorbell/ring", data={"wait": "true"})
+    assert resp.status_code == 202
+    assert resp.json()["message"] == "Doorbell ring still processing"
+
+
+def test_ring_wait_timeout_returns_202(client):
+    queue = _mock_queue()
+    queue.wait.side_effect = asyncio.TimeoutError
+    with patch('src.app.ring_queue', queue):
+        resp = client.post("/api/doorbell/ring", data={"wait": "true"})
+    assert resp.status_code == 202
+    assert resp.json()["job_id"] == 7
+
+
+def test_ring_wait_done_without_analysis_returns_504(client):
+    job = {"status": "done", "event_id": 42, "error": None, "checkpoint": {"capture": {}}}
+    with patch('src.app.ring_queue', _mock_queue(job=job)):
+        resp = client.post("/api/doorbell/ring", data={"wait": "true"})
+    assert resp.status_code == 504
+    assert "analysis" in resp.json()["detail"]
+
+
+def test_second_ring_within_debounce_is_not_queued(client):
+    queue = _mock_queue()
+    with patch('src.app.ring_queue', queue):
+        client.post("/api/doorbell/ring", data={})
+        resp = client.post("/api/doorbell/ring", data={})
+    assert resp.json()["debounced"] is True
+    queue.enqueue.assert_awaited_once()
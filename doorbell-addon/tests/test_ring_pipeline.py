@@ -2,6 +2,7 @@
 import asyncio
 import os
 import sys
+import threading
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -25,17 +26,18 @@ def _make_mocks(tmp_path, *, camera_ok=True, llm_enabled=True,
 
     mock_camera = MagicMock()
     if camera_ok:
-        def fake_capture(path):
+        async def fake_capture(path):
             os.makedirs(os.path.dirname(path), exist_ok=True)
             open(path, 'wb').write(b"img")
             return True
-        mock_camera.capture_image.side_effect = fake_capture
+        mock_camera.capture_image = AsyncMock(side_effect=fake_capture)
     else:
-        mock_camera.capture_image.return_value = False
+        mock_camera.capture_image = AsyncMock(return_value=False)
 
     mock_db = MagicMock()
-    mock_db.add_doorbell_event.return_value = MagicMock(
-        id=42, timestamp=MagicMock(isoformat=lambda: "2026-01-01T00:00:00")
+    mock_db.commit_ring.return_value = MagicMock(
+        event=MagicMock(id=42, timestamp=MagicMock(isoformat=lambda: "2026-01-01T00:00:00")),
+        crop_ids=[],
     )
     mock_frs = MagicMock()
     mock_frs.is_ready.return_value = False
@@ -61,6 +63,7 @@ def _patch_pipeline(pipeline_mod, mock_settings, mock_camera, mock_db, mock_frs,
         patch.object(pipeline_mod, 'face_recognition_service', mock_frs),
         patch.object(pipeline_mod, 'ha_integration', mock_ha_integration),
         patch.object(pipeline_mod, 'notification_manager', mock_notification_manager),
+        patch.object(pipeline_mod, 'thumbnail_cache', MagicMock(pregenerate=AsyncMock())),
     ]
 
 
@@ -268,7 +271,7 @@ async def test_event_saved_to_db(tmp_path, pipeline_mod):
         await pipeline_mod.run_ring_pipeline()
     finally:
         for p in patches: p.stop()
-    mocks[2].add_doorbell_event.assert_called_once()
+    mocks[2].commit_ring.assert_called_once()
 
 
 @pytest.mark.asyncio
@@ -292,9 +295,207 @@ async def test_public_image_write_failure_skips_llm(tmp_path, pipeline_mod):
     patches = _patch_pipeline(pipeline_mod, *mocks)
     for p in patches: p.start()
     with patch.object(pipeline_mod, 'HomeAssistantAPI', return_value=mock_ha_api), \
-         patch('shutil.copy2', side_effect=OSError("disk full")):
+         patch.object(pipeline_mod.Snapshot, 'write_copy', side_effect=OSError("disk full")):
         result = await pipeline_mod.run_ring_pipeline()
     for p in patches: p.stop()
     # LLM was not called because public copy failed → public_filename is None
     mock_ha_api.call_llmvision.assert_not_called()
     assert result["ai_message"] == "Someone is at the door"
+
+
+@pytest.mark.asyncio
+async def test_snapshot_decoded_once_for_detection_and_crops(tmp_path, pipeline_mod):
+    """Detection gets the decoded frame and every crop reuses the same image."""
+    from PIL import Image
+    from src.face_recognition_service import IdentifiedFace
+    snapshot = tmp_path / "snap.jpg"
+    Image.new("RGB", (64, 48), (10, 20, 30)).save(snapshot, "JPEG")
+    mocks = _make_mocks(tmp_path, llm_enabled=False)
+    mock_settings, _, mock_db, mock_frs = mocks[:4]
+    mock_settings.face_recognition_enabled = True
+    mock_frs.is_ready.return_value = True
+    mock_frs.analyze = AsyncMock(return_value=[MagicMock(), MagicMock()])
+    identified = [
+        IdentifiedFace(bbox=(1, 1, 5, 5), name="Unknown", person_id=None, score=0.1, det_score=0.9),
+        IdentifiedFace(bbox=(9, 9, 5, 5), name="Unknown", person_id=None, score=0.1, det_score=0.9),
+    ]
+    matched_on = []
+    mock_frs.identify_faces.side_effect = (
+        lambda faces: matched_on.append(threading.current_thread()) or identified
+    )
+    mock_frs.save_face_crop.return_value = "/crops/x.jpg"
+    patches = _patch_pipeline(pipeline_mod, *mocks)
+    for p in patches: p.start()
+    opened = []
+    real_open = Image.open
+    try:
+        with patch("PIL.Image.open", side_effect=lambda *a, **k: opened.append(a) or real_open(*a, **k)):
+            await pipeline_mod.run_ring_pipeline(image_path=str(snapshot))
+    finally:
+        for p in patches: p.stop()
+    assert len(opened) == 1
+    # Matching against the gallery runs off the event loop.
+    assert matched_on and matched_on[0] is not threading.main_thread()
+    frame = mock_frs.analyze.call_args[0][0]
+    assert frame.shape == (48, 64, 3)
+    crop_images = [c[0][0] for c in mock_frs.save_face_crop.call_args_list]
+    assert len(crop_images) == 2 and crop_images[0] is crop_images[1]
+    assert crop_images[0].size == (64, 48)
+    assert len(mock_db.commit_ring.call_args.kwargs["crop_paths"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_snapshot_not_decoded_without_face_recognition(tmp_path, pipeline_mod):
+    """With face recognition off the JPEG is only copied, never decoded."""
+    snapshot = tmp_path / "snap.jpg"
+    snapshot.write_bytes(b"not really a jpeg")
+    mocks = _make_mocks(tmp_path, llm_enabled=False, public_path=str(tmp_path / "www"))
+    patches = _patch_pipeline(pipeline_mod, *mocks)
+    for p in patches: p.start()
+    try:
+        with patch("PIL.Image.open") as mock_open:
+            await pipeline_mod.run_ring_pipeline(image_path=str(snapshot))
+    finally:
+        for p in patches: p.stop()
+    mock_open.assert_not_called()
+    public = list((tmp_path / "www").iterdir())
+    assert len(public) == 1 and public[0].read_bytes() == b"not really a jpeg"
+    assert list((tmp_path / "images").iterdir())[0].read_bytes() == b"not really a jpeg"
+
+
+@pytest.mark.asyncio
+async def test_ring_clip_recorded_in_background(tmp_path, pipeline_mod):
+    mocks = _make_mocks(tmp_path, llm_enabled=False)
+    mock_clips = MagicMock()
+    mock_clips.available.return_value = True
+    mock_clips.record = AsyncMock(return_value=None)
+    patches = _patch_pipeline(pipeline_mod, *mocks)
+    for p in patches: p.start()
+    try:
+        with patch.object(pipeline_mod, 'clip_recorder', mock_clips):
+            await pipeline_mod.run_ring_pipeline()
+            await asyncio.gather(*pipeline_mod._background_tasks)
+    finally:
+        for p in patches: p.stop()
+    image_path = mocks[2].commit_ring.call_args.kwargs["image_path"]
+    mock_clips.record.assert_awaited_once()
+    assert mock_clips.record.call_args[0][0] == image_path
+    assert "ring_at" in mock_clips.record.call_args.kwargs
+
+
+@pytest.mark.asyncio
+async def test_cached_weather_and_its_age_saved_with_event(tmp_path, pipeline_mod):
+    mocks = _make_mocks(tmp_path, llm_enabled=False)
+    mock_weather = MagicMock()
+    mock_weather.current = AsyncMock(
+        return_value=({"condition": "rainy", "temperature": 9.0, "humidity": 90.0}, 42.5)
+    )
+    patches = _patch_pipeline(pipeline_mod, *mocks)
+    for p in patches: p.start()
+    try:
+        with patch.object(pipeline_mod, 'weather_cache', mock_weather):
+            await pipeline_mod.run_ring_pipeline()
+    finally:
+        for p in patches: p.stop()
+    kwargs = mocks[2].commit_ring.call_args.kwargs
+    assert kwargs["weather_condition"] == "rainy"
+    assert kwargs["weather_age_secs"] == 42.5
+
+
+@pytest.mark.asyncio
+async def test_stages_are_reported_for_checkpointing(tmp_path, pipeline_mod):
+    mocks = _make_mocks(tmp_path, llm_enabled=False)
+    stages = []
+
+    async def on_stage(stage, outputs, ms):
+        stages.append((stage, outputs))
+
+    patches = _patch_pipeline(pipeline_mod, *mocks)
+    for p in patches: p.start()
+    try:
+        await pipeline_mod.run_ring_pipeline(on_stage=on_stage, ring_job_id=5)
+    finally:
+        for p in patches: p.stop()
+    assert [s for s, _ in stages] == list(pipeline_mod.RING_STAGES)
+    assert stages[1][1]["ai_message"] == "Someone is at the door"
+    assert stages[2][1]["event_id"] == 42
+    assert mocks[2].commit_ring.call_args.kwargs["ring_job_id"] == 5
+
+
+@pytest.mark.asyncio
+async def test_resumed_ring_skips_completed_stages(tmp_path, pipeline_mod):
+    """A ring resumed after analysis reuses the checkpoint: no capture, no LLM."""
+    from PIL import Image
+    image = tmp_path / "images" / "doorbell_x.jpg"
+    image.parent.mkdir()
+    Image.new("RGB", (64, 48)).save(image, "JPEG")
+    mocks = _make_mocks(tmp_path)
+    mock_settings, mock_camera, mock_db, mock_frs = mocks[:4]
+    mock_frs.save_face_crop.side_effect = lambda img, bbox, prefix, idx: f"/crops/{prefix}_{idx}.jpg"
+    checkpoint = {
+        "capture": {"image_path": str(image), "public_filename": None,
+                    "rang_at": "2026-10-17T08:00:00"},
+        "analyze": {"ai_message": "A courier", "ai_title": "Parcel", "weather": None,
+                    "weather_age_secs": None,
+                    "faces": [{"name": "Unknown", "person_id": None, "bbox": [1, 1, 5, 5],
+                               "score": 0.1, "det_score": 0.9}] * 2},
+    }
+    patches = _patch_pipeline(pipeline_mod, *mocks)
+    for p in patches: p.start()
+    decoded_on = []
+    real_image = pipeline_mod.Snapshot.image
+
+    def image(self):
+        decoded_on.append(threading.current_thread())
+        return real_image(self)
+
+    try:
+        with patch.object(pipeline_mod, 'HomeAssistantAPI') as mock_api, \
+             patch.object(pipeline_mod.Snapshot, 'image', image):
+            result = await pipeline_mod.run_ring_pipeline(checkpoint=checkpoint)
+    finally:
+        for p in patches: p.stop()
+    # The checkpointed snapshot is decoded for the crops off the event loop.
+    assert decoded_on and threading.main_thread() not in decoded_on
+    mock_camera.capture_image.assert_not_awaited()
+    mock_api.return_value.call_llmvision.assert_not_called()
+    assert result["ai_message"] == "A courier"
+    kwargs = mock_db.commit_ring.call_args.kwargs
+    assert kwargs["faces_detected"] == 2
+    assert kwargs["timestamp"].isoformat() == "2026-10-17T08:00:00"
+    # Crops are named after the snapshot and committed with the event.
+    assert kwargs["crop_paths"] == ["/crops/doorbell_x_0.jpg", "/crops/doorbell_x_1.jpg"]
+    mock_db.add_face_crop.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_ring_and_its_enrichment_published_live(tmp_path, pipeline_mod):
+    mocks = _make_mocks(tmp_path, llm_enabled=False)
+    bus = MagicMock()
+    patches = _patch_pipeline(pipeline_mod, *mocks) + [patch.object(pipeline_mod, 'event_bus', bus)]
+    for p in patches: p.start()
+    try:
+        await pipeline_mod.run_ring_pipeline(ring_job_id=5)
+    finally:
+        for p in patches: p.stop()
+    (ring_kind, ring), (event_kind, event) = [c.args for c in bus.publish.call_args_list]
+    assert ring_kind == "ring" and ring["job_id"] == 5
+    assert ring["image"].startswith("doorbell_") and ring["image"].endswith(".jpg")
+    assert event_kind == "event" and event["id"] == 42 and event["job_id"] == 5
+    assert event["image"] == ring["image"]
+    assert event["ai_message"] == "Someone is at the door"
+
+
+@pytest.mark.asyncio
+async def test_thumbnails_pregenerated_from_snapshot_bytes(tmp_path, pipeline_mod):
+    mocks = _make_mocks(tmp_path, llm_enabled=False)
+    patches = _patch_pipeline(pipeline_mod, *mocks)
+    for p in patches: p.start()
+    try:
+        await pipeline_mod.run_ring_pipeline()
+        await asyncio.gather(*pipeline_mod._background_tasks)
+        image_path, data = pipeline_mod.thumbnail_cache.pregenerate.call_args.args
+    finally:
+        for p in patches: p.stop()
+    assert image_path == mocks[2].commit_ring.call_args.kwargs["image_path"]
+    assert data == b"img"
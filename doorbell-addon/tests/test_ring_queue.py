@@ -0,0 +1,182 @@
+"""Tests for the durable ring job queue (src/ring_queue.py)."""
+import asyncio
+import os
+import sqlite3
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from tests.test_database import make_db
+
+import src.ring_queue as queue_mod
+from src.ring_queue import RingQueue
+
+
+@pytest.fixture
+def qdb(tmp_path):
+    mgr = make_db(tmp_path)
+    with patch.object(queue_mod, "db", mgr):
+        yield mgr
+
+
+def _fake_pipeline(calls, fail=None):
+    """Stand-in for run_ring_pipeline: completes the stages not yet in checkpoint."""
+    async def run(image_path=None, ai_message=None, checkpoint=None, on_stage=None, ring_job_id=None):
+        calls.append({"image_path": image_path, "checkpoint": dict(checkpoint), "job": ring_job_id})
+        if fail:
+            raise RuntimeError(fail)
+        for stage in queue_mod.RING_STAGES:
+            if stage not in checkpoint:
+                outputs = {"ai_message": ai_message or "Hi", "ai_title": "Doorbell"} \
+                    if stage == "analyze" else {}
+                await on_stage(stage, outputs, 5)
+        return {"event_id": 1, "ai_message": "Hi", "ai_title": "Doorbell"}
+    return run
+
+
+@pytest.mark.asyncio
+async def test_enqueued_ring_runs_and_records_stages(qdb):
+    calls = []
+    queue = RingQueue()
+    with patch.object(queue_mod, "run_ring_pipeline", _fake_pipeline(calls)):
+        await queue.start()
+        try:
+            job_id = await queue.enqueue(image_path="/snap.jpg", ai_message="Parcel")
+            job = await queue.wait(job_id, timeout=5)
+        finally:
+            await queue.stop()
+    assert job["status"] == "done" and job["attempts"] == 1
+    assert calls[0]["image_path"] == "/snap.jpg" and calls[0]["job"] == job_id
+    assert set(job["stage_ms"]) == set(queue_mod.RING_STAGES)
+    assert job["checkpoint"]["analyze"]["ai_message"] == "Parcel"
+
+
+@pytest.mark.asyncio
+async def test_interrupted_job_resumes_after_last_stage(qdb):
+    job_id = qdb.enqueue_ring_job({"image_path": None, "ai_message": None})
+    qdb.claim_ring_job()  # the process "died" while this was running
+    qdb.checkpoint_ring_job(job_id, {"capture": {"image_path": "/img/a.jpg"}}, {"capture": 40})
+    calls = []
+    queue = RingQueue()
+    with patch.object(queue_mod, "run_ring_pipeline", _fake_pipeline(calls)):
+        await queue.start()
+        try:
+            job = await queue.wait(job_id, timeout=5)
+        finally:
+            await queue.stop()
+    assert calls[0]["checkpoint"] == {"capture": {"image_path": "/img/a.jpg"}}
+    assert job["status"] == "done" and job["attempts"] == 2
+    assert job["stage_ms"]["capture"] == 40
+    assert queue.jobs_resumed == 1
+
+
+@pytest.mark.asyncio
+async def test_saved_event_is_not_inserted_again_on_resume(qdb):
+    job_id = qdb.enqueue_ring_job({"image_path": None, "ai_message": None})
+    qdb.claim_ring_job()
+    qdb.checkpoint_ring_job(job_id, {"capture": {}, "analyze": {}}, {})
+    # Crash right after the event commit, before its checkpoint was written
+    event = qdb.add_doorbell_event(image_path="/img/a.jpg", ring_job_id=job_id)
+    calls = []
+    queue = RingQueue()
+    with patch.object(queue_mod, "run_ring_pipeline", _fake_pipeline(calls)):
+        await queue.start()
+        try:
+            await queue.wait(job_id, timeout=5)
+        finally:
+            await queue.stop()
+    assert calls[0]["checkpoint"]["save"]["event_id"] == event.id
+    assert qdb.get_event_count() == 1
+
+
+def test_job_interrupted_too_often_is_failed(qdb):
+    job_id = qdb.enqueue_ring_job({})
+    for _ in range(3):
+        qdb.claim_ring_job()
+        qdb.requeue_interrupted_ring_jobs(max_attempts=3)
+    job = qdb.get_ring_job(job_id)
+    assert job["status"] == "failed" and "interrupted" in job["error"]
+
+
+def test_jobs_are_claimed_oldest_first(qdb):
+    first = qdb.enqueue_ring_job({"n": 1})
+    second = qdb.enqueue_ring_job({"n": 2})
+    assert qdb.claim_ring_job()["id"] == first
+    assert qdb.claim_ring_job()["id"] == second
+    assert qdb.claim_ring_job() is None
+
+
+@pytest.mark.asyncio
+async def test_failed_ring_is_recorded(qdb):
+    queue = RingQueue()
+    with patch.object(queue_mod, "run_ring_pipeline", _fake_pipeline([], fail="Camera fail")):
+        await queue.start()
+        try:
+            job = await queue.wait(await queue.enqueue(), timeout=5)
+        finally:
+            await queue.stop()
+    assert job["status"] == "failed" and job["error"] == "Camera fail"
+    assert queue.jobs_failed == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_survives_a_bookkeeping_error(qdb):
+    calls = []
+    real_finish = qdb.finish_ring_job
+    failures = [sqlite3.OperationalError("database is locked")]
+
+    def finish(job_id, status, error):
+        if failures:
+            raise failures.pop()
+        real_finish(job_id, status, error)
+
+    queue = RingQueue()
+    with patch.object(queue_mod, "run_ring_pipeline", _fake_pipeline(calls)), \
+         patch.object(qdb, "finish_ring_job", side_effect=finish):
+        await queue.start()
+        try:
+            first = await queue.wait(await queue.enqueue(), timeout=5)
+            second = await queue.wait(await queue.enqueue(), timeout=5)
+            assert (await queue.get_status())["workers"] == 1
+        finally:
+            await queue.stop()
+    # The first is left running (resumed on the next start); the next still runs.
+    assert first["status"] == "running"
+    assert second["status"] == "done" and len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_status_reports_depth_and_stage_timings(qdb):
+    queue = RingQueue()
+    with patch.object(queue_mod, "run_ring_pipeline", _fake_pipeline([])):
+        await queue.start()
+        try:
+            await queue.wait(await queue.enqueue(), timeout=5)
+        finally:
+            await queue.stop()
+        qdb.enqueue_ring_job({})  # nobody running: stays queued
+        status = await queue.get_status()
+    assert status["depth"] == 1 and status["done"] == 1
+    assert status["avg_stage_ms"] == {stage: 5 for stage in queue_mod.RING_STAGES}
+    assert status["avg_wait_ms"] is not None and status["oldest_wait_ms"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_shutdown_mid_ring_leaves_job_to_resume(qdb):
+    started = asyncio.Event()
+
+    async def hang(**kwargs):
+        started.set()
+        await asyncio.sleep(60)
+
+    queue = RingQueue()
+    with patch.object(queue_mod, "run_ring_pipeline", hang):
+        await queue.start()
+        job_id = await queue.enqueue()
+        await asyncio.wait_for(started.wait(), 5)
+        await queue.stop()
+    assert qdb.get_ring_job(job_id)["status"] == "running"
+    assert qdb.requeue_interrupted_ring_jobs(max_attempts=3) == (1, 0)
@@ -0,0 +1,168 @@
+"""Tests for the trigger-maintained ring statistics and the stats endpoints."""
+import os
+import sys
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from tests.test_database import make_db
+
+ALICE = {"name": "Alice", "person_id": None, "bbox": [1, 1, 5, 5], "score": 0.8, "det_score": 0.9}
+UNKNOWN = {"name": "Unknown", "person_id": None, "bbox": [9, 9, 5, 5], "score": 0.1, "det_score": 0.9}
+
+
+def _ring(mgr, ts, faces=(), weather=None):
+    return mgr.add_doorbell_event(
+        f"/img/doorbell_{ts}.jpg",
+        timestamp=datetime.fromisoformat(ts),
+        faces=list(faces),
+        faces_detected=len(faces),
+        weather_condition=weather,
+    ).id
+
+
+def _stats(mgr):
+    with mgr._connect() as conn:
+        return {
+            (r["period"], r["bucket"]): (r["rings"], r["known_faces"], r["unknown_faces"])
+            for r in conn.execute("SELECT * FROM ring_stats")
+        }
+
+
+def test_counts_follow_inserts_and_deletes(tmp_path):
+    mgr = make_db(tmp_path)
+    first = _ring(mgr, "2026-10-12T08:15:00", [ALICE, UNKNOWN], "rainy")  # a Monday
+    _ring(mgr, "2026-10-12T08:45:00", [UNKNOWN], "rainy")
+    _ring(mgr, "2026-10-13T19:05:00", [], None)
+
+    assert mgr.get_ring_totals() == {"rings": 3, "known_faces": 1, "unknown_faces": 2}
+    assert mgr.get_event_count() == 3
+    assert _stats(mgr)[("hour", "2026-10-12T08")] == (2, 1, 2)
+    assert _stats(mgr)[("day", "2026-10-13")] == (1, 0, 0)
+
+    # Deleting an event takes its faces with it (cascade) and both are uncounted.
+    mgr.delete_events([first])
+    assert mgr.get_ring_totals() == {"rings": 2, "known_faces": 0, "unknown_faces": 1}
+    assert _stats(mgr)[("hour", "2026-10-12T08")] == (1, 0, 1)
+    assert mgr.get_event_count() == len(mgr.get_doorbell_events())
+
+
+def test_purge_keeps_counts_in_step(tmp_path):
+    mgr = make_db(tmp_path)
+    for day in (1, 2, 3):
+        _ring(mgr, f"2026-01-0{day}T10:00:00", [UNKNOWN])
+    mgr.purge_events_before(datetime(2026, 1, 3), limit=10)
+    assert mgr.get_ring_totals() == {"rings": 1, "known_faces": 0, "unknown_faces": 1}
+    series = mgr.get_ring_timeseries("day", datetime(2026, 1, 1), datetime(2026, 1, 4))
+    assert [p["bucket"] for p in series] == ["2026-01-03"]
+
+
+def test_today_count_reads_todays_bucket(tmp_path):
+    mgr = make_db(tmp_path)
+    _ring(mgr, datetime.now().isoformat())
+    _ring(mgr, "2020-05-05T10:00:00")
+    assert mgr.get_today_event_count() == 1
+
+
+def test_timeseries_by_hour_and_day_with_weather(tmp_path):
+    mgr = make_db(tmp_path)
+    _ring(mgr, "2026-10-12T08:15:00", [ALICE], "rainy")
+    _ring(mgr, "2026-10-12T09:15:00", [], "sunny")
+    _ring(mgr, "2026-10-12T09:30:00", [], "sunny")
+    _ring(mgr, "2026-10-14T09:30:00", [], None)
+
+    hours = mgr.get_ring_timeseries("hour", datetime(2026, 10, 12), datetime(2026, 10, 13))
+    assert [(p["bucket"], p["rings"]) for p in hours] == [("2026-10-12T08", 1), ("2026-10-12T09", 2)]
+    assert hours[0]["known_faces"] == 1
+
+    days = mgr.get_ring_timeseries("day", datetime(2026, 10, 1), datetime(2026, 11, 1))
+    assert [(p["bucket"], p["rings"]) for p in days] == [("2026-10-12", 3), ("2026-10-14", 1)]
+    assert days[0]["weather"] == {"rainy": 1, "sunny": 2}
+    assert days[1]["weather"] == {"unknown": 1}
+
+
+def test_heatmap_by_weekday_and_hour(tmp_path):
+    mgr = make_db(tmp_path)
+    _ring(mgr, "2026-10-12T08:15:00")  # Monday
+    _ring(mgr, "2026-10-19T08:40:00")  # Monday
+    _ring(mgr, "2026-10-18T23:59:00")  # Sunday
+    _ring(mgr, "2026-01-01T12:00:00")  # outside the window
+    heatmap = mgr.get_ring_heatmap(datetime(2026, 10, 1), datetime(2026, 11, 1))
+    assert len(heatmap) == 7 and all(len(row) == 24 for row in heatmap)
+    assert heatmap[0][8] == 2
+    assert heatmap[6][23] == 1
+    assert sum(map(sum, heatmap)) == 3
+
+
+def test_existing_history_is_backfilled(tmp_path):
+    mgr = make_db(tmp_path)
+    _ring(mgr, "2026-10-12T08:15:00", [ALICE, UNKNOWN], "rainy")
+    _ring(mgr, "2026-10-13T08:15:00", [UNKNOWN], None)
+    expected = _stats(mgr)
+    with mgr._connect() as conn:
+        # As on a database from before the statistics existed.
+        for name in ("event", "face"):
+            for action in ("insert", "delete"):
+                conn.execute(f"DROP TRIGGER trg_ring_stats_{name}_{action}")
+        conn.execute("DROP TABLE ring_stats")
+        conn.execute("DROP TABLE ring_weather_stats")
+    mgr.close()
+
+    reopened = make_db(tmp_path)
+    assert _stats(reopened) == expected
+    days = reopened.get_ring_timeseries("day", datetime(2026, 10, 1), datetime(2026, 11, 1))
+    assert days[0]["weather"] == {"rainy": 1}
+    # And it keeps counting afterwards, without double-counting the backfill.
+    _ring(reopened, "2026-10-13T09:00:00")
+    assert reopened.get_ring_totals() == {"rings": 3, "known_faces": 1, "unknown_faces": 2}
+
+
+# ── Endpoints ─────────────────────────────────────────────────────────────────
+
+from tests.test_api_events import _patch_app_imports  # noqa: E402
+
+_patch_app_imports()
+
+
+@pytest.fixture
+def client(tmp_path):
+    from fastapi.testclient import TestClient
+    import src.app as app_mod
+    mock_ha_integration = MagicMock()
+    mock_ha_integration.initialize = AsyncMock()
+    with patch.object(app_mod, 'db') as mock_db, \
+         patch.object(app_mod, 'ha_integration', mock_ha_integration), \
+         patch.object(app_mod, 'ensure_directories', MagicMock()):
+        with TestClient(app_mod.app, raise_server_exceptions=True) as c:
+            c._mock_db = mock_db
+            yield c
+
+
+def test_heatmap_endpoint(client):
+    client._mock_db.get_ring_heatmap.return_value = [[0] * 24 for _ in range(7)]
+    resp = client.get("/api/stats/heatmap?days=7")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["weekdays"][0] == "Mon" and len(data["rings"]) == 7
+    start, end = client._mock_db.get_ring_heatmap.call_args[0]
+    assert (end - start).days == 7
+    assert client.get("/api/stats/heatmap?days=0").status_code == 422
+
+
+def test_timeseries_endpoint_windows_and_validation(client):
+    client._mock_db.get_ring_timeseries.return_value = [{"bucket": "2026-01-02", "rings": 4}]
+    resp = client.get("/api/stats/timeseries?from=2026-01-01&to=2026-01-31")
+    assert resp.status_code == 200
+    assert resp.json()["series"] == [{"bucket": "2026-01-02", "rings": 4}]
+    period, start, end = client._mock_db.get_ring_timeseries.call_args[0]
+    assert (period, start, end) == ("day", datetime(2026, 1, 1), datetime(2026, 2, 1))
+
+    client.get("/api/stats/timeseries?period=hour")
+    period, start, end = client._mock_db.get_ring_timeseries.call_args[0]
+    assert period == "hour" and (end - start).total_seconds() == 48 * 3600
+
+    assert client.get("/api/stats/timeseries?period=week").status_code == 422
+    assert client.get("/api/stats/timeseries?from=yesterday").status_code == 400
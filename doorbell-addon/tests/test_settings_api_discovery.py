@@ -1,4 +1,4 @@
-"""Tests for GET /api/settings/notify-services and /api/settings/binary-sensors."""
+"""Tests for the HA discovery endpoints (notify services, binary sensors, weather, cameras)."""
 import os
 import sys
 import pytest
@@ -36,6 +36,14 @@ def client():
             yield c
 
 
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    from src.ha_registry import ha_registry
+    ha_registry.invalidate()
+    yield
+    ha_registry.invalidate()
+
+
 def _mock_ha_api_get(return_value):
     """Return an AsyncMock for HomeAssistantAPI._get with a given JSON response."""
     mock_resp = MagicMock()
@@ -51,7 +59,7 @@ def test_notify_services_filters_and_classifies(client):
         {"domain": "light", "services": {"turn_on": {}}},
     ]
     mock_api = _mock_ha_api_get(ha_services_response)
-    with patch('src.app.HomeAssistantAPI', return_value=mock_api):
+    with patch('src.ha_registry.HomeAssistantAPI', return_value=mock_api):
         resp = client.get("/api/settings/notify-services")
     assert resp.status_code == 200
     svcs = {s["name"]: s for s in resp.json()["services"]}
@@ -64,7 +72,7 @@ def test_notify_services_filters_and_classifies(client):
 def test_notify_services_returns_empty_on_api_failure(client):
     mock_api = MagicMock()
     mock_api._get = AsyncMock(return_value=None)
-    with patch('src.app.HomeAssistantAPI', return_value=mock_api):
+    with patch('src.ha_registry.HomeAssistantAPI', return_value=mock_api):
         resp = client.get("/api/settings/notify-services")
     assert resp.status_code == 200
     assert resp.json()["services"] == []
@@ -77,7 +85,7 @@ def test_binary_sensors_filters_entity_ids(client):
         {"entity_id": "sensor.temperature", "attributes": {}},
     ]
     mock_api = _mock_ha_api_get(states)
-    with patch('src.app.HomeAssistantAPI', return_value=mock_api):
+    with patch('src.ha_registry.HomeAssistantAPI', return_value=mock_api):
         resp = client.get("/api/settings/binary-sensors")
     assert resp.status_code == 200
     entities = resp.json()["entities"]
@@ -90,7 +98,36 @@ def test_binary_sensors_filters_entity_ids(client):
 def test_binary_sensors_returns_empty_on_api_failure(client):
     mock_api = MagicMock()
     mock_api._get = AsyncMock(return_value=None)
-    with patch('src.app.HomeAssistantAPI', return_value=mock_api):
+    with patch('src.ha_registry.HomeAssistantAPI', return_value=mock_api):
         resp = client.get("/api/settings/binary-sensors")
     assert resp.status_code == 200
     assert resp.json()["entities"] == []
+
+
+def test_discovery_endpoints_share_one_states_fetch(client):
+    states = [
+        {"entity_id": "binary_sensor.doorbell", "state": "off", "attributes": {}},
+        {"entity_id": "weather.home", "state": "sunny", "attributes": {"friendly_name": "Home"}},
+        {"entity_id": "camera.porch", "state": "idle", "attributes": {"friendly_name": "Porch"}},
+    ]
+    mock_api = _mock_ha_api_get(states)
+    with patch('src.ha_registry.HomeAssistantAPI', return_value=mock_api), \
+         patch('src.ha_camera.ha_camera_manager.supervisor_token', 'tok'):
+        cameras = client.get("/api/cameras").json()["cameras"]
+        weather = client.get("/api/weather-entities").json()["entities"]
+        sensors = client.get("/api/settings/binary-sensors").json()["entities"]
+    assert [c["entity_id"] for c in cameras] == ["camera.porch"]
+    assert weather == [{"entity_id": "weather.home", "friendly_name": "Home", "state": "sunny"}]
+    assert [e["entity_id"] for e in sensors] == ["binary_sensor.doorbell"]
+    mock_api._get.assert_awaited_once_with("/states")
+
+
+def test_llmvision_schema_distinguishes_unreachable_from_missing(client):
+    with patch('src.ha_registry.HomeAssistantAPI', return_value=_mock_ha_api_get([])):
+        assert "not found" in client.get("/api/settings/llmvision-schema").json()["error"]
+    from src.ha_registry import ha_registry
+    ha_registry.invalidate()
+    mock_api = MagicMock()
+    mock_api._get = AsyncMock(return_value=None)
+    with patch('src.ha_registry.HomeAssistantAPI', return_value=mock_api):
+        assert "Could not reach" in client.get("/api/settings/llmvision-schema").json()["error"]
@@ -0,0 +1,59 @@
+"""Tests for src/snapshot.py."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.snapshot import Snapshot, crop_padded
+
+
+def _jpeg(path, size=(40, 30), orientation=None):
+    from PIL import Image
+    img = Image.new("RGB", size, (200, 100, 50))
+    if orientation:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        img.save(path, "JPEG", exif=exif)
+    else:
+        img.save(path, "JPEG")
+    return path
+
+
+def test_load_and_write_copy_preserve_bytes(tmp_path):
+    src = _jpeg(str(tmp_path / "a.jpg"))
+    snap = Snapshot.load(src)
+    dest = str(tmp_path / "sub" / "b.jpg")
+    snap.write_copy(dest)
+    assert open(dest, "rb").read() == open(src, "rb").read()
+    assert not snap.decoded
+
+
+def test_image_decoded_once_and_cached(tmp_path):
+    snap = Snapshot.load(_jpeg(str(tmp_path / "a.jpg")))
+    first = snap.image()
+    assert snap.decoded
+    assert snap.image() is first
+    assert first.mode == "RGB"
+
+
+def test_image_applies_exif_orientation(tmp_path):
+    # Orientation 6 = rotate 90° CW for display; width and height swap.
+    snap = Snapshot.load(_jpeg(str(tmp_path / "a.jpg"), size=(40, 30), orientation=6))
+    assert snap.image().size == (30, 40)
+
+
+def test_pixels_shape_and_shared(tmp_path):
+    snap = Snapshot.load(_jpeg(str(tmp_path / "a.jpg")))
+    px = snap.pixels()
+    assert px.shape == (30, 40, 3)
+    assert str(px.dtype) == "uint8"
+    assert snap.pixels() is px
+
+
+def test_crop_padded_clamps_to_image(tmp_path):
+    snap = Snapshot.load(_jpeg(str(tmp_path / "a.jpg")))
+    crop = snap.crop((0, 0, 10, 10), 0.5)
+    assert crop.size == (15, 15)
+    assert crop_padded(snap.image(), (35, 25, 10, 10), 0.5, (20, 20)).size == (20, 20)
@@ -0,0 +1,211 @@
+"""Tests for the thumbnail cache and the /api/images/{name}/thumb endpoint."""
+import asyncio
+import io
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import src.thumbnails as thumbs_mod  # noqa: E402
+from src.thumbnails import ThumbnailCache, render, snap_width, thumbnail_dir_for  # noqa: E402
+
+
+def _jpeg(size=(1920, 1080), orientation=None) -> bytes:
+    img = Image.new("RGB", size, "#336699")
+    buf = io.BytesIO()
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    img.save(buf, "JPEG", exif=exif)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def storage(tmp_path):
+    (tmp_path / "images").mkdir()
+    with patch.object(thumbs_mod.settings, 'storage_path', str(tmp_path)):
+        yield tmp_path
+
+
+def _snapshot(storage, name="doorbell_1.jpg", **kwargs) -> str:
+    path = storage / "images" / name
+    path.write_bytes(_jpeg(**kwargs))
+    return str(path)
+
+
+@pytest.mark.parametrize("requested,expected", [(1, 128), (128, 128), (200, 320), (5000, 640)])
+def test_width_snapped_up_to_cached_sizes(requested, expected):
+    assert snap_width(requested) == expected
+
+
+def test_render_sizes_and_never_upscales():
+    variants = render(_jpeg(), [128, 640], "jpeg")
+    assert Image.open(io.BytesIO(variants[640])).size == (640, 360)
+    assert Image.open(io.BytesIO(variants[128])).size == (128, 72)
+    small = render(_jpeg((100, 50)), [320], "webp")[320]
+    img = Image.open(io.BytesIO(small))
+    assert img.format == "WEBP" and img.size == (100, 50)
+
+
+def test_render_draft_decodes_at_reduced_scale():
+    opened = []
+    real_open = Image.open
+
+    def spy_open(fp):
+        img = real_open(fp)
+        opened.append(img)
+        return img
+
+    with patch.object(Image, "open", spy_open):
+        render(_jpeg(), [320], "jpeg")
+    # 1920x1080 for a 320 wide variant: the decoder scales by 1/4, not 1/1.
+    assert opened[0].size == (480, 270)
+
+
+def test_render_applies_exif_rotation():
+    variant = render(_jpeg((1920, 1080), orientation=6), [320], "jpeg")[320]
+    assert Image.open(io.BytesIO(variant)).size == (320, 569)
+
+
+@pytest.mark.asyncio
+async def test_variant_generated_once_then_served_from_disk(storage):
+    cache = ThumbnailCache()
+    image_path = _snapshot(storage)
+    path = await cache.get(image_path, 300, "webp")
+    assert os.path.dirname(path) == thumbnail_dir_for(image_path)
+    assert os.path.basename(path).startswith("320_") and path.endswith(".webp")
+    assert await cache.get(image_path, 320, "webp") == path
+    assert (cache.generated, cache.hits) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_encode(storage):
+    cache = ThumbnailCache()
+    image_path = _snapshot(storage)
+    with patch.object(thumbs_mod, "render", wraps=render) as spy:
+        paths = await asyncio.gather(*[cache.get(image_path, 320, "jpeg") for _ in range(5)])
+    assert len(set(paths)) == 1
+    assert spy.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_replaced_snapshot_gets_new_variant_and_old_is_removed(storage):
+    cache = ThumbnailCache()
+    image_path = _snapshot(storage)
+    old = await cache.get(image_path, 128, "jpeg")
+    os.utime(image_path, ns=(1, 1))
+    new = await cache.get(image_path, 128, "jpeg")
+    assert new != old
+    assert os.listdir(thumbnail_dir_for(image_path)) == [os.path.basename(new)]
+
+
+@pytest.mark.asyncio
+async def test_pregenerate_writes_every_width_from_bytes(storage):
+    cache = ThumbnailCache()
+    image_path = _snapshot(storage)
+    await cache.pregenerate(image_path, _jpeg())
+    names = sorted(os.listdir(thumbnail_dir_for(image_path)))
+    fmt = thumbs_mod.preferred_format()
+    assert [n.split("_")[0] for n in names] == ["128", "320", "640"]
+    assert all(n.endswith("." + fmt) for n in names)
+
+
+@pytest.mark.asyncio
+async def test_request_during_pregenerate_waits_for_it(storage):
+    cache = ThumbnailCache()
+    image_path = _snapshot(storage)
+    fmt = thumbs_mod.preferred_format()
+    with patch.object(thumbs_mod, "render", wraps=render) as spy:
+        pregen = asyncio.create_task(cache.pregenerate(image_path, _jpeg()))
+        await asyncio.sleep(0)
+        path = await cache.get(image_path, 128, fmt)
+        await pregen
+    assert spy.call_count == 1
+    assert os.path.isfile(path) and path.endswith("." + fmt)
+    assert not [n for n in os.listdir(thumbnail_dir_for(image_path)) if n.endswith(".part")]
+
+
+def test_concurrent_writers_never_share_a_temp_file(storage):
+    import threading
+    cache = ThumbnailCache()
+    image_path = _snapshot(storage)
+    variants = render(image_path, [128], "jpeg")
+    errors = []
+
+    def write():
+        try:
+            for _ in range(20):
+                cache._write(image_path, variants, "jpeg")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert len(os.listdir(thumbnail_dir_for(image_path))) == 1
+
+
+@pytest.mark.asyncio
+async def test_evict_removes_variant_directories(storage):
+    cache = ThumbnailCache()
+    image_path = _snapshot(storage)
+    await cache.pregenerate(image_path)
+    assert cache.evict([image_path, "/elsewhere/crop_1.jpg"]) == 1
+    assert not os.path.exists(thumbnail_dir_for(image_path))
+
+
+@pytest.mark.asyncio
+async def test_deleting_events_evicts_their_thumbnails(storage):
+    from tests.test_database import make_db
+    db = make_db(storage)
+    image_path = _snapshot(storage)
+    event = db.add_doorbell_event(image_path=image_path)
+    await ThumbnailCache().pregenerate(image_path)
+    from src.database import remove_event_files
+    _, paths = db.delete_events([event.id])
+    assert os.path.exists(thumbnail_dir_for(image_path))
+    remove_event_files(paths)
+    assert not os.path.exists(thumbnail_dir_for(image_path))
+
+
+# ── Endpoint ──────────────────────────────────────────────────────────────────
+
+from tests.test_api_events import _patch_app_imports  # noqa: E402
+
+_patch_app_imports()
+
+
+@pytest.fixture
+def client(storage):
+    from fastapi.testclient import TestClient
+    import src.app as app_mod
+    mock_ha_integration = MagicMock()
+    mock_ha_integration.initialize = AsyncMock()
+    with patch.object(app_mod, 'ha_integration', mock_ha_integration), \
+         patch.object(app_mod, 'ensure_directories', MagicMock()):
+        with TestClient(app_mod.app, raise_server_exceptions=True) as c:
+            yield c
+
+
+def test_thumb_endpoint_negotiates_format(client, storage):
+    _snapshot(storage)
+    webp = client.get("/api/images/doorbell_1.jpg/thumb?w=128", headers={"Accept": "image/webp,*/*"})
+    assert webp.status_code == 200
+    assert webp.headers["content-type"] == "image/webp"
+    assert webp.headers["vary"] == "Accept"
+    assert Image.open(io.BytesIO(webp.content)).size == (128, 72)
+    jpeg = client.get("/api/images/doorbell_1.jpg/thumb?w=128", headers={"Accept": "image/*"})
+    assert jpeg.headers["content-type"] == "image/jpeg"
+
+
+def test_thumb_endpoint_missing_image_gets_placeholder(client, storage):
+    resp = client.get("/api/images/doorbell_missing.jpg/thumb")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "image/jpeg"
@@ -0,0 +1,119 @@
+"""Tests for the ring weather cache (src/weather_cache.py)."""
+import asyncio
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import src.weather_cache as weather_mod
+from src.weather_cache import WeatherCache
+
+_SUNNY = {"condition": "sunny", "temperature": 21.0, "humidity": 40.0}
+
+
+@pytest.fixture
+def env():
+    """Weather entity configured, WebSocket down, HA API mocked."""
+    api = MagicMock()
+    api.get_weather_data = AsyncMock(return_value=_SUNNY)
+    ws = MagicMock()
+    ws.get_state.return_value = None
+    with patch.object(weather_mod.settings, "weather_entity", "weather.home"), \
+         patch.object(weather_mod.settings, "weather_max_age_secs", 600), \
+         patch.object(weather_mod, "HomeAssistantAPI", return_value=api), \
+         patch.object(weather_mod, "ha_websocket", ws):
+        yield api, ws
+
+
+@pytest.mark.asyncio
+async def test_fresh_cache_needs_no_request(env):
+    api, _ = env
+    cache = WeatherCache()
+    await cache.refresh()
+    reading, age = await cache.current()
+    assert reading == _SUNNY and 0 <= age < 1
+    api.get_weather_data.assert_awaited_once()
+    assert cache.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_cache_fetches_live(env):
+    api, _ = env
+    cache = WeatherCache()
+    await cache.refresh()
+    cache._at -= 601
+    api.get_weather_data.return_value = {**_SUNNY, "condition": "rainy"}
+    reading, age = await cache.current()
+    assert reading["condition"] == "rainy" and age == 0.0
+    assert api.get_weather_data.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_websocket_state_is_current_without_request(env):
+    api, ws = env
+    ws.get_state.return_value = {"state": "cloudy", "attributes": {"temperature": 15}}
+    reading, age = await WeatherCache().current()
+    assert reading == {"condition": "cloudy", "temperature": 15.0, "humidity": None}
+    assert age < 1
+    api.get_weather_data.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_slow_live_fetch_does_not_hold_the_ring(env):
+    api, _ = env
+
+    async def slow(entity_id):
+        await asyncio.sleep(0.2)
+        return _SUNNY
+
+    api.get_weather_data.side_effect = slow
+    cache = WeatherCache()
+    with patch.object(weather_mod, "_RING_FETCH_TIMEOUT_SECS", 0.05):
+        assert await cache.current() == (None, None)
+    await asyncio.sleep(0.25)  # the fetch carried on and warmed the cache
+    reading, _ = await cache.current()
+    assert reading == _SUNNY
+    api.get_weather_data.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refreshes_share_one_request(env):
+    api, _ = env
+    cache = WeatherCache()
+    results = await asyncio.gather(cache.refresh(), cache.refresh(), cache.refresh())
+    assert results == [_SUNNY] * 3
+    api.get_weather_data.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_no_entity_means_no_weather(env):
+    api, _ = env
+    with patch.object(weather_mod.settings, "weather_entity", None):
+        assert await WeatherCache().current() == (None, None)
+    api.get_weather_data.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_changed_entity_is_not_served_from_cache(env):
+    api, _ = env
+    cache = WeatherCache()
+    await cache.refresh()
+    with patch.object(weather_mod.settings, "weather_entity", "weather.cabin"):
+        await cache.current()
+    api.get_weather_data.assert_awaited_with("weather.cabin")
+
+
+@pytest.mark.asyncio
+async def test_poller_keeps_cache_warm(env):
+    api, _ = env
+    cache = WeatherCache()
+    with patch.object(weather_mod, "_MIN_POLL_SECS", 0.02), \
+         patch.object(weather_mod.settings, "weather_max_age_secs", 0):
+        cache.start()
+        await asyncio.sleep(0.1)
+        await cache.stop()
+    assert api.get_weather_data.await_count >= 2
+    assert cache.get_status()["reading"] == _SUNNY
@@ -59,8 +59,8 @@ function initializeTooltips() {
 }
 
 function setupAutoRefresh() {
-    // Auto-refresh dashboard every 30 seconds
-    setInterval(function() {
+    // Refresh dashboard every 30 seconds, only while the live stream is down
+    WhoRangLive.poll(function() {
         if (document.visibilityState === 'visible') {
             refreshDashboardData();
         }
@@ -0,0 +1,70 @@
+/**
+ * live.js — One server-sent event stream (api/events/stream) per tab.
+ *
+ * Pages register handlers with WhoRangLive.on(type, fn) for the message
+ * types ring, event, event_updated, events_deleted, inbox, stats, hello and
+ * resync. WhoRangLive.poll(fn, ms) runs fn on a timer only while the stream
+ * is down, so pages fall back to polling when EventSource is unavailable or
+ * the connection keeps failing.
+ */
+
+var WhoRangLive = (function () {
+    var handlers = {};
+    var pollers = [];
+    var source = null;
+    var connected = false;
+
+    function emit(type, data) {
+        (handlers[type] || []).forEach(function (fn) {
+            try { fn(data); } catch (e) { console.error('Live handler failed', type, e); }
+        });
+    }
+
+    function setConnected(value) {
+        if (connected === value) return;
+        connected = value;
+        pollers.forEach(function (p) {
+            if (connected && p.timer) {
+                clearInterval(p.timer);
+                p.timer = null;
+            } else if (!connected && !p.timer) {
+                p.timer = setInterval(p.fn, p.ms);
+            }
+        });
+    }
+
+    function listen(type) {
+        source.addEventListener(type, function (e) { emit(type, JSON.parse(e.data)); });
+    }
+
+    function on(type, fn) {
+        if (!handlers[type]) {
+            handlers[type] = [];
+            if (source) listen(type);
+        }
+        handlers[type].push(fn);
+    }
+
+    function poll(fn, ms) {
+        var p = { fn: fn, ms: ms, timer: null };
+        pollers.push(p);
+        if (!connected) p.timer = setInterval(fn, ms);
+    }
+
+    function connect() {
+        if (!window.EventSource) return;
+        source = new EventSource('api/events/stream');
+        // The browser reconnects by itself; until it does, pages poll.
+        source.onerror = function () { setConnected(false); };
+        source.addEventListener('hello', function () { setConnected(true); });
+        Object.keys(handlers).forEach(listen);
+    }
+
+    document.addEventListener('DOMContentLoaded', connect);
+
+    return {
+        on: on,
+        poll: poll,
+        isConnected: function () { return connected; },
+    };
+})();
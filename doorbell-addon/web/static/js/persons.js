@@ -1,9 +1,9 @@
 /**
- * persons.js — Loaded globally for nav badge polling.
+ * persons.js — Loaded globally for the nav inbox badge (live, polling as fallback).
  * Also contains all Persons page tab/action logic (runs only when #persons-tabs exists).
  */
 
-// ── Nav badge polling ────────────────────────────────────────────────────────
+// ── Nav badge ────────────────────────────────────────────────────────────────
 
 (function () {
     var badgeEl = null;
@@ -13,20 +13,22 @@
         if (frEnabled === false) return;
         fetch('api/face-crops?count_only=true')
             .then(function (r) { return r.json(); })
-            .then(function (data) {
-                badgeEl = badgeEl || document.getElementById('unrecognised-count');
-                if (!badgeEl) return;
-                var n = data.count || 0;
-                if (n > 0) {
-                    badgeEl.textContent = n;
-                    badgeEl.style.display = 'inline-block';
-                } else {
-                    badgeEl.style.display = 'none';
-                }
-            })
+            .then(function (data) { showCount(data.count); })
             .catch(function () {});
     }
 
+    function showCount(count) {
+        badgeEl = badgeEl || document.getElementById('unrecognised-count');
+        if (!badgeEl) return;
+        var n = count || 0;
+        if (n > 0) {
+            badgeEl.textContent = n;
+            badgeEl.style.display = 'inline-block';
+        } else {
+            badgeEl.style.display = 'none';
+        }
+    }
+
     function checkStatusThenPoll() {
         fetch('api/face-recognition/status')
             .then(function (r) { return r.json(); })
@@ -34,12 +36,16 @@
                 frEnabled = !!data.enabled;
                 if (frEnabled) {
                     updateBadge();
-                    setInterval(updateBadge, 30000);
+                    WhoRangLive.poll(updateBadge, 30000);
                 }
             })
             .catch(function () {});
     }
 
+    // The stream's hello and inbox messages carry the count; no request needed.
+    WhoRangLive.on('hello', function (data) { if (frEnabled) showCount(data.inbox); });
+    WhoRangLive.on('inbox', function (data) { if (frEnabled !== false) showCount(data.count); });
+
     document.addEventListener('DOMContentLoaded', checkStatusThenPoll);
 })();
 
@@ -306,6 +312,12 @@ document.addEventListener('DOMContentLoaded', function () {
             .catch(function () {});
     }
 
+    // Crops from a new ring show up live; a crop being labelled is left alone.
+    WhoRangLive.on('inbox', function () {
+        var pane = document.querySelector('[data-pane="unrecognised"]');
+        if (pane && pane.style.display !== 'none' && !selectedCropId) loadCrops();
+    });
+
     function renderCrops(crops) {
         var grid = document.getElementById('crops-grid');
         var panel = document.getElementById('crop-action-panel');
@@ -5,6 +5,7 @@ const API = {
     cameras: 'api/cameras',
     weatherEntities: 'api/weather-entities',
     cameraTest: 'api/camera/test',
+    cameraGrabber: 'api/camera/grabber',
     notifyServices: 'api/settings/notify-services',
     binarySensors: 'api/settings/binary-sensors',
     llmvisionProviders: 'api/settings/llmvision-providers',
@@ -40,6 +41,7 @@ function initializeSettings() {
             'Error loading weather entities'
         );
         updateCameraStatus();
+        updateGrabberStatus();
         window._currentNotifyServices = (data && data.ha_notify_services) || [];
         loadNotifyServices();
         loadLlmvisionProviders();
@@ -276,6 +278,11 @@ async function saveSettings() {
     if (urlOption && urlOption.checked) {
         settingsData.camera_url = document.getElementById('camera-url').value;
         settingsData.camera_entity = null;
+        settingsData.camera_rtsp_persistent = document.getElementById('camera-rtsp-persistent').checked;
+        settingsData.clip_enabled = document.getElementById('clip-enabled').checked;
+        settingsData.clip_pre_roll_secs = parseInt(document.getElementById('clip-pre-roll').value, 10);
+        settingsData.clip_post_roll_secs = parseInt(document.getElementById('clip-post-roll').value, 10);
+        settingsData.clip_buffer_mb = parseInt(document.getElementById('clip-buffer-mb').value, 10);
     } else if (entityOption && entityOption.checked) {
         settingsData.camera_entity = document.getElementById('camera-entity').value;
         settingsData.camera_url = null;
@@ -301,6 +308,7 @@ async function saveSettings() {
                 if (response.ok) {
                     showNotification('Settings saved successfully!', 'success');
                     updateCameraStatus();
+                    updateGrabberStatus();
                 } else {
                     const error = await response.json();
                     showNotification('Error saving settings: ' + getErrorMessage(error), 'error');
@@ -364,6 +372,24 @@ function showNotification(message, type) {
     }, 5000);
 }
 
+async function updateGrabberStatus() {
+    const info = document.getElementById('camera-grabber-info');
+    if (!info) return;
+    try {
+        const response = await fetch(API.cameraGrabber);
+        const g = response.ok ? await response.json() : {};
+        if (!g.running) {
+            info.textContent = '';
+        } else if (g.connected) {
+            info.textContent = `Streaming: ${g.decode_fps} fps, newest frame ${g.frame_age_ms} ms old.`;
+        } else {
+            info.textContent = `Reconnecting (${g.restarts} restarts)${g.last_error ? ': ' + g.last_error : ''}.`;
+        }
+    } catch (error) {
+        info.textContent = '';
+    }
+}
+
 async function updateCameraStatus() {
     const statusElement = document.getElementById('camera-connection-status');
     if (!statusElement) return;
@@ -410,7 +436,10 @@ async function saveWeatherSettings() {
                 const response = await fetch(API.settings, {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ weather_entity: weatherEntity.value || null })
+                    body: JSON.stringify({
+                        weather_entity: weatherEntity.value || null,
+                        weather_max_age_secs: parseInt(document.getElementById('weather-max-age').value, 10)
+                    })
                 });
 
                 if (response.ok) {